@@ -4,12 +4,19 @@ Accuracy tracking API endpoints
 from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from database import get_db
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
+from services.forecasting.accuracy_rollup import (
+    SNAPSHOT_METRIC_MAP,
+    get_windowed_accuracy,
+    inverse_mape_weights,
+    trailing_window,
+)
 
 router = APIRouter()
 
@@ -93,9 +100,40 @@ async def get_accuracy_summary(
     ]
 
 
+@router.post("/recalculate")
+async def recalculate_accuracy(
+    from_date: date = Query(..., description="First date to recalculate"),
+    to_date: Optional[date] = Query(None, description="Last date to recalculate (default: yesterday)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Rebuild actual_vs_forecast (and the accuracy rollup) for a date window.
+
+    Use after a model change to recompute accuracy history in one pass
+    instead of one job run per day.
+    """
+    if to_date and to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must be on or after from_date")
+
+    queue_id = await enqueue_job_async(
+        db, "accuracy_calc", {"from_date": from_date, "to_date": to_date},
+        triggered_by=f"user:{current_user['username']}"
+    )
+
+    return {
+        "status": "started",
+        "queue_id": queue_id,
+        "from_date": from_date,
+        "to_date": to_date or (date.today() - timedelta(days=1)),
+        "message": "Accuracy recalculation started in background"
+    }
+
+
 @router.get("/model-weights")
 async def get_model_weights(
     metric_code: Optional[str] = Query(None, description="Metric code (if None, returns all metrics)"),
+    window_days: Optional[int] = Query(None, ge=1, description="Trailing window in days (default: all backtest history)"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -103,56 +141,38 @@ async def get_model_weights(
     Get MAPE-based model weights used for blending.
     Shows the actual MAPE scores from backtest data and calculated weights.
     This is what the blended_tuned_weighted service uses for weighting.
-    """
-    # Map metric codes to forecast_snapshots metric codes
-    metric_map = {
-        'hotel_occupancy_pct': 'occupancy',
-        'hotel_room_nights': 'rooms',
-        'hotel_guests': 'guests',
-        'hotel_arr': 'arr',
-        'ave_guest_rate': 'ave_guest_rate',
-        'net_accom': 'net_accom',
-        'net_dry': 'net_dry',
-        'net_wet': 'net_wet',
-        'total_rev': 'total_rev',
-    }
 
+    Scores are read from the accuracy_rollup table, so any trailing window
+    costs the same as all history.
+    """
     # Pace metrics use pickup model
     pace_metrics = ['hotel_occupancy_pct', 'hotel_room_nights']
 
     # If specific metric requested, process just that one
-    metrics_to_process = [metric_code] if metric_code else list(metric_map.keys())
+    metrics_to_process = [metric_code] if metric_code else list(SNAPSHOT_METRIC_MAP.keys())
+    from_date, to_date = trailing_window(window_days)
 
     results = []
     for metric in metrics_to_process:
-        snapshot_metric = metric_map.get(metric, metric)
+        snapshot_metric = SNAPSHOT_METRIC_MAP.get(metric, metric)
         is_pace_metric = metric in pace_metrics
 
-        # Query MAPE from forecast_snapshots
         models_to_query = ['prophet', 'xgboost', 'catboost']
         if is_pace_metric:
             models_to_query.append('pickup')
 
+        stats = await get_windowed_accuracy(
+            db, 'backtest', snapshot_metric, models_to_query,
+            from_date=from_date, to_date=to_date
+        )
+
         mape_scores = {}
         sample_counts = {}
         for model in models_to_query:
-            query = text("""
-                SELECT
-                    AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape,
-                    COUNT(*) as sample_count
-                FROM forecast_snapshots
-                WHERE actual_value IS NOT NULL
-                    AND actual_value != 0
-                    AND forecast_value IS NOT NULL
-                    AND metric_code = :metric_code
-                    AND model = :model
-            """)
-            result = await db.execute(query, {"metric_code": snapshot_metric, "model": model})
-            row = result.fetchone()
-
-            if row and row.mape is not None:
-                mape_scores[model] = float(row.mape)
-                sample_counts[model] = int(row.sample_count)
+            model_stats = stats.get(model)
+            if model_stats and model_stats["mape"] is not None:
+                mape_scores[model] = model_stats["mape"]
+                sample_counts[model] = model_stats["n"]
             else:
                 mape_scores[model] = None
                 sample_counts[model] = 0
@@ -162,9 +182,7 @@ async def get_model_weights(
 
         if valid_mapes:
             # Calculate weights: lower MAPE = higher weight
-            weights = {model: 1.0 / max(mape, 0.1) for model, mape in valid_mapes.items()}
-            weight_sum = sum(weights.values())
-            normalized_weights = {k: v / weight_sum for k, v in weights.items()}
+            normalized_weights = inverse_mape_weights(valid_mapes)
         else:
             # Fall back to equal weights
             normalized_weights = {model: 1.0 / len(models_to_query) for model in models_to_query}
@@ -191,7 +209,7 @@ async def get_model_weights(
 
 @router.get("/by-model")
 async def get_accuracy_by_model(
-    model: str = Query(..., description="Model: prophet, xgboost, catboost, pickup"),
+    model: str = Query(..., description="Model: prophet, xgboost, catboost, pickup, blended"),
     from_date: date = Query(...),
     to_date: date = Query(...),
     metric_type: Optional[str] = Query(None),
@@ -205,7 +223,8 @@ async def get_accuracy_by_model(
         "prophet": ("prophet_forecast", "prophet_error", "prophet_pct_error"),
         "xgboost": ("xgboost_forecast", "xgboost_error", "xgboost_pct_error"),
         "catboost": ("catboost_forecast", "catboost_error", "catboost_pct_error"),
-        "pickup": ("pickup_forecast", "pickup_error", "pickup_pct_error")
+        "pickup": ("pickup_forecast", "pickup_error", "pickup_pct_error"),
+        "blended": ("blended_forecast", "blended_error", "blended_pct_error")
     }
 
     if model not in column_map:
@@ -7,13 +7,29 @@ on historical data using only information available at the time.
 from datetime import date, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from database import get_db
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
 from utils.time_alignment import get_prior_year_daily
+from services.forecasting.accuracy_rollup import (
+    HORIZON_BUCKETS,
+    get_rollup_models,
+    get_windowed_accuracy,
+    refresh_accuracy_rollup_async,
+    trailing_window,
+)
+from services.forecasting.backtest_cube import (
+    DAY_NAMES,
+    LEAD_BRACKET_ORDER,
+    MONTH_NAMES,
+    query_backtest_cube,
+    refresh_backtest_cube_async,
+)
+from services.forecast_partitions import delete_model_snapshots as delete_partitioned_snapshots
 
 router = APIRouter()
 
@@ -650,7 +666,6 @@ async def get_historical_forecast_status(
 
 @router.post("/batch")
 async def run_batch_backtest_endpoint(
-    background_tasks: BackgroundTasks,
     start_perception: date = Query(..., description="First Monday to use as perception date"),
     end_perception: date = Query(..., description="Last Monday to use as perception date"),
     forecast_days: int = Query(365, description="Days ahead to forecast from each perception date"),
@@ -685,8 +700,6 @@ async def run_batch_backtest_endpoint(
 
     Results can be analyzed via /backtest/accuracy-by-bracket endpoint.
     """
-    from jobs.batch_backtest import run_batch_backtest
-
     valid_models = ['xgboost', 'prophet', 'pickup', 'pickup_avg', 'catboost', 'blended']
     valid_metrics = ['occupancy', 'rooms', 'guests', 'ave_guest_rate', 'arr', 'net_accom', 'net_dry', 'net_wet']
     # Pickup models require pace data - only work with occupancy and rooms
@@ -717,19 +730,23 @@ async def run_batch_backtest_endpoint(
     # Training cutoff for post-COVID: May 1, 2021
     training_start = date(2021, 5, 1) if exclude_covid else None
 
-    # Run in background
-    background_tasks.add_task(
-        run_batch_backtest,
-        start_perception,
-        end_perception,
-        forecast_days,
-        metric,
-        [model],  # Single model at a time
-        training_start  # Training cutoff date
+    # Run on a worker
+    queue_id = await enqueue_job_async(
+        db, "batch_backtest",
+        {
+            "start_perception": start_perception,
+            "end_perception": end_perception,
+            "forecast_days": forecast_days,
+            "metric": metric,
+            "models": [model],  # Single model at a time
+            "training_start": training_start  # Training cutoff date
+        },
+        triggered_by=f"user:{current_user['username']}"
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "message": f"Batch backtest for {model}{' (post-COVID)' if exclude_covid else ''} running in background",
         "params": {
             "start_perception": str(start_perception),
@@ -850,65 +867,15 @@ async def get_accuracy_by_bracket(
     - 90+ days out
 
     Use this to derive weights for ensemble forecasting.
+    Answered from the pre-aggregated backtest_cube table.
     """
-    model_filter = "AND model = :model" if model else ""
-    params = {"metric_code": metric_code}
-    if model:
-        params["model"] = model
-
-    query = f"""
-    SELECT
-        model,
-        CASE
-            WHEN days_out BETWEEN 0 AND 7 THEN '0-7'
-            WHEN days_out BETWEEN 8 AND 14 THEN '8-14'
-            WHEN days_out BETWEEN 15 AND 30 THEN '15-30'
-            WHEN days_out BETWEEN 31 AND 60 THEN '31-60'
-            WHEN days_out BETWEEN 61 AND 90 THEN '61-90'
-            ELSE '90+'
-        END as lead_bracket,
-        CASE
-            WHEN days_out BETWEEN 0 AND 7 THEN 1
-            WHEN days_out BETWEEN 8 AND 14 THEN 2
-            WHEN days_out BETWEEN 15 AND 30 THEN 3
-            WHEN days_out BETWEEN 31 AND 60 THEN 4
-            WHEN days_out BETWEEN 61 AND 90 THEN 5
-            ELSE 6
-        END as sort_order,
-        COUNT(*) as n,
-        AVG(ABS(forecast_value - actual_value)) as mae,
-        AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape
-    FROM forecast_snapshots
-    WHERE actual_value IS NOT NULL
-    AND metric_code = :metric_code
-    {model_filter}
-    GROUP BY model,
-        CASE
-            WHEN days_out BETWEEN 0 AND 7 THEN '0-7'
-            WHEN days_out BETWEEN 8 AND 14 THEN '8-14'
-            WHEN days_out BETWEEN 15 AND 30 THEN '15-30'
-            WHEN days_out BETWEEN 31 AND 60 THEN '31-60'
-            WHEN days_out BETWEEN 61 AND 90 THEN '61-90'
-            ELSE '90+'
-        END,
-        CASE
-            WHEN days_out BETWEEN 0 AND 7 THEN 1
-            WHEN days_out BETWEEN 8 AND 14 THEN 2
-            WHEN days_out BETWEEN 15 AND 30 THEN 3
-            WHEN days_out BETWEEN 31 AND 60 THEN 4
-            WHEN days_out BETWEEN 61 AND 90 THEN 5
-            ELSE 6
-        END
-    ORDER BY model, sort_order
-    """
-
-    result = await db.execute(text(query), params)
-    rows = result.fetchall()
+    rows = await query_backtest_cube(db, metric_code, 'lead_bracket', model)
+    rows = sorted(rows, key=lambda r: (r.model, LEAD_BRACKET_ORDER.get(r.dim, 99)))
 
     return [
         {
             "model": row.model,
-            "lead_bracket": row.lead_bracket,
+            "lead_bracket": row.dim,
             "n": row.n,
             "mae": round(float(row.mae), 2) if row.mae else None,
             "mape": round(float(row.mape), 2) if row.mape else None
@@ -937,54 +904,16 @@ async def get_accuracy_by_day_of_week(
     - Saturday (6)
 
     Useful for identifying if models perform better on certain days.
+    Answered from the pre-aggregated backtest_cube table.
     """
-    model_filter = "AND model = :model" if model else ""
-    params = {"metric_code": metric_code}
-    if model:
-        params["model"] = model
-
-    query = f"""
-    SELECT
-        model,
-        EXTRACT(DOW FROM target_date)::int as dow_num,
-        CASE EXTRACT(DOW FROM target_date)::int
-            WHEN 0 THEN 'Sunday'
-            WHEN 1 THEN 'Monday'
-            WHEN 2 THEN 'Tuesday'
-            WHEN 3 THEN 'Wednesday'
-            WHEN 4 THEN 'Thursday'
-            WHEN 5 THEN 'Friday'
-            WHEN 6 THEN 'Saturday'
-        END as day_name,
-        COUNT(*) as n,
-        AVG(ABS(forecast_value - actual_value)) as mae,
-        AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape
-    FROM forecast_snapshots
-    WHERE actual_value IS NOT NULL
-    AND metric_code = :metric_code
-    {model_filter}
-    GROUP BY model,
-        EXTRACT(DOW FROM target_date)::int,
-        CASE EXTRACT(DOW FROM target_date)::int
-            WHEN 0 THEN 'Sunday'
-            WHEN 1 THEN 'Monday'
-            WHEN 2 THEN 'Tuesday'
-            WHEN 3 THEN 'Wednesday'
-            WHEN 4 THEN 'Thursday'
-            WHEN 5 THEN 'Friday'
-            WHEN 6 THEN 'Saturday'
-        END
-    ORDER BY model, dow_num
-    """
-
-    result = await db.execute(text(query), params)
-    rows = result.fetchall()
+    rows = await query_backtest_cube(db, metric_code, 'dow', model)
+    rows = sorted(rows, key=lambda r: (r.model, r.dim))
 
     return [
         {
             "model": row.model,
-            "dow_num": row.dow_num,
-            "day_name": row.day_name,
+            "dow_num": row.dim,
+            "day_name": DAY_NAMES[row.dim],
             "n": row.n,
             "mae": round(float(row.mae), 2) if row.mae else None,
             "mape": round(float(row.mape), 2) if row.mape else None
@@ -1006,64 +935,16 @@ async def get_accuracy_by_month(
     Returns accuracy metrics grouped by month (January through December).
 
     Useful for identifying seasonal patterns in model accuracy.
+    Answered from the pre-aggregated backtest_cube table.
     """
-    model_filter = "AND model = :model" if model else ""
-    params = {"metric_code": metric_code}
-    if model:
-        params["model"] = model
-
-    query = f"""
-    SELECT
-        model,
-        EXTRACT(MONTH FROM target_date)::int as month_num,
-        CASE EXTRACT(MONTH FROM target_date)::int
-            WHEN 1 THEN 'January'
-            WHEN 2 THEN 'February'
-            WHEN 3 THEN 'March'
-            WHEN 4 THEN 'April'
-            WHEN 5 THEN 'May'
-            WHEN 6 THEN 'June'
-            WHEN 7 THEN 'July'
-            WHEN 8 THEN 'August'
-            WHEN 9 THEN 'September'
-            WHEN 10 THEN 'October'
-            WHEN 11 THEN 'November'
-            WHEN 12 THEN 'December'
-        END as month_name,
-        COUNT(*) as n,
-        AVG(ABS(forecast_value - actual_value)) as mae,
-        AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape
-    FROM forecast_snapshots
-    WHERE actual_value IS NOT NULL
-    AND metric_code = :metric_code
-    {model_filter}
-    GROUP BY model,
-        EXTRACT(MONTH FROM target_date)::int,
-        CASE EXTRACT(MONTH FROM target_date)::int
-            WHEN 1 THEN 'January'
-            WHEN 2 THEN 'February'
-            WHEN 3 THEN 'March'
-            WHEN 4 THEN 'April'
-            WHEN 5 THEN 'May'
-            WHEN 6 THEN 'June'
-            WHEN 7 THEN 'July'
-            WHEN 8 THEN 'August'
-            WHEN 9 THEN 'September'
-            WHEN 10 THEN 'October'
-            WHEN 11 THEN 'November'
-            WHEN 12 THEN 'December'
-        END
-    ORDER BY model, month_num
-    """
-
-    result = await db.execute(text(query), params)
-    rows = result.fetchall()
+    rows = await query_backtest_cube(db, metric_code, 'month', model)
+    rows = sorted(rows, key=lambda r: (r.model, r.dim))
 
     return [
         {
             "model": row.model,
-            "month_num": row.month_num,
-            "month_name": row.month_name,
+            "month_num": row.dim,
+            "month_name": MONTH_NAMES[row.dim - 1],
             "n": row.n,
             "mae": round(float(row.mae), 2) if row.mae else None,
             "mape": round(float(row.mape), 2) if row.mape else None
@@ -1075,6 +956,7 @@ async def get_accuracy_by_month(
 @router.get("/model-weights")
 async def get_model_weights(
     metric_code: str = Query("occupancy", description="Metric code"),
+    window_days: Optional[int] = Query(None, ge=1, description="Trailing window in days (default: all history)"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -1085,70 +967,35 @@ async def get_model_weights(
     Weights are normalized to sum to 1.0 within each bracket.
 
     Use these weights for ensemble forecasting.
+    MAPE per bracket is read from the accuracy_rollup table.
     """
-    query = """
-    WITH accuracy AS (
-        SELECT
-            model,
-            CASE
-                WHEN days_out BETWEEN 0 AND 7 THEN '0-7'
-                WHEN days_out BETWEEN 8 AND 14 THEN '8-14'
-                WHEN days_out BETWEEN 15 AND 30 THEN '15-30'
-                WHEN days_out BETWEEN 31 AND 60 THEN '31-60'
-                WHEN days_out BETWEEN 61 AND 90 THEN '61-90'
-                ELSE '90+'
-            END as lead_bracket,
-            AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape
-        FROM forecast_snapshots
-        WHERE actual_value IS NOT NULL
-        AND metric_code = :metric_code
-        GROUP BY model,
-            CASE
-                WHEN days_out BETWEEN 0 AND 7 THEN '0-7'
-                WHEN days_out BETWEEN 8 AND 14 THEN '8-14'
-                WHEN days_out BETWEEN 15 AND 30 THEN '15-30'
-                WHEN days_out BETWEEN 31 AND 60 THEN '31-60'
-                WHEN days_out BETWEEN 61 AND 90 THEN '61-90'
-                ELSE '90+'
-            END
-    ),
-    inverse_mape AS (
-        SELECT
-            model,
-            lead_bracket,
-            mape,
-            CASE WHEN mape > 0 THEN 1.0 / mape ELSE 0 END as inv_mape
-        FROM accuracy
-    ),
-    bracket_totals AS (
-        SELECT lead_bracket, SUM(inv_mape) as total_inv
-        FROM inverse_mape
-        GROUP BY lead_bracket
-    )
-    SELECT
-        i.model,
-        i.lead_bracket,
-        i.mape,
-        CASE WHEN b.total_inv > 0 THEN i.inv_mape / b.total_inv ELSE 0 END as weight
-    FROM inverse_mape i
-    JOIN bracket_totals b ON i.lead_bracket = b.lead_bracket
-    ORDER BY
-        i.lead_bracket,
-        weight DESC
-    """
-
-    result = await db.execute(text(query), {"metric_code": metric_code})
-    rows = result.fetchall()
+    models = await get_rollup_models(db, 'backtest', metric_code)
+    from_date, to_date = trailing_window(window_days)
 
-    return [
-        {
-            "model": row.model,
-            "lead_bracket": row.lead_bracket,
-            "mape": round(float(row.mape), 2) if row.mape else None,
-            "weight": round(float(row.weight), 4) if row.weight else 0
+    results = []
+    for lead_bracket in sorted(HORIZON_BUCKETS):
+        stats = await get_windowed_accuracy(
+            db, 'backtest', metric_code, models,
+            from_date=from_date, to_date=to_date, horizon_bucket=lead_bracket
+        )
+        inv_mapes = {
+            model: (1.0 / s["mape"] if s["mape"] else 0)
+            for model, s in stats.items()
         }
-        for row in rows
-    ]
+        total_inv = sum(inv_mapes.values())
+
+        bracket_rows = [
+            {
+                "model": model,
+                "lead_bracket": lead_bracket,
+                "mape": round(s["mape"], 2) if s["mape"] else None,
+                "weight": round(inv_mapes[model] / total_inv, 4) if total_inv > 0 else 0
+            }
+            for model, s in stats.items()
+        ]
+        results.extend(sorted(bracket_rows, key=lambda r: r["weight"], reverse=True))
+
+    return results
 
 
 @router.post("/backfill-actuals")
@@ -1170,6 +1017,15 @@ async def backfill_snapshot_actuals(
     - arr: accommodation / booking_count (from revenue data)
     - net_accom, net_dry, net_wet: from revenue data
     """
+    # Earliest target date about to receive actuals (rollup refresh starts here)
+    pending_result = await db.execute(text("""
+        SELECT MIN(target_date) as first_pending, MIN(perception_date) as first_perception
+        FROM forecast_snapshots
+        WHERE actual_value IS NULL AND target_date < CURRENT_DATE
+    """))
+    pending = pending_result.fetchone()
+    first_pending = pending.first_pending if pending else None
+
     # First, update stats-based metrics (occupancy, rooms, guests, ave_guest_rate)
     result1 = await db.execute(text("""
         UPDATE forecast_snapshots fs
@@ -1216,9 +1072,14 @@ async def backfill_snapshot_actuals(
 
     await db.commit()
 
+    rows_updated = result1.rowcount + result2.rowcount
+    if rows_updated and first_pending:
+        await refresh_accuracy_rollup_async(db, 'backtest', from_date=first_pending)
+        await refresh_backtest_cube_async(db, from_perception=pending.first_perception)
+
     return {
         "status": "complete",
-        "rows_updated": result1.rowcount + result2.rowcount
+        "rows_updated": rows_updated
     }
 
 
@@ -1237,27 +1098,22 @@ async def delete_model_snapshots(
 
     The model name must match exactly (e.g., 'xgboost', 'prophet', 'pickup_postcovid').
     """
-    query = "DELETE FROM forecast_snapshots WHERE model = :model"
-    params = {"model": model}
+    rows_deleted = await delete_partitioned_snapshots(db, model, metric_code)
 
-    if metric_code:
-        query += " AND metric_code = :metric_code"
-        params["metric_code"] = metric_code
-
-    result = await db.execute(text(query), params)
-    await db.commit()
+    # Drop the model's rows from the accuracy rollup and backtest cube
+    await refresh_accuracy_rollup_async(db, 'backtest', model=model)
+    await refresh_backtest_cube_async(db, model=model)
 
     return {
         "status": "complete",
         "model": model,
         "metric_code": metric_code,
-        "rows_deleted": result.rowcount
+        "rows_deleted": rows_deleted
     }
 
 
 @router.post("/fill-to-today")
 async def fill_backtests_to_today(
-    background_tasks: BackgroundTasks,
     metric: str = Query("occupancy", description="Metric to backtest"),
     models: str = Query("prophet,xgboost,catboost,blended", description="Comma-separated models to run (blended runs last)"),
     forecast_days: int = Query(365, description="Days ahead to forecast from each perception date"),
@@ -1274,8 +1130,6 @@ async def fill_backtests_to_today(
     The 'blended' model averages prophet, xgboost, and catboost - those must run first.
     If included, blended is automatically moved to run last.
     """
-    from jobs.batch_backtest import run_batch_backtest
-
     model_list = [m.strip() for m in models.split(",")]
     valid_models = ['xgboost', 'prophet', 'pickup', 'pickup_avg', 'catboost', 'blended']
 
@@ -1333,19 +1187,23 @@ async def fill_backtests_to_today(
             missing_count += 1
         check_date += timedelta(days=7)
 
-    # Run in background
-    background_tasks.add_task(
-        run_batch_backtest,
-        start_date,
-        last_monday,
-        forecast_days,
-        metric,
-        model_list,
-        training_start
+    # Run on a worker
+    queue_id = await enqueue_job_async(
+        db, "batch_backtest",
+        {
+            "start_perception": start_date,
+            "end_perception": last_monday,
+            "forecast_days": forecast_days,
+            "metric": metric,
+            "models": model_list,
+            "training_start": training_start
+        },
+        triggered_by=f"user:{current_user['username']}"
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "message": f"Filling backtests from {start_date} to {last_monday}",
         "params": {
             "start_perception": str(start_date),
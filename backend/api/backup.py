@@ -2,14 +2,15 @@
 Backup and Restore API Endpoints
 """
 import logging
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 
 from database import get_db
 from auth import get_current_user
-from services.backup_service import BackupService
+from services.backup_service import BackupService, MAX_UPLOAD_BYTES
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +61,9 @@ async def update_backup_settings(
         frequency?: 'manual' | 'daily' | 'weekly' | 'monthly',
         retention_count?: number,
         destination?: 'local',
-        time?: 'HH:MM'
+        time?: 'HH:MM',
+        json_compression?: 'deflate' | 'zstd',
+        parallel_jobs?: number
     }
     """
     try:
@@ -79,15 +82,25 @@ async def update_backup_settings(
 
 @router.post("/create")
 async def create_backup(
+    mode: str = 'full',
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Trigger manual backup creation
 
-    Creates a ZIP file containing database dump, JSON export, and all data files.
+    Creates a ZIP file containing a directory-format database dump (parallel
+    pg_dump), NDJSON export (one entry per table), and all data files.
+    Progress is recorded in backup_history while it runs.
     Returns backup ID and status.
+
+    Query params:
+    - mode: 'full' (default) or 'incremental' - only rows and files changed
+      since the latest backup, chained to its full backup
     """
+    if mode not in ('full', 'incremental'):
+        raise HTTPException(status_code=400, detail="mode must be 'full' or 'incremental'")
+
     try:
         service = BackupService(db)
         await service.ensure_backup_table_exists()
@@ -95,7 +108,8 @@ async def create_backup(
         username = current_user.get('username', 'unknown')
         success, message, backup_id = await service.create_backup(
             backup_type='manual',
-            created_by=username
+            created_by=username,
+            mode=mode
         )
 
         if success:
@@ -200,6 +214,7 @@ async def download_backup(
 @router.post("/{backup_id}/restore")
 async def restore_backup(
     backup_id: int,
+    tables: Optional[List[str]] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -208,10 +223,22 @@ async def restore_backup(
 
     WARNING: This will overwrite the current database with the backup data.
     All current data will be replaced.
+
+    Query params:
+    - tables: Only replace the rows of these tables (repeatable, e.g.
+      ?tables=forecasts&tables=forecast_snapshots); schema, files and all
+      other tables are left alone. Directory-format backups only.
+
+    Progress is recorded in backup_history as a 'restore' entry.
     """
     try:
         service = BackupService(db)
-        success, message = await service.restore_from_backup(backup_id)
+        await service.ensure_backup_table_exists()
+        success, message = await service.restore_from_backup(
+            backup_id,
+            tables=tables,
+            created_by=current_user.get('username', 'unknown')
+        )
 
         if success:
             return {"success": True, "message": message}
@@ -227,41 +254,48 @@ async def restore_backup(
 
 @router.post("/upload-restore")
 async def upload_and_restore(
-    file: UploadFile = File(...),
+    request: Request,
+    filename: str = Query(..., description="Name of the uploaded backup ZIP"),
+    sha256: Optional[str] = Query(None, description="Expected SHA-256 of the upload"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Upload and restore from a backup file
 
-    Upload a backup ZIP file and restore database and files from it.
+    The request body is the backup ZIP itself (Content-Type
+    application/zip), not a form. It is streamed to disk in chunks and
+    hashed on the way, so nothing is spooled or held in memory first; pass
+    sha256 to have it verified before anything is restored. Progress is
+    reported on the restore's backup history entry.
 
     WARNING: This will overwrite the current database with the backup data.
     """
     try:
         # Validate file type
-        if not file.filename or not file.filename.endswith('.zip'):
+        if not filename.endswith('.zip'):
             raise HTTPException(
                 status_code=400,
                 detail="Only ZIP files are accepted"
             )
 
-        # Read file content
-        file_content = await file.read()
-
-        # Validate file size (max 5GB)
-        max_size = 5 * 1024 * 1024 * 1024  # 5GB
-        if len(file_content) > max_size:
+        # Validate file size (max 5GB) up front when the size is known;
+        # the service enforces it again while streaming
+        content_length = request.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
             raise HTTPException(
                 status_code=400,
-                detail=f"File too large (max {max_size / 1024 / 1024 / 1024}GB)"
+                detail=f"File too large (max {MAX_UPLOAD_BYTES / 1024 / 1024 / 1024:.0f}GB)"
             )
 
         # Restore from uploaded file
         service = BackupService(db)
+        await service.ensure_backup_table_exists()
         success, message = await service.restore_from_upload(
-            file_content=file_content,
-            filename=file.filename
+            chunks=request.stream(),
+            filename=Path(filename).name,
+            created_by=current_user.get('username', 'unknown'),
+            expected_sha256=sha256
         )
 
         if success:
@@ -286,6 +320,7 @@ async def delete_backup(
     Delete a backup file and record
 
     Removes the backup file from disk and deletes the database record.
+    Incremental backups chained from it are deleted with it.
     """
     try:
         service = BackupService(db)
@@ -4,7 +4,7 @@ Rate availability matrix and competitor rate comparison
 """
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
@@ -13,6 +13,8 @@ import json
 
 from database import get_db, SyncSessionLocal
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
+from utils.settings_cache import get_settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -487,14 +489,13 @@ def _refresh_date_sync(rate_date: date):
 
     db = SyncSessionLocal()
     try:
-        # Get config
-        config_result = db.execute(
-            text("""
-                SELECT config_key, config_value FROM system_config
-                WHERE config_key IN ('newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region', 'accommodation_vat_rate')
-            """)
-        )
-        config = {row.config_key: row.config_value for row in config_result.fetchall()}
+        # Get config (decrypted by the settings cache)
+        settings = get_settings(db)
+        config = {
+            key: settings.get(key)
+            for key in ('newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region', 'accommodation_vat_rate')
+            if settings.get(key) is not None
+        }
 
         if not all(k in config for k in ['newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region']):
             logger.error("Newbook credentials not configured for single-date refresh")
@@ -503,10 +504,7 @@ def _refresh_date_sync(rate_date: date):
         vat_rate = Decimal(config.get('accommodation_vat_rate', '0.20'))
 
         # Get included categories
-        cat_result = db.execute(
-            text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-        )
-        included_categories = set(row.site_id for row in cat_result.fetchall())
+        included_categories = set(settings.included_category_ids)
 
         client = NewbookRatesClient(
             api_key=config['newbook_api_key'],
@@ -582,7 +580,7 @@ def _refresh_date_sync(rate_date: date):
 @router.post("/refresh-date/{rate_date}")
 async def refresh_single_date(
     rate_date: str,
-    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -594,5 +592,8 @@ async def refresh_single_date(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    background_tasks.add_task(_refresh_date_sync, target_date)
-    return {"status": "queued", "date": rate_date, "message": f"Refreshing rates for {rate_date}"}
+    queue_id = await enqueue_job_async(
+        db, "rate_refresh_date", {"rate_date": target_date},
+        triggered_by=f"user:{current_user['username']}"
+    )
+    return {"status": "queued", "queue_id": queue_id, "date": rate_date, "message": f"Refreshing rates for {rate_date}"}
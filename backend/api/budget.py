@@ -16,6 +16,7 @@ from pydantic import BaseModel
 
 from database import get_db
 from auth import get_current_user
+from utils.response_cache import bump_data_version_async
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +117,7 @@ async def create_or_update_monthly_budget(
         "budget_value": budget.budget_value,
         "notes": budget.notes
     })
+    await bump_data_version_async(db)
     await db.commit()
 
     row = result.fetchone()
@@ -489,6 +491,8 @@ async def upload_budget_spreadsheet(
             except Exception as e:
                 errors.append(f"Failed to save {budget_type} for {month:02d}/{year}: {str(e)}")
 
+    if records_created or records_updated:
+        await bump_data_version_async(db)
     await db.commit()
 
     logger.info(f"Budget upload complete: {records_created} created, {records_updated} updated")
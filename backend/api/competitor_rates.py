@@ -4,7 +4,7 @@ Booking.com rate scraping, hotel management, and competitor comparison
 """
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
@@ -12,6 +12,8 @@ import logging
 
 from database import get_db, SyncSessionLocal
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
+from services.single_flight import single_flight
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -201,6 +203,7 @@ async def unpause_scraper(
 # MANUAL SCRAPE TRIGGER
 # ============================================
 
+@single_flight("booking_scrape")
 def run_scrape_sync(from_date: date, to_date: date):
     """Run scrape in sync context for background task."""
     import asyncio
@@ -227,7 +230,7 @@ def run_scrape_sync(from_date: date, to_date: date):
 @router.post("/scrape")
 async def trigger_manual_scrape(
     request: ScrapeRequest,
-    background_tasks: BackgroundTasks,
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -263,11 +266,16 @@ async def trigger_manual_scrape(
     if paused_row and paused_row.config_value == 'true':
         raise HTTPException(status_code=400, detail="Scraper is currently paused. Use /unpause first or wait for cooldown.")
 
-    # Start background task
-    background_tasks.add_task(run_scrape_sync, from_date, to_date)
+    # Run on a worker
+    queue_id = await enqueue_job_async(
+        db, "competitor_scrape", {"from_date": from_date, "to_date": to_date},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
+    )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "from_date": from_date.isoformat(),
         "to_date": to_date.isoformat(),
         "message": "Scrape started in background. Check /status for progress."
@@ -14,6 +14,8 @@ import logging
 
 from database import get_db
 from auth import get_current_user, get_all_api_keys, create_api_key, revoke_api_key, delete_api_key
+from utils.response_cache import bump_data_version_async, response_cache
+from utils.settings_cache import invalidate_settings, settings_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -125,6 +127,7 @@ async def update_newbook_settings(
         )
 
     await db.commit()
+    invalidate_settings()
     return {"status": "saved", "message": "Newbook settings updated"}
 
 
@@ -189,6 +192,7 @@ async def update_resos_settings(
         )
 
     await db.commit()
+    invalidate_settings()
     return {"status": "saved", "message": "Resos settings updated"}
 
 
@@ -350,6 +354,7 @@ async def fetch_room_categories(
                     updated += 1
 
             await db.commit()
+            invalidate_settings()
 
             return {
                 "status": "success",
@@ -398,7 +403,10 @@ async def bulk_update_room_categories(
         if result.rowcount > 0:
             updated += 1
 
+    if updated:
+        await bump_data_version_async(db)
     await db.commit()
+    invalidate_settings()
     return {"status": "success", "updated": updated}
 
 
@@ -699,15 +707,34 @@ async def set_config(
             "username": current_user.get("username")
         }
     )
+    row = result.fetchone()
+    if row:
+        await bump_data_version_async(db)
     await db.commit()
+    invalidate_settings()
 
-    row = result.fetchone()
     if not row:
         raise HTTPException(status_code=404, detail=f"Config key not found: {config.key}")
 
     return {"status": "saved", "key": config.key}
 
 
+@router.get("/response-cache")
+async def get_response_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Public API response cache size and hit/miss counters (this process)"""
+    return response_cache.stats()
+
+
+@router.get("/settings-cache")
+async def get_settings_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Shared settings cache age, reload and invalidation counters (this process)"""
+    return settings_cache.stats()
+
+
 @router.post("/test/{api}")
 async def test_api_connection(
     api: str,
@@ -1077,6 +1104,7 @@ async def update_forecast_snapshot_settings(
         )
 
     await db.commit()
+    invalidate_settings()
 
     return {"status": "updated", "message": "Forecast snapshot settings saved successfully"}
 
@@ -1,26 +1,103 @@
 """
 Export API endpoints for Excel/CSV downloads
 """
-import io
+import asyncio
+import os
+import tempfile
 from datetime import date, timedelta
+from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-import pandas as pd
+from starlette.background import BackgroundTask
 
 from database import get_db
 from auth import get_current_user
+from services.export_service import (
+    EXPORT_BACKGROUND_DAYS,
+    EXPORTS,
+    XLSX_MEDIA_TYPE,
+    create_export_job,
+    export_filename,
+    stream_csv,
+    write_export_file,
+)
+from services.job_queue import enqueue_job_async
 
 router = APIRouter()
 
 
+def _date_range(from_date: Optional[date], to_date: Optional[date]):
+    if from_date is None:
+        from_date = date.today()
+    if to_date is None:
+        to_date = from_date + timedelta(days=28)
+    return from_date, to_date
+
+
+async def _export_response(
+    db: AsyncSession,
+    export_type: str,
+    params: dict,
+    background: bool,
+    current_user: dict
+):
+    """
+    Stream the export, or queue it as a background job when asked to or
+    when the range is longer than EXPORT_BACKGROUND_DAYS (202 with the
+    export id to poll at /export/jobs/{export_id}).
+    """
+    filename = export_filename(export_type, params)
+
+    if background or (params['to_date'] - params['from_date']).days > EXPORT_BACKGROUND_DAYS:
+        username = current_user['username']
+        export_id = await create_export_job(db, export_type, params, created_by=username)
+        queue_id = await enqueue_job_async(
+            db, "export", {"export_id": export_id}, triggered_by=f"user:{username}"
+        )
+        await db.execute(
+            text("UPDATE export_jobs SET queue_id = :queue_id WHERE id = :id"),
+            {"queue_id": queue_id, "id": export_id}
+        )
+        await db.commit()
+        return JSONResponse(status_code=202, content={
+            "status": "queued",
+            "export_id": export_id,
+            "queue_id": queue_id,
+            "filename": filename,
+            "status_url": f"/export/jobs/{export_id}",
+            "message": f"Export of {filename} queued; download it from the status URL when completed"
+        })
+
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if EXPORTS[export_type]['format'] == 'csv':
+        return StreamingResponse(stream_csv(export_type, params), media_type="text/csv", headers=headers)
+
+    # xlsx is a zip, so it can't be sent before the last row is written;
+    # build it in a temp file off the event loop and send that
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        await asyncio.to_thread(write_export_file, export_type, params, Path(path))
+    except Exception:
+        os.unlink(path)
+        raise
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=filename,
+        background=BackgroundTask(os.unlink, path)
+    )
+
+
 @router.get("/excel")
 async def export_excel(
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
+    background: bool = Query(False, description="Queue as a background export even for short ranges"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -31,107 +108,9 @@ async def export_excel(
     - Budget Comparison
     - Model Accuracy
     """
-    if from_date is None:
-        from_date = date.today()
-    if to_date is None:
-        to_date = from_date + timedelta(days=28)
-
-    # Create Excel writer
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Daily forecasts sheet
-        daily_query = """
-            SELECT
-                f.forecast_date as "Date",
-                f.forecast_type as "Metric",
-                MAX(CASE WHEN f.model_type = 'prophet' THEN f.predicted_value END) as "Prophet",
-                MAX(CASE WHEN f.model_type = 'prophet' THEN f.lower_bound END) as "Prophet Lower",
-                MAX(CASE WHEN f.model_type = 'prophet' THEN f.upper_bound END) as "Prophet Upper",
-                MAX(CASE WHEN f.model_type = 'xgboost' THEN f.predicted_value END) as "XGBoost",
-                MAX(CASE WHEN f.model_type = 'pickup' THEN f.predicted_value END) as "Pickup",
-                db.budget_value as "Budget"
-            FROM forecasts f
-            LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
-            WHERE f.forecast_date BETWEEN :from_date AND :to_date
-            GROUP BY f.forecast_date, f.forecast_type, db.budget_value
-            ORDER BY f.forecast_date, f.forecast_type
-        """
-        result = await db.execute(text(daily_query), {"from_date": from_date, "to_date": to_date})
-        daily_df = pd.DataFrame(result.fetchall())
-        if not daily_df.empty:
-            daily_df.to_excel(writer, sheet_name='Daily Forecast', index=False)
-
-        # Weekly summary sheet
-        weekly_query = """
-            SELECT
-                DATE_TRUNC('week', f.forecast_date) as "Week Start",
-                f.forecast_type as "Metric",
-                AVG(f.predicted_value) as "Avg Forecast",
-                SUM(f.predicted_value) as "Total Forecast",
-                AVG(db.budget_value) as "Avg Budget",
-                SUM(db.budget_value) as "Total Budget"
-            FROM forecasts f
-            LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
-            WHERE f.forecast_date BETWEEN :from_date AND :to_date
-                AND f.model_type = 'prophet'
-            GROUP BY DATE_TRUNC('week', f.forecast_date), f.forecast_type
-            ORDER BY "Week Start", f.forecast_type
-        """
-        result = await db.execute(text(weekly_query), {"from_date": from_date, "to_date": to_date})
-        weekly_df = pd.DataFrame(result.fetchall())
-        if not weekly_df.empty:
-            weekly_df.to_excel(writer, sheet_name='Weekly Summary', index=False)
-
-        # Budget variance sheet
-        variance_query = """
-            SELECT
-                f.forecast_date as "Date",
-                f.forecast_type as "Metric",
-                f.predicted_value as "Forecast",
-                db.budget_value as "Budget",
-                (f.predicted_value - db.budget_value) as "Variance",
-                CASE
-                    WHEN db.budget_value != 0 THEN
-                        ROUND(((f.predicted_value - db.budget_value) / db.budget_value * 100)::numeric, 1)
-                    ELSE NULL
-                END as "Variance %"
-            FROM forecasts f
-            LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
-            WHERE f.forecast_date BETWEEN :from_date AND :to_date
-                AND f.model_type = 'prophet'
-            ORDER BY f.forecast_date, f.forecast_type
-        """
-        result = await db.execute(text(variance_query), {"from_date": from_date, "to_date": to_date})
-        variance_df = pd.DataFrame(result.fetchall())
-        if not variance_df.empty:
-            variance_df.to_excel(writer, sheet_name='Budget Variance', index=False)
-
-        # Accuracy sheet (historical)
-        accuracy_query = """
-            SELECT
-                date as "Date",
-                metric_type as "Metric",
-                actual_value as "Actual",
-                prophet_forecast as "Prophet",
-                xgboost_forecast as "XGBoost",
-                pickup_forecast as "Pickup",
-                best_model as "Best Model"
-            FROM actual_vs_forecast
-            WHERE date BETWEEN :from_date - INTERVAL '30 days' AND :from_date
-            ORDER BY date, metric_type
-        """
-        result = await db.execute(text(accuracy_query), {"from_date": from_date, "to_date": to_date})
-        accuracy_df = pd.DataFrame(result.fetchall())
-        if not accuracy_df.empty:
-            accuracy_df.to_excel(writer, sheet_name='Historical Accuracy', index=False)
-
-    output.seek(0)
-
-    filename = f"forecast_{from_date}_{to_date}.xlsx"
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    from_date, to_date = _date_range(from_date, to_date)
+    return await _export_response(
+        db, 'excel', {"from_date": from_date, "to_date": to_date}, background, current_user
     )
 
 
@@ -140,51 +119,16 @@ async def export_csv(
     metric: str,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
+    background: bool = Query(False, description="Queue as a background export even for short ranges"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Download CSV for a specific metric.
     """
-    if from_date is None:
-        from_date = date.today()
-    if to_date is None:
-        to_date = from_date + timedelta(days=28)
-
-    query = """
-        SELECT
-            f.forecast_date,
-            f.model_type,
-            f.predicted_value,
-            f.lower_bound,
-            f.upper_bound,
-            dm.actual_value,
-            db.budget_value
-        FROM forecasts f
-        LEFT JOIN daily_metrics dm ON f.forecast_date = dm.date AND f.forecast_type = dm.metric_code
-        LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
-        WHERE f.forecast_date BETWEEN :from_date AND :to_date
-            AND f.forecast_type = :metric
-        ORDER BY f.forecast_date, f.model_type
-    """
-
-    result = await db.execute(text(query), {
-        "from_date": from_date,
-        "to_date": to_date,
-        "metric": metric
-    })
-
-    df = pd.DataFrame(result.fetchall())
-
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-
-    filename = f"{metric}_{from_date}_{to_date}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    from_date, to_date = _date_range(from_date, to_date)
+    return await _export_response(
+        db, 'csv', {"from_date": from_date, "to_date": to_date, "metric": metric}, background, current_user
     )
 
 
@@ -192,46 +136,90 @@ async def export_csv(
 async def export_model_comparison(
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
+    background: bool = Query(False, description="Queue as a background export even for short ranges"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Export model comparison data for all metrics.
     """
-    if from_date is None:
-        from_date = date.today()
-    if to_date is None:
-        to_date = from_date + timedelta(days=28)
+    from_date, to_date = _date_range(from_date, to_date)
+    return await _export_response(
+        db, 'model_comparison', {"from_date": from_date, "to_date": to_date}, background, current_user
+    )
 
-    query = """
-        SELECT
-            f.forecast_date,
-            f.forecast_type,
-            fm.metric_name,
-            MAX(CASE WHEN f.model_type = 'prophet' THEN f.predicted_value END) as prophet,
-            MAX(CASE WHEN f.model_type = 'xgboost' THEN f.predicted_value END) as xgboost,
-            MAX(CASE WHEN f.model_type = 'pickup' THEN f.predicted_value END) as pickup,
-            dm.actual_value
-        FROM forecasts f
-        LEFT JOIN forecast_metrics fm ON f.forecast_type = fm.metric_code
-        LEFT JOIN daily_metrics dm ON f.forecast_date = dm.date AND f.forecast_type = dm.metric_code
-        WHERE f.forecast_date BETWEEN :from_date AND :to_date
-        GROUP BY f.forecast_date, f.forecast_type, fm.metric_name, dm.actual_value
-        ORDER BY f.forecast_date, f.forecast_type
+
+@router.get("/jobs")
+async def list_export_jobs(
+    limit: int = Query(20, description="Number of exports to return"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List recent background exports, newest first.
     """
+    result = await db.execute(
+        text("""
+            SELECT id, export_type, filename, status, rows_written, file_size_bytes,
+                   progress_message, error_message, created_by, created_at, completed_at
+            FROM export_jobs
+            ORDER BY id DESC
+            LIMIT :limit
+        """),
+        {"limit": limit}
+    )
+    return [dict(row._mapping) for row in result.fetchall()]
 
-    result = await db.execute(text(query), {"from_date": from_date, "to_date": to_date})
-    df = pd.DataFrame(result.fetchall())
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Model Comparison', index=False)
+@router.get("/jobs/{export_id}")
+async def get_export_job(
+    export_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Status of a background export: queued, running (rows_written and the
+    current sheet in progress_message), completed (download_url) or failed.
+    """
+    result = await db.execute(
+        text("""
+            SELECT id, export_type, params, filename, status, queue_id, rows_written,
+                   file_size_bytes, progress_message, error_message, created_by,
+                   created_at, started_at, completed_at
+            FROM export_jobs
+            WHERE id = :id
+        """),
+        {"id": export_id}
+    )
+    row = result.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Export not found")
 
-    output.seek(0)
+    job = dict(row._mapping)
+    job["download_url"] = f"/export/jobs/{export_id}/download" if row.status == 'completed' else None
+    return job
 
-    filename = f"model_comparison_{from_date}_{to_date}.xlsx"
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+
+@router.get("/jobs/{export_id}/download")
+async def download_export(
+    export_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Download a completed background export.
+    """
+    result = await db.execute(
+        text("SELECT export_type, filename, status, file_path FROM export_jobs WHERE id = :id"),
+        {"id": export_id}
     )
+    row = result.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if row.status != 'completed':
+        raise HTTPException(status_code=409, detail=f"Export is {row.status}")
+    if not row.file_path or not Path(row.file_path).exists():
+        raise HTTPException(status_code=404, detail="Export file no longer exists")
+
+    media_type = "text/csv" if EXPORTS[row.export_type]['format'] == 'csv' else XLSX_MEDIA_TYPE
+    return FileResponse(row.file_path, media_type=media_type, filename=row.filename)
@@ -6,15 +6,17 @@ import math
 from datetime import date, timedelta
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
 from database import get_db
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
 from api.special_dates import resolve_special_date
 from utils.capacity import get_bookable_cap
+from services.forecasting.accuracy_rollup import get_windowed_accuracy, inverse_mape_weights, trailing_window
 
 router = APIRouter()
 
@@ -421,7 +423,6 @@ async def _run_forecast_in_background(
 
 @router.post("/regenerate")
 async def regenerate_forecasts(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     models: Optional[List[str]] = Query(None, description="Models to run: prophet, xgboost, pickup, catboost"),
@@ -441,17 +442,21 @@ async def regenerate_forecasts(
     horizon_days = (to_date - date.today()).days
     models_to_run = models or ['prophet', 'xgboost', 'pickup', 'catboost']
 
-    # Run forecast in background
-    background_tasks.add_task(
-        _run_forecast_in_background,
-        horizon_days=horizon_days,
-        start_days=start_days,
-        models=models_to_run,
+    # Run forecast on a worker
+    queue_id = await enqueue_job_async(
+        db, "forecast_regenerate",
+        {
+            "horizon_days": horizon_days,
+            "start_days": start_days,
+            "models": models_to_run,
+            "triggered_by": f"api:manual:{current_user.get('username', 'unknown')}"
+        },
         triggered_by=f"api:manual:{current_user.get('username', 'unknown')}"
     )
 
     return {
         "status": "triggered",
+        "queue_id": queue_id,
         "from_date": from_date,
         "to_date": to_date,
         "models": models_to_run,
@@ -1871,37 +1876,21 @@ async def get_blended_preview(
     today = date.today()
     is_revenue_metric = metric in REVENUE_METRICS
 
-    # Get accuracy scores for model weighting (from last 90 days)
-    accuracy_query = """
-        SELECT
-            AVG(ABS(prophet_pct_error)) as prophet_mape,
-            AVG(ABS(xgboost_pct_error)) as xgboost_mape,
-            AVG(ABS(catboost_pct_error)) as catboost_mape
-        FROM actual_vs_forecast
-        WHERE date >= CURRENT_DATE - INTERVAL '90 days'
-            AND date < CURRENT_DATE
-            AND metric_type = :metric
-            AND actual_value IS NOT NULL
-    """
-    accuracy_result = await db.execute(text(accuracy_query), {"metric": metric})
-    accuracy_row = accuracy_result.fetchone()
+    # Get accuracy scores for model weighting (from last 90 days, via accuracy rollup)
+    accuracy_from, accuracy_to = trailing_window(90)
+    accuracy = await get_windowed_accuracy(
+        db, 'live', metric, ['prophet', 'xgboost', 'catboost'],
+        from_date=accuracy_from, to_date=accuracy_to
+    )
+    mapes = {model: stats["mape"] for model, stats in accuracy.items()}
 
     # Calculate inverse-MAPE weights (lower MAPE = higher weight)
     # Use default equal weights if no accuracy data
-    if accuracy_row and accuracy_row.prophet_mape and accuracy_row.xgboost_mape and accuracy_row.catboost_mape:
-        prophet_mape = float(accuracy_row.prophet_mape) or 10
-        xgboost_mape = float(accuracy_row.xgboost_mape) or 10
-        catboost_mape = float(accuracy_row.catboost_mape) or 10
-
-        # Inverse weights (1/MAPE), normalized
-        inv_prophet = 1 / max(prophet_mape, 0.1)
-        inv_xgboost = 1 / max(xgboost_mape, 0.1)
-        inv_catboost = 1 / max(catboost_mape, 0.1)
-        total_inv = inv_prophet + inv_xgboost + inv_catboost
-
-        prophet_weight = inv_prophet / total_inv
-        xgboost_weight = inv_xgboost / total_inv
-        catboost_weight = inv_catboost / total_inv
+    if mapes.get('prophet') and mapes.get('xgboost') and mapes.get('catboost'):
+        weights = inverse_mape_weights(mapes)
+        prophet_weight = weights['prophet']
+        xgboost_weight = weights['xgboost']
+        catboost_weight = weights['catboost']
     else:
         # Equal weights if no accuracy data
         prophet_weight = 1/3
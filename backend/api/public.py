@@ -4,13 +4,15 @@ For external integrations like Kitchen Flash app
 """
 from datetime import date, datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import logging
 
 from database import get_db
 from auth import get_api_key_auth
+from utils.response_cache import cached_response
+from utils.settings_cache import get_settings_async
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -26,6 +28,7 @@ def get_prior_year_date(target_date: date) -> date:
 
 @router.get("/forecast/rooms")
 async def get_rooms_forecast(
+    request: Request,
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     days: int = Query(7, ge=1, le=365, description="Number of days to forecast"),
     db: AsyncSession = Depends(get_db),
@@ -35,7 +38,16 @@ async def get_rooms_forecast(
     Get forecasted room bookings for external applications.
 
     Returns: OTB rooms, forecast rooms, occupancy %, prior year data
+    Cached per data version; supports ETag / If-None-Match.
     """
+    return await cached_response(
+        request, db, "forecast/rooms", {"start_date": start_date, "days": days},
+        lambda: build_rooms_forecast(db, start_date, days)
+    )
+
+
+async def build_rooms_forecast(db: AsyncSession, start_date: str, days: int) -> dict:
+    """Build the /forecast/rooms payload"""
     from services.forecasting.pickup_v2_model import forecast_rooms_for_date
 
     try:
@@ -47,11 +59,7 @@ async def get_rooms_forecast(
     today = date.today()
 
     # Get total rooms for occupancy calculation
-    result = await db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'total_rooms'")
-    )
-    row = result.fetchone()
-    total_rooms = int(row.config_value) if row and row.config_value else 30
+    total_rooms = (await get_settings_async(db)).get_int('total_rooms', 30)
 
     data = []
     current = start
@@ -174,6 +182,7 @@ async def get_rooms_forecast(
 
 @router.get("/forecast/covers")
 async def get_covers_forecast(
+    request: Request,
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     days: int = Query(7, ge=1, le=365, description="Number of days to forecast"),
     db: AsyncSession = Depends(get_db),
@@ -183,7 +192,16 @@ async def get_covers_forecast(
     Get forecasted restaurant covers by period for external applications.
 
     Returns: OTB covers, forecast covers, prior year data for breakfast, lunch, dinner
+    Cached per data version; supports ETag / If-None-Match.
     """
+    return await cached_response(
+        request, db, "forecast/covers", {"start_date": start_date, "days": days},
+        lambda: build_covers_forecast(db, start_date, days)
+    )
+
+
+async def build_covers_forecast(db: AsyncSession, start_date: str, days: int) -> dict:
+    """Build the /forecast/covers payload"""
     from services.forecasting.covers_model import forecast_covers_range
 
     try:
@@ -262,6 +280,7 @@ async def get_covers_forecast(
 
 @router.get("/forecast/revenue")
 async def get_revenue_forecast(
+    request: Request,
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     days: int = Query(7, ge=1, le=365, description="Number of days to forecast"),
     type: str = Query("all", description="Revenue type: all, accom, dry, wet"),
@@ -272,7 +291,16 @@ async def get_revenue_forecast(
     Get forecasted revenue by type for external applications.
 
     Returns: OTB revenue, forecast revenue, prior year actuals, budget
+    Cached per data version; supports ETag / If-None-Match.
     """
+    return await cached_response(
+        request, db, "forecast/revenue", {"start_date": start_date, "days": days, "type": type},
+        lambda: build_revenue_forecast(db, start_date, days, type)
+    )
+
+
+async def build_revenue_forecast(db: AsyncSession, start_date: str, days: int, type: str) -> dict:
+    """Build the /forecast/revenue payload"""
     from services.forecasting.covers_model import forecast_covers_range
     from services.forecasting.pickup_v2_model import forecast_revenue_for_date
 
@@ -492,6 +520,7 @@ async def get_revenue_forecast(
 
 @router.get("/forecast/spend-rates")
 async def get_spend_rates(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     api_key: dict = Depends(get_api_key_auth)
 ):
@@ -499,7 +528,16 @@ async def get_spend_rates(
     Return spend-per-cover rates for each meal period.
     Values are gross (inc VAT) from system_config, plus the VAT rate.
     Kitchen app can divide by VAT rate to get net values.
+    Cached per data version; supports ETag / If-None-Match.
     """
+    return await cached_response(
+        request, db, "forecast/spend-rates", {},
+        lambda: build_spend_rates(db)
+    )
+
+
+async def build_spend_rates(db: AsyncSession) -> dict:
+    """Build the /forecast/spend-rates payload"""
     VAT_RATE = 1.20
 
     spend_result = await db.execute(
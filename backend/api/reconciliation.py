@@ -7,8 +7,9 @@ float management, attachment handling, and reconciliation settings.
 import os
 import shutil
 import logging
+from collections import defaultdict
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
@@ -117,6 +118,77 @@ class BulkFinalizeRequest(BaseModel):
     ids: List[int]
 
 
+# ============================================
+# BATCHED LOADERS
+# ============================================
+# Child rows are loaded for many cash-ups at once with = ANY(:ids), so a
+# page or report costs one query per child table however many cash-ups
+# it covers. Children are replaced with one executemany INSERT per table.
+
+CASH_UP_SQL = """
+    SELECT c.*, u.display_name as created_by_name
+    FROM recon_cash_ups c
+    LEFT JOIN users u ON c.created_by = u.id
+"""
+
+DENOMINATIONS_SQL = """
+    SELECT * FROM recon_denominations
+    WHERE cash_up_id = ANY(:ids)
+    ORDER BY cash_up_id, count_type, denomination_value DESC
+"""
+
+CARD_MACHINES_SQL = "SELECT * FROM recon_card_machines WHERE cash_up_id = ANY(:ids) ORDER BY cash_up_id, id"
+
+RECONCILIATION_SQL = "SELECT * FROM recon_reconciliation WHERE cash_up_id = ANY(:ids) ORDER BY cash_up_id, id"
+
+ATTACHMENTS_SQL = "SELECT * FROM recon_attachments WHERE cash_up_id = ANY(:ids) ORDER BY cash_up_id, uploaded_at DESC"
+
+INSERT_DENOMINATION_SQL = """
+    INSERT INTO recon_denominations
+    (cash_up_id, count_type, denomination_type, denomination_value, quantity, value_entered, total_amount)
+    VALUES (:cid, :ct, :dt, :dv, :q, :ve, :ta)
+"""
+
+INSERT_CARD_MACHINE_SQL = """
+    INSERT INTO recon_card_machines
+    (cash_up_id, machine_name, total_amount, amex_amount, visa_mc_amount)
+    VALUES (:cid, :mn, :ta, :aa, :vma)
+"""
+
+INSERT_RECONCILIATION_SQL = """
+    INSERT INTO recon_reconciliation
+    (cash_up_id, category, banked_amount, reported_amount, variance)
+    VALUES (:cid, :cat, :ba, :ra, :var)
+"""
+
+
+async def _load_children(db: AsyncSession, query: str, cash_up_ids: Iterable[int]) -> Dict[int, list]:
+    """Rows of a child table grouped by cash_up_id (one query for all ids)."""
+    ids = list(cash_up_ids)
+    grouped = defaultdict(list)
+    if not ids:
+        return grouped
+    result = await db.execute(text(query), {"ids": ids})
+    for row in result.fetchall():
+        grouped[row.cash_up_id].append(row)
+    return grouped
+
+
+async def _insert_many(db: AsyncSession, query: str, rows: List[dict]):
+    """executemany INSERT; skipped when there is nothing to insert."""
+    if rows:
+        await db.execute(text(query), rows)
+
+
+def _card_machine_dict(c) -> dict:
+    return {
+        "machine_name": c.machine_name,
+        "total_amount": float(c.total_amount),
+        "amex_amount": float(c.amex_amount),
+        "visa_mc_amount": float(c.visa_mc_amount),
+    }
+
+
 # ============================================
 # CASH UP CRUD
 # ============================================
@@ -215,7 +287,7 @@ async def get_cash_up_by_date(
 ):
     """Check if cash-up exists for a given date and return full data."""
     result = await db.execute(
-        text("SELECT * FROM recon_cash_ups WHERE session_date = :d"),
+        text(CASH_UP_SQL + " WHERE c.session_date = :d"),
         {"d": _parse_date(session_date)}
     )
     cash_up = result.fetchone()
@@ -233,7 +305,7 @@ async def get_cash_up(
 ):
     """Get full cash-up with all related data."""
     result = await db.execute(
-        text("SELECT * FROM recon_cash_ups WHERE id = :id"),
+        text(CASH_UP_SQL + " WHERE c.id = :id"),
         {"id": cash_up_id}
     )
     cash_up = result.fetchone()
@@ -245,13 +317,33 @@ async def get_cash_up(
 
 async def _build_full_cash_up(db: AsyncSession, cash_up) -> dict:
     """Build full cash-up response with denominations, cards, reconciliation, attachments."""
-    cash_up_id = cash_up.id
+    return (await _build_full_cash_ups(db, [cash_up]))[0]
+
+
+async def _build_full_cash_ups(db: AsyncSession, cash_ups: list) -> List[dict]:
+    """
+    Full responses for several cash-ups (rows from CASH_UP_SQL), with one
+    query per child table for all of them.
+    """
+    ids = [cash_up.id for cash_up in cash_ups]
+    denominations = await _load_children(db, DENOMINATIONS_SQL, ids)
+    card_machines = await _load_children(db, CARD_MACHINES_SQL, ids)
+    reconciliation = await _load_children(db, RECONCILIATION_SQL, ids)
+    attachments = await _load_children(db, ATTACHMENTS_SQL, ids)
+
+    return [
+        _full_cash_up_dict(
+            cash_up,
+            denominations[cash_up.id],
+            card_machines[cash_up.id],
+            reconciliation[cash_up.id],
+            attachments[cash_up.id],
+        )
+        for cash_up in cash_ups
+    ]
 
-    # Denominations
-    denom_result = await db.execute(
-        text("SELECT * FROM recon_denominations WHERE cash_up_id = :id ORDER BY count_type, denomination_value DESC"),
-        {"id": cash_up_id}
-    )
+
+def _full_cash_up_dict(cash_up, denominations, card_machines, reconciliation, attachments) -> dict:
     denominations = [
         {
             "id": d.id,
@@ -262,30 +354,11 @@ async def _build_full_cash_up(db: AsyncSession, cash_up) -> dict:
             "value_entered": float(d.value_entered) if d.value_entered else None,
             "total_amount": float(d.total_amount),
         }
-        for d in denom_result.fetchall()
+        for d in denominations
     ]
 
-    # Card machines
-    card_result = await db.execute(
-        text("SELECT * FROM recon_card_machines WHERE cash_up_id = :id"),
-        {"id": cash_up_id}
-    )
-    card_machines = [
-        {
-            "id": c.id,
-            "machine_name": c.machine_name,
-            "total_amount": float(c.total_amount),
-            "amex_amount": float(c.amex_amount),
-            "visa_mc_amount": float(c.visa_mc_amount),
-        }
-        for c in card_result.fetchall()
-    ]
+    card_machines = [{"id": c.id, **_card_machine_dict(c)} for c in card_machines]
 
-    # Reconciliation rows
-    recon_result = await db.execute(
-        text("SELECT * FROM recon_reconciliation WHERE cash_up_id = :id"),
-        {"id": cash_up_id}
-    )
     reconciliation = [
         {
             "id": r.id,
@@ -294,14 +367,9 @@ async def _build_full_cash_up(db: AsyncSession, cash_up) -> dict:
             "reported_amount": float(r.reported_amount),
             "variance": float(r.variance),
         }
-        for r in recon_result.fetchall()
+        for r in reconciliation
     ]
 
-    # Attachments
-    attach_result = await db.execute(
-        text("SELECT * FROM recon_attachments WHERE cash_up_id = :id ORDER BY uploaded_at DESC"),
-        {"id": cash_up_id}
-    )
     attachments = [
         {
             "id": a.id,
@@ -310,16 +378,9 @@ async def _build_full_cash_up(db: AsyncSession, cash_up) -> dict:
             "file_size": a.file_size,
             "uploaded_at": a.uploaded_at.isoformat() if a.uploaded_at else None,
         }
-        for a in attach_result.fetchall()
+        for a in attachments
     ]
 
-    # Creator name
-    user_result = await db.execute(
-        text("SELECT display_name FROM users WHERE id = :id"),
-        {"id": cash_up.created_by}
-    )
-    creator = user_result.fetchone()
-
     return {
         "cash_up": {
             "id": cash_up.id,
@@ -329,7 +390,7 @@ async def _build_full_cash_up(db: AsyncSession, cash_up) -> dict:
             "total_cash_counted": float(cash_up.total_cash_counted or 0),
             "notes": cash_up.notes,
             "created_by": cash_up.created_by,
-            "created_by_name": creator.display_name if creator else None,
+            "created_by_name": cash_up.created_by_name,
             "created_at": cash_up.created_at.isoformat() if cash_up.created_at else None,
             "updated_at": cash_up.updated_at.isoformat() if cash_up.updated_at else None,
             "submitted_at": cash_up.submitted_at.isoformat() if cash_up.submitted_at else None,
@@ -412,70 +473,44 @@ async def update_cash_up(
         }
     )
 
-    # Replace denominations
-    await db.execute(
-        text("DELETE FROM recon_denominations WHERE cash_up_id = :id"),
-        {"id": cash_up_id}
-    )
-    for d in data.denominations:
+    # Replace child rows (one DELETE and one executemany INSERT per table)
+    for table in ("recon_denominations", "recon_card_machines", "recon_reconciliation"):
         await db.execute(
-            text("""
-                INSERT INTO recon_denominations
-                (cash_up_id, count_type, denomination_type, denomination_value, quantity, value_entered, total_amount)
-                VALUES (:cid, :ct, :dt, :dv, :q, :ve, :ta)
-            """),
-            {
-                "cid": cash_up_id,
-                "ct": d.count_type,
-                "dt": d.denomination_type,
-                "dv": d.denomination_value,
-                "q": d.quantity,
-                "ve": d.value_entered,
-                "ta": d.total_amount,
-            }
-        )
-
-    # Replace card machines
-    await db.execute(
-        text("DELETE FROM recon_card_machines WHERE cash_up_id = :id"),
-        {"id": cash_up_id}
-    )
-    for c in data.card_machines:
-        await db.execute(
-            text("""
-                INSERT INTO recon_card_machines
-                (cash_up_id, machine_name, total_amount, amex_amount, visa_mc_amount)
-                VALUES (:cid, :mn, :ta, :aa, :vma)
-            """),
-            {
-                "cid": cash_up_id,
-                "mn": c.machine_name,
-                "ta": c.total_amount,
-                "aa": c.amex_amount,
-                "vma": c.visa_mc_amount,
-            }
-        )
-
-    # Replace reconciliation rows
-    await db.execute(
-        text("DELETE FROM recon_reconciliation WHERE cash_up_id = :id"),
-        {"id": cash_up_id}
-    )
-    for r in data.reconciliation:
-        await db.execute(
-            text("""
-                INSERT INTO recon_reconciliation
-                (cash_up_id, category, banked_amount, reported_amount, variance)
-                VALUES (:cid, :cat, :ba, :ra, :var)
-            """),
-            {
-                "cid": cash_up_id,
-                "cat": r.category,
-                "ba": r.banked_amount,
-                "ra": r.reported_amount,
-                "var": r.variance,
-            }
+            text(f"DELETE FROM {table} WHERE cash_up_id = :id"),
+            {"id": cash_up_id}
         )
+    await _insert_many(db, INSERT_DENOMINATION_SQL, [
+        {
+            "cid": cash_up_id,
+            "ct": d.count_type,
+            "dt": d.denomination_type,
+            "dv": d.denomination_value,
+            "q": d.quantity,
+            "ve": d.value_entered,
+            "ta": d.total_amount,
+        }
+        for d in data.denominations
+    ])
+    await _insert_many(db, INSERT_CARD_MACHINE_SQL, [
+        {
+            "cid": cash_up_id,
+            "mn": c.machine_name,
+            "ta": c.total_amount,
+            "aa": c.amex_amount,
+            "vma": c.visa_mc_amount,
+        }
+        for c in data.card_machines
+    ])
+    await _insert_many(db, INSERT_RECONCILIATION_SQL, [
+        {
+            "cid": cash_up_id,
+            "cat": r.category,
+            "ba": r.banked_amount,
+            "ra": r.reported_amount,
+            "var": r.variance,
+        }
+        for r in data.reconciliation
+    ])
 
     await db.commit()
     return {"message": "Cash-up updated successfully", "id": cash_up_id}
@@ -552,31 +587,35 @@ async def bulk_finalize_cash_ups(
     current_user: dict = Depends(get_admin_user)
 ):
     """Finalize multiple cash-ups (admin only)."""
-    finalized = 0
+    result = await db.execute(
+        text("SELECT id, status FROM recon_cash_ups WHERE id = ANY(:ids)"),
+        {"ids": data.ids}
+    )
+    statuses = {row.id: row.status for row in result.fetchall()}
+
     errors = []
+    to_finalize = []
     for cash_up_id in data.ids:
-        result = await db.execute(
-            text("SELECT id, status FROM recon_cash_ups WHERE id = :id"),
-            {"id": cash_up_id}
-        )
-        row = result.fetchone()
-        if not row:
+        status = statuses.get(cash_up_id)
+        if status is None:
             errors.append(f"ID {cash_up_id}: not found")
-        elif row.status == 'final':
+        elif status == 'final' or cash_up_id in to_finalize:
             errors.append(f"ID {cash_up_id}: already finalized")
         else:
-            await db.execute(
-                text("""
-                    UPDATE recon_cash_ups
-                    SET status = 'final', submitted_at = NOW(), submitted_by = :user_id, updated_at = NOW()
-                    WHERE id = :id
-                """),
-                {"id": cash_up_id, "user_id": current_user["id"]}
-            )
-            finalized += 1
+            to_finalize.append(cash_up_id)
+
+    if to_finalize:
+        await db.execute(
+            text("""
+                UPDATE recon_cash_ups
+                SET status = 'final', submitted_at = NOW(), submitted_by = :user_id, updated_at = NOW()
+                WHERE id = ANY(:ids)
+            """),
+            {"ids": to_finalize, "user_id": current_user["id"]}
+        )
 
     await db.commit()
-    return {"finalized": finalized, "errors": errors}
+    return {"finalized": len(to_finalize), "errors": errors}
 
 
 # ============================================
@@ -737,25 +776,18 @@ async def generate_multi_day_report(
     )
     cash_up_rows = cu_result.fetchall()
 
-    # Build cash-up dicts with card machines
-    cash_ups = []
-    for cu in cash_up_rows:
-        cards_result = await db.execute(
-            text("SELECT * FROM recon_card_machines WHERE cash_up_id = :id"),
-            {"id": cu.id}
-        )
-        card_machines = [
-            {"machine_name": c.machine_name, "total_amount": float(c.total_amount),
-             "amex_amount": float(c.amex_amount), "visa_mc_amount": float(c.visa_mc_amount)}
-            for c in cards_result.fetchall()
-        ]
-        cash_ups.append({
+    # Build cash-up dicts with card machines (one query for the whole range)
+    cards_by_cash_up = await _load_children(db, CARD_MACHINES_SQL, [cu.id for cu in cash_up_rows])
+    cash_ups = [
+        {
             "session_date": cu.session_date.isoformat(),
             "status": cu.status,
             "total_float_counted": float(cu.total_float_counted or 0),
             "total_cash_counted": float(cu.total_cash_counted or 0),
-            "card_machines": card_machines,
-        })
+            "card_machines": [_card_machine_dict(c) for c in cards_by_cash_up[cu.id]],
+        }
+        for cu in cash_up_rows
+    ]
 
     # Fetch stored payment totals by date from recon_payment_records
     payment_totals_by_date = {}
@@ -6,13 +6,15 @@ import logging
 from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
 from database import get_db
 from auth import get_current_user
+from services.job_queue import enqueue_job_async
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -116,9 +118,9 @@ async def get_resos_sync_status(
 
 @router.post("/resos-bookings/sync")
 async def trigger_resos_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date (default: today - 365)"),
     to_date: Optional[date] = Query(None, description="End date (default: today + 365)"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -131,16 +133,17 @@ async def trigger_resos_sync(
     if not to_date:
         to_date = date.today() + timedelta(days=365)
 
-    # Queue background task
-    background_tasks.add_task(
-        run_resos_sync_task,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "resos_bookings_data_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "from_date": from_date.isoformat(),
         "to_date": to_date.isoformat(),
         "message": f"Resos bookings sync started for {from_date} to {to_date}"
@@ -215,6 +218,7 @@ async def update_resos_sync_config(
     }
 
 
+@single_flight("resos:bookings_data")
 def run_resos_sync_task(
     from_date: date,
     to_date: date,
@@ -1,19 +1,23 @@
 """
 Data Sync API endpoints
 """
+import asyncio
 import uuid
 import logging
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
 from database import get_db, SyncSessionLocal
 from auth import get_current_user
+from jobs.pipeline import PIPELINES, start_pipeline
+from services.job_queue import enqueue_job_async, list_jobs
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -74,10 +78,10 @@ async def get_sync_status(
 
 @router.post("/newbook")
 async def trigger_newbook_sync(
-    background_tasks: BackgroundTasks,
     full_sync: bool = Query(False, description="If True, fetches all bookings. If False, only fetches since last sync."),
     from_date: Optional[date] = Query(None, description="Start date for stay period (filters by arrival/stay dates)"),
     to_date: Optional[date] = Query(None, description="End date for stay period (filters by arrival/stay dates)"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -89,15 +93,12 @@ async def trigger_newbook_sync(
     - full_sync=True: Full sync - fetches entire booking database
     - from_date/to_date: If provided, fetches bookings staying during this period (overrides full_sync)
     """
-    from jobs.data_sync import sync_newbook_data
-
-    # Queue background task
-    background_tasks.add_task(
-        sync_newbook_data,
-        full_sync=full_sync,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "newbook_data_sync",
+        {"full_sync": full_sync, "from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     msg = "Newbook sync started in background"
@@ -110,6 +111,7 @@ async def trigger_newbook_sync(
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "source": "newbook",
         "full_sync": full_sync,
         "from_date": from_date,
@@ -120,9 +122,9 @@ async def trigger_newbook_sync(
 
 @router.post("/resos")
 async def trigger_resos_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date for sync"),
     to_date: Optional[date] = Query(None, description="End date for sync"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -130,23 +132,22 @@ async def trigger_resos_sync(
     Trigger manual Resos data sync.
     Runs in background to avoid timeout.
     """
-    from jobs.data_sync import sync_resos_data
-
     if from_date is None:
         from_date = date.today() - timedelta(days=7)
     if to_date is None:
         to_date = date.today() + timedelta(days=365)
 
-    # Queue background task
-    background_tasks.add_task(
-        sync_resos_data,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "resos_data_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "source": "resos",
         "from_date": from_date,
         "to_date": to_date,
@@ -156,9 +157,9 @@ async def trigger_resos_sync(
 
 @router.post("/newbook/occupancy-report")
 async def trigger_occupancy_report_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date for report"),
     to_date: Optional[date] = Query(None, description="End date for report"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -174,22 +175,22 @@ async def trigger_occupancy_report_sync(
     Use this to ensure accurate occupancy % calculations when rooms
     have been taken offline for maintenance.
     """
-    from jobs.data_sync import sync_newbook_occupancy_report
-
     if from_date is None:
         from_date = date.today() - timedelta(days=90)
     if to_date is None:
         to_date = date.today() + timedelta(days=30)
 
-    background_tasks.add_task(
-        sync_newbook_occupancy_report,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "occupancy_report_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "source": "newbook_occupancy_report",
         "from_date": from_date,
         "to_date": to_date,
@@ -199,9 +200,9 @@ async def trigger_occupancy_report_sync(
 
 @router.post("/newbook/earned-revenue")
 async def trigger_earned_revenue_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date for revenue"),
     to_date: Optional[date] = Query(None, description="End date for revenue"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -215,22 +216,22 @@ async def trigger_earned_revenue_sync(
     Defaults to last 7 days if no dates specified (catches adjustments).
     For historical backfill, specify a wider date range.
     """
-    from jobs.data_sync import sync_newbook_earned_revenue
-
     if from_date is None:
         from_date = date.today() - timedelta(days=7)
     if to_date is None:
         to_date = date.today()
 
-    background_tasks.add_task(
-        sync_newbook_earned_revenue,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "earned_revenue_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "source": "newbook_earned_revenue",
         "from_date": from_date,
         "to_date": to_date,
@@ -240,24 +241,24 @@ async def trigger_earned_revenue_sync(
 
 @router.post("/full")
 async def trigger_full_sync(
-    background_tasks: BackgroundTasks,
     full_sync: bool = Query(False, description="If True, fetches all bookings from both sources"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Trigger full sync from all sources (Newbook bookings, Newbook occupancy report, Resos).
     """
-    from jobs.data_sync import run_data_sync
-
-    background_tasks.add_task(
-        run_data_sync,
-        full_sync=full_sync,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "full_sync",
+        {"full_sync": full_sync, "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "sources": ["newbook", "newbook_occupancy_report", "resos"],
         "full_sync": full_sync,
         "message": f"Full {'complete' if full_sync else 'incremental'} sync started in background"
@@ -266,8 +267,8 @@ async def trigger_full_sync(
 
 @router.post("/aggregate")
 async def trigger_aggregation(
-    background_tasks: BackgroundTasks,
     source: Optional[str] = Query(None, description="Filter by source: newbook, resos. Leave empty for all."),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -275,18 +276,18 @@ async def trigger_aggregation(
     Trigger manual aggregation of pending dates.
     Processes the aggregation queue and updates daily_occupancy/daily_covers tables.
     """
-    from jobs.aggregation import run_aggregation
-
     if source and source not in ['newbook', 'resos']:
         raise HTTPException(status_code=400, detail="Source must be 'newbook', 'resos', or omitted for all")
 
-    background_tasks.add_task(
-        run_aggregation,
-        source=source
+    queue_id = await enqueue_job_async(
+        db, "aggregation", {"source": source},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "source": source or "all",
         "message": f"Aggregation started for {source or 'all sources'}"
     }
@@ -294,7 +295,6 @@ async def trigger_aggregation(
 
 @router.post("/aggregate/requeue")
 async def requeue_for_aggregation(
-    background_tasks: BackgroundTasks,
     source: str = Query(..., description="Source to requeue: newbook or resos"),
     from_date: Optional[date] = Query(None, description="Start date (optional, defaults to all)"),
     to_date: Optional[date] = Query(None, description="End date (optional, defaults to all)"),
@@ -373,8 +373,10 @@ async def requeue_for_aggregation(
 
     # Optionally trigger aggregation
     if run_aggregation_after:
-        from jobs.aggregation import run_aggregation as do_aggregation
-        background_tasks.add_task(do_aggregation, source=source)
+        await enqueue_job_async(
+            db, "aggregation", {"source": source},
+            triggered_by=f"user:{current_user['username']}"
+        )
 
     return {
         "status": "queued",
@@ -571,7 +573,7 @@ async def get_sync_logs(
 @router.post("/backfill")
 async def start_backfill(
     request: BackfillRequest,
-    background_tasks: BackgroundTasks,
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -616,14 +618,12 @@ async def start_backfill(
     )
     await db.commit()
 
-    # Queue background task
-    background_tasks.add_task(
-        run_backfill_job,
-        job_id=job_id,
-        source=request.source,
-        from_date=request.from_date,
-        to_date=request.to_date,
-        chunk_months=request.chunk_months
+    await enqueue_job_async(
+        db, "backfill",
+        {"job_id": job_id, "source": request.source, "from_date": request.from_date,
+         "to_date": request.to_date, "chunk_months": request.chunk_months},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
@@ -731,6 +731,150 @@ async def list_backfill_jobs(
     ]
 
 
+@router.post("/pipeline/run")
+async def trigger_pipeline(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Start the daily pipeline now (syncs -> aggregation -> pace -> forecasts
+    -> snapshot -> accuracy). Each step is queued as soon as its inputs finish.
+    """
+    loop = asyncio.get_event_loop()
+    run_id = await loop.run_in_executor(
+        None, start_pipeline, 'daily', f"user:{current_user['username']}"
+    )
+    if run_id is None:
+        raise HTTPException(status_code=409, detail="Daily pipeline is already running")
+    return {"status": "started", "pipeline_run_id": run_id}
+
+
+@router.get("/pipeline/runs")
+async def list_pipeline_runs(
+    limit: int = Query(20, description="Number of runs to return"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List recent pipeline runs with node counts by status.
+    """
+    result = await db.execute(
+        text("""
+            SELECT r.id, r.pipeline, r.status, r.triggered_by, r.started_at, r.completed_at,
+                   EXTRACT(EPOCH FROM COALESCE(r.completed_at, NOW()) - r.started_at) AS duration_seconds,
+                   COUNT(*) FILTER (WHERE n.status = 'completed') AS nodes_completed,
+                   COUNT(*) FILTER (WHERE n.status IN ('queued', 'running')) AS nodes_active,
+                   COUNT(*) FILTER (WHERE n.status IN ('failed', 'cancelled')) AS nodes_failed,
+                   COUNT(*) AS nodes_total
+            FROM pipeline_runs r
+            JOIN pipeline_node_runs n ON n.run_id = r.id
+            GROUP BY r.id
+            ORDER BY r.id DESC
+            LIMIT :limit
+        """),
+        {"limit": limit}
+    )
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+@router.get("/pipeline/runs/{run_id}")
+async def get_pipeline_run(
+    run_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get a pipeline run with per-node status/timings and per-edge timings
+    (wait = upstream done -> downstream started).
+    """
+    result = await db.execute(
+        text("""
+            SELECT id, pipeline, status, triggered_by, started_at, completed_at
+            FROM pipeline_runs WHERE id = :id
+        """),
+        {"id": run_id}
+    )
+    run = result.fetchone()
+    if not run:
+        raise HTTPException(status_code=404, detail="Pipeline run not found")
+
+    graph = PIPELINES.get(run.pipeline, {})
+    result = await db.execute(
+        text("""
+            SELECT node, status, queue_id, queued_at, started_at, completed_at,
+                   EXTRACT(EPOCH FROM completed_at - started_at) AS duration_seconds,
+                   error_message
+            FROM pipeline_node_runs
+            WHERE run_id = :id
+        """),
+        {"id": run_id}
+    )
+    nodes = {row.node: dict(row._mapping) for row in result.fetchall()}
+    for name, node in nodes.items():
+        spec = graph.get(name, {})
+        node["job"] = spec.get("job")
+        node["upstream"] = spec.get("requires", []) + spec.get("after", [])
+
+    result = await db.execute(
+        text("""
+            SELECT upstream, downstream, upstream_completed_at, downstream_started_at,
+                   downstream_completed_at, wait_seconds, duration_seconds
+            FROM pipeline_edge_runs
+            WHERE run_id = :id
+            ORDER BY downstream_started_at, upstream
+        """),
+        {"id": run_id}
+    )
+
+    return {
+        **dict(run._mapping),
+        # Keep the pipeline's declared (dependency) order
+        "nodes": [nodes[name] for name in graph if name in nodes],
+        "edges": [dict(row._mapping) for row in result.fetchall()],
+    }
+
+
+@router.get("/jobs")
+async def list_queued_jobs(
+    status: Optional[str] = Query(None, description="Filter by status: queued, running, completed, failed"),
+    limit: int = Query(50, description="Number of jobs to return"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List recent job_queue entries (syncs, aggregation, forecasts, ...).
+    Jobs are run by worker processes; queue_id from a trigger response
+    can be looked up here.
+    """
+    return await list_jobs(db, status=status, limit=limit)
+
+
+@router.get("/jobs/{queue_id}")
+async def get_queued_job(
+    queue_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get a single job_queue entry.
+    """
+    result = await db.execute(
+        text("""
+            SELECT id, job_name, payload, status, priority, attempts, max_attempts,
+                   triggered_by, worker_id, enqueued_at, started_at, heartbeat_at,
+                   completed_at, result, error_message, pipeline_run_id, pipeline_node,
+                   query_stats
+            FROM job_queue
+            WHERE id = :id
+        """),
+        {"id": queue_id}
+    )
+    row = result.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return dict(row._mapping)
+
+
+@single_flight("backfill:{source}")
 async def run_backfill_job(
     job_id: str,
     source: str,
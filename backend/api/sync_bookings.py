@@ -6,13 +6,18 @@ import logging
 from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
 from database import get_db, SyncSessionLocal
 from auth import get_current_user
+from utils.booking_nights import save_booking_payload
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings
+from services.job_queue import enqueue_job_async
+from services.single_flight import clear_orphaned_syncs_async, single_flight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -169,10 +174,10 @@ async def get_bookings_sync_logs(
 
 @router.post("/bookings-data/sync")
 async def trigger_bookings_sync(
-    background_tasks: BackgroundTasks,
     sync_mode: str = Query("incremental", description="Sync mode: 'incremental', 'staying_range', or 'full'"),
     from_date: Optional[date] = Query(None, description="Start date for staying range sync"),
     to_date: Optional[date] = Query(None, description="End date for staying range sync"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -187,13 +192,12 @@ async def trigger_bookings_sync(
     if sync_mode == "staying_range" and (not from_date or not to_date):
         raise HTTPException(status_code=400, detail="from_date and to_date required for staying_range mode")
 
-    # Queue background task
-    background_tasks.add_task(
-        run_bookings_data_sync,
-        sync_mode=sync_mode,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "bookings_data_sync",
+        {"sync_mode": sync_mode, "from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     msg = f"Bookings data sync started ({sync_mode})"
@@ -202,6 +206,7 @@ async def trigger_bookings_sync(
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "sync_mode": sync_mode,
         "from_date": from_date,
         "to_date": to_date,
@@ -267,11 +272,13 @@ async def update_bookings_sync_config(
     }
 
 
+@single_flight("newbook:bookings_data")
 def run_bookings_data_sync(
     sync_mode: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
-    triggered_by: str = "scheduler"
+    triggered_by: str = "scheduler",
+    aggregate: bool = True
 ):
     """
     Background task to sync bookings data to newbook_bookings_data table.
@@ -280,8 +287,10 @@ def run_bookings_data_sync(
     - incremental: Uses modified_since from last successful sync (or -7 days fallback)
     - staying_range: Uses bookings_list with list_type="staying" for date range
     - full: Fetches all bookings
+
+    aggregate=False leaves bookings aggregation to the caller (the daily
+    pipeline runs it as its own step).
     """
-    import json
     import sys
     import asyncio
     from services.newbook_client import NewbookClient
@@ -293,27 +302,12 @@ def run_bookings_data_sync(
 
     try:
         # Load credentials
-        def get_config(key):
-            result = db.execute(
-                text("SELECT config_value, is_encrypted FROM system_config WHERE config_key = :key"),
-                {"key": key}
-            )
-            row = result.fetchone()
-            if row and row.config_value:
-                if row.is_encrypted:
-                    import base64
-                    try:
-                        return base64.b64decode(row.config_value.encode()).decode()
-                    except:
-                        return row.config_value
-                return row.config_value
-            return None
-
+        settings = get_settings(db)
         creds = {
-            'api_key': get_config('newbook_api_key'),
-            'username': get_config('newbook_username'),
-            'password': get_config('newbook_password'),
-            'region': get_config('newbook_region')
+            'api_key': settings.get('newbook_api_key'),
+            'username': settings.get('newbook_username'),
+            'password': settings.get('newbook_password'),
+            'region': settings.get('newbook_region')
         }
 
         # Determine modified_since for incremental sync
@@ -405,7 +399,6 @@ def run_bookings_data_sync(
             try:
                 # Create sanitized raw JSON (remove guest PII)
                 raw_booking = {k: v for k, v in booking.items() if k != "guests"}
-                raw_json_str = json.dumps(raw_booking)
 
                 # Parse dates
                 arrival_raw = booking.get("booking_arrival")
@@ -437,7 +430,7 @@ def run_bookings_data_sync(
                             booking_source_id, booking_source_name,
                             booking_parent_source_id, booking_parent_source_name,
                             booking_method_id, booking_method_name,
-                            raw_json, fetched_at
+                            fetched_at
                         ) VALUES (
                             :newbook_id, :reference, :group_id,
                             :booking_placed, :arrival, :departure, :nights,
@@ -448,7 +441,7 @@ def run_bookings_data_sync(
                             :source_id, :source_name,
                             :parent_source_id, :parent_source_name,
                             :method_id, :method_name,
-                            :raw_json, NOW()
+                            NOW()
                         )
                         ON CONFLICT (newbook_id) DO UPDATE SET
                             booking_reference = EXCLUDED.booking_reference,
@@ -457,7 +450,6 @@ def run_bookings_data_sync(
                             total_amount = EXCLUDED.total_amount,
                             tariff_total = EXCLUDED.tariff_total,
                             travel_agent_commission = EXCLUDED.travel_agent_commission,
-                            raw_json = EXCLUDED.raw_json,
                             fetched_at = NOW()
                     """),
                     {
@@ -488,11 +480,13 @@ def run_bookings_data_sync(
                         "parent_source_id": str(booking.get("booking_parent_source_id")) if booking.get("booking_parent_source_id") else None,
                         "parent_source_name": booking.get("booking_parent_source_name"),
                         "method_id": str(booking.get("booking_method_id")) if booking.get("booking_method_id") else None,
-                        "method_name": booking.get("booking_method_name"),
-                        "raw_json": raw_json_str
+                        "method_name": booking.get("booking_method_name")
                     }
                 )
 
+                # Payload to cold storage, per-night rates to typed rows
+                save_booking_payload(db, newbook_id, raw_booking)
+
                 if existing:
                     records_updated += 1
                 else:
@@ -520,12 +514,15 @@ def run_bookings_data_sync(
             """),
             {"fetched": len(bookings), "created": records_created, "updated": records_updated}
         )
+        bump_data_version(db)
         db.commit()
 
         print(f"[SYNC-BOOKINGS] Completed: {records_created} created, {records_updated} updated", flush=True)
         logger.info(f"Bookings data sync completed: {records_created} created, {records_updated} updated")
 
         # Trigger bookings aggregation after successful sync
+        if not aggregate:
+            return
         print(f"[SYNC-BOOKINGS] Triggering bookings aggregation...", flush=True)
         try:
             from jobs.bookings_aggregation import run_bookings_aggregation
@@ -704,9 +701,9 @@ async def get_occupancy_sync_logs(
 
 @router.post("/occupancy-data/sync")
 async def trigger_occupancy_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date for sync (default: today - 7 days)"),
     to_date: Optional[date] = Query(None, description="End date for sync (default: today + 365 days)"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -721,16 +718,17 @@ async def trigger_occupancy_sync(
     if not to_date:
         to_date = date.today() + timedelta(days=365)
 
-    # Queue background task
-    background_tasks.add_task(
-        run_occupancy_data_sync,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "occupancy_data_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "from_date": from_date,
         "to_date": to_date,
         "message": f"Occupancy data sync started for {from_date} to {to_date}"
@@ -781,6 +779,7 @@ async def update_occupancy_sync_config(
     }
 
 
+@single_flight("newbook:occupancy_report")
 def run_occupancy_data_sync(
     from_date: date,
     to_date: date,
@@ -950,9 +949,9 @@ async def get_earned_revenue_sync_logs(
 
 @router.post("/earned-revenue-data/sync")
 async def trigger_earned_revenue_sync(
-    background_tasks: BackgroundTasks,
     from_date: Optional[date] = Query(None, description="Start date for sync (default: today - 7 days)"),
     to_date: Optional[date] = Query(None, description="End date for sync (default: today)"),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -967,16 +966,17 @@ async def trigger_earned_revenue_sync(
     if not to_date:
         to_date = date.today()
 
-    # Queue background task
-    background_tasks.add_task(
-        run_earned_revenue_data_sync,
-        from_date=from_date,
-        to_date=to_date,
-        triggered_by=f"user:{current_user['username']}"
+    queue_id = await enqueue_job_async(
+        db, "earned_revenue_data_sync",
+        {"from_date": from_date, "to_date": to_date,
+         "triggered_by": f"user:{current_user['username']}"},
+        triggered_by=f"user:{current_user['username']}",
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "from_date": from_date,
         "to_date": to_date,
         "message": f"Earned revenue sync started for {from_date} to {to_date}"
@@ -1027,6 +1027,7 @@ async def update_earned_revenue_sync_config(
     }
 
 
+@single_flight("newbook:earned_revenue")
 def run_earned_revenue_data_sync(
     from_date: date,
     to_date: date,
@@ -1072,18 +1073,8 @@ async def get_current_rates_sync_status(
     Get sync status for Newbook current rates data.
     Used for pickup-v2 upper bound calculations.
     """
-    # Auto-clear stuck syncs (running for more than 60 minutes)
-    await db.execute(
-        text("""
-            UPDATE sync_log
-            SET status = 'failed', completed_at = NOW(),
-                error_message = 'Auto-cleared: sync stuck for more than 60 minutes'
-            WHERE source = 'newbook' AND sync_type = 'current_rates'
-            AND status = 'running'
-            AND started_at < NOW() - INTERVAL '60 minutes'
-        """)
-    )
-    await db.commit()
+    # Clear syncs whose process stopped heartbeating (killed mid-run)
+    await clear_orphaned_syncs_async(db)
 
     # Get last successful sync
     result = await db.execute(
@@ -1215,8 +1206,8 @@ class CurrentRatesSyncRequest(BaseModel):
 
 @router.post("/current-rates/sync")
 async def trigger_current_rates_sync(
-    background_tasks: BackgroundTasks,
     request: CurrentRatesSyncRequest = CurrentRatesSyncRequest(),
+    if_running: str = Query("fail", pattern="^(fail|wait)$", description="If the same job is already running: fail (409) or wait and share its result"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -1226,45 +1217,19 @@ async def trigger_current_rates_sync(
     """
     horizon_days = request.horizon_days or 720
 
-    # Auto-clear stuck syncs (running for more than 60 minutes)
-    await db.execute(
-        text("""
-            UPDATE sync_log
-            SET status = 'failed', completed_at = NOW(),
-                error_message = 'Auto-cleared: sync stuck for more than 60 minutes'
-            WHERE source = 'newbook' AND sync_type = 'current_rates'
-            AND status = 'running'
-            AND started_at < NOW() - INTERVAL '60 minutes'
-        """)
-    )
-    await db.commit()
-
-    # Check if a sync is already running
-    result = await db.execute(
-        text("""
-            SELECT id, started_at FROM sync_log
-            WHERE source = 'newbook' AND sync_type = 'current_rates'
-            AND status = 'running'
-            ORDER BY started_at DESC
-            LIMIT 1
-        """)
-    )
-    running = result.fetchone()
-    if running:
-        raise HTTPException(
-            status_code=409,
-            detail=f"A sync is already running (started at {running.started_at}). Please wait for it to complete."
-        )
+    # Clear syncs whose process stopped heartbeating (killed mid-run)
+    await clear_orphaned_syncs_async(db)
 
-    # Queue background task
-    background_tasks.add_task(
-        run_current_rates_sync,
+    queue_id = await enqueue_job_async(
+        db, "current_rates_sync",
+        {"triggered_by": f"user:{current_user['username']}", "horizon_days": horizon_days},
         triggered_by=f"user:{current_user['username']}",
-        horizon_days=horizon_days
+        if_running=if_running
     )
 
     return {
         "status": "started",
+        "queue_id": queue_id,
         "message": f"Current rates sync started - fetching rates for next {horizon_days} days"
     }
 
@@ -1350,6 +1315,7 @@ async def cancel_current_rates_sync(
         }
 
 
+@single_flight("newbook:current_rates")
 def run_current_rates_sync(triggered_by: str = "scheduler", horizon_days: int = 720):
     """
     Background task to sync current rates from Newbook API.
@@ -2,12 +2,15 @@
 Authentication utilities - JWT based simple auth + API key auth
 """
 import os
+import time
+import asyncio
+import logging
 import bcrypt
 import hashlib
 import secrets
 import base64
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -16,13 +19,25 @@ from pydantic import BaseModel
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
+from utils.settings_cache import on_config_changed
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# Validated API keys / users are cached per process for this long. Any
+# change to users or api_keys (other than last_used_at) sends NOTIFY
+# config_changed, and the settings listener drops these caches in every
+# process; the TTL only bounds staleness while the listener is down.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+
+# api_keys.last_used_at updates are held in memory and flushed this often
+API_KEY_LAST_USED_FLUSH_SECONDS = int(os.getenv("API_KEY_LAST_USED_FLUSH_SECONDS", "30"))
+
 # Security scheme
 security = HTTPBearer()
 
@@ -79,6 +94,115 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+# ============================================
+# AUTH CACHE
+# ============================================
+
+# key_hash -> (expires_at, key info) for valid, active API keys
+_api_key_cache: Dict[str, Tuple[float, dict]] = {}
+# username -> (expires_at, user dict) for active users
+_user_cache: Dict[str, Tuple[float, dict]] = {}
+# api key id -> last time it was used (pending flush)
+_pending_last_used: Dict[int, datetime] = {}
+_last_used_flush_task: Optional[asyncio.Task] = None
+# Bumped on every invalidation; an entry loaded before the bump may predate
+# the change and is not cached
+_auth_generation = 0
+
+
+def _cache_get(cache: Dict[str, Tuple[float, dict]], key: str) -> Optional[dict]:
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        cache.pop(key, None)
+        return None
+    return entry[1]
+
+
+def _cache_put(cache: Dict[str, Tuple[float, dict]], key: str, value: dict, generation: int):
+    if AUTH_CACHE_TTL_SECONDS > 0 and generation == _auth_generation:
+        cache[key] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, value)
+
+
+def invalidate_api_key_cache(key_id: Optional[int] = None):
+    """Drop a cached API key by id (or every cached key)"""
+    global _auth_generation
+    _auth_generation += 1
+    if key_id is None:
+        _api_key_cache.clear()
+        return
+    for key_hash, (_, info) in list(_api_key_cache.items()):
+        if info["id"] == key_id:
+            _api_key_cache.pop(key_hash, None)
+
+
+def invalidate_user_cache(user_id: Optional[int] = None):
+    """Drop a cached user by id (or every cached user)"""
+    global _auth_generation
+    _auth_generation += 1
+    if user_id is None:
+        _user_cache.clear()
+        return
+    for username, (_, user) in list(_user_cache.items()):
+        if user["id"] == user_id:
+            _user_cache.pop(username, None)
+
+
+on_config_changed('users', invalidate_user_cache)
+on_config_changed('api_keys', invalidate_api_key_cache)
+
+
+async def flush_api_key_last_used():
+    """Write coalesced last_used_at values in one batched UPDATE"""
+    if not _pending_last_used:
+        return
+    pending = [
+        {"key_id": key_id, "used_at": used_at}
+        for key_id, used_at in _pending_last_used.items()
+    ]
+    _pending_last_used.clear()
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("""
+                    UPDATE api_keys
+                    SET last_used_at = :used_at
+                    WHERE id = :key_id
+                """),
+                pending
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Failed to flush API key last_used_at ({len(pending)} keys): {e}")
+
+
+async def _last_used_flush_loop():
+    while True:
+        await asyncio.sleep(API_KEY_LAST_USED_FLUSH_SECONDS)
+        await flush_api_key_last_used()
+
+
+def start_last_used_flusher():
+    """Start the background last_used_at flush loop (call on app startup)"""
+    global _last_used_flush_task
+    if _last_used_flush_task is None or _last_used_flush_task.done():
+        _last_used_flush_task = asyncio.create_task(_last_used_flush_loop())
+
+
+async def stop_last_used_flusher():
+    """Stop the flush loop and write anything still pending (call on shutdown)"""
+    global _last_used_flush_task
+    if _last_used_flush_task is not None:
+        _last_used_flush_task.cancel()
+        try:
+            await _last_used_flush_task
+        except asyncio.CancelledError:
+            pass
+        _last_used_flush_task = None
+    await flush_api_key_last_used()
+
+
 async def get_admin_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -112,6 +236,11 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    cached = _cache_get(_user_cache, username)
+    if cached is not None:
+        return dict(cached)
+
+    generation = _auth_generation
     # Query user from database
     result = await db.execute(
         select_user_by_username(username)
@@ -122,13 +251,15 @@ async def get_current_user(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    return {
+    user_info = {
         "id": user.id,
         "username": user.username,
         "display_name": user.display_name,
         "is_active": user.is_active,
         "role": getattr(user, 'role', 'admin') or 'admin'
     }
+    _cache_put(_user_cache, username, user_info, generation)
+    return dict(user_info)
 
 
 def select_user_by_username(username: str):
@@ -233,6 +364,7 @@ async def delete_user(db: AsyncSession, user_id: int, current_user_id: int) -> b
         text("DELETE FROM users WHERE id = :user_id").bindparams(user_id=user_id)
     )
     await db.commit()
+    invalidate_user_cache(user_id)
     return True
 
 
@@ -265,43 +397,45 @@ def generate_api_key() -> tuple[str, str, str]:
 async def verify_api_key(api_key: str, db: AsyncSession) -> Optional[dict]:
     """
     Verify an API key and return key info if valid.
-    Also updates last_used_at timestamp.
+    Also records last_used_at (coalesced in memory, flushed in batches).
     """
     if not api_key or not api_key.startswith("fk_"):
         return None
 
     key_hash = hashlib.sha256(api_key.encode()).hexdigest()
 
-    # Check if key exists and is active
-    result = await db.execute(
-        text("""
-            SELECT id, name, key_prefix, is_active, created_at
-            FROM api_keys
-            WHERE key_hash = :key_hash
-        """),
-        {"key_hash": key_hash}
-    )
-    key_record = result.fetchone()
+    key_info = _cache_get(_api_key_cache, key_hash)
+    if key_info is None:
+        generation = _auth_generation
+        # Check if key exists and is active
+        result = await db.execute(
+            text("""
+                SELECT id, name, key_prefix, is_active, created_at
+                FROM api_keys
+                WHERE key_hash = :key_hash
+            """),
+            {"key_hash": key_hash}
+        )
+        key_record = result.fetchone()
 
-    if not key_record:
-        return None
+        if not key_record:
+            return None
 
-    if not key_record.is_active:
-        return None
+        if not key_record.is_active:
+            return None
 
-    # Update last_used_at
-    await db.execute(
-        text("UPDATE api_keys SET last_used_at = NOW() WHERE id = :key_id"),
-        {"key_id": key_record.id}
-    )
-    await db.commit()
+        key_info = {
+            "id": key_record.id,
+            "name": key_record.name,
+            "key_prefix": key_record.key_prefix,
+            "is_active": key_record.is_active
+        }
+        _cache_put(_api_key_cache, key_hash, key_info, generation)
 
-    return {
-        "id": key_record.id,
-        "name": key_record.name,
-        "key_prefix": key_record.key_prefix,
-        "is_active": key_record.is_active
-    }
+    # Update last_used_at on the next flush
+    _pending_last_used[key_info["id"]] = datetime.now()
+
+    return dict(key_info)
 
 
 async def get_api_key_auth(
@@ -399,6 +533,7 @@ async def revoke_api_key(db: AsyncSession, key_id: int) -> bool:
         {"key_id": key_id}
     )
     await db.commit()
+    invalidate_api_key_cache(key_id)
     return True
 
 
@@ -416,4 +551,6 @@ async def delete_api_key(db: AsyncSession, key_id: int) -> bool:
         {"key_id": key_id}
     )
     await db.commit()
+    invalidate_api_key_cache(key_id)
+    _pending_last_used.pop(key_id, None)
     return True
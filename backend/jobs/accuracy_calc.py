@@ -3,176 +3,200 @@ Accuracy calculation job
 Compares forecasts to actuals once dates have passed
 """
 import logging
+import time
 from datetime import date, timedelta
+from typing import Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from services.forecasting.accuracy_rollup import refresh_accuracy_rollup
 
 logger = logging.getLogger(__name__)
 
+# Models with forecast/error columns on actual_vs_forecast
+# (blended = accuracy-weighted blend written by the daily forecast job)
+ACCURACY_MODELS = ['prophet', 'xgboost', 'pickup', 'catboost', 'blended']
 
-async def run_accuracy_calculation():
+# Candidates for best_model, in tie-break order
+BEST_MODEL_CANDIDATES = ['prophet', 'xgboost', 'pickup', 'catboost']
+
+
+def _build_accuracy_sql() -> str:
+    """
+    Build the single INSERT ... SELECT that computes actual_vs_forecast for a date window.
+
+    For each (date, metric) with an actual, takes the latest forecast of each model
+    generated no later than the date itself, pivots models into columns and
+    computes errors, % errors and the best model in SQL.
+    """
+    pivot_cols = ",\n                ".join(
+        f"MAX(predicted_value) FILTER (WHERE model_type = '{m}') as {m}_val"
+        for m in ACCURACY_MODELS
+    )
+    error_cols = ",\n            ".join(
+        f"p.actual_value - p.{m}_val as {m}_error,\n"
+        f"            (p.actual_value - p.{m}_val) / NULLIF(p.actual_value, 0) * 100 as {m}_pct_error"
+        for m in ACCURACY_MODELS
+    )
+    best_model_values = ",\n                    ".join(
+        f"({i}, '{m}', ABS(p.actual_value - p.{m}_val))"
+        for i, m in enumerate(BEST_MODEL_CANDIDATES)
+    )
+    insert_cols = ",\n            ".join(
+        f"{m}_forecast, {m}_error, {m}_pct_error" for m in ACCURACY_MODELS
+    )
+    select_cols = ",\n            ".join(
+        f"{m}_val, {m}_error, {m}_pct_error" for m in ACCURACY_MODELS
+    )
+    update_cols = ",\n            ".join(
+        f"{m}_forecast = EXCLUDED.{m}_forecast, "
+        f"{m}_error = EXCLUDED.{m}_error, "
+        f"{m}_pct_error = EXCLUDED.{m}_pct_error"
+        for m in ACCURACY_MODELS
+    )
+    value_cols = ", ".join(f"p.{m}_val" for m in ACCURACY_MODELS)
+    model_list = ", ".join(f"'{m}'" for m in ACCURACY_MODELS)
+
+    return f"""
+        WITH latest AS (
+            SELECT DISTINCT ON (forecast_date, forecast_type, model_type)
+                forecast_date, forecast_type, model_type,
+                predicted_value, lower_bound, upper_bound
+            FROM forecasts
+            WHERE forecast_date BETWEEN :from_date AND :to_date
+                AND model_type IN ({model_list})
+                AND generated_at < forecast_date + INTERVAL '1 day'
+            ORDER BY forecast_date, forecast_type, model_type, generated_at DESC
+        ),
+        pivoted AS (
+            SELECT
+                forecast_date,
+                forecast_type,
+                {pivot_cols},
+                MAX(lower_bound) FILTER (WHERE model_type = 'prophet') as prophet_lower,
+                MAX(upper_bound) FILTER (WHERE model_type = 'prophet') as prophet_upper
+            FROM latest
+            GROUP BY forecast_date, forecast_type
+        ),
+        paired AS (
+            SELECT
+                dm.date,
+                dm.metric_code,
+                dm.actual_value,
+                b.budget_value,
+                pv.*
+            FROM daily_metrics dm
+            JOIN forecast_metrics fm ON fm.metric_code = dm.metric_code AND fm.is_active = TRUE
+            LEFT JOIN pivoted pv ON pv.forecast_date = dm.date AND pv.forecast_type = dm.metric_code
+            LEFT JOIN daily_budgets b ON b.date = dm.date AND b.budget_type = dm.metric_code
+            WHERE dm.date BETWEEN :from_date AND :to_date
+                AND dm.actual_value IS NOT NULL
+        ),
+        scored AS (
+            SELECT
+                p.date,
+                p.metric_code,
+                p.actual_value,
+                p.budget_value,
+                p.prophet_lower,
+                p.prophet_upper,
+                {value_cols},
+                {error_cols},
+                (
+                    SELECT c.model
+                    FROM (VALUES
+                    {best_model_values}
+                    ) AS c(ord, model, abs_error)
+                    WHERE c.abs_error IS NOT NULL
+                    ORDER BY c.abs_error, c.ord
+                    LIMIT 1
+                ) as best_model
+            FROM paired p
+        )
+        INSERT INTO actual_vs_forecast (
+            date, metric_type, actual_value, budget_value,
+            prophet_lower, prophet_upper,
+            {insert_cols},
+            best_model, calculated_at
+        )
+        SELECT
+            date, metric_code, actual_value, budget_value,
+            prophet_lower, prophet_upper,
+            {select_cols},
+            best_model, NOW()
+        FROM scored
+        ON CONFLICT (date, metric_type) DO UPDATE SET
+            actual_value = EXCLUDED.actual_value,
+            budget_value = EXCLUDED.budget_value,
+            prophet_lower = EXCLUDED.prophet_lower,
+            prophet_upper = EXCLUDED.prophet_upper,
+            {update_cols},
+            best_model = EXCLUDED.best_model,
+            calculated_at = NOW()
+    """
+
+
+ACCURACY_SQL = _build_accuracy_sql()
+
+
+def calculate_accuracy_range(db, from_date: date, to_date: date) -> int:
+    """
+    Compute actual_vs_forecast for every active metric and model over a date window.
+
+    Runs as one set-based statement, so rebuilding years of history costs the
+    same number of round trips as a single day.
+
+    Args:
+        db: Sync database session
+        from_date: First date to (re)calculate
+        to_date: Last date to (re)calculate
+
+    Returns:
+        Number of actual_vs_forecast rows written
+    """
+    result = db.execute(text(ACCURACY_SQL), {"from_date": from_date, "to_date": to_date})
+    db.commit()
+    return result.rowcount
+
+
+@single_flight("accuracy_calc")
+async def run_accuracy_calculation(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+):
     """
     Calculate forecast accuracy for dates that have passed.
     Updates actual_vs_forecast table with error metrics.
+
+    Args:
+        from_date: First date to calculate (default: yesterday)
+        to_date: Last date to calculate (default: yesterday)
     """
-    logger.info("Starting accuracy calculation")
+    # Default: process yesterday's actuals
+    yesterday = date.today() - timedelta(days=1)
+    from_date = from_date or yesterday
+    to_date = min(to_date or yesterday, yesterday)
+
+    if from_date > to_date:
+        logger.info(f"Accuracy calculation skipped: empty window {from_date} to {to_date}")
+        return {"rows": 0, "from_date": from_date, "to_date": to_date}
+
+    logger.info(f"Starting accuracy calculation for {from_date} to {to_date}")
 
-    db = next(iter([SyncSessionLocal()]))
+    db = SyncSessionLocal()
 
     try:
-        # Process yesterday's actuals
-        calc_date = date.today() - timedelta(days=1)
-
-        # Get all metrics
-        metrics_result = db.execute(
-            text("""
-            SELECT metric_code FROM forecast_metrics WHERE is_active = TRUE
-            """)
-        )
-        metrics = [row.metric_code for row in metrics_result.fetchall()]
-
-        for metric_code in metrics:
-            # Get actual value from daily_metrics
-            actual_result = db.execute(
-                text("""
-                SELECT actual_value FROM daily_metrics
-                WHERE date = :calc_date AND metric_code = :metric_code
-                """),
-                {"calc_date": calc_date, "metric_code": metric_code}
-            )
-            actual_row = actual_result.fetchone()
-            actual_value = actual_row.actual_value if actual_row else None
-
-            if actual_value is None:
-                continue  # Skip if no actual available
-
-            # Get forecasts for this date
-            forecast_result = db.execute(
-                text("""
-                SELECT model_type, predicted_value, lower_bound, upper_bound
-                FROM forecasts
-                WHERE forecast_date = :calc_date AND forecast_type = :metric_code
-                """),
-                {"calc_date": calc_date, "metric_code": metric_code}
-            )
-            forecasts = {row.model_type: row for row in forecast_result.fetchall()}
-
-            prophet_forecast = forecasts.get('prophet')
-            xgboost_forecast = forecasts.get('xgboost')
-            pickup_forecast = forecasts.get('pickup')
-            catboost_forecast = forecasts.get('catboost')
-
-            # Calculate errors
-            def calc_error(forecast_val):
-                if forecast_val is None:
-                    return None, None
-                error = actual_value - forecast_val
-                pct_error = (error / actual_value * 100) if actual_value != 0 else None
-                return error, pct_error
-
-            prophet_error, prophet_pct = calc_error(
-                prophet_forecast.predicted_value if prophet_forecast else None
-            )
-            xgboost_error, xgboost_pct = calc_error(
-                xgboost_forecast.predicted_value if xgboost_forecast else None
-            )
-            pickup_error, pickup_pct = calc_error(
-                pickup_forecast.predicted_value if pickup_forecast else None
-            )
-            catboost_error, catboost_pct = calc_error(
-                catboost_forecast.predicted_value if catboost_forecast else None
-            )
-
-            # Determine best model
-            errors = []
-            if prophet_error is not None:
-                errors.append(('prophet', abs(prophet_error)))
-            if xgboost_error is not None:
-                errors.append(('xgboost', abs(xgboost_error)))
-            if pickup_error is not None:
-                errors.append(('pickup', abs(pickup_error)))
-            if catboost_error is not None:
-                errors.append(('catboost', abs(catboost_error)))
-
-            best_model = min(errors, key=lambda x: x[1])[0] if errors else None
-
-            # Get budget value
-            budget_result = db.execute(
-                text("""
-                SELECT budget_value FROM daily_budgets
-                WHERE date = :calc_date AND budget_type = :metric_code
-                """),
-                {"calc_date": calc_date, "metric_code": metric_code}
-            )
-            budget_row = budget_result.fetchone()
-            budget_value = budget_row.budget_value if budget_row else None
-
-            # Upsert accuracy record
-            db.execute(
-                text("""
-                INSERT INTO actual_vs_forecast (
-                    date, metric_type, actual_value,
-                    prophet_forecast, prophet_lower, prophet_upper,
-                    xgboost_forecast, pickup_forecast,
-                    catboost_forecast,
-                    budget_value,
-                    prophet_error, prophet_pct_error,
-                    xgboost_error, xgboost_pct_error,
-                    pickup_error, pickup_pct_error,
-                    catboost_error, catboost_pct_error,
-                    best_model, calculated_at
-                ) VALUES (
-                    :date, :metric_type, :actual,
-                    :prophet_val, :prophet_lower, :prophet_upper,
-                    :xgboost_val, :pickup_val,
-                    :catboost_val,
-                    :budget,
-                    :prophet_error, :prophet_pct,
-                    :xgboost_error, :xgboost_pct,
-                    :pickup_error, :pickup_pct,
-                    :catboost_error, :catboost_pct,
-                    :best_model, NOW()
-                )
-                ON CONFLICT (date, metric_type) DO UPDATE SET
-                    actual_value = :actual,
-                    prophet_error = :prophet_error,
-                    prophet_pct_error = :prophet_pct,
-                    xgboost_error = :xgboost_error,
-                    xgboost_pct_error = :xgboost_pct,
-                    pickup_error = :pickup_error,
-                    pickup_pct_error = :pickup_pct,
-                    catboost_forecast = :catboost_val,
-                    catboost_error = :catboost_error,
-                    catboost_pct_error = :catboost_pct,
-                    best_model = :best_model,
-                    calculated_at = NOW()
-                """),
-                {
-                    "date": calc_date,
-                    "metric_type": metric_code,
-                    "actual": actual_value,
-                    "prophet_val": prophet_forecast.predicted_value if prophet_forecast else None,
-                    "prophet_lower": prophet_forecast.lower_bound if prophet_forecast else None,
-                    "prophet_upper": prophet_forecast.upper_bound if prophet_forecast else None,
-                    "xgboost_val": xgboost_forecast.predicted_value if xgboost_forecast else None,
-                    "pickup_val": pickup_forecast.predicted_value if pickup_forecast else None,
-                    "catboost_val": catboost_forecast.predicted_value if catboost_forecast else None,
-                    "budget": budget_value,
-                    "prophet_error": prophet_error,
-                    "prophet_pct": prophet_pct,
-                    "xgboost_error": xgboost_error,
-                    "xgboost_pct": xgboost_pct,
-                    "pickup_error": pickup_error,
-                    "pickup_pct": pickup_pct,
-                    "catboost_error": catboost_error,
-                    "catboost_pct": catboost_pct,
-                    "best_model": best_model
-                }
-            )
-
-        db.commit()
-        logger.info(f"Accuracy calculation completed for {calc_date}")
+        started = time.monotonic()
+        rows = calculate_accuracy_range(db, from_date, to_date)
+        elapsed = time.monotonic() - started
+        logger.info(f"Accuracy calculation completed for {from_date} to {to_date}: {rows} rows in {elapsed:.2f}s")
+
+        # Keep the accuracy rollup (used for model weighting) in step
+        refresh_accuracy_rollup(db, 'live', from_date=from_date, to_date=to_date)
+        refresh_accuracy_rollup(db, 'backtest', from_date=from_date, to_date=to_date)
+
+        return {"rows": rows, "from_date": from_date, "to_date": to_date, "seconds": round(elapsed, 2)}
 
     except Exception as e:
         logger.error(f"Accuracy calculation failed: {e}")
@@ -12,10 +12,14 @@ from typing import List, Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+@single_flight("aggregation")
 async def run_aggregation(source: Optional[str] = None):
     """
     Process pending aggregation queue and update daily summary tables.
@@ -66,6 +70,9 @@ async def run_aggregation(source: Optional[str] = None):
         if all_dates:
             await populate_daily_metrics(db, all_dates)
 
+        bump_data_version(db)
+        db.commit()
+
         logger.info("Aggregation completed successfully")
 
     except Exception as e:
@@ -89,19 +96,13 @@ async def aggregate_newbook_dates(db, dates: List[date]):
     """
     logger.info(f"Aggregating {len(dates)} Newbook dates")
 
+    settings = get_settings(db)
+
     # Get fallback total_rooms from system config (used when no occupancy report data)
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'total_rooms'")
-    )
-    row = result.fetchone()
-    fallback_total_rooms = int(row.config_value) if row and row.config_value else 80
+    fallback_total_rooms = settings.get_int('total_rooms', 80)
 
     # Get accommodation VAT rate from config (default 20%)
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-    )
-    row = result.fetchone()
-    accommodation_vat = float(row.config_value) if row and row.config_value else 0.20
+    accommodation_vat = float(settings.vat_rate)
 
     # Statuses that count as "occupied" (case-insensitive check in query)
     # Includes: Confirmed, Unconfirmed, Arrived, Departed, In-House, etc.
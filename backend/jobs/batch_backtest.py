@@ -12,8 +12,11 @@ import warnings
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
 
 from api.special_dates import resolve_special_date
+from services.forecasting.accuracy_rollup import refresh_accuracy_rollup
+from services.forecasting.backtest_cube import refresh_backtest_cube
 
 logger = logging.getLogger(__name__)
 
@@ -156,6 +159,7 @@ def get_lead_time_column(days_out: int) -> str:
         return "d365"
 
 
+@single_flight("batch_backtest:{metric}:{start_perception}:{end_perception}")
 async def run_batch_backtest(
     start_perception: date,
     end_perception: date,
@@ -249,6 +253,11 @@ async def run_batch_backtest(
         backfill_count = await backfill_actuals()
         logger.info(f"Backfilled {backfill_count} actual values")
 
+        # Re-run snapshots may have replaced forecasts that already had actuals
+        if perception_dates:
+            refresh_accuracy_rollup(db, 'backtest', from_date=perception_dates[0])
+            refresh_backtest_cube(db, from_perception=perception_dates[0])
+
         return {
             "perception_dates_processed": len(perception_dates),
             "total_snapshots": total_snapshots,
@@ -1594,6 +1603,12 @@ async def backfill_actuals():
     db = SyncSessionLocal()
 
     try:
+        # Earliest target date about to receive actuals (rollup refresh starts here)
+        first_pending, first_perception = db.execute(text("""
+            SELECT MIN(target_date), MIN(perception_date) FROM forecast_snapshots
+            WHERE actual_value IS NULL AND target_date < CURRENT_DATE
+        """)).fetchone()
+
         # First, update stats-based metrics (occupancy, rooms, guests, ave_guest_rate)
         result1 = db.execute(text("""
             UPDATE forecast_snapshots fs
@@ -1641,6 +1656,10 @@ async def backfill_actuals():
         db.commit()
         count = result1.rowcount + result2.rowcount
         logger.info(f"Backfilled {count} actual values")
+
+        if count and first_pending:
+            refresh_accuracy_rollup(db, 'backtest', from_date=first_pending)
+            refresh_backtest_cube(db, from_perception=first_perception)
         return count
 
     finally:
@@ -13,6 +13,10 @@ from typing import List, Set, Dict, Any, Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.booking_nights import NIGHT_COLUMNS, tariff_rates
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings, read_config_value
 
 logger = logging.getLogger(__name__)
 
@@ -33,16 +37,7 @@ PACE_INTERVALS = [
 ]
 
 
-def get_config_value(db, key: str) -> Optional[str]:
-    """Get a configuration value from system_config table."""
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = :key"),
-        {"key": key}
-    )
-    row = result.fetchone()
-    return row.config_value if row else None
-
-
+@single_flight("bookings_aggregation")
 async def run_bookings_aggregation(triggered_by: str = "manual"):
     """
     Aggregate bookings into newbook_bookings_stats.
@@ -60,7 +55,7 @@ async def run_bookings_aggregation(triggered_by: str = "manual"):
 
     try:
         # Get last aggregation timestamp
-        last_aggregation = get_config_value(db, 'last_bookings_aggregation_at')
+        last_aggregation = read_config_value(db, 'last_bookings_aggregation_at')
         if last_aggregation:
             try:
                 last_ts = datetime.fromisoformat(last_aggregation)
@@ -104,8 +99,7 @@ async def run_bookings_aggregation(triggered_by: str = "manual"):
         logger.info(f"Reaggregating {len(affected_dates)} affected dates")
 
         # Get accommodation VAT rate
-        vat_rate_str = get_config_value(db, 'accommodation_vat_rate')
-        vat_rate = Decimal(vat_rate_str) if vat_rate_str else Decimal('0.20')
+        vat_rate = get_settings(db).vat_rate
 
         # Aggregate each affected date
         for target_date in sorted(affected_dates):
@@ -128,6 +122,7 @@ async def run_bookings_aggregation(triggered_by: str = "manual"):
             """),
             {"now": datetime.now().isoformat()}
         )
+        bump_data_version(db)
 
         db.commit()
         logger.info(f"Bookings aggregation completed: {len(affected_dates)} dates processed")
@@ -211,7 +206,7 @@ async def aggregate_date(db, target_date: date, vat_rate: Decimal):
     # A booking is "in house" if: arrival_date <= date < departure_date
     # Only counts bookings for categories marked as is_included=true in settings
     result = db.execute(
-        text("""
+        text(f"""
             SELECT
                 b.newbook_id,
                 b.category_id,
@@ -219,11 +214,12 @@ async def aggregate_date(db, target_date: date, vat_rate: Decimal):
                 COALESCE(b.adults, 0) as adults,
                 COALESCE(b.children, 0) as children,
                 COALESCE(b.infants, 0) as infants,
-                b.raw_json
+                {NIGHT_COLUMNS}
             FROM newbook_bookings_data b
             JOIN newbook_room_categories c ON b.category_id = c.site_id
-            WHERE b.arrival_date <= :target_date
-            AND b.departure_date > :target_date
+            LEFT JOIN newbook_booking_nights n
+                ON n.newbook_id = b.newbook_id AND n.stay_date = :target_date
+            WHERE b.stay_range @> CAST(:target_date AS date)
             AND b.status IN :valid_statuses
             AND c.is_included = true
         """),
@@ -284,10 +280,8 @@ async def aggregate_date(db, target_date: date, vat_rate: Decimal):
         if cat_id in availability_by_category:
             availability_by_category[cat_id]["booking_count"] += 1
 
-        # Get revenue from tariffs_quoted for this date
-        calculated_amount, net_amount = get_rate_for_date(
-            booking.raw_json, target_date, vat_rate
-        )
+        # Get revenue from the booking's tariff for this night
+        calculated_amount, net_amount = tariff_rates(booking, vat_rate)
         guest_rate_total += calculated_amount
         net_booking_rev_total += net_amount
 
@@ -408,39 +402,6 @@ async def aggregate_date(db, target_date: date, vat_rate: Decimal):
     )
 
 
-def get_rate_for_date(raw_json: dict, target_date: date, vat_rate: Decimal) -> tuple:
-    """
-    Extract rate from tariffs_quoted for specific stay_date.
-
-    Returns tuple of (calculated_amount, net_amount).
-    calculated_amount = gross rate guest paid (for AGR)
-    net_amount = amount after VAT deduction
-    """
-    if not raw_json:
-        return Decimal('0'), Decimal('0')
-
-    tariffs = raw_json.get("tariffs_quoted", [])
-    target_str = target_date.strftime("%Y-%m-%d")
-
-    for tariff in tariffs:
-        if tariff.get("stay_date") == target_str:
-            calculated_amount = Decimal(str(tariff.get("calculated_amount", 0) or 0))
-            charge_amount = Decimal(str(tariff.get("charge_amount", 0) or 0))
-
-            # Try to get net from taxes array if available
-            taxes = tariff.get("taxes", [])
-            if taxes and charge_amount > 0:
-                tax_amount = sum(Decimal(str(t.get("tax_amount", 0) or 0)) for t in taxes)
-                net_amount = charge_amount - tax_amount
-            else:
-                # Fallback: calculate net using VAT rate
-                net_amount = charge_amount / (1 + vat_rate)
-
-            return calculated_amount, net_amount
-
-    return Decimal('0'), Decimal('0')
-
-
 async def update_booking_pace(db):
     """
     Update booking pace table with current snapshots.
@@ -467,8 +428,7 @@ async def update_booking_pace(db):
                 SELECT COUNT(*) as count
                 FROM newbook_bookings_data b
                 JOIN newbook_room_categories c ON b.category_id = c.site_id
-                WHERE b.arrival_date <= :stay_date
-                AND b.departure_date > :stay_date
+                WHERE b.stay_range @> CAST(:stay_date AS date)
                 AND b.status IN :valid_statuses
                 AND c.is_included = true
             """),
@@ -517,8 +477,7 @@ async def update_booking_pace(db):
                 SELECT COUNT(*) as count
                 FROM newbook_bookings_data b
                 JOIN newbook_room_categories c ON b.category_id = c.site_id
-                WHERE b.arrival_date <= :stay_date
-                AND b.departure_date > :stay_date
+                WHERE b.stay_range @> CAST(:stay_date AS date)
                 AND b.status IN :valid_statuses
                 AND c.is_included = true
             """),
@@ -550,8 +509,7 @@ async def fill_occupancy_only_dates(db, vat_rate: Decimal = None):
     stats rows with bookable_count=0, so forecasts can cap correctly.
     """
     if vat_rate is None:
-        vat_rate_str = get_config_value(db, 'accommodation_vat_rate')
-        vat_rate = Decimal(vat_rate_str) if vat_rate_str else Decimal('0.20')
+        vat_rate = get_settings(db).vat_rate
 
     # Find dates with occupancy data but no stats row
     result = db.execute(
@@ -599,8 +557,7 @@ async def backfill_aggregation(db=None):
 
     try:
         # Get VAT rate
-        vat_rate_str = get_config_value(db, 'accommodation_vat_rate')
-        vat_rate = Decimal(vat_rate_str) if vat_rate_str else Decimal('0.20')
+        vat_rate = get_settings(db).vat_rate
 
         # Step 1: Get all unique stay dates from bookings
         print("[BACKFILL] Finding all stay dates...", flush=True)
@@ -719,8 +676,7 @@ async def backfill_pace_for_date(db, stay_date: date, today: date):
                 SELECT COUNT(*) as count
                 FROM newbook_bookings_data b
                 JOIN newbook_room_categories c ON b.category_id = c.site_id
-                WHERE b.arrival_date <= :stay_date
-                AND b.departure_date > :stay_date
+                WHERE b.stay_range @> CAST(:stay_date AS date)
                 AND b.status IN :valid_statuses
                 AND c.is_included = true
                 AND b.booking_placed IS NOT NULL
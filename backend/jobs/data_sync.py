@@ -8,89 +8,28 @@ from typing import Optional, Dict, Set
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
 from services.newbook_client import NewbookClient
 from services.resos_client import ResosClient
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
 
-def get_config_value(db, key: str) -> Optional[str]:
-    """Get a configuration value from system_config table."""
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = :key"),
-        {"key": key}
-    )
-    row = result.fetchone()
-    return row.config_value if row else None
-
-
 def load_newbook_credentials(db) -> dict:
-    """Load Newbook API credentials from database config."""
-    import base64
-
-    def decrypt(value: str) -> str:
-        """Decrypt base64 encoded value"""
-        if not value:
-            return None
-        try:
-            return base64.b64decode(value.encode()).decode()
-        except:
-            return value
-
-    # Get credentials (some are encrypted)
-    api_key_result = db.execute(
-        text("SELECT config_value, is_encrypted FROM system_config WHERE config_key = 'newbook_api_key'")
-    )
-    api_key_row = api_key_result.fetchone()
-
-    password_result = db.execute(
-        text("SELECT config_value, is_encrypted FROM system_config WHERE config_key = 'newbook_password'")
-    )
-    password_row = password_result.fetchone()
-
-    username = get_config_value(db, 'newbook_username')
-    region = get_config_value(db, 'newbook_region')
-
-    api_key = None
-    if api_key_row and api_key_row.config_value:
-        api_key = decrypt(api_key_row.config_value) if api_key_row.is_encrypted else api_key_row.config_value
-
-    password = None
-    if password_row and password_row.config_value:
-        password = decrypt(password_row.config_value) if password_row.is_encrypted else password_row.config_value
-
+    """Load Newbook API credentials (decrypted) from the shared settings."""
+    settings = get_settings(db)
     return {
-        'api_key': api_key,
-        'username': username,
-        'password': password,
-        'region': region
+        'api_key': settings.get('newbook_api_key'),
+        'username': settings.get('newbook_username'),
+        'password': settings.get('newbook_password'),
+        'region': settings.get('newbook_region')
     }
 
 
 def load_resos_credentials(db) -> dict:
-    """Load Resos API credentials from database config."""
-    import base64
-
-    def decrypt(value: str) -> str:
-        """Decrypt base64 encoded value"""
-        if not value:
-            return None
-        try:
-            return base64.b64decode(value.encode()).decode()
-        except:
-            return value
-
-    # Get API key (may be encrypted)
-    api_key_result = db.execute(
-        text("SELECT config_value, is_encrypted FROM system_config WHERE config_key = 'resos_api_key'")
-    )
-    api_key_row = api_key_result.fetchone()
-
-    api_key = None
-    if api_key_row and api_key_row.config_value:
-        api_key = decrypt(api_key_row.config_value) if api_key_row.is_encrypted else api_key_row.config_value
-
-    return {'api_key': api_key}
+    """Load Resos API credentials (decrypted) from the shared settings."""
+    return {'api_key': get_settings(db).get('resos_api_key')}
 
 
 def load_gl_config(db) -> tuple:
@@ -100,17 +39,19 @@ def load_gl_config(db) -> tuple:
     Returns:
         tuple: (breakfast_codes, dinner_codes, breakfast_vat, dinner_vat, gl_mapping)
     """
+    settings = get_settings(db)
+
     # Load configured GL codes
-    breakfast_gl_codes = get_config_value(db, 'newbook_breakfast_gl_codes') or ''
-    dinner_gl_codes = get_config_value(db, 'newbook_dinner_gl_codes') or ''
+    breakfast_gl_codes = settings.get('newbook_breakfast_gl_codes', '')
+    dinner_gl_codes = settings.get('newbook_dinner_gl_codes', '')
 
     # Parse into sets
     breakfast_codes = set(c.strip() for c in breakfast_gl_codes.split(',') if c.strip())
     dinner_codes = set(c.strip() for c in dinner_gl_codes.split(',') if c.strip())
 
     # Load VAT rates
-    breakfast_vat = float(get_config_value(db, 'newbook_breakfast_vat_rate') or 0.20)
-    dinner_vat = float(get_config_value(db, 'newbook_dinner_vat_rate') or 0.20)
+    breakfast_vat = settings.get_float('newbook_breakfast_vat_rate', 0.20)
+    dinner_vat = settings.get_float('newbook_dinner_vat_rate', 0.20)
 
     # Build GL account ID → GL code mapping from cached lookup table
     gl_mapping: Dict[str, str] = {}
@@ -173,6 +114,7 @@ def process_inventory_items(
     }
 
 
+@single_flight("full_sync")
 async def run_data_sync(
     full_sync: bool = False,
     triggered_by: str = "scheduler"
@@ -208,6 +150,7 @@ async def run_data_sync(
         raise
 
 
+@single_flight("newbook:bookings")
 async def sync_newbook_data(
     full_sync: bool = False,
     from_date: Optional[date] = None,
@@ -577,6 +520,7 @@ def load_resos_custom_field_mappings(db) -> Dict[str, dict]:
     return mappings
 
 
+@single_flight("resos:bookings")
 async def sync_resos_data(
     from_date: date,
     to_date: date,
@@ -787,6 +731,7 @@ async def sync_resos_data(
         db.close()
 
 
+@single_flight("newbook:occupancy_report")
 async def sync_newbook_occupancy_report(
     from_date: date,
     to_date: date,
@@ -819,11 +764,7 @@ async def sync_newbook_occupancy_report(
     creds = load_newbook_credentials(db)
 
     # Get accommodation VAT rate for calculating net revenue
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-    )
-    row = result.fetchone()
-    accommodation_vat = float(row.config_value) if row and row.config_value else 0.20
+    accommodation_vat = float(get_settings(db).vat_rate)
 
     try:
         # Log sync start
@@ -995,10 +936,12 @@ async def sync_newbook_occupancy_report(
         db.close()
 
 
+@single_flight("newbook:earned_revenue")
 async def sync_newbook_earned_revenue(
     from_date: date,
     to_date: date,
-    triggered_by: str = "scheduler"
+    triggered_by: str = "scheduler",
+    aggregate: bool = True
 ):
     """
     Sync earned revenue from Newbook's report_earned_revenue endpoint.
@@ -1024,12 +967,10 @@ async def sync_newbook_earned_revenue(
     # Load credentials
     creds = load_newbook_credentials(db)
 
+    settings = get_settings(db)
+
     # Load accommodation GL codes configuration
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_gl_codes'")
-    )
-    row = result.fetchone()
-    accommodation_gl_codes_str = row.config_value if row and row.config_value else ""
+    accommodation_gl_codes_str = settings.get('accommodation_gl_codes', '')
     accommodation_gl_codes = set(c.strip() for c in accommodation_gl_codes_str.split(',') if c.strip())
 
     if not accommodation_gl_codes:
@@ -1037,11 +978,7 @@ async def sync_newbook_earned_revenue(
         print("[SYNC] WARNING: No accommodation_gl_codes configured", flush=True)
 
     # Get accommodation VAT rate for calculating net if not provided
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-    )
-    row = result.fetchone()
-    accommodation_vat = float(row.config_value) if row and row.config_value else 0.20
+    accommodation_vat = float(settings.vat_rate)
 
     try:
         # Log sync start
@@ -1216,6 +1153,9 @@ async def sync_newbook_earned_revenue(
         logger.info(f"Newbook earned revenue sync completed: {records_created} GL records, {days_processed} days")
 
         # Trigger revenue aggregation after successful sync
+        # (the daily pipeline runs it as its own step)
+        if not aggregate:
+            return
         try:
             from jobs.revenue_aggregation import aggregate_revenue
             print("[SYNC] Running revenue aggregation...", flush=True)
@@ -23,6 +23,9 @@ from typing import Dict, Any, Optional, Set
 import asyncio
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -179,6 +182,7 @@ def needs_multi_night_check(tariff: Dict, days_ahead: int) -> Optional[int]:
     return min_stay
 
 
+@single_flight("newbook:current_rates")
 async def run_fetch_current_rates(horizon_days: int = 720, start_date: date = None):
     """
     Fetch current rates for all included categories and store in database.
@@ -203,17 +207,13 @@ async def run_fetch_current_rates(horizon_days: int = 720, start_date: date = No
     today = start_date or date.today()
 
     try:
+        settings = get_settings(db)
+
         # Get VAT rate from config
-        vat_result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-        ).fetchone()
-        vat_rate_str = vat_result.config_value if vat_result and vat_result.config_value else '0.20'
+        vat_rate_str = str(settings.vat_rate)
 
         # Get all included room categories
-        cat_result = db.execute(
-            text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-        )
-        included_categories = set(row.site_id for row in cat_result.fetchall())
+        included_categories = set(settings.included_category_ids)
 
         if not included_categories:
             logger.warning("No included room categories found")
@@ -222,26 +222,14 @@ async def run_fetch_current_rates(horizon_days: int = 720, start_date: date = No
         logger.info(f"Fetching rates for {len(included_categories)} categories")
 
         # Import rates client
-        import base64
         from services.newbook_rates_client import NewbookRatesClient
 
-        # Get credentials from config (decrypt encrypted values)
-        config_result = db.execute(
-            text("""
-                SELECT config_key, config_value, COALESCE(is_encrypted, false) as is_encrypted
-                FROM system_config
-                WHERE config_key IN ('newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region')
-            """)
-        )
-        config = {}
-        for row in config_result.fetchall():
-            value = row.config_value
-            if row.is_encrypted and value:
-                try:
-                    value = base64.b64decode(value.encode()).decode()
-                except Exception:
-                    pass  # Use raw value if decryption fails
-            config[row.config_key] = value
+        # Get credentials from config (decrypted by the settings cache)
+        config = {
+            key: settings.get(key)
+            for key in ('newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region')
+            if settings.get(key) is not None
+        }
 
         if not all(k in config for k in ['newbook_api_key', 'newbook_username', 'newbook_password', 'newbook_region']):
             logger.error("Newbook credentials not configured")
@@ -258,6 +246,7 @@ async def run_fetch_current_rates(horizon_days: int = 720, start_date: date = No
 
         async with client:
             inserted_total = 0
+            bumped_at = 0  # inserted_total at the last data version bump
             verified_total = 0
             multi_night_checks = 0
             skipped_advance = 0
@@ -334,12 +323,17 @@ async def run_fetch_current_rates(horizon_days: int = 720, start_date: date = No
 
                 # Step 5: Commit periodically
                 if day_count % COMMIT_BATCH_SIZE == 0:
+                    if inserted_total > bumped_at:
+                        bump_data_version(db)
+                        bumped_at = inserted_total
                     db.commit()
 
                 current_date += timedelta(days=1)
                 await asyncio.sleep(1.0)  # Rate limiting between days
 
             # Final commit for remaining days
+            if inserted_total > bumped_at:
+                bump_data_version(db)
             db.commit()
 
             if skipped_advance > 0:
@@ -10,10 +10,12 @@ from typing import List, Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
 
+@single_flight("forecast:{horizon_days}:{start_days}")
 async def run_daily_forecast(
     horizon_days: int = 14,
     start_days: int = 0,
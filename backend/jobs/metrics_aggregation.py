@@ -10,10 +10,12 @@ from typing import List, Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
 
+@single_flight("metrics_aggregation")
 async def run_metrics_aggregation(
     from_date: Optional[date] = None,
     to_date: Optional[date] = None
@@ -15,6 +15,10 @@ from typing import Dict, List, Optional
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.booking_nights import NIGHT_COLUMNS, tariff_rates
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -60,35 +64,7 @@ def get_lead_time_column(lead_days: int) -> str:
         return "d365"
 
 
-def get_rate_for_date(raw_json: dict, target_date: date, vat_rate: Decimal) -> Decimal:
-    """
-    Extract net accommodation rate from tariffs_quoted for a specific stay_date.
-    Returns net amount (after VAT deduction).
-    """
-    if not raw_json:
-        return Decimal('0')
-
-    tariffs = raw_json.get("tariffs_quoted", [])
-    target_str = target_date.strftime("%Y-%m-%d")
-
-    for tariff in tariffs:
-        if tariff.get("stay_date") == target_str:
-            charge_amount = Decimal(str(tariff.get("charge_amount", 0) or 0))
-
-            # Try to get net from taxes array if available
-            taxes = tariff.get("taxes", [])
-            if taxes and charge_amount > 0:
-                tax_amount = sum(Decimal(str(t.get("amount", 0) or 0)) for t in taxes)
-                net_amount = charge_amount - tax_amount
-            else:
-                # Fallback: calculate net using VAT rate
-                net_amount = charge_amount / (1 + vat_rate)
-
-            return net_amount
-
-    return Decimal('0')
-
-
+@single_flight("pace_snapshot_v2")
 async def run_pace_snapshot_v2():
     """
     Capture per-category room counts and total revenue at each lead time.
@@ -103,17 +79,13 @@ async def run_pace_snapshot_v2():
     today = date.today()
 
     try:
+        settings = get_settings(db)
+
         # Get accommodation VAT rate from config
-        vat_result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-        ).fetchone()
-        vat_rate = Decimal(vat_result.config_value) if vat_result and vat_result.config_value else Decimal('0.20')
+        vat_rate = settings.vat_rate
 
         # Get all included room categories
-        cat_result = db.execute(
-            text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-        )
-        included_categories = [row.site_id for row in cat_result.fetchall()]
+        included_categories = settings.included_category_ids
 
         if not included_categories:
             logger.warning("No included room categories found")
@@ -154,6 +126,7 @@ async def run_pace_snapshot_v2():
         # Also fill gap dates (31-36, 38-43, etc.) with their bracketed column
         await fill_gap_dates(db, today, vat_rate, included_categories)
 
+        bump_data_version(db)
         db.commit()
         logger.info(f"Pace snapshot v2 completed for {today}")
 
@@ -174,8 +147,7 @@ async def capture_category_counts(db, stay_date: date, included_categories: List
         text("""
             SELECT category_id, COUNT(*) as count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :stay_date
-            AND departure_date > :stay_date
+            WHERE stay_range @> CAST(:stay_date AS date)
             AND status IN :valid_statuses
             AND category_id IN :categories
             GROUP BY category_id
@@ -196,22 +168,22 @@ async def capture_booked_revenue(db, stay_date: date, vat_rate: Decimal, include
     Sums up tariffs from all active bookings that span this date.
     """
     result = db.execute(
-        text("""
-            SELECT raw_json
-            FROM newbook_bookings_data
-            WHERE arrival_date <= :stay_date
-            AND departure_date > :stay_date
-            AND status IN :valid_statuses
-            AND category_id IN :categories
+        text(f"""
+            SELECT {NIGHT_COLUMNS}
+            FROM newbook_bookings_data b
+            JOIN newbook_booking_nights n
+                ON n.newbook_id = b.newbook_id AND n.stay_date = :stay_date
+            WHERE b.stay_range @> CAST(:stay_date AS date)
+            AND b.status IN :valid_statuses
+            AND b.category_id IN :categories
         """),
         {"stay_date": stay_date, "valid_statuses": VALID_STATUSES, "categories": tuple(included_categories)}
     )
 
     total_revenue = Decimal('0')
     for row in result.fetchall():
-        if row.raw_json:
-            revenue = get_rate_for_date(row.raw_json, stay_date, vat_rate)
-            total_revenue += revenue
+        _, revenue = tariff_rates(row, vat_rate)
+        total_revenue += revenue
 
     return total_revenue
 
@@ -276,17 +248,13 @@ async def backfill_pace_v2(db=None):
         close_db = True
 
     try:
+        settings = get_settings(db)
+
         # Get VAT rate
-        vat_result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-        ).fetchone()
-        vat_rate = Decimal(vat_result.config_value) if vat_result and vat_result.config_value else Decimal('0.20')
+        vat_rate = settings.vat_rate
 
         # Get included categories
-        cat_result = db.execute(
-            text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-        )
-        included_categories = [row.site_id for row in cat_result.fetchall()]
+        included_categories = settings.included_category_ids
 
         if not included_categories:
             print("[PACE-V2-BACKFILL] No included categories found", flush=True)
@@ -309,10 +277,12 @@ async def backfill_pace_v2(db=None):
         for i, stay_date in enumerate(stay_dates):
             if i % 100 == 0:
                 print(f"[PACE-V2-BACKFILL] Processing: {i}/{len(stay_dates)} dates...", flush=True)
+                bump_data_version(db)
                 db.commit()
 
             await backfill_pace_v2_for_date(db, stay_date, today, vat_rate, included_categories)
 
+        bump_data_version(db)
         db.commit()
         print(f"[PACE-V2-BACKFILL] Complete: {len(stay_dates)} dates processed", flush=True)
 
@@ -353,8 +323,7 @@ async def backfill_pace_v2_for_date(
             text("""
                 SELECT category_id, COUNT(*) as count
                 FROM newbook_bookings_data
-                WHERE arrival_date <= :stay_date
-                AND departure_date > :stay_date
+                WHERE stay_range @> CAST(:stay_date AS date)
                 AND status IN :valid_statuses
                 AND category_id IN :categories
                 AND booking_placed IS NOT NULL
@@ -374,15 +343,16 @@ async def backfill_pace_v2_for_date(
 
         # Calculate revenue that was booked at snapshot_date
         result = db.execute(
-            text("""
-                SELECT raw_json
-                FROM newbook_bookings_data
-                WHERE arrival_date <= :stay_date
-                AND departure_date > :stay_date
-                AND status IN :valid_statuses
-                AND category_id IN :categories
-                AND booking_placed IS NOT NULL
-                AND booking_placed::date <= :snapshot_date
+            text(f"""
+                SELECT {NIGHT_COLUMNS}
+                FROM newbook_bookings_data b
+                JOIN newbook_booking_nights n
+                    ON n.newbook_id = b.newbook_id AND n.stay_date = :stay_date
+                WHERE b.stay_range @> CAST(:stay_date AS date)
+                AND b.status IN :valid_statuses
+                AND b.category_id IN :categories
+                AND b.booking_placed IS NOT NULL
+                AND b.booking_placed::date <= :snapshot_date
             """),
             {
                 "stay_date": stay_date,
@@ -394,9 +364,8 @@ async def backfill_pace_v2_for_date(
 
         total_revenue = Decimal('0')
         for row in result.fetchall():
-            if row.raw_json:
-                revenue = get_rate_for_date(row.raw_json, stay_date, vat_rate)
-                total_revenue += revenue
+            _, revenue = tariff_rates(row, vat_rate)
+            total_revenue += revenue
 
         pace_revenue_values[column_name] = total_revenue
 
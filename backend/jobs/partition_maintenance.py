@@ -0,0 +1,56 @@
+"""
+Partition maintenance job
+Keeps yearly partitions of forecast_snapshots / forecast_history ahead of the
+calendar and applies retention by dropping whole expired partitions.
+"""
+import logging
+
+from database import SyncSessionLocal
+from services.forecast_partitions import (
+    PARTITIONED_TABLES,
+    drop_expired_partitions,
+    ensure_partitions,
+)
+from services.forecasting.accuracy_rollup import refresh_accuracy_rollup
+from services.forecasting.backtest_cube import refresh_backtest_cube
+from utils.settings_cache import get_settings
+from services.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def get_retention_years(db, key: str) -> int:
+    """Get retention in years from system_config (unset/invalid = 0 = keep all)"""
+    return get_settings(db).get_int(key, 0)
+
+
+@single_flight("partition_maintenance")
+async def run_partition_maintenance():
+    """
+    Ensure current and next year partitions exist and drop expired ones.
+
+    Rollup tables derived from forecast_snapshots are rebuilt when snapshot
+    partitions are dropped.
+    """
+    db = SyncSessionLocal()
+
+    try:
+        summary = {}
+        for table, retention_key in PARTITIONED_TABLES.items():
+            ensured = ensure_partitions(db, table)
+            dropped = drop_expired_partitions(db, table, get_retention_years(db, retention_key))
+            summary[table] = {"ensured": ensured, "dropped": dropped}
+
+        if summary["forecast_snapshots"]["dropped"]:
+            refresh_accuracy_rollup(db, 'backtest')
+            refresh_backtest_cube(db)
+
+        logger.info(f"Partition maintenance completed: {summary}")
+        return summary
+
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
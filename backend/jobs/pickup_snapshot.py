@@ -5,204 +5,242 @@ Used by the pickup model for pace comparison
 Prior year comparison uses 364 days (52 weeks) for day-of-week alignment:
 - Monday compares to Monday
 - Saturday compares to Saturday
+
+The whole horizon is captured set-based: grouped queries over
+generate_series produce every (stay_date, metric) row, written to
+pickup_snapshots with one bulk upsert. Each run is logged to snapshot_runs.
 """
 import logging
-from datetime import date, timedelta
+import time
+from datetime import date, datetime, timedelta
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
 from utils.time_alignment import get_prior_year_daily, SQL_PRIOR_YEAR_OFFSET
 
 logger = logging.getLogger(__name__)
 
+# Capture OTB for the next 365 days (extended from 60 for longer-term forecasting)
+SNAPSHOT_DAYS = 365
+
+# Overflow room category is used for chargeable no-shows/cancellations
+# and is excluded from room night counts
+OVERFLOW_CATEGORY_ID = '5'
+
+# Used when the occupancy report has no availability for a date
+DEFAULT_TOTAL_ROOMS = 25
+
+# One row per (stay_date, metric):
+# - hotel_occupancy_pct: room count as % of available rooms
+# - hotel_room_nights: raw room count
+# - resos_dinner_covers / resos_lunch_covers: cover counts
+# Prior year hotel OTB is reconstructed from booking_placed at the same lead
+# time; restaurant metrics fall back to last year's snapshot at that lead time.
+SNAPSHOT_UPSERT_SQL = """
+    WITH dates AS (
+        SELECT d::date AS stay_date,
+               d::date - CAST(:snapshot_date AS date) AS days_out,
+               d::date - :prior_offset AS prior_stay_date
+        FROM generate_series(CAST(:first_date AS date), CAST(:last_date AS date), INTERVAL '1 day') d
+    ),
+    rooms AS (
+        SELECT date, SUM(available) AS total_rooms
+        FROM newbook_occupancy_report
+        WHERE date BETWEEN CAST(:first_date AS date) AND CAST(:last_date AS date)
+        GROUP BY date
+    ),
+    hotel AS (
+        SELECT d.stay_date,
+               COUNT(DISTINCT b.newbook_id) AS bookings,
+               SUM(CASE WHEN LOWER(b.status) IN ('confirmed', 'provisional', 'unconfirmed', 'arrived') THEN 1 ELSE 0 END) AS active_bookings
+        FROM dates d
+        JOIN newbook_bookings b ON b.arrival_date <= d.stay_date AND b.departure_date > d.stay_date
+        WHERE LOWER(b.status) NOT IN ('cancelled', 'no show', 'no_show', 'quote', 'waitlist')
+            AND (b.category_id IS NULL OR b.category_id != :overflow_cat)
+        GROUP BY d.stay_date
+    ),
+    prior_hotel AS (
+        SELECT d.stay_date, COUNT(DISTINCT b.newbook_id) AS otb_count
+        FROM dates d
+        JOIN newbook_bookings b ON b.arrival_date <= d.prior_stay_date AND b.departure_date > d.prior_stay_date
+        WHERE LOWER(b.status) NOT IN ('cancelled', 'no show', 'no_show', 'quote', 'waitlist')
+            AND (b.raw_json->>'booking_placed')::timestamp <= CAST(:prior_snapshot_date AS timestamp)
+            AND (b.category_id IS NULL OR b.category_id != :overflow_cat)
+        GROUP BY d.stay_date
+    ),
+    covers AS (
+        SELECT booking_date,
+               COUNT(*) FILTER (WHERE booking_time >= '15:00') AS dinner_bookings,
+               COALESCE(SUM(covers) FILTER (WHERE booking_time >= '15:00'), 0) AS dinner_covers,
+               COUNT(*) FILTER (WHERE booking_time < '15:00') AS lunch_bookings,
+               COALESCE(SUM(covers) FILTER (WHERE booking_time < '15:00'), 0) AS lunch_covers
+        FROM resos_bookings
+        WHERE booking_date BETWEEN CAST(:first_date AS date) AND CAST(:last_date AS date)
+            AND LOWER(status) NOT IN ('cancelled', 'no show', 'no_show')
+        GROUP BY booking_date
+    ),
+    otb AS (
+        SELECT d.stay_date, d.days_out, d.prior_stay_date,
+               COALESCE(NULLIF(r.total_rooms, 0), :default_rooms) AS total_rooms,
+               COALESCE(h.active_bookings, 0) AS hotel_otb,
+               COALESCE(ph.otb_count, 0) AS prior_hotel_otb,
+               COALESCE(c.dinner_covers, 0) AS dinner_covers,
+               COALESCE(c.lunch_covers, 0) AS lunch_covers
+        FROM dates d
+        LEFT JOIN rooms r ON r.date = d.stay_date
+        LEFT JOIN hotel h ON h.stay_date = d.stay_date
+        LEFT JOIN prior_hotel ph ON ph.stay_date = d.stay_date
+        LEFT JOIN covers c ON c.booking_date = d.stay_date
+    ),
+    metric_values AS (
+        SELECT o.stay_date, o.days_out, o.prior_stay_date, v.metric_type, v.otb_raw, v.otb_value, v.prior_otb
+        FROM otb o
+        CROSS JOIN LATERAL (VALUES
+            ('hotel_occupancy_pct', o.hotel_otb, o.hotel_otb * 100.0 / o.total_rooms, o.prior_hotel_otb * 100.0 / o.total_rooms),
+            ('hotel_room_nights', o.hotel_otb, o.hotel_otb::numeric, o.prior_hotel_otb::numeric),
+            ('resos_dinner_covers', o.dinner_covers, o.dinner_covers::numeric, NULL::numeric),
+            ('resos_lunch_covers', o.lunch_covers, o.lunch_covers::numeric, NULL::numeric)
+        ) AS v(metric_type, otb_raw, otb_value, prior_otb)
+    ),
+    prior_snapshots AS (
+        SELECT DISTINCT ON (stay_date, metric_type) stay_date, metric_type, otb_value
+        FROM pickup_snapshots
+        WHERE stay_date BETWEEN CAST(:first_date AS date) - :prior_offset AND CAST(:last_date AS date) - :prior_offset
+            AND metric_type IN ('resos_dinner_covers', 'resos_lunch_covers')
+            AND days_out = stay_date + :prior_offset - CAST(:snapshot_date AS date)
+        ORDER BY stay_date, metric_type, snapshot_date DESC
+    ),
+    prior_final AS (
+        SELECT date, metric_code, actual_value
+        FROM daily_metrics
+        WHERE date BETWEEN CAST(:first_date AS date) - :prior_offset AND CAST(:last_date AS date) - :prior_offset
+            AND metric_code IN ('hotel_occupancy_pct', 'hotel_room_nights', 'resos_dinner_covers', 'resos_lunch_covers')
+    ),
+    snapshot_rows AS (
+        SELECT mv.stay_date, mv.days_out, mv.metric_type, mv.otb_raw, mv.otb_value,
+               COALESCE(mv.prior_otb, ps.otb_value) AS prior_year_otb,
+               NULLIF(pf.actual_value, 0) AS prior_year_final
+        FROM metric_values mv
+        LEFT JOIN prior_snapshots ps ON ps.stay_date = mv.prior_stay_date AND ps.metric_type = mv.metric_type
+        LEFT JOIN prior_final pf ON pf.date = mv.prior_stay_date AND pf.metric_code = mv.metric_type
+    ),
+    paced AS (
+        SELECT sr.*,
+               CASE WHEN sr.prior_year_otb > 0
+                    THEN (sr.otb_value - sr.prior_year_otb) / sr.prior_year_otb * 100 END AS pace_pct
+        FROM snapshot_rows sr
+    )
+    INSERT INTO pickup_snapshots (
+        snapshot_date, stay_date, days_out, metric_type,
+        otb_value, otb_bookings, prior_year_otb, prior_year_final,
+        pace_vs_prior_pct, created_at
+    )
+    SELECT CAST(:snapshot_date AS date), stay_date, days_out, metric_type,
+           ROUND(otb_value, 2), otb_raw, ROUND(prior_year_otb, 2), prior_year_final,
+           CASE WHEN pace_pct <> 0 THEN ROUND(pace_pct, 2) END, NOW()
+    FROM paced
+    ON CONFLICT (snapshot_date, stay_date, metric_type) DO UPDATE SET
+        otb_value = EXCLUDED.otb_value,
+        prior_year_otb = EXCLUDED.prior_year_otb,
+        pace_vs_prior_pct = EXCLUDED.pace_vs_prior_pct
+"""
+
 
+def _record_run(db, snapshot_date: date, started_at: datetime, seconds: float, status: str,
+                rows_written=None, error=None):
+    db.execute(
+        text("""
+            INSERT INTO snapshot_runs (
+                snapshot, snapshot_date, status, stay_dates, rows_written,
+                started_at, duration_seconds, error_message
+            ) VALUES (
+                'pickup_snapshot', :snapshot_date, :status, :stay_dates, :rows_written,
+                :started_at, :seconds, :error
+            )
+        """),
+        {
+            "snapshot_date": snapshot_date,
+            "status": status,
+            "stay_dates": SNAPSHOT_DAYS,
+            "rows_written": rows_written,
+            "started_at": started_at,
+            "seconds": round(seconds, 2),
+            "error": error[:2000] if error else None,
+        }
+    )
+    db.commit()
+
+
+@single_flight("pickup_snapshot")
 async def run_pickup_snapshot():
     """
     Capture daily on-the-books snapshot for future dates.
     Stores OTB values at various lead times for pickup model.
+
+    Returns:
+        Dict with snapshot_date, rows_written and duration_seconds
     """
     logger.info("Starting pickup snapshot capture")
 
-    db = next(iter([SyncSessionLocal()]))
+    db = SyncSessionLocal()
     snapshot_date = date.today()
-
-    # Overflow room category (category_id=5) is used for chargeable no-shows/cancellations
-    # and should be excluded from room night counts
-    overflow_category_id = '5'
+    started_at = datetime.now()
+    started = time.perf_counter()
 
     try:
-        # Capture OTB for next 365 days (extended from 60 for longer-term forecasting)
-        for days_out in range(1, 366):
-            stay_date = snapshot_date + timedelta(days=days_out)
-
-            # Get total available rooms for this date from occupancy report
-            rooms_result = db.execute(
-                text("""
-                SELECT COALESCE(SUM(available), 25) as total_rooms
-                FROM newbook_occupancy_report
-                WHERE date = :stay_date
-                """),
-                {"stay_date": stay_date}
-            ).fetchone()
-            total_rooms = rooms_result.total_rooms if rooms_result and rooms_result.total_rooms else 25
-
-            # Get hotel occupancy OTB (count rooms on the books for this stay date)
-            # EXCLUDES overflow category (chargeable no-shows)
-            hotel_result = db.execute(
-                text("""
-                SELECT COUNT(DISTINCT newbook_id) as bookings,
-                       SUM(CASE WHEN LOWER(status) IN ('confirmed', 'provisional', 'unconfirmed', 'arrived') THEN 1 ELSE 0 END) as active_bookings
-                FROM newbook_bookings
-                WHERE arrival_date <= :stay_date AND departure_date > :stay_date
-                    AND LOWER(status) NOT IN ('cancelled', 'no show', 'no_show', 'quote', 'waitlist')
-                    AND (category_id IS NULL OR category_id != :overflow_cat)
-                """),
-                {"stay_date": stay_date, "overflow_cat": overflow_category_id}
-            )
-            hotel_row = hotel_result.fetchone()
-            hotel_otb = hotel_row.active_bookings or 0
-
-            # Get dinner covers OTB
-            dinner_result = db.execute(
-                text("""
-                SELECT COUNT(*) as bookings, COALESCE(SUM(covers), 0) as total_covers
-                FROM resos_bookings
-                WHERE booking_date = :stay_date
-                    AND LOWER(status) NOT IN ('cancelled', 'no show', 'no_show')
-                    AND booking_time >= '15:00'
-                """),
-                {"stay_date": stay_date}
-            )
-            dinner_row = dinner_result.fetchone()
-            dinner_otb = dinner_row.total_covers or 0
-
-            # Get lunch covers OTB
-            lunch_result = db.execute(
-                text("""
-                SELECT COUNT(*) as bookings, COALESCE(SUM(covers), 0) as total_covers
-                FROM resos_bookings
-                WHERE booking_date = :stay_date
-                    AND LOWER(status) NOT IN ('cancelled', 'no show', 'no_show')
-                    AND booking_time < '15:00'
-                """),
-                {"stay_date": stay_date}
-            )
-            lunch_row = lunch_result.fetchone()
-            lunch_otb = lunch_row.total_covers or 0
-
-            # Get prior year comparison data (same day of week, exactly 52 weeks ago)
-            # Uses SQL_PRIOR_YEAR_OFFSET (364 days = 52 weeks) for Mon→Mon, Sat→Sat alignment
-            prior_year_stay_date = get_prior_year_daily(stay_date)
-            prior_year_snapshot_date = get_prior_year_daily(snapshot_date)  # Same lead time last year
-
-            # Calculate prior year hotel OTB at same lead time using booking_placed
-            # EXCLUDES overflow category
-            prior_hotel_otb_result = db.execute(
-                text("""
-                SELECT COUNT(DISTINCT newbook_id) as otb_count
-                FROM newbook_bookings
-                WHERE arrival_date <= :prior_stay_date
-                    AND departure_date > :prior_stay_date
-                    AND LOWER(status) NOT IN ('cancelled', 'no show', 'no_show', 'quote', 'waitlist')
-                    AND (raw_json->>'booking_placed')::timestamp <= :prior_snapshot_date
-                    AND (category_id IS NULL OR category_id != :overflow_cat)
-                """),
-                {"prior_stay_date": prior_year_stay_date, "prior_snapshot_date": prior_year_snapshot_date, "overflow_cat": overflow_category_id}
-            ).fetchone()
-            prior_hotel_otb = prior_hotel_otb_result.otb_count if prior_hotel_otb_result else None
-
-            # Store snapshots for each metric
-            # For hotel_occupancy_pct: store room count, convert to % for otb_value
-            # For hotel_room_nights: store raw room count (no conversion)
-            # For restaurant: store cover counts directly
-            for metric_type, otb_raw, otb_bookings_count in [
-                ('hotel_occupancy_pct', hotel_otb, hotel_row.bookings),
-                ('hotel_room_nights', hotel_otb, hotel_row.bookings),  # Same count, stored as-is
-                ('resos_dinner_covers', dinner_otb, dinner_row.bookings),
-                ('resos_lunch_covers', lunch_otb, lunch_row.bookings)
-            ]:
-                # Convert to percentage for occupancy metric, keep raw counts for others
-                if metric_type == 'hotel_occupancy_pct':
-                    otb_value = (otb_raw / total_rooms) * 100 if total_rooms > 0 else 0
-                    # Use 'is not None' check - 0 is valid data (no bookings at that lead time)
-                    prior_otb_value = (prior_hotel_otb / total_rooms) * 100 if prior_hotel_otb is not None and total_rooms > 0 else None
-                elif metric_type == 'hotel_room_nights':
-                    otb_value = otb_raw  # Raw room count
-                    prior_otb_value = prior_hotel_otb  # Raw room count from prior year
-                else:
-                    otb_value = otb_raw
-                    prior_otb_value = None  # Will try historical snapshots below
-
-                # Get prior year ACTUAL from daily_metrics (the final outcome)
-                prior_final_result = db.execute(
-                    text("""
-                    SELECT actual_value
-                    FROM daily_metrics
-                    WHERE date = :prior_date AND metric_code = :metric
-                    """),
-                    {"prior_date": prior_year_stay_date, "metric": metric_type}
-                ).fetchone()
-                prior_final = float(prior_final_result.actual_value) if prior_final_result and prior_final_result.actual_value else None
-
-                # Use reconstructed prior year OTB for hotel metrics, or try historical snapshots
-                if metric_type in ('hotel_occupancy_pct', 'hotel_room_nights') and prior_otb_value is not None:
-                    prior_otb = prior_otb_value
-                else:
-                    # For restaurant metrics, fall back to historical snapshots
-                    prior_otb_result = db.execute(
-                        text("""
-                        SELECT otb_value
-                        FROM pickup_snapshots
-                        WHERE stay_date = :prior_stay_date
-                            AND metric_type = :metric
-                            AND days_out = :days_out
-                        ORDER BY snapshot_date DESC LIMIT 1
-                        """),
-                        {"prior_stay_date": prior_year_stay_date, "metric": metric_type, "days_out": days_out}
-                    ).fetchone()
-                    # Use 'is not None' - 0 is valid OTB data
-                    prior_otb = float(prior_otb_result.otb_value) if prior_otb_result and prior_otb_result.otb_value is not None else None
-
-                # Calculate pace vs prior year if we have comparison data
-                pace_pct = None
-                if prior_otb and prior_otb > 0:
-                    pace_pct = ((otb_value - prior_otb) / prior_otb) * 100
-
-                db.execute(
-                    text("""
-                    INSERT INTO pickup_snapshots (
-                        snapshot_date, stay_date, days_out, metric_type,
-                        otb_value, otb_bookings, prior_year_otb, prior_year_final,
-                        pace_vs_prior_pct, created_at
-                    ) VALUES (
-                        :snapshot_date, :stay_date, :days_out, :metric_type,
-                        :otb_value, :otb_bookings, :prior_year_otb, :prior_year_final,
-                        :pace_pct, NOW()
-                    )
-                    ON CONFLICT (snapshot_date, stay_date, metric_type) DO UPDATE SET
-                        otb_value = :otb_value,
-                        prior_year_otb = :prior_year_otb,
-                        pace_vs_prior_pct = :pace_pct
-                    """),
-                    {
-                        "snapshot_date": snapshot_date,
-                        "stay_date": stay_date,
-                        "days_out": days_out,
-                        "metric_type": metric_type,
-                        "otb_value": round(otb_value, 2),  # % for hotel, covers for restaurant
-                        "otb_bookings": otb_raw,  # Raw count (rooms or covers)
-                        "prior_year_otb": round(prior_otb, 2) if prior_otb is not None else None,
-                        "prior_year_final": prior_final,
-                        "pace_pct": round(pace_pct, 2) if pace_pct else None
-                    }
-                )
-
+        result = db.execute(
+            text(SNAPSHOT_UPSERT_SQL),
+            {
+                "snapshot_date": snapshot_date,
+                "first_date": snapshot_date + timedelta(days=1),
+                "last_date": snapshot_date + timedelta(days=SNAPSHOT_DAYS),
+                # Same lead time last year, 52 weeks back
+                "prior_snapshot_date": get_prior_year_daily(snapshot_date),
+                "prior_offset": SQL_PRIOR_YEAR_OFFSET,
+                "overflow_cat": OVERFLOW_CATEGORY_ID,
+                "default_rooms": DEFAULT_TOTAL_ROOMS,
+            }
+        )
+        rows_written = result.rowcount
         db.commit()
-        logger.info(f"Pickup snapshot completed for {snapshot_date}")
+
+        seconds = time.perf_counter() - started
+        _record_run(db, snapshot_date, started_at, seconds, 'completed', rows_written=rows_written)
+        logger.info(f"Pickup snapshot completed for {snapshot_date}: {rows_written} rows in {seconds:.1f}s")
+        return {
+            "snapshot_date": snapshot_date.isoformat(),
+            "rows_written": rows_written,
+            "duration_seconds": round(seconds, 2),
+        }
 
     except Exception as e:
         logger.error(f"Pickup snapshot failed: {e}")
         db.rollback()
+        try:
+            _record_run(db, snapshot_date, started_at, time.perf_counter() - started, 'failed', error=str(e))
+        except Exception as record_error:
+            logger.warning(f"Could not record failed pickup snapshot run: {record_error}")
+            db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@single_flight("pickup_curves")
+async def run_pickup_curves_update(triggered_by: str = "scheduler"):
+    """
+    Rebuild pickup_curves from pickup_snapshots and final actuals.
+    Runs in the daily pipeline after the snapshot capture.
+    """
+    from services.forecasting.pickup_model import update_pickup_curves
+
+    db = SyncSessionLocal()
+    try:
+        return await update_pickup_curves(db, triggered_by=triggered_by)
+    except Exception as e:
+        logger.error(f"Pickup curves update failed: {e}")
+        db.rollback()
         raise
     finally:
         db.close()
@@ -0,0 +1,326 @@
+"""
+Daily job pipeline - dependency-driven batch
+
+Each node names the job_queue job it runs and the nodes it waits for. A
+node is queued the moment its last upstream node finishes, so the Newbook
+and Resos branches run side by side on the workers and nothing waits on a
+fixed clock offset:
+
+    newbook bookings sync ─> bookings aggregation ─> pace v1 ─> pickup curves ─┐
+                                                  └> pace v2 ──────────────────┤
+    newbook occupancy / earned revenue / current rates ────────────────────────┤
+    resos bookings sync ─> resos aggregation ──────────────────────────────────┼─> forecasts ─> snapshot ─> accuracy
+    resos sync ─> daily aggregation ───────────────────────────────────────────┘
+
+State lives in pipeline_runs / pipeline_node_runs; every transition happens
+with the pipeline_runs row locked, so two workers finishing sibling nodes at
+the same moment can't both (or neither) queue the shared downstream node.
+Per-edge timings are written to pipeline_edge_runs.
+"""
+import logging
+from datetime import date, datetime, time
+from typing import Optional
+
+from sqlalchemy import text
+
+from database import SyncSessionLocal
+from services.job_queue import NOTIFY_SQL, encode_payload
+from utils.settings_cache import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Node spec:
+#   job       - job_queue job name (jobs/registry.py)
+#   kwargs    - job keyword arguments
+#   requires  - upstream nodes whose output this node processes; if one
+#               fails, this node is cancelled
+#   after     - upstream nodes this node only has to wait for; it still runs
+#               (on the data it has) if they fail
+#   weekdays  - only run on these date.weekday() values, skipped otherwise
+#   not_before - (system_config key, default 'HH:MM'): once ready, the job is
+#               queued with run_after at that time on the run's day
+DAILY_PIPELINE = {
+    # Newbook branch
+    'newbook_bookings_sync': {'job': 'newbook_sync', 'kwargs': {'aggregate': False}},
+    'newbook_occupancy_sync': {'job': 'newbook_occupancy_report'},
+    'newbook_earned_revenue_sync': {'job': 'newbook_earned_revenue', 'kwargs': {'aggregate': False}},
+    'current_rates': {'job': 'fetch_current_rates'},
+    'bookings_aggregation': {
+        'job': 'bookings_aggregation',
+        'requires': ['newbook_bookings_sync'],
+        'after': ['newbook_occupancy_sync'],
+    },
+    'revenue_aggregation': {
+        'job': 'revenue_aggregation',
+        'requires': ['newbook_earned_revenue_sync'],
+    },
+    'pace_v1': {'job': 'pickup_snapshot', 'after': ['bookings_aggregation']},
+    'pickup_curves': {'job': 'pickup_curves', 'after': ['pace_v1']},
+    'pace_v2': {'job': 'pace_snapshot_v2', 'after': ['bookings_aggregation', 'current_rates']},
+
+    # Resos branch
+    'resos_bookings_sync': {'job': 'resos_bookings_sync', 'kwargs': {'aggregate': False}},
+    'resos_aggregation': {'job': 'resos_aggregation', 'requires': ['resos_bookings_sync']},
+    'resos_sync': {'job': 'resos_sync', 'not_before': ('sync_schedule_time', '05:05')},
+
+    # Legacy daily_occupancy / daily_covers aggregation (aggregation_queue)
+    'aggregation': {
+        'job': 'aggregation',
+        'after': ['newbook_bookings_sync', 'newbook_occupancy_sync', 'resos_sync'],
+    },
+
+    # Forecasts
+    'forecast_daily': {
+        'job': 'forecast',
+        'kwargs': {'horizon_days': 28, 'models': ['prophet', 'xgboost', 'pickup', 'catboost']},
+        'after': ['pickup_curves', 'pace_v2', 'revenue_aggregation', 'resos_aggregation', 'aggregation'],
+    },
+    'forecast_weekly': {
+        'job': 'forecast',
+        'kwargs': {'horizon_days': 365, 'start_days': 29, 'models': ['prophet', 'xgboost']},
+        'after': ['pickup_curves', 'pace_v2', 'revenue_aggregation', 'resos_aggregation', 'aggregation'],
+        'weekdays': [0],
+    },
+    'weekly_snapshot': {
+        'job': 'weekly_forecast_snapshot',
+        'after': ['forecast_daily', 'forecast_weekly'],
+        'weekdays': [0],
+        'not_before': ('forecast_snapshot_time', '06:00'),
+    },
+    'accuracy': {'job': 'accuracy_calc', 'after': ['forecast_daily', 'weekly_snapshot']},
+}
+
+PIPELINES = {
+    'daily': DAILY_PIPELINE,
+}
+
+# Node states that no longer block downstream nodes
+FINISHED_STATES = ('completed', 'failed', 'skipped', 'cancelled')
+
+# A run still 'running' after this long is assumed abandoned when the next starts
+STALE_RUN_HOURS = 20
+
+
+def _upstream(spec: dict) -> list:
+    return spec.get('requires', []) + spec.get('after', [])
+
+
+def _set_node(db, run_id: int, node: str, status: str, error: Optional[str] = None):
+    db.execute(
+        text("""
+            UPDATE pipeline_node_runs
+            SET status = :status, completed_at = NOW(), error_message = :error
+            WHERE run_id = :run_id AND node = :node
+        """),
+        {"run_id": run_id, "node": node, "status": status, "error": error}
+    )
+
+
+def _not_before(db, spec: dict, run_date: date) -> Optional[datetime]:
+    """Earliest start for a node with a not_before setting, else None"""
+    if 'not_before' not in spec:
+        return None
+    key, default = spec['not_before']
+    value = get_settings(db).get(key) or default
+    try:
+        hour, minute = (int(part) for part in value.split(':')[:2])
+    except ValueError:
+        logger.warning(f"Invalid time format for {key}: {value}, using {default}")
+        hour, minute = (int(part) for part in default.split(':'))
+    return datetime.combine(run_date, time(hour, minute))
+
+
+def _queue_node(db, run_id: int, node: str, spec: dict, triggered_by: str, run_date: date) -> int:
+    queue_id = db.execute(
+        text("""
+            INSERT INTO job_queue (job_name, payload, triggered_by, pipeline_run_id, pipeline_node, run_after)
+            VALUES (
+                :job_name, CAST(:payload AS jsonb), :triggered_by, :run_id, :node,
+                GREATEST(NOW(), COALESCE(CAST(:not_before AS timestamp), NOW()))
+            )
+            RETURNING id
+        """),
+        {
+            "job_name": spec['job'],
+            "payload": encode_payload(spec.get('kwargs')),
+            "triggered_by": triggered_by,
+            "run_id": run_id,
+            "node": node,
+            "not_before": _not_before(db, spec, run_date),
+        }
+    ).scalar()
+    db.execute(
+        text("""
+            UPDATE pipeline_node_runs
+            SET status = 'queued', queue_id = :queue_id, queued_at = NOW()
+            WHERE run_id = :run_id AND node = :node
+        """),
+        {"run_id": run_id, "node": node, "queue_id": queue_id}
+    )
+    db.execute(text(NOTIFY_SQL), {"job_name": spec['job']})
+    return queue_id
+
+
+def _advance(db, run_id: int):
+    """
+    Queue every pending node whose upstream nodes have all finished, then
+    close the run once nothing is left. Caller commits.
+    """
+    run = db.execute(
+        text("SELECT pipeline, status, triggered_by, started_at FROM pipeline_runs WHERE id = :id FOR UPDATE"),
+        {"id": run_id}
+    ).fetchone()
+    if not run or run.status != 'running':
+        return
+
+    graph = PIPELINES[run.pipeline]
+    states = {
+        row.node: row.status
+        for row in db.execute(
+            text("SELECT node, status FROM pipeline_node_runs WHERE run_id = :id"),
+            {"id": run_id}
+        ).fetchall()
+    }
+    run_weekday = run.started_at.date().weekday()
+    triggered_by = f"pipeline:{run_id}"
+
+    # Nodes are declared in dependency order, so one pass settles cascades
+    for node, spec in graph.items():
+        if states.get(node) != 'pending':
+            continue
+        if any(states.get(up) not in FINISHED_STATES for up in _upstream(spec)):
+            continue
+
+        failed = [up for up in spec.get('requires', []) if states.get(up) in ('failed', 'cancelled')]
+        if failed:
+            states[node] = 'cancelled'
+            _set_node(db, run_id, node, 'cancelled', f"Upstream failed: {', '.join(failed)}")
+        elif 'weekdays' in spec and run_weekday not in spec['weekdays']:
+            states[node] = 'skipped'
+            _set_node(db, run_id, node, 'skipped')
+        else:
+            states[node] = 'queued'
+            _queue_node(db, run_id, node, spec, triggered_by, run.started_at.date())
+
+    if all(state in FINISHED_STATES for state in states.values()):
+        status = 'failed' if any(state in ('failed', 'cancelled') for state in states.values()) else 'completed'
+        db.execute(
+            text("UPDATE pipeline_runs SET status = :status, completed_at = NOW() WHERE id = :id"),
+            {"id": run_id, "status": status}
+        )
+        logger.info(f"Pipeline {run.pipeline} #{run_id} {status}")
+
+
+def start_pipeline(pipeline: str = 'daily', triggered_by: str = "scheduler") -> Optional[int]:
+    """
+    Start a pipeline run and queue its root nodes.
+
+    Returns:
+        pipeline_runs id, or None if a run of this pipeline is still going
+    """
+    graph = PIPELINES[pipeline]
+    db = SyncSessionLocal()
+    try:
+        # Serialise starts so a manual trigger and the cron can't both win
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('pipeline:' || :pipeline))"), {"pipeline": pipeline})
+        db.execute(
+            text(f"""
+                UPDATE pipeline_runs SET status = 'failed', completed_at = NOW()
+                WHERE pipeline = :pipeline AND status = 'running'
+                AND started_at < NOW() - INTERVAL '{STALE_RUN_HOURS} hours'
+            """),
+            {"pipeline": pipeline}
+        )
+        active = db.execute(
+            text("SELECT id FROM pipeline_runs WHERE pipeline = :pipeline AND status = 'running' LIMIT 1"),
+            {"pipeline": pipeline}
+        ).scalar()
+        if active:
+            logger.warning(f"Pipeline {pipeline} not started: run #{active} still running")
+            db.rollback()
+            return None
+
+        run_id = db.execute(
+            text("INSERT INTO pipeline_runs (pipeline, triggered_by) VALUES (:pipeline, :triggered_by) RETURNING id"),
+            {"pipeline": pipeline, "triggered_by": triggered_by}
+        ).scalar()
+        db.execute(
+            text("INSERT INTO pipeline_node_runs (run_id, node) SELECT :run_id, unnest(CAST(:nodes AS text[]))"),
+            {"run_id": run_id, "nodes": list(graph)}
+        )
+        _advance(db, run_id)
+        db.commit()
+        logger.info(f"Pipeline {pipeline} #{run_id} started ({len(graph)} nodes, triggered_by={triggered_by})")
+        return run_id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def node_started(db, run_id: int, node: str):
+    """Called by the worker when it picks up a pipeline node's job"""
+    db.execute(
+        text("""
+            UPDATE pipeline_node_runs SET status = 'running', started_at = NOW()
+            WHERE run_id = :run_id AND node = :node
+        """),
+        {"run_id": run_id, "node": node}
+    )
+    db.commit()
+
+
+def node_finished(db, run_id: int, node: str, status: str, error: Optional[str] = None):
+    """
+    Record a node's outcome and its incoming edge timings, then queue
+    whatever it unblocked. Commits.
+    """
+    try:
+        pipeline = db.execute(
+            text("SELECT pipeline FROM pipeline_runs WHERE id = :id FOR UPDATE"),
+            {"id": run_id}
+        ).scalar()
+        db.execute(
+            text("""
+                UPDATE pipeline_node_runs
+                SET status = :status, completed_at = NOW(), error_message = :error,
+                    started_at = COALESCE(started_at, queued_at)
+                WHERE run_id = :run_id AND node = :node
+            """),
+            {"run_id": run_id, "node": node, "status": status, "error": error[:2000] if error else None}
+        )
+
+        graph = PIPELINES.get(pipeline, {})
+        upstream = _upstream(graph[node]) if node in graph else []
+        if upstream:
+            db.execute(
+                text("""
+                    INSERT INTO pipeline_edge_runs (
+                        run_id, upstream, downstream,
+                        upstream_completed_at, downstream_started_at, downstream_completed_at,
+                        wait_seconds, duration_seconds
+                    )
+                    SELECT d.run_id, u.node, d.node,
+                           u.completed_at, d.started_at, d.completed_at,
+                           EXTRACT(EPOCH FROM d.started_at - u.completed_at),
+                           EXTRACT(EPOCH FROM d.completed_at - u.completed_at)
+                    FROM pipeline_node_runs d
+                    JOIN pipeline_node_runs u ON u.run_id = d.run_id AND u.node = ANY(:upstream)
+                    WHERE d.run_id = :run_id AND d.node = :node
+                    ON CONFLICT (run_id, upstream, downstream) DO NOTHING
+                """),
+                {"run_id": run_id, "node": node, "upstream": upstream}
+            )
+
+        _advance(db, run_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Pipeline #{run_id}: could not record {node} {status}: {e}")
+        raise
+
+
+def run_daily_pipeline(triggered_by: str = "scheduler") -> Optional[int]:
+    """Scheduler entry point for the daily batch"""
+    return start_pipeline('daily', triggered_by=triggered_by)
@@ -0,0 +1,87 @@
+"""
+Job registry
+
+Maps job_queue.job_name to the function a worker runs. Functions may be sync
+or async; queued payloads are passed as keyword arguments.
+"""
+from api.bookability import _refresh_date_sync
+from api.competitor_rates import run_scrape_sync
+from api.forecast import _run_forecast_in_background
+from api.resos_sync import run_resos_sync_task
+from api.sync import run_backfill_job
+from api.sync_bookings import (
+    run_bookings_data_sync,
+    run_current_rates_sync,
+    run_earned_revenue_data_sync,
+    run_occupancy_data_sync,
+)
+from jobs.accuracy_calc import run_accuracy_calculation
+from jobs.aggregation import run_aggregation
+from jobs.batch_backtest import run_batch_backtest
+from jobs.bookings_aggregation import run_bookings_aggregation
+from jobs.data_sync import (
+    run_data_sync,
+    sync_newbook_data,
+    sync_newbook_earned_revenue,
+    sync_newbook_occupancy_report,
+    sync_resos_data,
+)
+from jobs.forecast_daily import run_daily_forecast
+from jobs.pace_snapshot_v2 import run_pace_snapshot_v2
+from jobs.partition_maintenance import run_partition_maintenance
+from jobs.pickup_snapshot import run_pickup_curves_update, run_pickup_snapshot
+from jobs.resos_aggregation import aggregate_resos_bookings
+from jobs.revenue_aggregation import aggregate_revenue
+from jobs.scrape_booking_rates import run_scheduled_booking_scrape_async
+from jobs.weekly_forecast_snapshot import run_weekly_forecast_snapshot
+from scheduler import (
+    run_scheduled_current_rates_sync,
+    run_scheduled_earned_revenue_sync,
+    run_scheduled_newbook_sync,
+    run_scheduled_occupancy_report_sync,
+    run_scheduled_resos_bookings_sync,
+    run_scheduled_resos_sync,
+)
+from services.export_service import run_export_job
+
+JOB_REGISTRY = {
+    # Scheduled (wrappers check the sync_*_enabled flags)
+    'newbook_sync': run_scheduled_newbook_sync,
+    'resos_bookings_sync': run_scheduled_resos_bookings_sync,
+    'resos_sync': run_scheduled_resos_sync,
+    'newbook_occupancy_report': run_scheduled_occupancy_report_sync,
+    'newbook_earned_revenue': run_scheduled_earned_revenue_sync,
+    'fetch_current_rates': run_scheduled_current_rates_sync,
+    'booking_scrape': run_scheduled_booking_scrape_async,
+    'aggregation': run_aggregation,
+    'pickup_snapshot': run_pickup_snapshot,
+    'pickup_curves': run_pickup_curves_update,
+    'pace_snapshot_v2': run_pace_snapshot_v2,
+    'forecast': run_daily_forecast,
+    'accuracy_calc': run_accuracy_calculation,
+    'partition_maintenance': run_partition_maintenance,
+    'weekly_forecast_snapshot': run_weekly_forecast_snapshot,
+
+    # Daily pipeline steps (jobs/pipeline.py)
+    'bookings_aggregation': run_bookings_aggregation,
+    'resos_aggregation': aggregate_resos_bookings,
+    'revenue_aggregation': aggregate_revenue,
+
+    # Manual triggers (/sync, /forecast, /backtest, ...)
+    'newbook_data_sync': sync_newbook_data,
+    'resos_data_sync': sync_resos_data,
+    'occupancy_report_sync': sync_newbook_occupancy_report,
+    'earned_revenue_sync': sync_newbook_earned_revenue,
+    'full_sync': run_data_sync,
+    'backfill': run_backfill_job,
+    'bookings_data_sync': run_bookings_data_sync,
+    'occupancy_data_sync': run_occupancy_data_sync,
+    'earned_revenue_data_sync': run_earned_revenue_data_sync,
+    'current_rates_sync': run_current_rates_sync,
+    'resos_bookings_data_sync': run_resos_sync_task,
+    'forecast_regenerate': _run_forecast_in_background,
+    'batch_backtest': run_batch_backtest,
+    'competitor_scrape': run_scrape_sync,
+    'rate_refresh_date': _refresh_date_sync,
+    'export': run_export_job,
+}
@@ -3,15 +3,19 @@ Resos Bookings Aggregation Job
 Aggregates resos_bookings_data into:
 - resos_bookings_stats: daily aggregated stats with period/source breakdowns
 - resos_booking_pace: lead-time snapshots for pickup forecasting (3 types)
+- resos_pickup_curves: DOW x lead-time pickup quantiles for the covers model
 """
 import json
 import logging
+import time
 from datetime import date, datetime, timedelta
 from typing import Set, Dict, Any, Optional, Tuple, List
 from collections import defaultdict
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.response_cache import bump_data_version
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,86 @@ PACE_INTERVALS = [
     10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 0
 ]
 
+# Pickup curve history windows (same-DOW dates)
+PICKUP_CURVE_LOOKBACK_WEEKS = 8
+DINING_RATE_LOOKBACK_WEEKS = 4
+
+
+def _build_pickup_curves_sql() -> str:
+    """
+    Build the INSERT rebuilding resos_pickup_curves.
+
+    Pace rows are ranked per (pace_type, DOW) with a window function so only the
+    last N same-DOW dates count, unpivoted to one row per lead day, and reduced
+    to pickup quantiles (pickup = final covers - OTB at lead, floored at 0).
+    Resident dining rates (resident covers / hotel guests) are stored alongside
+    as period 'dinner', segment 'resident_rate', lead_day 0.
+    """
+    lead_values = ", ".join(f"({d}, r.d{d})" for d in sorted(PACE_INTERVALS) if d > 0)
+    quantiles = """
+            COUNT(*),
+            percentile_cont(0.1) WITHIN GROUP (ORDER BY value),
+            percentile_cont(0.25) WITHIN GROUP (ORDER BY value),
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY value),
+            percentile_cont(0.75) WITHIN GROUP (ORDER BY value),
+            percentile_cont(0.9) WITHIN GROUP (ORDER BY value),
+            NOW()"""
+
+    return f"""
+        WITH recent_pace AS (
+            SELECT
+                p.*,
+                EXTRACT(DOW FROM booking_date)::int as dow,
+                ROW_NUMBER() OVER (
+                    PARTITION BY pace_type, EXTRACT(DOW FROM booking_date)
+                    ORDER BY booking_date DESC
+                ) as rn
+            FROM resos_booking_pace p
+            WHERE booking_date >= CURRENT_DATE - CAST(:pickup_lookback_days AS INTEGER)
+            AND booking_date < CURRENT_DATE
+            AND d0 > 0
+        ),
+        pickups AS (
+            SELECT
+                r.pace_type as segment,
+                r.dow,
+                v.lead_day,
+                GREATEST(0, COALESCE(r.d0, 0) - COALESCE(v.otb, 0)) as value
+            FROM recent_pace r
+            CROSS JOIN LATERAL (VALUES {lead_values}) AS v(lead_day, otb)
+            WHERE r.rn <= :pickup_weeks
+        ),
+        dining AS (
+            SELECT
+                EXTRACT(DOW FROM nbs.date)::int as dow,
+                LEAST(1.0, rbs.hotel_guest_covers::numeric / nbs.guests_count) as value,
+                ROW_NUMBER() OVER (
+                    PARTITION BY EXTRACT(DOW FROM nbs.date)
+                    ORDER BY nbs.date DESC
+                ) as rn
+            FROM newbook_bookings_stats nbs
+            JOIN resos_bookings_stats rbs ON nbs.date = rbs.date
+            WHERE nbs.date >= CURRENT_DATE - CAST(:dining_lookback_days AS INTEGER)
+            AND nbs.date < CURRENT_DATE
+            AND nbs.guests_count > 0
+        )
+        INSERT INTO resos_pickup_curves (
+            period, segment, dow, lead_day,
+            sample_size, p10, p25, median, p75, p90, updated_at
+        )
+        SELECT 'all', segment, dow, lead_day,{quantiles}
+        FROM pickups
+        GROUP BY segment, dow, lead_day
+        UNION ALL
+        SELECT 'dinner', 'resident_rate', dow, 0,{quantiles}
+        FROM dining
+        WHERE rn <= :dining_weeks
+        GROUP BY dow
+    """
+
+
+PICKUP_CURVES_SQL = _build_pickup_curves_sql()
+
 
 def parse_group_exclude_field(group_exclude_field: Optional[str], primary_booking_number: Optional[str]) -> Tuple[List[str], List[str]]:
     """
@@ -66,6 +150,7 @@ def parse_group_exclude_field(group_exclude_field: Optional[str], primary_bookin
     return all_booking_numbers, exclude_numbers
 
 
+@single_flight("resos_aggregation")
 async def aggregate_resos_bookings(triggered_by: str = "manual"):
     """
     Aggregate Resos bookings into resos_bookings_stats.
@@ -110,9 +195,9 @@ async def aggregate_resos_bookings(triggered_by: str = "manual"):
 
         if not changed_bookings:
             logger.info("No changed bookings to aggregate")
-            # Still update pace table
+            # Still update pace table (and the pickup curves built from it)
             await update_resos_booking_pace(db)
-            db.commit()
+            rebuild_resos_pickup_curves(db)
 
             # Update timestamp
             db.execute(
@@ -125,6 +210,7 @@ async def aggregate_resos_bookings(triggered_by: str = "manual"):
                 """),
                 {"now": datetime.now().isoformat()}
             )
+            bump_data_version(db)
             db.commit()
             return
 
@@ -142,8 +228,9 @@ async def aggregate_resos_bookings(triggered_by: str = "manual"):
         for target_date in sorted(affected_dates):
             await aggregate_date(db, target_date)
 
-        # Update booking pace table (3 types)
+        # Update booking pace table (3 types) and the pickup curves built from it
         await update_resos_booking_pace(db)
+        rebuild_resos_pickup_curves(db)
 
         # Update last aggregation timestamp
         db.execute(
@@ -156,6 +243,7 @@ async def aggregate_resos_bookings(triggered_by: str = "manual"):
             """),
             {"now": datetime.now().isoformat()}
         )
+        bump_data_version(db)
 
         db.commit()
         logger.info(f"Resos bookings aggregation completed: {len(affected_dates)} dates processed")
@@ -474,3 +562,30 @@ async def update_resos_booking_pace(db):
 
     db.commit()
     logger.info("Resos booking pace table updated (3 types: total, resident, non_resident)")
+
+
+def rebuild_resos_pickup_curves(db) -> int:
+    """
+    Rebuild resos_pickup_curves from resos_booking_pace in one statement.
+
+    Run after update_resos_booking_pace. The covers model then looks up
+    median / quantile pickup by (period, segment, dow, lead_day) instead of
+    recomputing medians over the pace table on every call.
+
+    Returns:
+        Number of curve rows written
+    """
+    started = time.monotonic()
+    db.execute(text("DELETE FROM resos_pickup_curves"))
+    result = db.execute(
+        text(PICKUP_CURVES_SQL),
+        {
+            "pickup_lookback_days": PICKUP_CURVE_LOOKBACK_WEEKS * 7,
+            "pickup_weeks": PICKUP_CURVE_LOOKBACK_WEEKS,
+            "dining_lookback_days": DINING_RATE_LOOKBACK_WEEKS * 7,
+            "dining_weeks": DINING_RATE_LOOKBACK_WEEKS,
+        }
+    )
+    db.commit()
+    logger.info(f"Resos pickup curves rebuilt: {result.rowcount} rows in {time.monotonic() - started:.2f}s")
+    return result.rowcount
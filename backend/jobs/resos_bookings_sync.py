@@ -5,12 +5,14 @@ Pattern: Replicates newbook bookings sync but adapted for Resos covers/stats
 """
 import json
 import logging
-import base64
 from datetime import date, datetime, timedelta
 from typing import Optional, Tuple, List, Dict, Any
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.response_cache import bump_data_version
+from utils.settings_cache import get_settings
 from services.resos_client import ResosClient
 
 logger = logging.getLogger(__name__)
@@ -20,27 +22,6 @@ logger = logging.getLogger(__name__)
 VALID_STATUSES = ('approved', 'arrived', 'seated', 'left')
 
 
-def get_config_value(db, key: str) -> Optional[str]:
-    """Get a configuration value from system_config table."""
-    result = db.execute(
-        text("SELECT config_value, is_encrypted FROM system_config WHERE config_key = :key"),
-        {"key": key}
-    )
-    row = result.fetchone()
-    if not row or not row.config_value:
-        return None
-
-    # Decrypt if encrypted
-    if row.is_encrypted:
-        try:
-            return base64.b64decode(row.config_value.encode()).decode()
-        except Exception as e:
-            logger.warning(f"Failed to decrypt {key}: {e}")
-            return row.config_value
-
-    return row.config_value
-
-
 def load_resos_custom_field_mappings(db) -> Dict[str, Dict[str, Any]]:
     """
     Load custom field mappings from resos_custom_field_mapping table.
@@ -168,10 +149,12 @@ def extract_custom_field_value(custom_fields: List[Dict[str, Any]], field_id: st
     return str(field_value) if field_value else str(field_value_label) if field_value_label else None
 
 
+@single_flight("resos:bookings_data")
 async def sync_resos_bookings_data(
     from_date: date,
     to_date: date,
-    triggered_by: str = "scheduler"
+    triggered_by: str = "scheduler",
+    aggregate: bool = True
 ):
     """
     Sync Resos bookings to resos_bookings_data.
@@ -195,7 +178,7 @@ async def sync_resos_bookings_data(
         db.commit()
 
         # Load Resos API key
-        api_key = get_config_value(db, 'resos_api_key')
+        api_key = get_settings(db).get('resos_api_key')
 
         if not api_key:
             raise Exception("Resos API key not configured")
@@ -363,19 +346,20 @@ async def sync_resos_bookings_data(
                 """),
                 {"fetched": len(bookings), "created": records_created, "updated": records_updated}
             )
+            bump_data_version(db)
             db.commit()
 
             logger.info(f"Resos bookings sync completed: {records_created} created, {records_updated} updated")
 
-            # Trigger aggregation
-            logger.info("Triggering Resos bookings aggregation...")
-            try:
-                import asyncio
-                from jobs.resos_aggregation import aggregate_resos_bookings
-                await aggregate_resos_bookings(triggered_by=triggered_by)
-                logger.info("Resos bookings aggregation completed")
-            except Exception as agg_error:
-                logger.warning(f"Resos aggregation failed (non-fatal): {agg_error}")
+            # Trigger aggregation (the daily pipeline runs it as its own step)
+            if aggregate:
+                logger.info("Triggering Resos bookings aggregation...")
+                try:
+                    from jobs.resos_aggregation import aggregate_resos_bookings
+                    await aggregate_resos_bookings(triggered_by=triggered_by)
+                    logger.info("Resos bookings aggregation completed")
+                except Exception as agg_error:
+                    logger.warning(f"Resos aggregation failed (non-fatal): {agg_error}")
 
     except Exception as e:
         logger.error(f"Resos bookings sync failed: {e}", exc_info=True)
@@ -1,22 +1,55 @@
 """
 Revenue aggregation - consolidates earned revenue by department
+
+newbook_net_revenue_data is maintained incrementally: each run pivots every
+date with earned revenue rows fetched since the last run's fetched_at
+watermark into accommodation / dry / wet in one INSERT ... SELECT ... GROUP BY
+date. A backfill is the same statement over all dates.
 """
 import logging
 from datetime import datetime
+from typing import Optional
+
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.response_cache import bump_data_version
+from utils.settings_cache import read_config_value
 
 logger = logging.getLogger(__name__)
 
-
-def get_config_value(db, key: str) -> str | None:
-    """Get a config value from system_config"""
-    result = db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = :key"),
-        {"key": key}
+WATERMARK_KEY = 'last_revenue_aggregation_at'
+
+# Rows stamped just before the watermark can commit after it was read (the
+# sync stamps fetched_at = NOW() at transaction start), so each run re-reads
+# this much before it. Re-aggregating a date is idempotent.
+WATERMARK_OVERLAP_MINUTES = 10
+
+# Pivot departments per date. :changed_only limits it to dates with rows
+# fetched in (:since, :until]; otherwise every date is recomputed.
+AGGREGATE_SQL = f"""
+    INSERT INTO newbook_net_revenue_data (date, accommodation, dry, wet, aggregated_at)
+    SELECT
+        e.date,
+        ROUND(COALESCE(SUM(e.amount_net) FILTER (WHERE g.department = 'accommodation'), 0), 2),
+        ROUND(COALESCE(SUM(e.amount_net) FILTER (WHERE g.department = 'dry'), 0), 2),
+        ROUND(COALESCE(SUM(e.amount_net) FILTER (WHERE g.department = 'wet'), 0), 2),
+        NOW()
+    FROM newbook_earned_revenue_data e
+    LEFT JOIN newbook_gl_accounts g ON e.gl_code = g.gl_code
+    WHERE NOT CAST(:changed_only AS boolean) OR e.date IN (
+        SELECT DISTINCT date
+        FROM newbook_earned_revenue_data
+        WHERE fetched_at > CAST(:since AS timestamp) - INTERVAL '{WATERMARK_OVERLAP_MINUTES} minutes'
+        AND fetched_at <= CAST(:until AS timestamp)
     )
-    row = result.fetchone()
-    return row.config_value if row else None
+    GROUP BY e.date
+    ON CONFLICT (date) DO UPDATE SET
+        accommodation = EXCLUDED.accommodation,
+        dry = EXCLUDED.dry,
+        wet = EXCLUDED.wet,
+        aggregated_at = NOW()
+"""
 
 
 def set_config_value(db, key: str, value: str):
@@ -33,13 +66,54 @@ def set_config_value(db, key: str, value: str):
     )
 
 
+def run_revenue_aggregation(db, since_timestamp: Optional[str] = None) -> dict:
+    """
+    Aggregate revenue for dates fetched after since_timestamp, or all dates
+    when it is None, and advance the watermark (sync session, commits).
+    """
+    started = datetime.now()
+
+    # Newest row this run covers; becomes the next run's watermark
+    until = db.execute(text("SELECT MAX(fetched_at) FROM newbook_earned_revenue_data")).scalar()
+    if until is None:
+        logger.info("No revenue data to aggregate")
+        return {"dates_processed": 0, "message": "No new data"}
+
+    if since_timestamp:
+        logger.info(f"Aggregating revenue data fetched since {since_timestamp}")
+    else:
+        logger.info("Aggregating all revenue data")
+
+    result = db.execute(
+        text(AGGREGATE_SQL),
+        {"changed_only": since_timestamp is not None, "since": since_timestamp, "until": until}
+    )
+    dates_processed = result.rowcount
+
+    set_config_value(db, WATERMARK_KEY, until.isoformat())
+    if dates_processed:
+        bump_data_version(db)
+    db.commit()
+
+    seconds = (datetime.now() - started).total_seconds()
+    logger.info(f"Revenue aggregation complete: {dates_processed} dates in {seconds:.1f}s")
+    return {
+        "dates_processed": dates_processed,
+        "watermark": until.isoformat(),
+        "seconds": round(seconds, 2),
+        "message": f"Aggregated {dates_processed} dates" if dates_processed else "No new data"
+    }
+
+
+@single_flight("revenue_aggregation")
 async def aggregate_revenue(since_timestamp: str = None):
     """
     Aggregate earned revenue data by department into newbook_net_revenue_data.
 
     - Joins newbook_earned_revenue_data with newbook_gl_accounts to get department
     - Sums net amounts by date and department
-    - Only processes dates with data fetched since last aggregation (or all if first run)
+    - Only processes dates with data fetched since the last run's watermark
+      (or all if first run)
 
     Args:
         since_timestamp: Optional timestamp to process data from (ISO format)
@@ -49,91 +123,9 @@ async def aggregate_revenue(since_timestamp: str = None):
 
     db = SyncSessionLocal()
     try:
-        # Get last aggregation time if not provided
         if since_timestamp is None:
-            since_timestamp = get_config_value(db, 'last_revenue_aggregation_at')
-
-        # Find dates with new/updated data
-        if since_timestamp:
-            logger.info(f"Aggregating revenue data updated since {since_timestamp}")
-            result = db.execute(
-                text("""
-                    SELECT DISTINCT date
-                    FROM newbook_earned_revenue_data
-                    WHERE fetched_at > :since
-                    ORDER BY date
-                """),
-                {"since": since_timestamp}
-            )
-        else:
-            logger.info("Aggregating all revenue data (first run)")
-            result = db.execute(
-                text("""
-                    SELECT DISTINCT date
-                    FROM newbook_earned_revenue_data
-                    ORDER BY date
-                """)
-            )
-
-        dates_to_process = [row.date for row in result.fetchall()]
-
-        if not dates_to_process:
-            logger.info("No new revenue data to aggregate")
-            return {"dates_processed": 0, "message": "No new data"}
-
-        logger.info(f"Found {len(dates_to_process)} dates to aggregate")
-
-        # Aggregate each date
-        for target_date in dates_to_process:
-            # Get totals by department for this date
-            result = db.execute(
-                text("""
-                    SELECT
-                        COALESCE(g.department, 'other') as department,
-                        SUM(e.amount_net) as total_net
-                    FROM newbook_earned_revenue_data e
-                    LEFT JOIN newbook_gl_accounts g ON e.gl_code = g.gl_code
-                    WHERE e.date = :date
-                    GROUP BY g.department
-                """),
-                {"date": target_date}
-            )
-
-            totals = {"accommodation": 0, "dry": 0, "wet": 0}
-            for row in result.fetchall():
-                if row.department in totals:
-                    totals[row.department] = float(row.total_net or 0)
-
-            # Upsert into newbook_net_revenue_data
-            db.execute(
-                text("""
-                    INSERT INTO newbook_net_revenue_data (date, accommodation, dry, wet, aggregated_at)
-                    VALUES (:date, :accommodation, :dry, :wet, NOW())
-                    ON CONFLICT (date) DO UPDATE SET
-                        accommodation = :accommodation,
-                        dry = :dry,
-                        wet = :wet,
-                        aggregated_at = NOW()
-                """),
-                {
-                    "date": target_date,
-                    "accommodation": round(totals["accommodation"], 2),
-                    "dry": round(totals["dry"], 2),
-                    "wet": round(totals["wet"], 2)
-                }
-            )
-
-        db.commit()
-
-        # Update last aggregation timestamp
-        set_config_value(db, 'last_revenue_aggregation_at', datetime.now().isoformat())
-        db.commit()
-
-        logger.info(f"Revenue aggregation complete: {len(dates_to_process)} dates")
-        return {
-            "dates_processed": len(dates_to_process),
-            "message": f"Aggregated {len(dates_to_process)} dates"
-        }
+            since_timestamp = read_config_value(db, WATERMARK_KEY)
+        return run_revenue_aggregation(db, since_timestamp)
 
     except Exception as e:
         logger.error(f"Revenue aggregation failed: {e}")
@@ -143,11 +135,22 @@ async def aggregate_revenue(since_timestamp: str = None):
         db.close()
 
 
+@single_flight("revenue_aggregation")
 async def backfill_revenue_aggregation():
     """
     Backfill all historical revenue data.
-    Forces re-aggregation of all dates regardless of last run time.
+    Recomputes every date in one statement regardless of the watermark
+    (e.g. after GL accounts are mapped to different departments).
     """
     logger.info("Starting revenue backfill aggregation...")
-    # Pass epoch time to force processing all data
-    return await aggregate_revenue(since_timestamp="1970-01-01T00:00:00")
+
+    db = SyncSessionLocal()
+    try:
+        return run_revenue_aggregation(db, None)
+
+    except Exception as e:
+        logger.error(f"Revenue backfill failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
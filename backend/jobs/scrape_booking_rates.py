@@ -23,6 +23,8 @@ from datetime import date, timedelta
 
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.settings_cache import get_settings
 from services.booking_scraper import (
     populate_queue,
     process_queue,
@@ -82,6 +84,7 @@ def compute_next_scrape_for_date(target_date: date) -> tuple[str, date | None]:
         return ('low', today)
 
 
+@single_flight("booking_scrape")
 def run_scheduled_booking_scrape():
     """
     Main scheduled job: populate queue with today's dates, then process.
@@ -89,10 +92,7 @@ def run_scheduled_booking_scrape():
     db = SyncSessionLocal()
     try:
         # Check if scraper is enabled
-        result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = 'booking_scraper_enabled'")
-        ).fetchone()
-        if not result or result.config_value != 'true':
+        if get_settings(db).get('booking_scraper_enabled') != 'true':
             logger.debug("Scheduled booking scrape skipped (disabled)")
             return
 
@@ -160,6 +160,5 @@ def run_scheduled_booking_scrape():
 
 
 async def run_scheduled_booking_scrape_async():
-    """Async wrapper for APScheduler."""
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, run_scheduled_booking_scrape)
+    """Async wrapper for APScheduler (to_thread keeps the job's context vars)."""
+    await asyncio.to_thread(run_scheduled_booking_scrape)
@@ -8,43 +8,23 @@ import uuid
 from datetime import date, datetime, timedelta
 from sqlalchemy import text
 from database import SyncSessionLocal
+from services.single_flight import single_flight
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
 
-def get_config_value(db, key: str, default: str = None) -> str:
-    """Get a config value from system_config"""
-    try:
-        result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = :key"),
-            {"key": key}
-        )
-        row = result.fetchone()
-        if row and row.config_value:
-            return row.config_value
-        return default
-    except Exception as e:
-        logger.error(f"Error getting config {key}: {e}")
-        return default
-
-
 def is_forecast_snapshot_enabled(db) -> bool:
     """Check if automated forecast snapshots are enabled"""
-    value = get_config_value(db, "forecast_snapshot_enabled")
-    if value:
-        return value.lower() in ('true', '1', 'yes', 'enabled')
-    return False
+    return get_settings(db).get_bool("forecast_snapshot_enabled")
 
 
 def get_forecast_snapshot_days_ahead(db) -> int:
     """Get number of days ahead to forecast"""
-    days_str = get_config_value(db, "forecast_snapshot_days_ahead", "90")
-    try:
-        return int(days_str)
-    except ValueError:
-        return 90
+    return get_settings(db).get_int("forecast_snapshot_days_ahead", 90)
 
 
+@single_flight("weekly_forecast_snapshot")
 async def run_weekly_forecast_snapshot():
     """
     Run weekly blended forecast snapshot using MAPE-weighted + 60/40 blend.
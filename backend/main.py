@@ -1,6 +1,7 @@
 """
 Forecasting Application - FastAPI Backend
 """
+import hmac
 import os
 import logging
 import sys
@@ -16,8 +17,10 @@ logging.basicConfig(
     ]
 )
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
@@ -26,11 +29,17 @@ from auth import (
     Token, UserLogin, UserResponse, UserCreate,
     authenticate_user, create_access_token, get_current_user, get_admin_user,
     get_all_users, create_user, delete_user,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    start_last_used_flusher, stop_last_used_flusher,
+    ACCESS_TOKEN_EXPIRE_MINUTES, security
 )
 from typing import List
 from api import forecast, sync, export, budget, accuracy, evolution, crossref, explain, config, historical, resos, backtest, sync_bookings, resos_sync, reports, special_dates, backup, public, bookability, competitor_rates, reconciliation
 from scheduler import start_scheduler, shutdown_scheduler
+from utils.settings_cache import start_settings_listener, stop_settings_listener
+from services.single_flight import JobAlreadyRunning
+from utils.query_metrics import (
+    METRICS_SCRAPE_TOKEN, QUERY_METRICS_ENABLED, QueryMetricsMiddleware, render_prometheus
+)
 
 
 @asynccontextmanager
@@ -50,9 +59,13 @@ async def lifespan(app: FastAPI):
         logging.getLogger(__name__).warning(f"Stale batch cleanup on startup failed: {e}")
 
     start_scheduler()
+    start_last_used_flusher()
+    start_settings_listener()
     yield
     # Shutdown
     shutdown_scheduler()
+    await stop_last_used_flusher()
+    await stop_settings_listener()
 
 
 app = FastAPI(
@@ -71,6 +84,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route statement counts / DB time (/metrics, Server-Timing header)
+if QUERY_METRICS_ENABLED:
+    app.add_middleware(QueryMetricsMiddleware)
+
+@app.exception_handler(JobAlreadyRunning)
+async def job_already_running_handler(request: Request, exc: JobAlreadyRunning):
+    """Manual trigger for a job that is already in flight (if_running=fail)"""
+    return JSONResponse(
+        status_code=409,
+        content={
+            "detail": f"{exc}. Please wait for it to complete, or retry with if_running=wait.",
+            "job": exc.key,
+            "started_at": exc.started_at.isoformat() if exc.started_at else None,
+        }
+    )
+
+
 # Include routers
 app.include_router(forecast.router, prefix="/forecast", tags=["Forecasts"])
 app.include_router(sync.router, prefix="/sync", tags=["Data Sync"])
@@ -111,6 +141,46 @@ async def db_health_check(db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=503, detail=f"Database unhealthy: {str(e)}")
 
 
+async def get_metrics_reader(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bearer METRICS_SCRAPE_TOKEN (Prometheus) or a logged-in user's JWT"""
+    if METRICS_SCRAPE_TOKEN and hmac.compare_digest(credentials.credentials, METRICS_SCRAPE_TOKEN):
+        return {"username": "metrics-scraper"}
+    return await get_current_user(credentials, db)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    db: AsyncSession = Depends(get_db),
+    reader: dict = Depends(get_metrics_reader)
+):
+    """
+    Prometheus metrics: SQL statements and DB time per route (this process)
+    and per queued job (latest run, recorded by the workers).
+    Empty unless QUERY_METRICS_ENABLED is set. Slow-statement labels carry
+    SQL text, so it needs METRICS_SCRAPE_TOKEN or a user login.
+    """
+    if not QUERY_METRICS_ENABLED:
+        return PlainTextResponse("# query metrics disabled (set QUERY_METRICS_ENABLED=true)\n")
+    result = await db.execute(
+        text("""
+            SELECT DISTINCT ON (job_name)
+                job_name, query_stats,
+                EXTRACT(EPOCH FROM completed_at - started_at) AS seconds
+            FROM job_queue
+            WHERE query_stats IS NOT NULL
+            ORDER BY job_name, id DESC
+        """)
+    )
+    job_stats = [dict(row._mapping) for row in result.fetchall()]
+    return PlainTextResponse(
+        render_prometheus(job_stats),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/auth/login", response_model=Token)
 async def login(user_login: UserLogin, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return JWT token"""
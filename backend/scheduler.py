@@ -1,28 +1,25 @@
 """
 APScheduler configuration for scheduled jobs
+
+The scheduler only enqueues: each trigger inserts a job_queue row and a
+worker process (worker.py) runs it, so the batch window never competes with
+API requests for the web process's event loop.
 """
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import text
 
 from jobs.data_sync import (
-    sync_newbook_data,
     sync_resos_data,
     sync_newbook_occupancy_report,
     sync_newbook_earned_revenue
 )
 from jobs.resos_bookings_sync import sync_resos_bookings_data
 from api.sync_bookings import run_bookings_data_sync
-from jobs.aggregation import run_aggregation
-from jobs.forecast_daily import run_daily_forecast
-from jobs.pickup_snapshot import run_pickup_snapshot
-from jobs.pace_snapshot_v2 import run_pace_snapshot_v2
-from jobs.accuracy_calc import run_accuracy_calculation
-from jobs.weekly_forecast_snapshot import run_weekly_forecast_snapshot
 from jobs.fetch_current_rates import run_fetch_current_rates
-from jobs.scrape_booking_rates import run_scheduled_booking_scrape_async
-from database import SyncSessionLocal
+from jobs.pipeline import run_daily_pipeline
+from services.job_queue import enqueue_job
+from utils.settings_cache import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -35,22 +32,17 @@ scheduler = AsyncIOScheduler(
 
 
 def get_config_value(key: str, default: str = None) -> str:
-    """Get a config value from system_config"""
-    db = SyncSessionLocal()
+    """Get a config value from the shared settings cache"""
     try:
-        result = db.execute(
-            text("SELECT config_value FROM system_config WHERE config_key = :key"),
-            {"key": key}
-        )
-        row = result.fetchone()
-        if row and row.config_value:
-            return row.config_value
-        return default
+        return get_settings().get(key, default)
     except Exception as e:
         logger.error(f"Error getting config {key}: {e}")
         return default
-    finally:
-        db.close()
+
+
+def enqueue_scheduled(job_name: str, **kwargs):
+    """Queue a scheduled job for the workers (runs in the scheduler's thread pool)"""
+    enqueue_job(job_name, kwargs, triggered_by="scheduler")
 
 
 def is_sync_enabled(source: str) -> bool:
@@ -73,28 +65,28 @@ def get_sync_time(source: str, default_hour: int = 5, default_minute: int = 0) -
     return (default_hour, default_minute)
 
 
-async def run_scheduled_newbook_sync():
+async def run_scheduled_newbook_sync(aggregate: bool = True):
     """Wrapper to check if Newbook bookings sync is enabled before running"""
     if is_sync_enabled("newbook_bookings"):
         # Get sync type from config (incremental or full)
         sync_type = get_config_value("sync_newbook_bookings_type", "incremental")
         logger.info(f"Running scheduled Newbook bookings sync (mode={sync_type})")
-        # Run synchronous function in thread pool to avoid blocking
+        # Run synchronous function in a thread to avoid blocking
+        # (to_thread carries context vars: single-flight mode, query metrics scope)
         import asyncio
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
+        await asyncio.to_thread(
             run_bookings_data_sync,
             sync_type,  # sync_mode
             None,       # from_date
             None,       # to_date
-            "scheduler" # triggered_by
+            "scheduler", # triggered_by
+            aggregate
         )
     else:
         logger.debug("Scheduled Newbook bookings sync skipped (disabled in settings)")
 
 
-async def run_scheduled_resos_bookings_sync():
+async def run_scheduled_resos_bookings_sync(aggregate: bool = True):
     """Wrapper to check if Resos bookings sync is enabled before running"""
     from datetime import date, timedelta
     if is_sync_enabled("resos_bookings"):
@@ -102,7 +94,7 @@ async def run_scheduled_resos_bookings_sync():
         # Daily: -7 days to +365 days (recent history + forecast window)
         from_date = date.today() - timedelta(days=7)
         to_date = date.today() + timedelta(days=365)
-        await sync_resos_bookings_data(from_date, to_date, triggered_by="scheduler")
+        await sync_resos_bookings_data(from_date, to_date, triggered_by="scheduler", aggregate=aggregate)
     else:
         logger.info("Scheduled Resos bookings sync skipped (disabled in settings)")
 
@@ -129,7 +121,7 @@ async def run_scheduled_occupancy_report_sync():
         logger.info("Scheduled Newbook occupancy report sync skipped (disabled in settings)")
 
 
-async def run_scheduled_earned_revenue_sync():
+async def run_scheduled_earned_revenue_sync(aggregate: bool = True):
     """Wrapper to run earned revenue sync (uses dedicated enabled flag)"""
     from datetime import date, timedelta
     if is_sync_enabled("newbook_earned_revenue"):
@@ -137,7 +129,7 @@ async def run_scheduled_earned_revenue_sync():
         # Daily: last 7 days only (historical data, catches adjustments)
         from_date = date.today() - timedelta(days=7)
         to_date = date.today()
-        await sync_newbook_earned_revenue(from_date, to_date, triggered_by="scheduler")
+        await sync_newbook_earned_revenue(from_date, to_date, triggered_by="scheduler", aggregate=aggregate)
     else:
         logger.info("Scheduled Newbook earned revenue sync skipped (disabled in settings)")
 
@@ -151,93 +143,51 @@ async def run_scheduled_current_rates_sync():
         logger.debug("Scheduled Newbook current rates sync skipped (disabled in settings)")
 
 
-def reschedule_sync_jobs():
-    """
-    Read sync times from config and reschedule sync jobs.
-    Called at startup and daily at 1am to pick up config changes.
+def get_pipeline_start_time() -> tuple:
     """
-    logger.info("Rescheduling sync jobs from config...")
+    Start the daily pipeline at the earliest configured sync time.
 
-    # Newbook bookings sync
-    nb_hour, nb_min = get_sync_time("newbook_bookings", 5, 0)
-    scheduler.add_job(
-        run_scheduled_newbook_sync,
-        CronTrigger(hour=nb_hour, minute=nb_min),
-        id="newbook_sync",
-        name=f"Daily Newbook Bookings Sync ({nb_hour:02d}:{nb_min:02d})",
-        replace_existing=True
-    )
-    logger.info(f"  Newbook bookings sync scheduled for {nb_hour:02d}:{nb_min:02d}")
-
-    # Resos bookings sync
-    rsb_hour, rsb_min = get_sync_time("resos_bookings", 5, 5)
-    scheduler.add_job(
-        run_scheduled_resos_bookings_sync,
-        CronTrigger(hour=rsb_hour, minute=rsb_min),
-        id="resos_bookings_sync",
-        name=f"Daily Resos Bookings Sync ({rsb_hour:02d}:{rsb_min:02d})",
-        replace_existing=True
-    )
-    logger.info(f"  Resos bookings sync scheduled for {rsb_hour:02d}:{rsb_min:02d}")
-
-    # Resos sync - uses general sync_schedule_time for now
-    rs_time = get_config_value("sync_schedule_time", "05:05")
-    try:
-        rs_hour, rs_min = int(rs_time.split(':')[0]), int(rs_time.split(':')[1])
-    except:
-        rs_hour, rs_min = 5, 5
-    scheduler.add_job(
-        run_scheduled_resos_sync,
-        CronTrigger(hour=rs_hour, minute=rs_min),
-        id="resos_sync",
-        name=f"Daily Resos Sync ({rs_hour:02d}:{rs_min:02d})",
-        replace_existing=True
-    )
-    logger.info(f"  Resos sync scheduled for {rs_hour:02d}:{rs_min:02d}")
+    The individual sync_*_time settings used to stagger each sync; the
+    pipeline now orders the jobs itself, so only the earliest one matters.
+    sync_schedule_time (Resos sync) also holds the resos_sync node back and
+    forecast_snapshot_time holds back weekly_snapshot (not_before in
+    jobs/pipeline.py), so a later value there doesn't move the start.
+    """
+    times = [
+        get_sync_time("newbook_bookings", 5, 0),
+        get_sync_time("resos_bookings", 5, 5),
+        get_sync_time("newbook_occupancy", 5, 8),
+        get_sync_time("newbook_earned_revenue", 5, 10),
+        get_sync_time("schedule", 5, 5),  # sync_schedule_time
+    ]
+    return min(times)
 
-    # Newbook occupancy report
-    occ_hour, occ_min = get_sync_time("newbook_occupancy", 5, 8)
-    scheduler.add_job(
-        run_scheduled_occupancy_report_sync,
-        CronTrigger(hour=occ_hour, minute=occ_min),
-        id="newbook_occupancy_report",
-        name=f"Daily Newbook Occupancy Report ({occ_hour:02d}:{occ_min:02d})",
-        replace_existing=True
-    )
-    logger.info(f"  Newbook occupancy report scheduled for {occ_hour:02d}:{occ_min:02d}")
 
-    # Newbook earned revenue
-    rev_hour, rev_min = get_sync_time("newbook_earned_revenue", 5, 10)
-    scheduler.add_job(
-        run_scheduled_earned_revenue_sync,
-        CronTrigger(hour=rev_hour, minute=rev_min),
-        id="newbook_earned_revenue",
-        name=f"Daily Newbook Earned Revenue ({rev_hour:02d}:{rev_min:02d})",
-        replace_existing=True
-    )
-    logger.info(f"  Newbook earned revenue scheduled for {rev_hour:02d}:{rev_min:02d}")
+def reschedule_sync_jobs():
+    """
+    Read the pipeline start time from config and reschedule the daily pipeline.
+    Called at startup and daily at 1am to pick up config changes.
+    """
+    logger.info("Rescheduling daily pipeline from config...")
 
-    # Aggregation - 15 mins after the latest sync job
-    latest_sync = max(nb_hour * 60 + nb_min, occ_hour * 60 + occ_min, rev_hour * 60 + rev_min)
-    agg_mins = latest_sync + 15
-    agg_hour, agg_min = agg_mins // 60, agg_mins % 60
+    # Daily pipeline: syncs -> aggregation -> pace -> forecasts -> snapshot -> accuracy
+    # Each step is queued as soon as its inputs are ready (jobs/pipeline.py)
+    start_hour, start_min = get_pipeline_start_time()
     scheduler.add_job(
-        run_aggregation,
-        CronTrigger(hour=agg_hour, minute=agg_min),
-        id="aggregation",
-        name=f"Daily Aggregation ({agg_hour:02d}:{agg_min:02d})",
+        run_daily_pipeline,
+        CronTrigger(hour=start_hour, minute=start_min),
+        id="daily_pipeline",
+        name=f"Daily Pipeline ({start_hour:02d}:{start_min:02d})",
         replace_existing=True
     )
-    logger.info(f"  Aggregation scheduled for {agg_hour:02d}:{agg_min:02d}")
-
-    logger.info("Sync jobs rescheduled successfully")
+    logger.info(f"  Daily pipeline scheduled for {start_hour:02d}:{start_min:02d}")
 
 
 def start_scheduler():
     """Initialize and start the scheduler"""
     logger.info("Starting scheduler...")
 
-    # 1am daily: reschedule sync jobs from config
+    # 1am daily: reschedule the pipeline from config
     # This picks up any config changes made during the day
     scheduler.add_job(
         reschedule_sync_jobs,
@@ -247,96 +197,35 @@ def start_scheduler():
         replace_existing=True
     )
 
-    # Schedule sync jobs from config (initial schedule)
+    # Schedule the daily pipeline from config (initial schedule)
     reschedule_sync_jobs()
 
-    # Pickup snapshot - Daily at 5:30 AM
-    scheduler.add_job(
-        run_pickup_snapshot,
-        CronTrigger(hour=5, minute=30),
-        id="pickup_snapshot",
-        name="Daily Pickup Snapshot",
-        replace_existing=True
-    )
-
-    # Pace snapshot v2 - Daily at 5:32 AM
-    # Captures revenue pace for pickup-v2 model
-    scheduler.add_job(
-        run_pace_snapshot_v2,
-        CronTrigger(hour=5, minute=32),
-        id="pace_snapshot_v2",
-        name="Daily Pace Snapshot V2",
-        replace_existing=True
-    )
-
-    # Fetch current rates from Newbook - Daily at 5:20 AM
-    # Populates newbook_current_rates for pickup-v2 upper bound calculations
-    scheduler.add_job(
-        run_scheduled_current_rates_sync,
-        CronTrigger(hour=5, minute=20),
-        id="fetch_current_rates",
-        name="Daily Fetch Current Rates",
-        replace_existing=True
-    )
-
     # Booking.com rate scraper - Daily at configured time (default 05:30)
     # Tiered: daily 30d, weekly 31-180d (Mon-Fri), biweekly 181-365d (Wed)
+    # Independent of the pipeline (competitor rates don't feed the forecasts)
     booking_time = get_config_value("booking_scraper_daily_time", "05:30")
     try:
         bk_hour, bk_min = int(booking_time.split(':')[0]), int(booking_time.split(':')[1])
     except (ValueError, IndexError):
         bk_hour, bk_min = 5, 30
     scheduler.add_job(
-        run_scheduled_booking_scrape_async,
+        enqueue_scheduled,
         CronTrigger(hour=bk_hour, minute=bk_min),
+        args=["booking_scrape"],
         id="booking_scrape",
         name=f"Daily Booking.com Scrape ({bk_hour:02d}:{bk_min:02d})",
         replace_existing=True
     )
     logger.info(f"  Booking.com scrape scheduled for {bk_hour:02d}:{bk_min:02d}")
 
-    # Daily forecast (0-28 days) - Daily at 6:00 AM
-    # Prophet, XGBoost, Pickup, and CatBoost for operational planning window
-    scheduler.add_job(
-        lambda: run_daily_forecast(horizon_days=28, models=['prophet', 'xgboost', 'pickup', 'catboost']),
-        CronTrigger(hour=6, minute=0),
-        id="forecast_daily",
-        name="Daily Forecast (0-28 days)",
-        replace_existing=True
-    )
-
-    # Long-term forecast (29-365 days) - Weekly on Monday at 6:30 AM
-    # Prophet and XGBoost only (pickup less useful at long range)
-    scheduler.add_job(
-        lambda: run_daily_forecast(horizon_days=365, start_days=29, models=['prophet', 'xgboost']),
-        CronTrigger(day_of_week="mon", hour=6, minute=30),
-        id="forecast_weekly",
-        name="Weekly Forecast (29-365 days)",
-        replace_existing=True
-    )
-
-    # Accuracy calculation - Daily at 7:00 AM
-    scheduler.add_job(
-        run_accuracy_calculation,
-        CronTrigger(hour=7, minute=0),
-        id="accuracy_calc",
-        name="Daily Accuracy Calculation",
-        replace_existing=True
-    )
-
-    # Weekly forecast snapshot - Monday at 6:00 AM (default)
-    # Get time from config (default: Monday 6:00 AM)
-    snapshot_time = get_config_value("forecast_snapshot_time", "06:00")
-    try:
-        snapshot_hour, snapshot_min = int(snapshot_time.split(':')[0]), int(snapshot_time.split(':')[1])
-    except:
-        snapshot_hour, snapshot_min = 6, 0
-
+    # Forecast table partition maintenance - Daily at 1:30 AM
+    # Creates upcoming yearly partitions and drops partitions past retention
     scheduler.add_job(
-        run_weekly_forecast_snapshot,
-        CronTrigger(day_of_week="mon", hour=snapshot_hour, minute=snapshot_min),
-        id="weekly_forecast_snapshot",
-        name=f"Weekly Forecast Snapshot (Mon {snapshot_hour:02d}:{snapshot_min:02d})",
+        enqueue_scheduled,
+        CronTrigger(hour=1, minute=30),
+        args=["partition_maintenance"],
+        id="partition_maintenance",
+        name="Daily Forecast Partition Maintenance",
         replace_existing=True
     )
 
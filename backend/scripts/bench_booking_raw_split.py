@@ -0,0 +1,142 @@
+"""
+Benchmark: booked revenue lookups, raw_json inline vs narrow table + nights
+
+Builds two synthetic booking sets (TEMP, dropped on exit) from the same
+rows, shaped like newbook_bookings_data before and after the raw_json split:
+
+    wide:   bookings with an inline raw_json payload (tariffs_quoted,
+            inventory_items and the rest of a Newbook booking)
+    narrow: bookings without raw_json + typed per-night amounts
+
+then runs the stay-night revenue query used by pace v2 / pickup-v2 for a
+run of stay dates both ways and reports table size, bytes returned and
+shared buffers touched (EXPLAIN (ANALYZE, BUFFERS)). EXPLAIN does not
+detoast output columns, so the wide figure understates the TOAST reads the
+real query pays for; bytes returned shows that part.
+
+Usage (from backend/, DATABASE_URL pointing at any scratch database):
+    python -m scripts.bench_booking_raw_split
+    python -m scripts.bench_booking_raw_split --bookings 100000 --dates 90
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from database import sync_engine
+
+# Arrivals spread over five years, 1-7 nights; payload padded to a typical
+# Newbook booking size (~4 KB) so it is TOASTed like the real thing
+SETUP_SQL = [
+    """
+    CREATE TEMP TABLE bench_wide AS
+    SELECT g::text AS newbook_id, a AS arrival_date, a + n AS departure_date,
+           daterange(a, a + n) AS stay_range,
+           (1 + g % 6)::text AS category_id, 'Confirmed'::varchar(50) AS status,
+           jsonb_build_object(
+               'booking_id', g,
+               'tariffs_quoted', (
+                   SELECT jsonb_agg(jsonb_build_object(
+                       'stay_date', to_char(a + k, 'YYYY-MM-DD'),
+                       'calculated_amount', 120 + g % 80, 'charge_amount', 120 + g % 80,
+                       'taxes', jsonb_build_array(jsonb_build_object('tax_amount', round((120 + g % 80) / 6.0, 2)))
+                   )) FROM generate_series(0, n - 1) k
+               ),
+               'inventory_items', (
+                   SELECT jsonb_agg(jsonb_build_object('stay_date', to_char(a + k, 'YYYY-MM-DD'), 'amount', 15))
+                   FROM generate_series(0, n - 1) k
+               ),
+               'notes', repeat(md5(g::text), 100)
+           ) AS raw_json
+    FROM (
+        SELECT g, CAST(:first_arrival AS date) + (g % 1826) AS a, 1 + g % 7 AS n
+        FROM generate_series(1, :bookings) g
+    ) s
+    """,
+    """
+    CREATE TEMP TABLE bench_narrow AS
+    SELECT newbook_id, arrival_date, departure_date, stay_range, category_id, status
+    FROM bench_wide
+    """,
+    """
+    CREATE TEMP TABLE bench_nights AS
+    SELECT w.newbook_id, (t->>'stay_date')::date AS stay_date,
+           (t->>'calculated_amount')::numeric AS calculated_amount,
+           (t->>'charge_amount')::numeric AS charge_amount,
+           (t->'taxes'->0->>'tax_amount')::numeric AS tax_amount,
+           15::numeric AS extras_amount, 0::numeric AS deductions_amount
+    FROM bench_wide w, jsonb_array_elements(w.raw_json->'tariffs_quoted') t
+    """,
+    "CREATE INDEX ON bench_wide USING GIST (stay_range)",
+    "CREATE INDEX ON bench_narrow USING GIST (stay_range)",
+    "ALTER TABLE bench_nights ADD PRIMARY KEY (newbook_id, stay_date)",
+    "ANALYZE bench_wide",
+    "ANALYZE bench_narrow",
+    "ANALYZE bench_nights",
+]
+
+QUERIES = {
+    "wide (SELECT raw_json)": """
+        SELECT raw_json FROM bench_wide
+        WHERE stay_range @> CAST(:d AS date) AND status = 'Confirmed'
+    """,
+    "narrow (JOIN nights)": """
+        SELECT n.calculated_amount, n.charge_amount, n.tax_amount, n.extras_amount, n.deductions_amount
+        FROM bench_narrow b
+        JOIN bench_nights n ON n.newbook_id = b.newbook_id AND n.stay_date = :d
+        WHERE b.stay_range @> CAST(:d AS date) AND b.status = 'Confirmed'
+    """,
+}
+
+
+def _buffers(plan: dict) -> int:
+    """Shared blocks hit + read for a plan tree (top node includes children)"""
+    return plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark raw_json inline vs split booking storage")
+    parser.add_argument("--bookings", type=int, default=50000, help="Synthetic bookings over five years")
+    parser.add_argument("--dates", type=int, default=60, help="Stay dates to look up")
+    args = parser.parse_args()
+
+    first_arrival = date.today() - timedelta(days=4 * 365)
+    stay_dates = [date.today() + timedelta(days=i) for i in range(args.dates)]
+
+    with sync_engine.connect() as conn:
+        started = time.perf_counter()
+        for sql in SETUP_SQL:
+            conn.execute(text(sql), {"first_arrival": first_arrival, "bookings": args.bookings})
+        print(f"Built {args.bookings} synthetic bookings in {time.perf_counter() - started:.1f}s")
+
+        sizes = {
+            table: conn.execute(text(f"SELECT pg_total_relation_size('{table}')")).scalar()
+            for table in ("bench_wide", "bench_narrow", "bench_nights")
+        }
+        print(f"\nbench_wide (with raw_json): {sizes['bench_wide'] / 1024 / 1024:8.1f} MB")
+        print(f"bench_narrow:               {sizes['bench_narrow'] / 1024 / 1024:8.1f} MB")
+        print(f"bench_nights:               {sizes['bench_nights'] / 1024 / 1024:8.1f} MB")
+
+        for label, sql in QUERIES.items():
+            query = text(sql)
+            explain = text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql)
+            elapsed = 0.0
+            returned = 0
+            buffers = 0
+            for stay_date in stay_dates:
+                t0 = time.perf_counter()
+                rows = conn.execute(query, {"d": stay_date}).fetchall()
+                elapsed += time.perf_counter() - t0
+                returned += sum(len(str(tuple(row))) for row in rows)
+                plan = conn.execute(explain, {"d": stay_date}).scalar()
+                buffers += _buffers(plan[0]["Plan"])
+            print(f"\n{label}: {args.dates} lookups in {elapsed * 1000:.0f} ms")
+            print(f"    shared buffers touched: {buffers} ({buffers * 8 / 1024:.1f} MB)")
+            print(f"    data returned:          {returned / 1024:.0f} KB")
+
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
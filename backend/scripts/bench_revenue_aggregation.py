@@ -0,0 +1,114 @@
+"""
+Benchmark: revenue aggregation, per-date loop vs one set-based statement
+
+Recomputes newbook_net_revenue_data for all history both ways:
+
+    before: one GROUP BY + one upsert per date (the old aggregate_revenue loop)
+    after:  jobs.revenue_aggregation.AGGREGATE_SQL over all dates
+
+Both write into a TEMP table that shadows newbook_net_revenue_data for this
+connection, and everything is rolled back, so the real table is untouched.
+With --synthetic-years, newbook_earned_revenue_data is shadowed too and
+filled with generated rows.
+
+Usage (from backend/, DATABASE_URL pointing at a seeded local database):
+    python -m scripts.bench_revenue_aggregation
+    python -m scripts.bench_revenue_aggregation --synthetic-years 5
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from database import sync_engine
+from jobs.revenue_aggregation import AGGREGATE_SQL
+from utils.query_metrics import StatementCounter
+
+# 40 GL accounts per day spread over the departments (and some unmapped)
+SYNTHETIC_SQL = """
+    CREATE TEMP TABLE newbook_earned_revenue_data
+        (LIKE public.newbook_earned_revenue_data INCLUDING ALL);
+    INSERT INTO newbook_earned_revenue_data (date, gl_account_id, gl_code, amount_gross, amount_net, fetched_at)
+    SELECT d::date, a::text, g.gl_code, round((random() * 500)::numeric, 2), round((random() * 420)::numeric, 2), NOW()
+    FROM generate_series(CURRENT_DATE - :days, CURRENT_DATE, INTERVAL '1 day') d
+    CROSS JOIN generate_series(1, 40) a
+    LEFT JOIN LATERAL (
+        SELECT gl_code FROM newbook_gl_accounts ORDER BY id OFFSET (a % GREATEST((SELECT COUNT(*) FROM newbook_gl_accounts), 1)) LIMIT 1
+    ) g ON true;
+    ANALYZE newbook_earned_revenue_data;
+"""
+
+LEGACY_DATES_SQL = "SELECT DISTINCT date FROM newbook_earned_revenue_data ORDER BY date"
+
+LEGACY_TOTALS_SQL = """
+    SELECT COALESCE(g.department, 'other') as department, SUM(e.amount_net) as total_net
+    FROM newbook_earned_revenue_data e
+    LEFT JOIN newbook_gl_accounts g ON e.gl_code = g.gl_code
+    WHERE e.date = :date
+    GROUP BY g.department
+"""
+
+LEGACY_UPSERT_SQL = """
+    INSERT INTO newbook_net_revenue_data (date, accommodation, dry, wet, aggregated_at)
+    VALUES (:date, :accommodation, :dry, :wet, NOW())
+    ON CONFLICT (date) DO UPDATE SET
+        accommodation = :accommodation, dry = :dry, wet = :wet, aggregated_at = NOW()
+"""
+
+RESULT_SQL = "SELECT date, accommodation, dry, wet FROM newbook_net_revenue_data ORDER BY date"
+
+
+def run_legacy(conn):
+    dates = [row.date for row in conn.execute(text(LEGACY_DATES_SQL)).fetchall()]
+    for target_date in dates:
+        totals = {"accommodation": 0, "dry": 0, "wet": 0}
+        for row in conn.execute(text(LEGACY_TOTALS_SQL), {"date": target_date}).fetchall():
+            if row.department in totals:
+                totals[row.department] = float(row.total_net or 0)
+        conn.execute(text(LEGACY_UPSERT_SQL), {
+            "date": target_date,
+            "accommodation": round(totals["accommodation"], 2),
+            "dry": round(totals["dry"], 2),
+            "wet": round(totals["wet"], 2),
+        })
+    return len(dates)
+
+
+def run_set_based(conn):
+    return conn.execute(text(AGGREGATE_SQL), {"changed_only": False, "since": None, "until": None}).rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark revenue aggregation strategies")
+    parser.add_argument("--synthetic-years", type=int, default=0,
+                        help="Use generated earned revenue for this many years instead of the real rows")
+    args = parser.parse_args()
+
+    with sync_engine.connect() as conn:
+        if args.synthetic_years:
+            for statement in SYNTHETIC_SQL.split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), {"days": args.synthetic_years * 365})
+        rows = conn.execute(text("SELECT COUNT(*) FROM newbook_earned_revenue_data")).scalar()
+        print(f"Earned revenue rows: {rows}")
+
+        results = {}
+        for label, run in (("before (per-date loop)", run_legacy), ("after (set-based)", run_set_based)):
+            conn.execute(text("DROP TABLE IF EXISTS pg_temp.newbook_net_revenue_data"))
+            conn.execute(text(
+                "CREATE TEMP TABLE newbook_net_revenue_data (LIKE public.newbook_net_revenue_data INCLUDING ALL)"
+            ))
+            with StatementCounter(sync_engine) as counter:
+                started = time.perf_counter()
+                dates = run(conn)
+                elapsed = time.perf_counter() - started
+            results[label] = [tuple(row) for row in conn.execute(text(RESULT_SQL)).fetchall()]
+            print(f"\n{label}: {dates} dates in {elapsed * 1000:.0f} ms, {counter.statements} statements")
+
+        before, after = results.values()
+        print("\nResults match" if before == after else "\nWARNING: results differ")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: stay-night lookups, arrival/departure B-tree vs stay_range GiST
+
+Builds a synthetic five-year booking table (TEMP, dropped on exit) shaped
+like newbook_bookings_data, then times the stay-night count used by the
+aggregation and pace jobs for a run of stay dates both ways:
+
+    before: arrival_date <= :d AND departure_date > :d   (idx on arrival_date)
+    after:  stay_range @> :d                             (GiST on stay_range)
+
+Usage (from backend/, DATABASE_URL pointing at any scratch database):
+    python -m scripts.bench_stay_range
+    python -m scripts.bench_stay_range --bookings 500000 --dates 365
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from database import sync_engine
+
+SETUP_SQL = [
+    """
+    CREATE TEMP TABLE bench_bookings (
+        id SERIAL PRIMARY KEY,
+        arrival_date DATE NOT NULL,
+        departure_date DATE NOT NULL,
+        category_id VARCHAR(50),
+        status VARCHAR(50),
+        booking_placed TIMESTAMP,
+        stay_range DATERANGE GENERATED ALWAYS AS (
+            CASE WHEN departure_date > arrival_date
+                 THEN daterange(arrival_date, departure_date, '[)')
+                 ELSE 'empty'::daterange
+            END
+        ) STORED
+    )
+    """,
+    # Arrivals spread over five years, 1-14 nights, ~10% cancelled
+    """
+    INSERT INTO bench_bookings (arrival_date, departure_date, category_id, status, booking_placed)
+    SELECT a, a + (1 + floor(random() * 14))::int,
+           (1 + floor(random() * 6))::int::text,
+           CASE WHEN random() < 0.1 THEN 'Cancelled' ELSE 'Confirmed' END,
+           a - (floor(random() * 365))::int
+    FROM (
+        SELECT CAST(:first_arrival AS date) + floor(random() * 1826)::int AS a
+        FROM generate_series(1, :bookings)
+    ) s
+    """,
+    "CREATE INDEX ON bench_bookings(arrival_date)",
+    "CREATE INDEX ON bench_bookings(status, category_id)",
+    "CREATE INDEX ON bench_bookings USING GIST (stay_range)",
+    "ANALYZE bench_bookings",
+]
+
+QUERIES = {
+    "before (arrival/departure)": """
+        SELECT category_id, COUNT(*) FROM bench_bookings
+        WHERE arrival_date <= :d AND departure_date > :d
+        AND status IN ('Confirmed', 'Arrived') AND category_id IN ('1', '2', '3', '4')
+        GROUP BY category_id
+    """,
+    "after (stay_range @>)": """
+        SELECT category_id, COUNT(*) FROM bench_bookings
+        WHERE stay_range @> CAST(:d AS date)
+        AND status IN ('Confirmed', 'Arrived') AND category_id IN ('1', '2', '3', '4')
+        GROUP BY category_id
+    """,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stay-night lookups on a synthetic booking table")
+    parser.add_argument("--bookings", type=int, default=200000, help="Synthetic bookings over five years")
+    parser.add_argument("--dates", type=int, default=365, help="Stay dates to look up")
+    args = parser.parse_args()
+
+    first_arrival = date.today() - timedelta(days=4 * 365)
+    stay_dates = [date.today() + timedelta(days=i) for i in range(args.dates)]
+
+    with sync_engine.connect() as conn:
+        started = time.perf_counter()
+        for sql in SETUP_SQL:
+            conn.execute(text(sql), {"first_arrival": first_arrival, "bookings": args.bookings})
+        print(f"Built {args.bookings} synthetic bookings in {time.perf_counter() - started:.1f}s")
+
+        results = {}
+        for label, sql in QUERIES.items():
+            query = text(sql)
+            timings = []
+            counts = []
+            for stay_date in stay_dates:
+                t0 = time.perf_counter()
+                rows = conn.execute(query, {"d": stay_date}).fetchall()
+                timings.append(time.perf_counter() - t0)
+                counts.append(sum(row[1] for row in rows))
+            results[label] = counts
+            plan = conn.execute(text("EXPLAIN " + sql), {"d": stay_dates[0]}).fetchall()
+            print(f"\n{label}: {args.dates} lookups in {sum(timings) * 1000:.0f} ms "
+                  f"(median {statistics.median(timings) * 1000:.2f} ms, max {max(timings) * 1000:.2f} ms)")
+            for row in plan:
+                print(f"    {row[0]}")
+
+        before, after = results.values()
+        print("\nResults match" if before == after else "\nWARNING: results differ between predicates")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Query budget check - catches N+1 regressions
+
+Runs key endpoints, forecast services and jobs against a local database and
+counts the SQL statements each one issues. Range-based cases run twice, over
+a short and a long date range: a set-based implementation issues the same
+number of statements for 7 days as for 365, a per-date loop does not.
+
+Counts are also held to the committed baseline (query_budgets.json), so a
+case that gets more chatty without becoming range-dependent still fails.
+Known offenders are listed in EXPECTED_FAILURES: they are reported but don't
+fail the run, and one that starts passing does, so the list only shrinks.
+
+Exits non-zero when any budget is exceeded. CI runs it against a fresh
+database loaded with query_budgets_seed.sql (.github/workflows/query-budgets.yml).
+
+Usage (from backend/, DATABASE_URL pointing at a database built from
+db/init_clean.sql plus the resos migrations; jobs write to it):
+    python -m scripts.query_budgets --seed          # load the fixture, then check
+    python -m scripts.query_budgets                 # check
+    python -m scripts.query_budgets --record        # write current counts as the baseline
+    python -m scripts.query_budgets --case pickup_v2_net_accom --verbose
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+from database import AsyncSessionLocal, async_engine, sync_engine
+from utils.query_metrics import StatementCounter, _statement_label
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(SCRIPTS_DIR, "query_budgets.json")
+SEED_PATH = os.path.join(SCRIPTS_DIR, "query_budgets_seed.sql")
+
+SHORT_DAYS = 7
+LONG_DAYS = 365
+
+BUDGET_USER = {"id": 0, "username": "query-budgets"}
+
+
+# --------------------------------------------
+# Cases: async callables taking (db, start, end)
+# --------------------------------------------
+
+async def _pickup_v2_preview(db, start: date, end: date, metric: str):
+    from api.forecast import get_pickup_v2_preview
+    return await get_pickup_v2_preview(
+        start_date=start.isoformat(), end_date=end.isoformat(), metric=metric,
+        include_details=False, db=db, current_user=BUDGET_USER
+    )
+
+
+async def _covers_forecast(db, start: date, end: date):
+    from api.forecast import get_covers_forecast
+    return await get_covers_forecast(
+        start_date=start.isoformat(), end_date=end.isoformat(),
+        include_details=False, db=db, current_user=BUDGET_USER
+    )
+
+
+async def _xgboost_tuned(db, start: date, end: date):
+    from services.forecasting.xgboost_tuned import run_xgboost_tuned_forecast
+    return await run_xgboost_tuned_forecast(db, "hotel_room_nights", start, end)
+
+
+async def _public_rooms(db, start: date, end: date):
+    # build_* bypasses the response cache
+    from api.public import build_rooms_forecast
+    return await build_rooms_forecast(db, start.isoformat(), (end - start).days + 1)
+
+
+async def _public_covers(db, start: date, end: date):
+    from api.public import build_covers_forecast
+    return await build_covers_forecast(db, start.isoformat(), (end - start).days + 1)
+
+
+async def _pace_snapshot_v2(db, start: date, end: date):
+    from jobs.pace_snapshot_v2 import run_pace_snapshot_v2
+    return await run_pace_snapshot_v2()
+
+
+async def _pickup_snapshot(db, start: date, end: date):
+    from jobs.pickup_snapshot import run_pickup_snapshot
+    return await run_pickup_snapshot()
+
+
+# name -> (callable, range_based)
+CASES = {
+    "pickup_v2_net_accom": (lambda db, s, e: _pickup_v2_preview(db, s, e, "net_accom"), True),
+    "pickup_v2_room_nights": (lambda db, s, e: _pickup_v2_preview(db, s, e, "hotel_room_nights"), True),
+    "covers_forecast": (_covers_forecast, True),
+    "xgboost_tuned": (_xgboost_tuned, True),
+    "public_rooms_forecast": (_public_rooms, True),
+    "public_covers_forecast": (_public_covers, True),
+    "job_pace_snapshot_v2": (_pace_snapshot_v2, False),
+    "job_pickup_snapshot": (_pickup_snapshot, False),
+}
+
+# Known failures: case -> reason. Remove an entry once the case is fixed.
+EXPECTED_FAILURES = {
+    "pickup_v2_net_accom": "run_pickup_v2_forecast queries per date",
+    "pickup_v2_room_nights": "run_pickup_v2_forecast queries per date",
+    "xgboost_tuned": "queries current OTB, prior OTB and bookable cap per forecast date",
+    "public_rooms_forecast": "build_rooms_forecast calls forecast_rooms_for_date and two stats queries per date",
+    "job_pickup_snapshot": "reads the legacy newbook_bookings / newbook_occupancy_report / resos_bookings tables",
+}
+
+
+# --------------------------------------------
+# Fixture
+# --------------------------------------------
+
+async def seed():
+    """Load query_budgets_seed.sql, then derive stats and pace the way production does"""
+    from api.special_dates import ensure_table_exists
+    from database import SyncSessionLocal
+    from jobs.bookings_aggregation import backfill_aggregation
+    from jobs.pace_snapshot_v2 import backfill_pace_v2
+    from jobs.resos_aggregation import aggregate_resos_bookings
+    from jobs.revenue_aggregation import run_revenue_aggregation
+
+    with open(SEED_PATH) as f:
+        seed_sql = f.read()
+    conn = sync_engine.raw_connection()
+    try:
+        conn.driver_connection.autocommit = True
+        conn.cursor().execute(seed_sql)
+    finally:
+        conn.close()
+
+    async with AsyncSessionLocal() as db:
+        await ensure_table_exists(db)
+
+    await backfill_aggregation()
+    await aggregate_resos_bookings(triggered_by="query-budgets")
+    db = SyncSessionLocal()
+    try:
+        run_revenue_aggregation(db)
+    finally:
+        db.close()
+    await backfill_pace_v2()
+    # The checks run on a new event loop
+    await async_engine.dispose()
+    print(f"Seeded from {os.path.basename(SEED_PATH)}")
+
+
+async def count_case(func, start: date, end: date) -> StatementCounter:
+    async with AsyncSessionLocal() as db:
+        with StatementCounter(sync_engine, async_engine.sync_engine) as counter:
+            await func(db, start, end)
+    return counter
+
+
+def load_baseline() -> dict:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+async def run(case_names, record: bool, tolerance: int, verbose: bool) -> int:
+    baseline = load_baseline()
+    measured = {}
+    failures = []
+    start = date.today() + timedelta(days=1)
+
+    for name in case_names:
+        func, range_based = CASES[name]
+        expected = EXPECTED_FAILURES.get(name)
+        try:
+            long_count = await count_case(func, start, start + timedelta(days=LONG_DAYS - 1))
+            short_count = (
+                await count_case(func, start, start + timedelta(days=SHORT_DAYS - 1))
+                if range_based else None
+            )
+        except Exception as e:
+            if expected:
+                print(f"  xfail {name}: {type(e).__name__} ({expected})")
+            else:
+                failures.append(f"{name}: raised {type(e).__name__}: {e}")
+                print(f"  ERROR {name}: {e}")
+            continue
+
+        statements = long_count.statements
+        measured[name] = statements
+        line = f"{name:28s} {statements:6d} statements  {long_count.db_seconds * 1000:8.0f} ms db"
+        if short_count is not None:
+            line += f"  ({SHORT_DAYS}d: {short_count.statements})"
+        problems = []
+        if short_count is not None and statements > short_count.statements + tolerance:
+            problems.append(
+                f"{LONG_DAYS}-day range issued {statements} statements vs {short_count.statements} "
+                f"for {SHORT_DAYS} days - per-date queries?"
+            )
+        if not record and name in baseline and statements > baseline[name] + tolerance:
+            problems.append(f"{statements} statements, budget {baseline[name]}")
+
+        if expected:
+            print(("  xfail " if problems else "  XPASS ") + line + f"  ({expected})")
+            if not problems:
+                failures.append(f"{name}: within budget now - remove it from EXPECTED_FAILURES")
+            if verbose:
+                for elapsed, statement in long_count.slowest:
+                    print(f"        {elapsed * 1000:8.1f} ms  {_statement_label(statement)[:120]}")
+            continue
+
+        print(("  FAIL  " if problems else "  ok    ") + line)
+        if verbose or problems:
+            for elapsed, statement in long_count.slowest:
+                print(f"        {elapsed * 1000:8.1f} ms  {_statement_label(statement)[:120]}")
+        failures.extend(f"{name}: {problem}" for problem in problems)
+
+    if record:
+        baseline.update(measured)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write("\n")
+        print(f"Recorded {len(measured)} budget(s) to {BASELINE_PATH}")
+
+    if failures:
+        print(f"\n{len(failures)} query budget failure(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nAll query budgets met")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-endpoint/job SQL statement budgets")
+    parser.add_argument("--case", action="append", choices=sorted(CASES),
+                        help="Run only this case (repeatable)")
+    parser.add_argument("--record", action="store_true",
+                        help=f"Write measured counts to {os.path.basename(BASELINE_PATH)}")
+    parser.add_argument("--tolerance", type=int, default=0,
+                        help="Extra statements allowed over the short range / baseline")
+    parser.add_argument("--verbose", action="store_true", help="Show slowest statements for every case")
+    parser.add_argument("--seed", action="store_true",
+                        help=f"Load {os.path.basename(SEED_PATH)} into an empty database first")
+    args = parser.parse_args()
+
+    if args.seed:
+        asyncio.run(seed())
+
+    case_names = args.case or list(CASES)
+    print(f"Query budgets ({len(case_names)} case(s), {SHORT_DAYS}d vs {LONG_DAYS}d ranges)")
+    sys.exit(asyncio.run(run(case_names, args.record, args.tolerance, args.verbose)))
+
+
+if __name__ == "__main__":
+    main()
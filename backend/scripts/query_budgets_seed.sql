@@ -0,0 +1,130 @@
+-- ============================================
+-- QUERY BUDGET FIXTURE
+-- Deterministic raw data for scripts/query_budgets.py: ~26 months of hotel
+-- and restaurant history plus a year of future bookings, all relative to
+-- CURRENT_DATE. Values hash the day offset rather than the date, so the
+-- fixture has the same shape whatever day it is loaded.
+-- Only source tables are seeded; the stats, pace and revenue tables are
+-- derived by the app's own aggregation backfills
+-- (python -m scripts.query_budgets --seed loads this file and runs them).
+--
+-- Expects an empty database built from db/init_clean.sql plus
+-- db/migrations/add_resos_tables.sql.
+-- ============================================
+
+BEGIN;
+
+-- Two included room categories, 25 rooms
+INSERT INTO newbook_room_categories (site_id, site_name, site_type, room_count, is_included, display_order)
+VALUES ('101', 'Double', 'Room', 12, TRUE, 1),
+       ('102', 'Twin', 'Room', 13, TRUE, 2)
+ON CONFLICT (site_id) DO NOTHING;
+
+INSERT INTO system_config (config_key, config_value, description)
+VALUES ('total_rooms', '25', 'Total rooms'),
+       ('accommodation_vat_rate', '0.20', 'Accommodation VAT rate')
+ON CONFLICT (config_key) DO UPDATE SET config_value = EXCLUDED.config_value;
+
+-- Up to 10 bookings arriving per night, 1-3 nights each, placed 0-179 days
+-- ahead. Future stays only include bookings already placed (the OTB);
+-- every tenth booking is cancelled.
+INSERT INTO newbook_bookings_data (
+    newbook_id, booking_reference, booking_placed, arrival_date, departure_date, nights,
+    adults, children, infants, total_guests, category_id, room_type, site_id,
+    status, total_amount, tariff_name, tariff_total, booking_source_name, fetched_at
+)
+SELECT
+    'QB' || to_char(b.arrival, 'YYYYMMDD') || '-' || b.k,
+    'QB-REF-' || to_char(b.arrival, 'YYYYMMDD') || '-' || b.k,
+    b.arrival - b.lead + TIME '10:00',
+    b.arrival,
+    b.arrival + b.nights,
+    b.nights,
+    2, (b.k % 3 = 0)::int, 0, 2 + (b.k % 3 = 0)::int,
+    CASE WHEN b.k % 2 = 0 THEN '101' ELSE '102' END,
+    CASE WHEN b.k % 2 = 0 THEN 'Double' ELSE 'Twin' END,
+    'R' || b.k,
+    CASE
+        WHEN b.k = 10 THEN 'Cancelled'
+        WHEN b.arrival + b.nights <= CURRENT_DATE THEN 'Departed'
+        WHEN b.arrival <= CURRENT_DATE THEN 'Arrived'
+        ELSE 'Confirmed'
+    END,
+    b.nights * 132.00,
+    'Bed & Breakfast',
+    b.nights * 132.00,
+    CASE WHEN b.k % 3 = 0 THEN 'Booking.com' ELSE 'Direct' END,
+    NOW()
+FROM (
+    SELECT d::date AS arrival, k,
+           1 + abs(hashtext((d::date - CURRENT_DATE) || ':n' || k)) % 3 AS nights,
+           abs(hashtext((d::date - CURRENT_DATE) || ':l' || k)) % 180 AS lead
+    FROM generate_series(CURRENT_DATE - 800, CURRENT_DATE + 365, INTERVAL '1 day') d
+    CROSS JOIN generate_series(1, 10) k
+) b
+WHERE b.arrival - b.lead <= CURRENT_DATE
+ON CONFLICT (newbook_id) DO NOTHING;
+
+INSERT INTO newbook_booking_nights (
+    newbook_id, stay_date, calculated_amount, charge_amount, tax_amount, extras_amount, deductions_amount
+)
+SELECT b.newbook_id, n::date, 120.00, 120.00, 20.00, 12.00, 0
+FROM newbook_bookings_data b
+CROSS JOIN LATERAL generate_series(b.arrival_date, b.departure_date - 1, INTERVAL '1 day') n
+WHERE b.newbook_id LIKE 'QB%'
+ON CONFLICT (newbook_id, stay_date) DO NOTHING;
+
+-- Earned revenue for past dates, one GL account per department
+INSERT INTO newbook_gl_accounts (gl_account_id, gl_code, gl_name, department)
+VALUES ('QB-ACC', '4000', 'Accommodation', 'accommodation'),
+       ('QB-DRY', '4100', 'Food', 'dry'),
+       ('QB-WET', '4200', 'Beverage', 'wet')
+ON CONFLICT (gl_account_id) DO NOTHING;
+
+INSERT INTO newbook_earned_revenue_data (date, gl_account_id, gl_code, gl_name, amount_gross, amount_net, revenue_type)
+SELECT d::date, g.gl_account_id, g.gl_code, g.gl_name,
+       ROUND(g.base * 1.2 + abs(hashtext((d::date - CURRENT_DATE) || g.gl_code)) % 400, 2),
+       ROUND(g.base + abs(hashtext((d::date - CURRENT_DATE) || g.gl_code)) % 400, 2),
+       g.department
+FROM generate_series(CURRENT_DATE - 800, CURRENT_DATE - 1, INTERVAL '1 day') d
+CROSS JOIN (
+    SELECT gl_account_id, gl_code, gl_name, department,
+           CASE department WHEN 'accommodation' THEN 1800 WHEN 'dry' THEN 600 ELSE 350 END AS base
+    FROM newbook_gl_accounts
+    WHERE gl_account_id LIKE 'QB-%'
+) g
+ON CONFLICT (date, gl_account_id) DO NOTHING;
+
+-- Up to 12 restaurant bookings per day (4 lunch, 8 dinner), placed 0-59
+-- days ahead; a third are hotel residents
+INSERT INTO resos_bookings_data (
+    resos_id, booking_date, booking_time, opening_hour_id, period_type, covers, status, source,
+    is_hotel_guest, is_dbb, is_package, hotel_booking_number, total_guests, booking_placed, fetched_at
+)
+SELECT
+    'QR' || to_char(r.booking_date, 'YYYYMMDD') || '-' || r.k,
+    r.booking_date,
+    CASE WHEN r.k <= 4 THEN TIME '12:30' ELSE TIME '19:00' END,
+    CASE WHEN r.k <= 4 THEN 'oh_lunch' ELSE 'oh_dinner' END,
+    CASE WHEN r.k <= 4 THEN 'lunch' ELSE 'dinner' END,
+    r.covers,
+    CASE WHEN r.booking_date < CURRENT_DATE THEN 'left' ELSE 'approved' END,
+    CASE WHEN r.k % 2 = 0 THEN 'website' ELSE 'phone' END,
+    r.k % 3 = 0,
+    r.k % 6 = 0,
+    FALSE,
+    CASE WHEN r.k % 3 = 0 THEN 'QB' || to_char(r.booking_date, 'YYYYMMDD') || '-' || r.k END,
+    r.covers,
+    r.booking_date - r.lead + TIME '11:00',
+    NOW()
+FROM (
+    SELECT d::date AS booking_date, k,
+           1 + abs(hashtext((d::date - CURRENT_DATE) || ':c' || k)) % 4 AS covers,
+           abs(hashtext((d::date - CURRENT_DATE) || ':l' || k)) % 60 AS lead
+    FROM generate_series(CURRENT_DATE - 800, CURRENT_DATE + 90, INTERVAL '1 day') d
+    CROSS JOIN generate_series(1, 12) k
+) r
+WHERE r.booking_date - r.lead <= CURRENT_DATE
+ON CONFLICT (resos_id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,386 @@
+"""
+Export engine - streams query results into CSV or Excel files
+
+Rows are read from server-side cursors in EXPORT_CHUNK_ROWS batches, so an
+export holds one batch in memory however long the date range. CSV is
+produced as a generator of text chunks; Excel uses openpyxl write-only
+worksheets, which spill rows to disk instead of building the sheet in
+memory.
+
+Exports covering more than EXPORT_BACKGROUND_DAYS run as 'export' jobs on
+the worker (jobs/registry.py). Each has an export_jobs row with its
+progress, and the finished file is kept in EXPORT_DIR for
+EXPORT_RETENTION_DAYS for download.
+"""
+import csv
+import io
+import logging
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal, SyncSessionLocal
+from services.job_queue import decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = Path("/app/data/exports")
+
+# Rows fetched from the server-side cursor (and written) per batch
+EXPORT_CHUNK_ROWS = 2000
+
+# Longer date ranges are queued as background jobs instead of streamed inline
+EXPORT_BACKGROUND_DAYS = 92
+
+# Finished background exports are deleted after this many days
+EXPORT_RETENTION_DAYS = 7
+
+# Minimum gap between export_jobs progress writes
+PROGRESS_INTERVAL_SECONDS = 2
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+DAILY_FORECAST_SQL = """
+    SELECT
+        f.forecast_date as "Date",
+        f.forecast_type as "Metric",
+        MAX(CASE WHEN f.model_type = 'prophet' THEN f.predicted_value END) as "Prophet",
+        MAX(CASE WHEN f.model_type = 'prophet' THEN f.lower_bound END) as "Prophet Lower",
+        MAX(CASE WHEN f.model_type = 'prophet' THEN f.upper_bound END) as "Prophet Upper",
+        MAX(CASE WHEN f.model_type = 'xgboost' THEN f.predicted_value END) as "XGBoost",
+        MAX(CASE WHEN f.model_type = 'pickup' THEN f.predicted_value END) as "Pickup",
+        db.budget_value as "Budget"
+    FROM forecasts f
+    LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
+    WHERE f.forecast_date BETWEEN :from_date AND :to_date
+    GROUP BY f.forecast_date, f.forecast_type, db.budget_value
+    ORDER BY f.forecast_date, f.forecast_type
+"""
+
+WEEKLY_SUMMARY_SQL = """
+    SELECT
+        DATE_TRUNC('week', f.forecast_date) as "Week Start",
+        f.forecast_type as "Metric",
+        AVG(f.predicted_value) as "Avg Forecast",
+        SUM(f.predicted_value) as "Total Forecast",
+        AVG(db.budget_value) as "Avg Budget",
+        SUM(db.budget_value) as "Total Budget"
+    FROM forecasts f
+    LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
+    WHERE f.forecast_date BETWEEN :from_date AND :to_date
+        AND f.model_type = 'prophet'
+    GROUP BY DATE_TRUNC('week', f.forecast_date), f.forecast_type
+    ORDER BY "Week Start", f.forecast_type
+"""
+
+BUDGET_VARIANCE_SQL = """
+    SELECT
+        f.forecast_date as "Date",
+        f.forecast_type as "Metric",
+        f.predicted_value as "Forecast",
+        db.budget_value as "Budget",
+        (f.predicted_value - db.budget_value) as "Variance",
+        CASE
+            WHEN db.budget_value != 0 THEN
+                ROUND(((f.predicted_value - db.budget_value) / db.budget_value * 100)::numeric, 1)
+            ELSE NULL
+        END as "Variance %"
+    FROM forecasts f
+    LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
+    WHERE f.forecast_date BETWEEN :from_date AND :to_date
+        AND f.model_type = 'prophet'
+    ORDER BY f.forecast_date, f.forecast_type
+"""
+
+HISTORICAL_ACCURACY_SQL = """
+    SELECT
+        date as "Date",
+        metric_type as "Metric",
+        actual_value as "Actual",
+        prophet_forecast as "Prophet",
+        xgboost_forecast as "XGBoost",
+        pickup_forecast as "Pickup",
+        best_model as "Best Model"
+    FROM actual_vs_forecast
+    WHERE date BETWEEN CAST(:from_date AS date) - INTERVAL '30 days' AND :from_date
+    ORDER BY date, metric_type
+"""
+
+METRIC_CSV_SQL = """
+    SELECT
+        f.forecast_date,
+        f.model_type,
+        f.predicted_value,
+        f.lower_bound,
+        f.upper_bound,
+        dm.actual_value,
+        db.budget_value
+    FROM forecasts f
+    LEFT JOIN daily_metrics dm ON f.forecast_date = dm.date AND f.forecast_type = dm.metric_code
+    LEFT JOIN daily_budgets db ON f.forecast_date = db.date AND f.forecast_type = db.budget_type
+    WHERE f.forecast_date BETWEEN :from_date AND :to_date
+        AND f.forecast_type = :metric
+    ORDER BY f.forecast_date, f.model_type
+"""
+
+MODEL_COMPARISON_SQL = """
+    SELECT
+        f.forecast_date,
+        f.forecast_type,
+        fm.metric_name,
+        MAX(CASE WHEN f.model_type = 'prophet' THEN f.predicted_value END) as prophet,
+        MAX(CASE WHEN f.model_type = 'xgboost' THEN f.predicted_value END) as xgboost,
+        MAX(CASE WHEN f.model_type = 'pickup' THEN f.predicted_value END) as pickup,
+        dm.actual_value
+    FROM forecasts f
+    LEFT JOIN forecast_metrics fm ON f.forecast_type = fm.metric_code
+    LEFT JOIN daily_metrics dm ON f.forecast_date = dm.date AND f.forecast_type = dm.metric_code
+    WHERE f.forecast_date BETWEEN :from_date AND :to_date
+    GROUP BY f.forecast_date, f.forecast_type, fm.metric_name, dm.actual_value
+    ORDER BY f.forecast_date, f.forecast_type
+"""
+
+# export_type -> file format, filename template and (sheet name, query) list
+EXPORTS: Dict[str, Dict[str, Any]] = {
+    'excel': {
+        'format': 'xlsx',
+        'filename': 'forecast_{from_date}_{to_date}.xlsx',
+        'sheets': [
+            ('Daily Forecast', DAILY_FORECAST_SQL),
+            ('Weekly Summary', WEEKLY_SUMMARY_SQL),
+            ('Budget Variance', BUDGET_VARIANCE_SQL),
+            ('Historical Accuracy', HISTORICAL_ACCURACY_SQL),
+        ],
+    },
+    'csv': {
+        'format': 'csv',
+        'filename': '{metric}_{from_date}_{to_date}.csv',
+        'sheets': [(None, METRIC_CSV_SQL)],
+    },
+    'model_comparison': {
+        'format': 'xlsx',
+        'filename': 'model_comparison_{from_date}_{to_date}.xlsx',
+        'sheets': [('Model Comparison', MODEL_COMPARISON_SQL)],
+    },
+}
+
+
+def export_filename(export_type: str, params: dict) -> str:
+    return EXPORTS[export_type]['filename'].format(**params)
+
+
+async def stream_csv(export_type: str, params: dict) -> AsyncIterator[str]:
+    """
+    CSV text in EXPORT_CHUNK_ROWS-row chunks, for a StreamingResponse.
+
+    Opens its own session: the request's session is closed before a
+    streaming response body is sent.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    async with AsyncSessionLocal() as db:
+        for _, sql in EXPORTS[export_type]['sheets']:
+            result = await db.stream(text(sql), params, execution_options={'yield_per': EXPORT_CHUNK_ROWS})
+            writer.writerow(result.keys())
+            async for rows in result.partitions():
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_export(
+    db,
+    export_type: str,
+    params: dict,
+    path: Path,
+    on_progress: Optional[Callable[[str, int], None]] = None
+) -> int:
+    """
+    Write an export to path from server-side cursors (sync session).
+    on_progress(sheet, rows_written) is called after every batch.
+
+    Returns:
+        Rows written
+    """
+    export = EXPORTS[export_type]
+    rows_written = 0
+
+    def batches(sql):
+        result = db.execute(text(sql), params, execution_options={'yield_per': EXPORT_CHUNK_ROWS})
+        return result.keys(), result.partitions()
+
+    if export['format'] == 'csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            for sheet, sql in export['sheets']:
+                columns, partitions = batches(sql)
+                writer.writerow(columns)
+                for rows in partitions:
+                    writer.writerows(rows)
+                    rows_written += len(rows)
+                    if on_progress:
+                        on_progress(sheet, rows_written)
+        return rows_written
+
+    workbook = Workbook(write_only=True)
+    for sheet, sql in export['sheets']:
+        worksheet = workbook.create_sheet(sheet)
+        columns, partitions = batches(sql)
+        worksheet.append(list(columns))
+        for rows in partitions:
+            for row in rows:
+                worksheet.append(list(row))
+            rows_written += len(rows)
+            if on_progress:
+                on_progress(sheet, rows_written)
+    workbook.save(path)
+    return rows_written
+
+
+def write_export_file(export_type: str, params: dict, path: Path) -> int:
+    """write_export with its own session, for asyncio.to_thread"""
+    db = SyncSessionLocal()
+    try:
+        return write_export(db, export_type, params, path)
+    finally:
+        db.close()
+
+
+async def create_export_job(
+    db: AsyncSession,
+    export_type: str,
+    params: dict,
+    created_by: Optional[str] = None
+) -> int:
+    """Record a queued background export (caller enqueues and commits)"""
+    result = await db.execute(
+        text("""
+            INSERT INTO export_jobs (export_type, params, filename, created_by)
+            VALUES (:export_type, CAST(:params AS jsonb), :filename, :created_by)
+            RETURNING id
+        """),
+        {
+            'export_type': export_type,
+            'params': encode_payload(params),
+            'filename': export_filename(export_type, params),
+            'created_by': created_by,
+        }
+    )
+    return result.scalar()
+
+
+def _remove_expired_exports(db):
+    """Delete exports (file and row) older than EXPORT_RETENTION_DAYS"""
+    rows = db.execute(
+        text(f"""
+            DELETE FROM export_jobs
+            WHERE created_at < NOW() - INTERVAL '{EXPORT_RETENTION_DAYS} days'
+            AND status IN ('completed', 'failed')
+            RETURNING file_path
+        """)
+    ).fetchall()
+    db.commit()
+    for row in rows:
+        if row.file_path:
+            Path(row.file_path).unlink(missing_ok=True)
+    if rows:
+        logger.info(f"Removed {len(rows)} expired export(s)")
+
+
+def run_export_job(export_id: int) -> dict:
+    """
+    Worker job: write an export_jobs export into EXPORT_DIR, recording
+    rows written and the current sheet as it goes.
+    """
+    db = SyncSessionLocal()
+    path = None
+    try:
+        _remove_expired_exports(db)
+
+        job = db.execute(
+            text("SELECT export_type, params, filename FROM export_jobs WHERE id = :id"),
+            {'id': export_id}
+        ).fetchone()
+        if not job:
+            raise ValueError(f"Export {export_id} not found")
+
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        path = EXPORT_DIR / f"{export_id}_{job.filename}"
+        db.execute(
+            text("UPDATE export_jobs SET status = 'running', started_at = NOW() WHERE id = :id"),
+            {'id': export_id}
+        )
+        db.commit()
+
+        # Progress goes through its own session; the export's session is
+        # holding an open server-side cursor
+        progress_db = SyncSessionLocal()
+        last_progress = 0.0
+
+        def on_progress(sheet: Optional[str], rows_written: int):
+            nonlocal last_progress
+            if time.monotonic() - last_progress < PROGRESS_INTERVAL_SECONDS:
+                return
+            progress_db.execute(
+                text("""
+                    UPDATE export_jobs
+                    SET rows_written = :rows, progress_message = :message
+                    WHERE id = :id
+                """),
+                {
+                    'id': export_id,
+                    'rows': rows_written,
+                    'message': f"{sheet}: {rows_written:,} rows" if sheet else f"{rows_written:,} rows",
+                }
+            )
+            progress_db.commit()
+            last_progress = time.monotonic()
+
+        try:
+            rows_written = write_export(db, job.export_type, decode_payload(job.params), path, on_progress)
+        finally:
+            progress_db.close()
+        db.rollback()
+
+        file_size = path.stat().st_size
+        db.execute(
+            text("""
+                UPDATE export_jobs
+                SET status = 'completed',
+                    file_path = :file_path,
+                    file_size_bytes = :file_size,
+                    rows_written = :rows,
+                    progress_message = NULL,
+                    completed_at = NOW()
+                WHERE id = :id
+            """),
+            {'id': export_id, 'file_path': str(path), 'file_size': file_size, 'rows': rows_written}
+        )
+        db.commit()
+        logger.info(f"Export {export_id} complete: {rows_written} rows, {file_size} bytes")
+        return {'export_id': export_id, 'rows_written': rows_written, 'file_size_bytes': file_size}
+
+    except Exception as e:
+        logger.error(f"Export {export_id} failed: {e}")
+        db.rollback()
+        if path:
+            path.unlink(missing_ok=True)
+        db.execute(
+            text("""
+                UPDATE export_jobs
+                SET status = 'failed', error_message = :error, progress_message = NULL, completed_at = NOW()
+                WHERE id = :id
+            """),
+            {'id': export_id, 'error': str(e)}
+        )
+        db.commit()
+        raise
+    finally:
+        db.close()
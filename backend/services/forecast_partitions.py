@@ -0,0 +1,184 @@
+"""
+Forecast table partition management
+
+forecast_snapshots (by perception_date) and forecast_history (by generated_at)
+are range-partitioned by calendar year (see
+db/migrations/partition_forecast_snapshots_history.sql). This module keeps
+upcoming partitions created, applies retention by dropping whole yearly
+partitions (and deleting expired rows that landed in the default partition),
+and deletes a model's snapshots partition by partition.
+"""
+import logging
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> system_config key holding its retention (years, 0 = keep all)
+PARTITIONED_TABLES = {
+    'forecast_snapshots': 'forecast_snapshot_retention_years',
+    'forecast_history': 'forecast_history_retention_years',
+}
+
+# Partitioned table -> partition key column
+PARTITION_KEYS = {
+    'forecast_snapshots': 'perception_date',
+    'forecast_history': 'generated_at',
+}
+
+LIST_PARTITIONS_SQL = """
+    SELECT c.relname as partition_name,
+           pg_get_expr(c.relpartbound, c.oid) as bound
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = :table
+    ORDER BY c.relname
+"""
+
+
+def _partition_year(table: str, partition_name: str) -> Optional[int]:
+    """Year of a yearly partition named <table>_yYYYY (None for default/other)"""
+    prefix = f"{table}_y"
+    if partition_name.startswith(prefix) and partition_name[len(prefix):].isdigit():
+        return int(partition_name[len(prefix):])
+    return None
+
+
+def list_partitions(db, table: str) -> List[dict]:
+    """
+    List partitions of a partitioned forecast table (sync session).
+
+    Returns:
+        List of dicts with partition_name, year (None for default) and bound
+    """
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Not a partitioned forecast table: {table}")
+    rows = db.execute(text(LIST_PARTITIONS_SQL), {"table": table}).fetchall()
+    return [
+        {
+            "partition_name": row.partition_name,
+            "year": _partition_year(table, row.partition_name),
+            "bound": row.bound,
+        }
+        for row in rows
+    ]
+
+
+def ensure_partitions(db, table: str, years_ahead: int = 1) -> List[str]:
+    """
+    Create yearly partitions for the current year and years_ahead years after it.
+
+    Returns:
+        Names of the partitions ensured
+    """
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Not a partitioned forecast table: {table}")
+    this_year = date.today().year
+    created = []
+    for yr in range(this_year, this_year + years_ahead + 1):
+        result = db.execute(
+            text("SELECT create_yearly_partition(:table, :yr)"),
+            {"table": table, "yr": yr}
+        )
+        created.append(result.scalar())
+    db.commit()
+    return created
+
+
+def drop_expired_partitions(db, table: str, keep_years: int) -> List[str]:
+    """
+    Drop whole yearly partitions older than keep_years (current year counts as one).
+
+    Dropping a partition is a metadata operation - no row-by-row DELETE, no
+    table bloat and no vacuum afterwards. Rows older than the cutoff in the
+    default partition (years with no partition of their own, e.g. old
+    backtests) are deleted.
+
+    Args:
+        db: Sync database session
+        table: Partitioned table name
+        keep_years: Number of years to keep (0 = keep everything)
+
+    Returns:
+        Names of dropped partitions (plus "<table>_default (N rows)" when
+        expired rows were deleted from the default partition)
+    """
+    if keep_years <= 0:
+        return []
+    cutoff_year = date.today().year - keep_years + 1
+    dropped = []
+    for part in list_partitions(db, table):
+        if part["year"] is not None and part["year"] < cutoff_year:
+            db.execute(text(f'DROP TABLE IF EXISTS "{part["partition_name"]}"'))
+            dropped.append(part["partition_name"])
+        elif part["partition_name"] == f"{table}_default":
+            result = db.execute(
+                text(f'''
+                    DELETE FROM "{part["partition_name"]}"
+                    WHERE {PARTITION_KEYS[table]} < make_date(:cutoff_year, 1, 1)
+                '''),
+                {"cutoff_year": cutoff_year}
+            )
+            if result.rowcount:
+                dropped.append(f"{part['partition_name']} ({result.rowcount} rows)")
+    db.commit()
+    if dropped:
+        logger.info(f"Retention dropped {len(dropped)} partition(s) of {table}: {', '.join(dropped)}")
+    return dropped
+
+
+async def delete_model_snapshots(db, model: str, metric_code: Optional[str] = None) -> int:
+    """
+    Delete a model's forecast_snapshots partition by partition (async session).
+
+    Each partition is handled in its own short transaction under a SHARE ROW
+    EXCLUSIVE lock, which keeps readers running but holds off concurrent
+    writers (a running backtest waits for that partition). A partition
+    holding nothing but the model's rows is truncated - no row-by-row
+    DELETE, no dead tuples to vacuum; any other partition gets one bulk
+    DELETE, pruned to that partition.
+
+    Args:
+        db: Async database session
+        model: Model name
+        metric_code: Optional metric to restrict the delete to
+
+    Returns:
+        Number of rows deleted
+    """
+    result = await db.execute(text(LIST_PARTITIONS_SQL), {"table": "forecast_snapshots"})
+    partitions = [row.partition_name for row in result.fetchall()]
+    await db.commit()
+
+    params = {"model": model}
+    match = "model = :model"
+    if metric_code:
+        match += " AND metric_code = :metric_code"
+        params["metric_code"] = metric_code
+
+    total = 0
+    truncated = []
+    for part in partitions:
+        await db.execute(text(f'LOCK TABLE "{part}" IN SHARE ROW EXCLUSIVE MODE'))
+        # Stops at the first row of another model, so a mixed partition
+        # costs a short scan before its DELETE
+        other_rows = await db.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{part}" WHERE ({match}) IS NOT TRUE)'),
+            params
+        )
+        if other_rows.scalar():
+            result = await db.execute(text(f'DELETE FROM "{part}" WHERE {match}'), params)
+            total += result.rowcount
+        else:
+            count = (await db.execute(text(f'SELECT COUNT(*) FROM "{part}"'))).scalar()
+            if count:
+                await db.execute(text(f'TRUNCATE TABLE "{part}"'))
+                truncated.append(part)
+                total += count
+        await db.commit()
+
+    if truncated:
+        logger.info(f"Truncated {', '.join(truncated)} deleting {model} snapshots")
+    return total
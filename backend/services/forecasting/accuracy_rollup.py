@@ -0,0 +1,358 @@
+"""
+Accuracy rollup service
+
+Maintains the accuracy_rollup table: one row per
+(source, metric, model, horizon bucket, day) holding sums of error, absolute
+error, squared error and absolute % error, plus running (cumulative) totals
+of each ordered by day.
+
+Sources:
+- 'live':     actual_vs_forecast (daily production forecasts, horizon 'all')
+- 'backtest': forecast_snapshots (backtest snapshots, bucketed by days_out)
+
+Because the cumulative columns are stored, any trailing window is answered
+with two index lookups per model (the last row at or before the window end,
+minus the last row before the window start) instead of re-aggregating the
+source tables. MAPE, MAE, RMSE and bias all fall out of the differenced sums.
+
+Refreshed by the accuracy calculation job and whenever backtest actuals are
+backfilled.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Models stored as columns on actual_vs_forecast
+LIVE_MODELS = ['prophet', 'xgboost', 'pickup', 'catboost', 'blended']
+
+# Lead time brackets used for backtest accuracy (matches /backtest endpoints)
+HORIZON_BUCKETS = ['0-7', '8-14', '15-30', '31-60', '61-90', '90+']
+ALL_HORIZONS = 'all'
+
+HORIZON_BUCKET_SQL = """
+    CASE
+        WHEN days_out BETWEEN 0 AND 7 THEN '0-7'
+        WHEN days_out BETWEEN 8 AND 14 THEN '8-14'
+        WHEN days_out BETWEEN 15 AND 30 THEN '15-30'
+        WHEN days_out BETWEEN 31 AND 60 THEN '31-60'
+        WHEN days_out BETWEEN 61 AND 90 THEN '61-90'
+        ELSE '90+'
+    END
+"""
+
+# Map forecast metric codes to forecast_snapshots metric codes
+SNAPSHOT_METRIC_MAP = {
+    'hotel_occupancy_pct': 'occupancy',
+    'hotel_room_nights': 'rooms',
+    'hotel_guests': 'guests',
+    'hotel_arr': 'arr',
+    'ave_guest_rate': 'ave_guest_rate',
+    'net_accom': 'net_accom',
+    'net_dry': 'net_dry',
+    'net_wet': 'net_wet',
+    'total_rev': 'total_rev',
+}
+
+SUM_COLUMNS = ['n', 'pct_n', 'sum_error', 'sum_abs_error', 'sum_sq_error', 'sum_abs_pct_error']
+
+
+def _live_models_sql() -> str:
+    """VALUES list unpivoting actual_vs_forecast error columns into (model, error, pct_error) rows"""
+    return ",\n                ".join(
+        f"('{m}', avf.{m}_error, avf.{m}_pct_error)" for m in LIVE_MODELS
+    )
+
+
+def _date_filter(column: str, from_date: Optional[date], to_date: Optional[date], params: dict) -> str:
+    """Build an optional date range filter, adding bound values to params"""
+    clause = ""
+    if from_date:
+        clause += f" AND {column} >= :from_date"
+        params["from_date"] = from_date
+    if to_date:
+        clause += f" AND {column} <= :to_date"
+        params["to_date"] = to_date
+    return clause
+
+
+def _refresh_statements(
+    source: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    model: Optional[str] = None
+) -> List[tuple]:
+    """
+    Build the delete / insert / cumulative-update statements for a refresh.
+
+    Returns list of (sql, params) tuples to execute in order.
+    """
+    if source not in ('live', 'backtest'):
+        raise ValueError(f"Invalid accuracy rollup source: {source}")
+
+    params = {"source": source}
+    model_filter = ""
+    if model:
+        model_filter = " AND model = :model"
+        params["model"] = model
+
+    delete_sql = "DELETE FROM accuracy_rollup WHERE source = :source" + model_filter
+    delete_sql += _date_filter("day", from_date, to_date, params)
+
+    if source == 'live':
+        insert_sql = f"""
+            INSERT INTO accuracy_rollup (
+                source, metric_code, model, horizon_bucket, day,
+                n, pct_n, sum_error, sum_abs_error, sum_sq_error, sum_abs_pct_error,
+                updated_at
+            )
+            SELECT
+                :source, avf.metric_type, m.model, '{ALL_HORIZONS}', avf.date,
+                1,
+                CASE WHEN m.pct_error IS NOT NULL THEN 1 ELSE 0 END,
+                -m.error,
+                ABS(m.error),
+                m.error * m.error,
+                ABS(m.pct_error),
+                NOW()
+            FROM actual_vs_forecast avf
+            CROSS JOIN LATERAL (VALUES
+                {_live_models_sql()}
+            ) AS m(model, error, pct_error)
+            WHERE avf.actual_value IS NOT NULL
+                AND m.error IS NOT NULL
+        """
+        insert_sql += _date_filter("avf.date", from_date, to_date, params)
+        if model:
+            insert_sql += " AND m.model = :model"
+    else:
+        insert_sql = f"""
+            INSERT INTO accuracy_rollup (
+                source, metric_code, model, horizon_bucket, day,
+                n, pct_n, sum_error, sum_abs_error, sum_sq_error, sum_abs_pct_error,
+                updated_at
+            )
+            SELECT
+                :source, metric_code, model, COALESCE(horizon_bucket, '{ALL_HORIZONS}'), target_date,
+                COUNT(*),
+                COUNT(NULLIF(actual_value, 0)),
+                SUM(forecast_value - actual_value),
+                SUM(ABS(forecast_value - actual_value)),
+                SUM((forecast_value - actual_value) * (forecast_value - actual_value)),
+                SUM(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100),
+                NOW()
+            FROM (
+                SELECT
+                    metric_code, model, target_date, forecast_value, actual_value,
+                    {HORIZON_BUCKET_SQL} as horizon_bucket
+                FROM forecast_snapshots
+                WHERE actual_value IS NOT NULL
+                    AND forecast_value IS NOT NULL
+        """
+        insert_sql += _date_filter("target_date", from_date, to_date, params)
+        insert_sql += model_filter
+        insert_sql += """
+            ) s
+            GROUP BY GROUPING SETS (
+                (metric_code, model, target_date, horizon_bucket),
+                (metric_code, model, target_date)
+            )
+        """
+
+    # Running totals only change from the first refreshed day onwards
+    cum_sets = ",\n                ".join(f"cum_{c} = c.cum_{c}" for c in SUM_COLUMNS)
+    cum_windows = ",\n                    ".join(f"SUM({c}) OVER w as cum_{c}" for c in SUM_COLUMNS)
+    cumulative_sql = f"""
+        UPDATE accuracy_rollup r
+        SET {cum_sets}
+        FROM (
+            SELECT
+                metric_code, model, horizon_bucket, day,
+                {cum_windows}
+            FROM accuracy_rollup
+            WHERE source = :source{model_filter}
+            WINDOW w AS (PARTITION BY metric_code, model, horizon_bucket ORDER BY day)
+        ) c
+        WHERE r.source = :source
+            AND r.metric_code = c.metric_code
+            AND r.model = c.model
+            AND r.horizon_bucket = c.horizon_bucket
+            AND r.day = c.day
+    """
+    if from_date:
+        cumulative_sql += " AND r.day >= :from_date"
+
+    return [
+        (delete_sql, params),
+        (insert_sql, params),
+        (cumulative_sql, params),
+    ]
+
+
+def refresh_accuracy_rollup(
+    db,
+    source: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    model: Optional[str] = None
+) -> int:
+    """
+    Rebuild accuracy_rollup day rows for a source over a date range (sync session).
+
+    Args:
+        db: Sync database session
+        source: 'live' (actual_vs_forecast) or 'backtest' (forecast_snapshots)
+        from_date: First day to rebuild (None = all history)
+        to_date: Last day to rebuild (None = no upper bound)
+        model: Optional model to restrict the rebuild to
+
+    Returns:
+        Number of rollup rows written
+    """
+    rows_written = 0
+    for i, (sql, params) in enumerate(_refresh_statements(source, from_date, to_date, model)):
+        result = db.execute(text(sql), params)
+        if i == 1:
+            rows_written = result.rowcount
+    db.commit()
+    logger.info(f"Accuracy rollup ({source}) refreshed: {rows_written} rows from {from_date or 'start'} to {to_date or 'end'}")
+    return rows_written
+
+
+async def refresh_accuracy_rollup_async(
+    db,
+    source: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    model: Optional[str] = None
+) -> int:
+    """Async session variant of refresh_accuracy_rollup (for API endpoints)"""
+    rows_written = 0
+    for i, (sql, params) in enumerate(_refresh_statements(source, from_date, to_date, model)):
+        result = await db.execute(text(sql), params)
+        if i == 1:
+            rows_written = result.rowcount
+    await db.commit()
+    logger.info(f"Accuracy rollup ({source}) refreshed: {rows_written} rows from {from_date or 'start'} to {to_date or 'end'}")
+    return rows_written
+
+
+async def get_windowed_accuracy(
+    db,
+    source: str,
+    metric_code: str,
+    models: List[str],
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    horizon_bucket: str = ALL_HORIZONS
+) -> Dict[str, dict]:
+    """
+    Look up accuracy statistics for each model over a window.
+
+    Each model costs two index lookups on the cumulative columns regardless
+    of window length.
+
+    Args:
+        db: Async database session
+        source: 'live' or 'backtest'
+        metric_code: Metric code as stored by the source
+        models: Models to look up
+        from_date: Window start (None = all history)
+        to_date: Window end (None = latest)
+        horizon_bucket: Lead time bracket, or 'all'
+
+    Returns:
+        Dict of model -> {n, mape, mae, rmse, bias}. Models with no data are omitted.
+    """
+    if not models:
+        return {}
+
+    cum_cols = ", ".join(f"cum_{c}" for c in SUM_COLUMNS)
+    diffs = ",\n            ".join(
+        f"hi.cum_{c} - COALESCE(lo.cum_{c}, 0) as {c}" for c in SUM_COLUMNS
+    )
+    params = {
+        "source": source,
+        "metric_code": metric_code,
+        "horizon_bucket": horizon_bucket,
+        "models": list(models),
+        "to_date": to_date or date.max,
+        "from_date": from_date or date.min,
+    }
+
+    query = f"""
+        SELECT
+            m.model,
+            {diffs}
+        FROM unnest(CAST(:models AS text[])) AS m(model)
+        CROSS JOIN LATERAL (
+            SELECT {cum_cols}
+            FROM accuracy_rollup
+            WHERE source = :source AND metric_code = :metric_code
+                AND model = m.model AND horizon_bucket = :horizon_bucket
+                AND day <= :to_date
+            ORDER BY day DESC
+            LIMIT 1
+        ) hi
+        LEFT JOIN LATERAL (
+            SELECT {cum_cols}
+            FROM accuracy_rollup
+            WHERE source = :source AND metric_code = :metric_code
+                AND model = m.model AND horizon_bucket = :horizon_bucket
+                AND day < :from_date
+            ORDER BY day DESC
+            LIMIT 1
+        ) lo ON TRUE
+    """
+
+    result = await db.execute(text(query), params)
+
+    stats = {}
+    for row in result.fetchall():
+        n = int(row.n or 0)
+        pct_n = int(row.pct_n or 0)
+        if n <= 0:
+            continue
+        stats[row.model] = {
+            "n": n,
+            "mape": float(row.sum_abs_pct_error) / pct_n if pct_n > 0 else None,
+            "mae": float(row.sum_abs_error) / n,
+            "rmse": (float(row.sum_sq_error) / n) ** 0.5,
+            "bias": float(row.sum_error) / n,
+        }
+    return stats
+
+
+async def get_rollup_models(db, source: str, metric_code: str) -> List[str]:
+    """List models that have rollup rows for a metric"""
+    result = await db.execute(
+        text("""
+            SELECT DISTINCT model FROM accuracy_rollup
+            WHERE source = :source AND metric_code = :metric_code AND horizon_bucket = :all
+            ORDER BY model
+        """),
+        {"source": source, "metric_code": metric_code, "all": ALL_HORIZONS}
+    )
+    return [row.model for row in result.fetchall()]
+
+
+def inverse_mape_weights(mape_scores: Dict[str, float]) -> Dict[str, float]:
+    """
+    Convert MAPE scores to weights (lower MAPE = higher weight), normalized to sum to 1.0.
+    """
+    weights = {model: 1.0 / max(mape, 0.1) for model, mape in mape_scores.items()}
+    weight_sum = sum(weights.values())
+    return {k: v / weight_sum for k, v in weights.items()}
+
+
+def trailing_window(window_days: Optional[int], end_date: Optional[date] = None) -> tuple:
+    """
+    Return (from_date, to_date) for a trailing window ending the day before end_date.
+    window_days=None means all history.
+    """
+    end_date = end_date or date.today()
+    to_date = end_date - timedelta(days=1)
+    from_date = end_date - timedelta(days=window_days) if window_days else None
+    return from_date, to_date
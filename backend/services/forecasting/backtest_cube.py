@@ -0,0 +1,162 @@
+"""
+Backtest analytics cube
+
+Pre-aggregates forecast_snapshots error statistics into backtest_cube, keyed by
+model x metric x lead bracket x target day-of-week x target month x perception week.
+The /backtest accuracy-by-bracket / day-of-week / month endpoints roll the cube
+up instead of scanning every snapshot row.
+
+Only snapshots with an actual value are included. Rows are rebuilt per
+perception week, so a refresh after a batch backtest or an actuals backfill
+only touches the weeks that changed.
+"""
+import logging
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import text
+
+from services.forecasting.accuracy_rollup import HORIZON_BUCKET_SQL
+
+logger = logging.getLogger(__name__)
+
+# Bracket sort order for display
+LEAD_BRACKET_ORDER = {'0-7': 1, '8-14': 2, '15-30': 3, '31-60': 4, '61-90': 5, '90+': 6}
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+MONTH_NAMES = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+
+def _refresh_statements(
+    from_perception: Optional[date] = None,
+    model: Optional[str] = None
+) -> List[tuple]:
+    """
+    Build the delete / insert statements rebuilding cube rows for perception
+    weeks on or after from_perception (None = everything).
+
+    Returns list of (sql, params) tuples to execute in order.
+    """
+    params = {}
+    cube_filter = ""
+    snapshot_filter = ""
+    if from_perception:
+        cube_filter += " AND perception_week >= CAST(date_trunc('week', CAST(:from_perception AS date)) AS date)"
+        snapshot_filter += " AND perception_date >= CAST(date_trunc('week', CAST(:from_perception AS date)) AS date)"
+        params["from_perception"] = from_perception
+    if model:
+        cube_filter += " AND model = :model"
+        snapshot_filter += " AND model = :model"
+        params["model"] = model
+
+    delete_sql = "DELETE FROM backtest_cube WHERE TRUE" + cube_filter
+
+    insert_sql = f"""
+        INSERT INTO backtest_cube (
+            metric_code, model, lead_bracket, dow, month, perception_week,
+            n, err_n, pct_n, sum_error, sum_abs_error, sum_sq_error, sum_abs_pct_error,
+            updated_at
+        )
+        SELECT
+            metric_code,
+            model,
+            {HORIZON_BUCKET_SQL} as lead_bracket,
+            EXTRACT(DOW FROM target_date)::int as dow,
+            EXTRACT(MONTH FROM target_date)::int as month,
+            CAST(date_trunc('week', perception_date) AS date) as perception_week,
+            COUNT(*),
+            COUNT(forecast_value),
+            COUNT(forecast_value - NULLIF(actual_value, 0)),
+            SUM(forecast_value - actual_value),
+            SUM(ABS(forecast_value - actual_value)),
+            SUM((forecast_value - actual_value) * (forecast_value - actual_value)),
+            SUM(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100),
+            NOW()
+        FROM forecast_snapshots
+        WHERE actual_value IS NOT NULL{snapshot_filter}
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """
+
+    return [(delete_sql, params), (insert_sql, params)]
+
+
+def refresh_backtest_cube(
+    db,
+    from_perception: Optional[date] = None,
+    model: Optional[str] = None
+) -> int:
+    """
+    Rebuild backtest_cube rows (sync session).
+
+    Args:
+        db: Sync database session
+        from_perception: Rebuild perception weeks from this date on (None = all)
+        model: Optional model to restrict the rebuild to
+
+    Returns:
+        Number of cube rows written
+    """
+    statements = _refresh_statements(from_perception, model)
+    db.execute(text(statements[0][0]), statements[0][1])
+    result = db.execute(text(statements[1][0]), statements[1][1])
+    db.commit()
+    logger.info(f"Backtest cube refreshed: {result.rowcount} rows from perception week of {from_perception or 'start'}")
+    return result.rowcount
+
+
+async def refresh_backtest_cube_async(
+    db,
+    from_perception: Optional[date] = None,
+    model: Optional[str] = None
+) -> int:
+    """Async session variant of refresh_backtest_cube (for API endpoints)"""
+    statements = _refresh_statements(from_perception, model)
+    await db.execute(text(statements[0][0]), statements[0][1])
+    result = await db.execute(text(statements[1][0]), statements[1][1])
+    await db.commit()
+    logger.info(f"Backtest cube refreshed: {result.rowcount} rows from perception week of {from_perception or 'start'}")
+    return result.rowcount
+
+
+async def query_backtest_cube(
+    db,
+    metric_code: str,
+    dimension: str,
+    model: Optional[str] = None
+) -> list:
+    """
+    Roll the cube up to (model, dimension).
+
+    Args:
+        db: Async database session
+        metric_code: Metric code
+        dimension: 'lead_bracket', 'dow' or 'month'
+        model: Optional model filter
+
+    Returns:
+        Rows with model, the dimension value, n, mae, mape
+    """
+    if dimension not in ('lead_bracket', 'dow', 'month'):
+        raise ValueError(f"Invalid cube dimension: {dimension}")
+
+    model_filter = "AND model = :model" if model else ""
+    params = {"metric_code": metric_code}
+    if model:
+        params["model"] = model
+
+    query = f"""
+        SELECT
+            model,
+            {dimension} as dim,
+            SUM(n) as n,
+            SUM(sum_abs_error) / NULLIF(SUM(err_n), 0) as mae,
+            SUM(sum_abs_pct_error) / NULLIF(SUM(pct_n), 0) as mape
+        FROM backtest_cube
+        WHERE metric_code = :metric_code
+        {model_filter}
+        GROUP BY model, {dimension}
+    """
+    result = await db.execute(text(query), params)
+    return result.fetchall()
@@ -6,7 +6,7 @@ Two-stage blending:
 2. 60/40 blend with prior year actual or budget
 
 Stage 1 - Model Weighting (MAPE-based):
-- Query forecast_snapshots table for backtest MAPE scores
+- Read backtest MAPE scores from the accuracy_rollup table
 - Calculate inverse-MAPE weights (lower MAPE = higher weight)
 - Pace metrics: weighted blend of Prophet + XGBoost + CatBoost + Pickup
 - Other metrics: weighted blend of Prophet + XGBoost + CatBoost
@@ -22,61 +22,54 @@ from datetime import date, timedelta
 from typing import List, Dict, Optional
 from sqlalchemy import text
 
+from services.forecasting.accuracy_rollup import (
+    SNAPSHOT_METRIC_MAP,
+    get_windowed_accuracy,
+    inverse_mape_weights,
+    trailing_window,
+)
+
 logger = logging.getLogger(__name__)
 
 
-async def get_model_weights(db, metric_code: str, is_pace_metric: bool) -> Dict[str, float]:
+async def get_model_weights(
+    db,
+    metric_code: str,
+    is_pace_metric: bool,
+    window_days: Optional[int] = None
+) -> Dict[str, float]:
     """
     Calculate accuracy-based weights for each model using MAPE scores from backtest data.
 
+    MAPE is read from the accuracy_rollup table (refreshed by the accuracy job
+    and actuals backfill) rather than aggregated from forecast_snapshots.
+
     Args:
         db: Database session
         metric_code: Metric to forecast
         is_pace_metric: Whether this is a pace metric (uses pickup)
+        window_days: Optional trailing window in days (None = all backtest history)
 
     Returns:
         Dict of model names to weights (normalized to sum to 1.0)
     """
-    # Map metric codes to forecast_snapshots metric codes
-    metric_map = {
-        'hotel_occupancy_pct': 'occupancy',
-        'hotel_room_nights': 'rooms',
-        'hotel_guests': 'guests',
-        'hotel_arr': 'arr',
-        'ave_guest_rate': 'ave_guest_rate',
-        'net_accom': 'net_accom',
-        'net_dry': 'net_dry',
-        'net_wet': 'net_wet',
-        'total_rev': 'total_rev',
-    }
-
-    snapshot_metric = metric_map.get(metric_code, 'rooms')
+    snapshot_metric = SNAPSHOT_METRIC_MAP.get(metric_code, 'rooms')
 
     try:
-        # Query MAPE from forecast_snapshots where we have actuals
-        # Calculate MAPE for each model separately
         models_to_query = ['prophet', 'xgboost', 'catboost']
         if is_pace_metric:
             models_to_query.append('pickup')
 
+        from_date, to_date = trailing_window(window_days)
+        stats = await get_windowed_accuracy(
+            db, 'backtest', snapshot_metric, models_to_query,
+            from_date=from_date, to_date=to_date
+        )
+
         mape_scores = {}
         for model in models_to_query:
-            query = text("""
-                SELECT AVG(ABS((forecast_value - actual_value) / NULLIF(actual_value, 0)) * 100) as mape
-                FROM forecast_snapshots
-                WHERE actual_value IS NOT NULL
-                    AND actual_value != 0
-                    AND forecast_value IS NOT NULL
-                    AND metric_code = :metric_code
-                    AND model = :model
-            """)
-            result = await db.execute(query, {"metric_code": snapshot_metric, "model": model})
-            row = result.fetchone()
-
-            if row and row.mape is not None:
-                mape_scores[model] = float(row.mape)
-            else:
-                mape_scores[model] = 100  # Default high MAPE if no data
+            mape = stats.get(model, {}).get('mape')
+            mape_scores[model] = mape if mape is not None else 100  # Default high MAPE if no data
 
         # Check if we have valid MAPE data
         if all(score == 100 for score in mape_scores.values()):
@@ -91,11 +84,7 @@ async def get_model_weights(db, metric_code: str, is_pace_metric: bool) -> Dict[
                    ", ".join([f"{k}={v:.2f}%" for k, v in mape_scores.items()]))
 
         # Calculate inverse-MAPE weights (lower MAPE = higher weight)
-        weights = {model: 1.0 / max(mape, 0.1) for model, mape in mape_scores.items()}
-
-        # Normalize weights to sum to 1.0
-        weight_sum = sum(weights.values())
-        normalized_weights = {k: v / weight_sum for k, v in weights.items()}
+        normalized_weights = inverse_mape_weights(mape_scores)
 
         logger.info(f"Normalized weights for {snapshot_metric}: " +
                    ", ".join([f"{k}={v:.4f}" for k, v in normalized_weights.items()]))
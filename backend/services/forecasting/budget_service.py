@@ -8,6 +8,8 @@ from calendar import monthrange
 from typing import Optional, Dict, List
 from sqlalchemy import text
 
+from utils.response_cache import bump_data_version_async
+
 logger = logging.getLogger(__name__)
 
 # Map budget_type to column name in newbook_net_revenue_data
@@ -181,6 +183,8 @@ async def distribute_budget(
                 )
                 days_distributed += 1
 
+    if days_distributed:
+        await bump_data_version_async(db)
     await db.commit()
     logger.info(f"Budget distribution complete: {days_distributed} days")
     return {"days_distributed": days_distributed, "status": "success"}
@@ -15,18 +15,57 @@ import math
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
-from collections import defaultdict
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from services.forecasting.pickup_v2_model import forecast_rooms_for_date, get_prior_year_date as get_py_date
+from services.forecasting.pickup_v2_model import (
+    forecast_rooms_for_date,
+    forecast_rooms_for_range,
+    get_prior_year_date as get_py_date,
+)
 
 logger = logging.getLogger(__name__)
 
 # Valid booking statuses for counting
 VALID_STATUSES = ('approved', 'arrived', 'seated', 'left')
 
+# Weekly pace columns tracked beyond d30
+WEEKLY_PACE_COLUMNS = [37, 44, 51, 58, 65, 72, 79, 86, 93, 100, 107, 114, 121, 128, 135, 142, 149, 156, 163, 170, 177]
+
+# resos_pickup_curves (period, segment) keys - built by jobs.resos_aggregation.
+# resos_booking_pace is not split by meal period, so lunch uses the 'total' pace.
+LUNCH_CURVE = ('all', 'total')
+DINNER_NON_RESIDENT_CURVE = ('all', 'non_resident')
+RESIDENT_DINING_CURVE = ('dinner', 'resident_rate')
+CURVE_QUANTILES = ['p10', 'p25', 'median', 'p75', 'p90']
+
+
+def _pace_lead_day(lead_days: int) -> int:
+    """resos_booking_pace interval used for a lead time (future dates only)"""
+    if lead_days <= 30:
+        return lead_days
+    elif lead_days <= 177:
+        return min(WEEKLY_PACE_COLUMNS, key=lambda x: abs(x - lead_days))
+    return 177  # Cap at max tracked
+
+
+def _pace_column(lead_days: int) -> str:
+    """resos_booking_pace column used for a lead time (future dates only)"""
+    return f"d{_pace_lead_day(lead_days)}"
+
+
+def _pg_dow(d: date) -> int:
+    """PostgreSQL day of week (0=Sun ... 6=Sat) for a date"""
+    return (d.weekday() + 1) % 7
+
+
+def _curve_from_row(row) -> Dict[str, float]:
+    """Convert a resos_pickup_curves row to a dict of floats"""
+    curve = {q: float(getattr(row, q) or 0) for q in CURVE_QUANTILES}
+    curve["sample_size"] = row.sample_size
+    return curve
+
 
 async def get_hotel_bookings_with_dinner_reservation(
     db: AsyncSession,
@@ -91,27 +130,8 @@ def get_prior_year_date(target_date: date) -> date:
     return target_date - timedelta(days=364)
 
 
-async def get_hotel_occupancy_for_date(db: AsyncSession, stay_date: date) -> Dict[str, Any]:
-    """
-    Get hotel room occupancy for a specific date from aggregated stats.
-    Returns occupied rooms, total capacity, and occupancy percentage.
-    Uses newbook_bookings_stats which is pre-aggregated with is_included filtering.
-    """
-    # Query from aggregated stats table - more reliable and already filtered
-    result = await db.execute(
-        text("""
-            SELECT
-                COALESCE(booking_count, 0) as room_count,
-                COALESCE(guests_count, 0) as guest_count,
-                COALESCE(bookable_count, 0) as total_rooms,
-                COALESCE(bookable_occupancy_pct, 0) as occupancy_pct
-            FROM newbook_bookings_stats
-            WHERE date = :stay_date
-        """),
-        {"stay_date": stay_date}
-    )
-    row = result.fetchone()
-
+def _occupancy_from_row(row) -> Dict[str, Any]:
+    """Convert a newbook_bookings_stats row (or None) to the occupancy dict"""
     if row:
         return {
             "occupied_rooms": row.room_count,
@@ -124,36 +144,30 @@ async def get_hotel_occupancy_for_date(db: AsyncSession, stay_date: date) -> Dic
     return {"occupied_rooms": 0, "total_rooms": 0, "occupancy_pct": 0, "guests": 0}
 
 
-async def get_resos_covers_for_date(
-    db: AsyncSession,
-    target_date: date,
-    period_type: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Get restaurant booking covers for a specific date from aggregated stats table.
-    Returns covers by period (breakfast, lunch, dinner, etc.)
-    """
-    # Query from aggregated stats table - more efficient and reliable
-    result = await db.execute(
-        text("""
-            SELECT
-                COALESCE(breakfast_covers, 0) as breakfast_covers,
-                COALESCE(lunch_covers, 0) as lunch_covers,
-                COALESCE(afternoon_covers, 0) as afternoon_covers,
-                COALESCE(dinner_covers, 0) as dinner_covers,
-                COALESCE(other_covers, 0) as other_covers,
-                COALESCE(total_covers, 0) as total_covers,
-                COALESCE(hotel_guest_covers, 0) as hotel_guest_covers,
-                COALESCE(non_hotel_guest_covers, 0) as non_hotel_guest_covers,
-                COALESCE(dbb_covers, 0) as dbb_covers,
-                COALESCE(total_bookings, 0) as total_bookings
-            FROM resos_bookings_stats
-            WHERE date = :target_date
-        """),
-        {"target_date": target_date}
-    )
-    row = result.fetchone()
+HOTEL_STATS_COLUMNS = """
+    COALESCE(booking_count, 0) as room_count,
+    COALESCE(guests_count, 0) as guest_count,
+    COALESCE(bookable_count, 0) as total_rooms,
+    COALESCE(bookable_occupancy_pct, 0) as occupancy_pct
+"""
+
 
+RESOS_STATS_COLUMNS = """
+    COALESCE(breakfast_covers, 0) as breakfast_covers,
+    COALESCE(lunch_covers, 0) as lunch_covers,
+    COALESCE(afternoon_covers, 0) as afternoon_covers,
+    COALESCE(dinner_covers, 0) as dinner_covers,
+    COALESCE(other_covers, 0) as other_covers,
+    COALESCE(total_covers, 0) as total_covers,
+    COALESCE(hotel_guest_covers, 0) as hotel_guest_covers,
+    COALESCE(non_hotel_guest_covers, 0) as non_hotel_guest_covers,
+    COALESCE(dbb_covers, 0) as dbb_covers,
+    COALESCE(total_bookings, 0) as total_bookings
+"""
+
+
+def _covers_from_row(row) -> Dict[str, Any]:
+    """Convert a resos_bookings_stats row (or None) to covers by period"""
     if not row:
         # No data for this date - return empty structure
         return {
@@ -195,265 +209,6 @@ async def get_resos_covers_for_date(
     return covers_by_period
 
 
-async def get_historical_breakfast_rate(db: AsyncSession, lookback_days: int = 90) -> float:
-    """
-    Calculate historical breakfast attendance rate as covers per occupied room.
-    Uses past data to determine typical breakfast covers per hotel room.
-    Uses aggregated stats tables for reliability.
-    """
-    # Join resos stats with newbook stats to get breakfast covers and occupancy
-    result = await db.execute(
-        text("""
-            SELECT
-                SUM(rbs.breakfast_covers) as total_breakfast,
-                SUM(nbs.booking_count) as total_room_nights
-            FROM resos_bookings_stats rbs
-            JOIN newbook_bookings_stats nbs ON rbs.date = nbs.date
-            WHERE rbs.date >= CURRENT_DATE - CAST(:lookback_days AS INTEGER)
-            AND rbs.date < CURRENT_DATE
-            AND rbs.breakfast_covers > 0
-            AND nbs.booking_count > 0
-        """),
-        {"lookback_days": lookback_days}
-    )
-    row = result.fetchone()
-
-    if row and row.total_room_nights and row.total_room_nights > 0:
-        # Calculate covers per room night
-        rate = float(row.total_breakfast) / float(row.total_room_nights)
-        return rate
-
-    # Default: assume 1.8 covers per room (average party size for breakfast)
-    return 1.8
-
-
-async def get_lunch_pickup_by_lead_time(
-    db: AsyncSession,
-    target_date: date,
-    lead_days: int,
-    lookback_weeks: int = 8
-) -> int:
-    """
-    Get the median pickup COUNT for lunch at a given lead time for the same DOW.
-
-    Pickup = final_covers - otb_at_lead
-    This tells us how many covers typically come in AFTER this lead time.
-
-    More stable than ratio-based approach because it doesn't inflate
-    when current OTB is higher than historical OTB.
-
-    Args:
-        db: Database session
-        target_date: Date we're forecasting (to get DOW)
-        lead_days: Days until the target date
-        lookback_weeks: Weeks of history to use
-
-    Returns:
-        Median pickup count (integer), or 0 if no data
-    """
-    # Get day of week - convert Python (0=Mon) to PostgreSQL (0=Sun, 1=Mon...6=Sat)
-    python_dow = target_date.weekday()
-    pg_dow = (python_dow + 1) % 7
-
-    # Determine which pace column to use based on lead days
-    if lead_days <= 0:
-        return 0  # No pickup for past dates
-    elif lead_days <= 30:
-        pace_col = f"d{lead_days}"
-    elif lead_days <= 177:
-        # Weekly intervals - find closest
-        weekly_cols = [37, 44, 51, 58, 65, 72, 79, 86, 93, 100, 107, 114, 121, 128, 135, 142, 149, 156, 163, 170, 177]
-        pace_col = f"d{min(weekly_cols, key=lambda x: abs(x - lead_days))}"
-    else:
-        pace_col = "d177"  # Cap at max tracked
-
-    # Query pace data for same DOW to calculate pickup counts
-    # pace_type 'total' gives us overall covers
-    result = await db.execute(
-        text(f"""
-            SELECT
-                COALESCE({pace_col}, 0) as otb_at_lead,
-                COALESCE(d0, 0) as final_covers
-            FROM resos_booking_pace
-            WHERE EXTRACT(DOW FROM booking_date) = :dow
-            AND booking_date >= CURRENT_DATE - CAST(:lookback_days AS INTEGER)
-            AND booking_date < CURRENT_DATE
-            AND d0 > 0
-            AND pace_type = 'total'
-            ORDER BY booking_date DESC
-            LIMIT :max_weeks
-        """),
-        {
-            "dow": pg_dow,
-            "lookback_days": lookback_weeks * 7,
-            "max_weeks": lookback_weeks
-        }
-    )
-    rows = result.fetchall()
-
-    if not rows:
-        # No pace data - return 0 (no pickup estimate available)
-        return 0
-
-    # Calculate pickup counts for each historical day
-    pickups = []
-    for row in rows:
-        otb_at_lead = row.otb_at_lead or 0
-        final = row.final_covers or 0
-        # Pickup = how many came in after this lead time
-        pickup = max(0, final - otb_at_lead)  # Floor at 0 (cancellations shouldn't give negative)
-        pickups.append(pickup)
-
-    if not pickups:
-        return 0
-
-    # Calculate median pickup count
-    pickups_sorted = sorted(pickups)
-    n = len(pickups_sorted)
-    if n % 2 == 0:
-        median = (pickups_sorted[n // 2 - 1] + pickups_sorted[n // 2]) / 2
-    else:
-        median = pickups_sorted[n // 2]
-
-    return math.ceil(median)  # Round up
-
-
-async def get_dinner_non_resident_pickup_by_lead_time(
-    db: AsyncSession,
-    target_date: date,
-    lead_days: int,
-    lookback_weeks: int = 8
-) -> int:
-    """
-    Get median pickup count for non-resident dinner at a given lead time.
-    Same logic as lunch - straight pickup count based on historical pace data.
-    """
-    python_dow = target_date.weekday()
-    pg_dow = (python_dow + 1) % 7
-
-    if lead_days <= 0:
-        return 0
-    elif lead_days <= 30:
-        pace_col = f"d{lead_days}"
-    elif lead_days <= 177:
-        weekly_cols = [37, 44, 51, 58, 65, 72, 79, 86, 93, 100, 107, 114, 121, 128, 135, 142, 149, 156, 163, 170, 177]
-        pace_col = f"d{min(weekly_cols, key=lambda x: abs(x - lead_days))}"
-    else:
-        pace_col = "d177"
-
-    # Query pace data for non_resident type
-    result = await db.execute(
-        text(f"""
-            SELECT
-                COALESCE({pace_col}, 0) as otb_at_lead,
-                COALESCE(d0, 0) as final_covers
-            FROM resos_booking_pace
-            WHERE EXTRACT(DOW FROM booking_date) = :dow
-            AND booking_date >= CURRENT_DATE - CAST(:lookback_days AS INTEGER)
-            AND booking_date < CURRENT_DATE
-            AND d0 > 0
-            AND pace_type = 'non_resident'
-            ORDER BY booking_date DESC
-            LIMIT :max_weeks
-        """),
-        {
-            "dow": pg_dow,
-            "lookback_days": lookback_weeks * 7,
-            "max_weeks": lookback_weeks
-        }
-    )
-    rows = result.fetchall()
-
-    if not rows:
-        return 0
-
-    pickups = []
-    for row in rows:
-        otb_at_lead = row.otb_at_lead or 0
-        final = row.final_covers or 0
-        pickup = max(0, final - otb_at_lead)
-        pickups.append(pickup)
-
-    if not pickups:
-        return 0
-
-    pickups_sorted = sorted(pickups)
-    n = len(pickups_sorted)
-    if n % 2 == 0:
-        median = (pickups_sorted[n // 2 - 1] + pickups_sorted[n // 2]) / 2
-    else:
-        median = pickups_sorted[n // 2]
-
-    return math.ceil(median)
-
-
-async def get_resident_dining_rate(
-    db: AsyncSession,
-    target_date: date,
-    lookback_weeks: int = 4
-) -> float:
-    """
-    Calculate what % of hotel guests typically dine at the restaurant (resident covers).
-
-    Simple approach: resident_covers / hotel_guests for same DOW over last N weeks.
-    Returns median rate to apply to forecasted hotel guests.
-
-    Args:
-        db: Database session
-        target_date: Date we're forecasting (to get DOW)
-        lookback_weeks: Weeks of history to analyze
-
-    Returns:
-        Median dining rate (0.0 to 1.0)
-    """
-    python_dow = target_date.weekday()
-    pg_dow = (python_dow + 1) % 7
-
-    # Query resident covers and hotel guests for same DOW
-    result = await db.execute(
-        text("""
-            SELECT
-                nbs.date,
-                COALESCE(nbs.guests_count, 0) as hotel_guests,
-                COALESCE(rbs.hotel_guest_covers, 0) as resident_covers
-            FROM newbook_bookings_stats nbs
-            JOIN resos_bookings_stats rbs ON nbs.date = rbs.date
-            WHERE EXTRACT(DOW FROM nbs.date) = :dow
-            AND nbs.date >= CURRENT_DATE - CAST(:lookback_days AS INTEGER)
-            AND nbs.date < CURRENT_DATE
-            AND nbs.guests_count > 0
-            ORDER BY nbs.date DESC
-            LIMIT :max_weeks
-        """),
-        {
-            "dow": pg_dow,
-            "lookback_days": lookback_weeks * 7,
-            "max_weeks": lookback_weeks
-        }
-    )
-    rows = result.fetchall()
-
-    if not rows:
-        return 0.4  # Default 40% if no data
-
-    # Calculate dining rate for each week
-    dining_rates = []
-    for row in rows:
-        if row.hotel_guests > 0:
-            rate = min(1.0, row.resident_covers / row.hotel_guests)
-            dining_rates.append(rate)
-
-    if not dining_rates:
-        return 0.4
-
-    # Return median
-    sorted_rates = sorted(dining_rates)
-    n = len(sorted_rates)
-    if n % 2 == 0:
-        return (sorted_rates[n // 2 - 1] + sorted_rates[n // 2]) / 2
-    return sorted_rates[n // 2]
-
-
 async def get_historical_pickup_by_lead_time(
     db: AsyncSession,
     period_type: str,
@@ -505,10 +260,148 @@ async def get_historical_pickup_by_lead_time(
     }
 
 
+class CoversForecastContext:
+    """
+    Everything forecast_covers_for_date needs for a date range, loaded up front.
+
+    One query each for hotel stats and resos stats (range + prior-year mirror,
+    including the night before each date) and one for the pickup curves.
+    Pickup-v2 room forecasts for every future night in the range (each date
+    and the night before it) are computed in one forecast_rooms_for_range
+    call. Days are then computed in memory.
+    """
+
+    def __init__(self, start_date: date, end_date: date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.hotel_stats: Dict[date, Any] = {}
+        self.resos_stats: Dict[date, Any] = {}
+        # (period, segment, pg_dow, lead_day) -> curve quantiles
+        self.curves: Dict[tuple, Dict[str, float]] = {}
+        self._rooms_forecasts: Dict[tuple, Optional[Dict[str, Any]]] = {}
+
+    @classmethod
+    async def load(cls, db: AsyncSession, start_date: date, end_date: date) -> "CoversForecastContext":
+        ctx = cls(start_date, end_date)
+
+        # Hotel stats: range incl. night before, plus prior-year mirror
+        night_from = start_date - timedelta(days=1)
+        result = await db.execute(
+            text(f"""
+                SELECT date, {HOTEL_STATS_COLUMNS}
+                FROM newbook_bookings_stats
+                WHERE date BETWEEN :from_date AND :to_date
+                   OR date BETWEEN :py_from AND :py_to
+            """),
+            {
+                "from_date": night_from,
+                "to_date": end_date,
+                "py_from": get_prior_year_date(night_from),
+                "py_to": get_prior_year_date(end_date),
+            }
+        )
+        ctx.hotel_stats = {row.date: row for row in result.fetchall()}
+
+        # Resos stats: range plus prior-year mirror
+        result = await db.execute(
+            text(f"""
+                SELECT date, {RESOS_STATS_COLUMNS}
+                FROM resos_bookings_stats
+                WHERE date BETWEEN :from_date AND :to_date
+                   OR date BETWEEN :py_from AND :py_to
+            """),
+            {
+                "from_date": start_date,
+                "to_date": end_date,
+                "py_from": get_prior_year_date(start_date),
+                "py_to": get_prior_year_date(end_date),
+            }
+        )
+        ctx.resos_stats = {row.date: row for row in result.fetchall()}
+
+        if end_date <= date.today():
+            # Nothing in the future - no pickup needed
+            return ctx
+
+        # Pickup curves are small (segments x 7 DOW x pace intervals): load them all
+        result = await db.execute(
+            text(f"""
+                SELECT period, segment, dow, lead_day, sample_size, {", ".join(CURVE_QUANTILES)}
+                FROM resos_pickup_curves
+            """)
+        )
+        ctx.curves = {
+            (row.period, row.segment, row.dow, row.lead_day): _curve_from_row(row)
+            for row in result.fetchall()
+        }
+
+        # Room forecasts: dinner (the date) and breakfast (the night before)
+        today = date.today()
+        keys = []
+        current = max(start_date, today + timedelta(days=1))
+        while current <= end_date:
+            lead_days = (current - today).days
+            night_before = current - timedelta(days=1)
+            keys.append((night_before, lead_days - 1, get_prior_year_date(night_before)))
+            keys.append((current, lead_days, get_prior_year_date(current)))
+            current += timedelta(days=1)
+        ctx._rooms_forecasts = await forecast_rooms_for_range(db, keys, 'hotel_room_nights')
+
+        return ctx
+
+    def hotel_occupancy(self, stay_date: date) -> Dict[str, Any]:
+        return _occupancy_from_row(self.hotel_stats.get(stay_date))
+
+    def resos_covers(self, target_date: date) -> Dict[str, Any]:
+        return _covers_from_row(self.resos_stats.get(target_date))
+
+    def curve(self, curve: tuple, target_date: date, lead_days: int) -> Optional[Dict[str, float]]:
+        """Pickup curve quantiles for the target date's DOW at a lead time"""
+        if lead_days <= 0:
+            return None
+        return self.curves.get((*curve, _pg_dow(target_date), _pace_lead_day(lead_days)))
+
+    def pickup(self, curve: tuple, target_date: date, lead_days: int) -> int:
+        """
+        Median pickup COUNT (final - OTB at lead) over recent same-DOW dates
+        (0 for past dates or when no curve exists).
+        """
+        quantiles = self.curve(curve, target_date, lead_days)
+        return math.ceil(quantiles["median"]) if quantiles else 0
+
+    def pickup_band(self, curve: tuple, target_date: date, lead_days: int) -> Optional[Dict[str, int]]:
+        """p10-p90 pickup band (rounded up, like the median)"""
+        quantiles = self.curve(curve, target_date, lead_days)
+        if not quantiles:
+            return None
+        return {q: math.ceil(quantiles[q]) for q in CURVE_QUANTILES}
+
+    def dining_rate(self, target_date: date) -> float:
+        """Median resident dining rate for the DOW (default 40% if no data)"""
+        quantiles = self.curves.get((*RESIDENT_DINING_CURVE, _pg_dow(target_date), 0))
+        return quantiles["median"] if quantiles else 0.4
+
+    async def rooms_forecast(
+        self,
+        db: AsyncSession,
+        stay_date: date,
+        lead_days: int,
+        prior_date: date
+    ) -> Optional[Dict[str, Any]]:
+        """Pickup-v2 room forecast (prefetched by load; computed singly otherwise)"""
+        key = (stay_date, lead_days, prior_date)
+        if key not in self._rooms_forecasts:
+            self._rooms_forecasts[key] = await forecast_rooms_for_date(
+                db, stay_date, lead_days, prior_date, 'hotel_room_nights'
+            )
+        return self._rooms_forecasts[key]
+
+
 async def forecast_covers_for_date(
     db: AsyncSession,
     target_date: date,
-    include_details: bool = False
+    include_details: bool = False,
+    context: Optional[CoversForecastContext] = None
 ) -> Dict[str, Any]:
     """
     Generate covers forecast for a specific date.
@@ -517,28 +410,30 @@ async def forecast_covers_for_date(
     - Breakfast: Based on previous night's occupancy
     - Lunch: OTB + non-resident pickup
     - Dinner: OTB (resident + non-resident) + pickup for each
+
+    Pass a CoversForecastContext covering target_date to avoid per-date queries.
     """
+    if context is None:
+        context = await CoversForecastContext.load(db, target_date, target_date)
+
     today = date.today()
     lead_days = (target_date - today).days
     prior_year_date = get_prior_year_date(target_date)
 
     # Get current OTB covers
-    current_covers = await get_resos_covers_for_date(db, target_date)
+    current_covers = context.resos_covers(target_date)
 
     # Get prior year covers
-    prior_covers = await get_resos_covers_for_date(db, prior_year_date)
+    prior_covers = context.resos_covers(prior_year_date)
 
     # Get hotel occupancy for the night before (for breakfast)
     night_before = target_date - timedelta(days=1)
     prior_year_night_before = get_prior_year_date(night_before)
 
     # Get current hotel OTB for night before
-    hotel_otb = await get_hotel_occupancy_for_date(db, night_before)
+    hotel_otb = context.hotel_occupancy(night_before)
     # Get prior year hotel occupancy for night before (tells us expected final)
-    hotel_prior = await get_hotel_occupancy_for_date(db, prior_year_night_before)
-
-    # Get breakfast rate (covers per room)
-    breakfast_rate = await get_historical_breakfast_rate(db)
+    hotel_prior = context.hotel_occupancy(prior_year_night_before)
 
     # Calculate forecasts by period
     result = {
@@ -582,12 +477,11 @@ async def forecast_covers_for_date(
         night_before_lead_days = lead_days - 1  # Night before has 1 less lead day
         pickup_rooms = 0
         try:
-            pickupv2_forecast = await forecast_rooms_for_date(
+            pickupv2_forecast = await context.rooms_forecast(
                 db,
                 night_before,
                 night_before_lead_days,
-                prior_year_night_before,
-                'hotel_room_nights'
+                prior_year_night_before
             )
             if pickupv2_forecast:
                 # Get forecasted rooms and pickup from pickupv2
@@ -649,16 +543,11 @@ async def forecast_covers_for_date(
     prior_lunch = prior_covers.get("lunch", {}).get("total_covers", 0)
 
     # Get median pickup count for this lead time and DOW
-    lunch_pickup = await get_lunch_pickup_by_lead_time(db, target_date, lead_days)
+    lunch_pickup = context.pickup(LUNCH_CURVE, target_date, lead_days)
+    lunch_band = context.pickup_band(LUNCH_CURVE, target_date, lead_days)
 
     # Determine pace column for tooltip
-    if lead_days <= 30:
-        lunch_pace_col = f"d{lead_days}"
-    elif lead_days <= 177:
-        weekly_cols = [37, 44, 51, 58, 65, 72, 79, 86, 93, 100, 107, 114, 121, 128, 135, 142, 149, 156, 163, 170, 177]
-        lunch_pace_col = f"d{min(weekly_cols, key=lambda x: abs(x - lead_days))}"
-    else:
-        lunch_pace_col = "d177"
+    lunch_pace_col = _pace_column(lead_days)
 
     lunch_calc = None
     # For future dates, add pickup to OTB
@@ -670,17 +559,25 @@ async def forecast_covers_for_date(
             "pace_column": lunch_pace_col,
             "lookback_weeks": 8,
             "median_pickup": lunch_pickup,
-            "source": "resos_booking_pace (total)",
+            "pickup_quantiles": lunch_band,
+            "source": "resos_pickup_curves (total)",
         }
     else:
         # Past date - no pickup
         lunch_pickup = 0
         lunch_forecast = lunch_otb
+        lunch_band = None
+
+    # Quantile band around the forecast (p10-p90 of historical pickup)
+    lunch_low = lunch_otb + lunch_band["p10"] if lunch_band else lunch_forecast
+    lunch_high = lunch_otb + lunch_band["p90"] if lunch_band else lunch_forecast
 
     result["lunch"] = {
         "otb": lunch_otb,
         "pickup": lunch_pickup,
         "forecast": lunch_forecast,
+        "forecast_p10": lunch_low,
+        "forecast_p90": lunch_high,
         "prior_year": prior_lunch,
         "calc": lunch_calc,
     }
@@ -700,37 +597,33 @@ async def forecast_covers_for_date(
     prior_dinner_non_resident = prior_covers.get("dinner", {}).get("non_resident_covers", 0)
 
     # Determine pace column for non-resident tooltip
-    if lead_days <= 30:
-        dinner_pace_col = f"d{lead_days}"
-    elif lead_days <= 177:
-        weekly_cols = [37, 44, 51, 58, 65, 72, 79, 86, 93, 100, 107, 114, 121, 128, 135, 142, 149, 156, 163, 170, 177]
-        dinner_pace_col = f"d{min(weekly_cols, key=lambda x: abs(x - lead_days))}"
-    else:
-        dinner_pace_col = "d177"
+    dinner_pace_col = _pace_column(lead_days)
 
     non_resident_calc = None
     if lead_days > 0:
         # ---- NON-RESIDENT PICKUP ----
         # Use lead-time based median pickup (same logic as lunch)
-        non_resident_pickup = await get_dinner_non_resident_pickup_by_lead_time(db, target_date, lead_days)
+        non_resident_pickup = context.pickup(DINNER_NON_RESIDENT_CURVE, target_date, lead_days)
+        non_resident_band = context.pickup_band(DINNER_NON_RESIDENT_CURVE, target_date, lead_days)
         non_resident_calc = {
             "day_of_week": target_date.strftime("%A"),
             "lead_days": lead_days,
             "pace_column": dinner_pace_col,
             "lookback_weeks": 8,
             "median_pickup": non_resident_pickup,
-            "source": "resos_booking_pace (non_resident)",
+            "pickup_quantiles": non_resident_band,
+            "source": "resos_pickup_curves (non_resident)",
         }
 
         # ---- RESIDENT PICKUP ----
         # Simple approach: % of hotel guests who dine, applied to forecasted guests
         # Get hotel occupancy for target_date (dinner is same night as stay)
-        hotel_tonight = await get_hotel_occupancy_for_date(db, target_date)
+        hotel_tonight = context.hotel_occupancy(target_date)
         hotel_guests_otb = hotel_tonight["guests"]
         hotel_rooms_otb = hotel_tonight["occupied_rooms"]
 
         # Calculate guests per room (use prior year ratio if current is 0)
-        prior_year_hotel = await get_hotel_occupancy_for_date(db, prior_year_date)
+        prior_year_hotel = context.hotel_occupancy(prior_year_date)
         if hotel_rooms_otb > 0:
             guests_per_room = hotel_guests_otb / hotel_rooms_otb
         elif prior_year_hotel["occupied_rooms"] > 0:
@@ -741,8 +634,8 @@ async def forecast_covers_for_date(
         # Get pickupv2 room forecast for tonight
         pickup_rooms = 0
         try:
-            pickupv2_dinner = await forecast_rooms_for_date(
-                db, target_date, lead_days, prior_year_date, 'hotel_room_nights'
+            pickupv2_dinner = await context.rooms_forecast(
+                db, target_date, lead_days, prior_year_date
             )
             if pickupv2_dinner:
                 pickup_rooms = pickupv2_dinner.get('pickup_rooms_total', 0)
@@ -754,7 +647,7 @@ async def forecast_covers_for_date(
         forecasted_guests = hotel_guests_otb + pickup_guests
 
         # Get historical resident dining rate (% of hotel guests who dine)
-        dining_rate = await get_resident_dining_rate(db, target_date)
+        dining_rate = context.dining_rate(target_date)
 
         # Calculate expected resident covers
         # forecasted_resident_covers = forecasted_guests × dining_rate
@@ -782,9 +675,15 @@ async def forecast_covers_for_date(
         dinner_forecast = dinner_otb
         resident_pickup = 0
         non_resident_pickup = 0
+        non_resident_band = None
         resident_calc = None
         non_resident_calc = None
 
+    # Quantile band from non-resident pickup (resident pickup is rate-based)
+    dinner_base = dinner_forecast - non_resident_pickup
+    dinner_low = dinner_base + non_resident_band["p10"] if non_resident_band else dinner_forecast
+    dinner_high = dinner_base + non_resident_band["p90"] if non_resident_band else dinner_forecast
+
     result["dinner"] = {
         "otb": dinner_otb,
         "resident_otb": dinner_resident_otb,
@@ -793,6 +692,8 @@ async def forecast_covers_for_date(
         "resident_pickup": resident_pickup,
         "non_resident_pickup": non_resident_pickup,
         "forecast": dinner_forecast,
+        "forecast_p10": dinner_low,
+        "forecast_p90": dinner_high,
         "prior_year": prior_dinner,
         "prior_resident": prior_dinner_resident,
         "prior_non_resident": prior_dinner_non_resident,
@@ -830,13 +731,17 @@ async def forecast_covers_range(
 ) -> Dict[str, Any]:
     """
     Generate covers forecast for a date range.
+
+    Loads the range, its prior-year mirror and pickup history once via
+    CoversForecastContext, then computes each day in memory.
     """
     forecasts = []
     current = start_date
+    context = await CoversForecastContext.load(db, start_date, end_date)
 
     while current <= end_date:
         try:
-            day_forecast = await forecast_covers_for_date(db, current, include_details)
+            day_forecast = await forecast_covers_for_date(db, current, include_details, context)
             forecasts.append(day_forecast)
         except Exception as e:
             logger.warning(f"Failed to forecast covers for {current}: {e}")
@@ -15,7 +15,8 @@ Prior year comparison uses 364 days (52 weeks) for day-of-week alignment:
 - Saturday compares to Saturday
 """
 import logging
-from datetime import date, timedelta
+import time
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 from sqlalchemy import text
 
@@ -24,6 +25,30 @@ from utils.capacity import get_bookable_cap_sync
 
 logger = logging.getLogger(__name__)
 
+# Season calendar for pickup curves (month -> season, anything else is shoulder)
+SEASON_CALENDAR = {
+    6: 'peak', 7: 'peak', 8: 'peak',
+    12: 'low', 1: 'low', 2: 'low',
+}
+DEFAULT_SEASON = 'shoulder'
+
+
+def get_season(month: int) -> str:
+    """Season of a month from SEASON_CALENDAR"""
+    return SEASON_CALENDAR.get(month, DEFAULT_SEASON)
+
+
+def _season_sql(date_col: str) -> str:
+    """SQL CASE assigning SEASON_CALENDAR seasons to a date column"""
+    by_season = {}
+    for month, season in SEASON_CALENDAR.items():
+        by_season.setdefault(season, []).append(str(month))
+    whens = " ".join(
+        f"WHEN EXTRACT(MONTH FROM {date_col}) IN ({', '.join(sorted(months, key=int))}) THEN '{season}'"
+        for season, months in by_season.items()
+    )
+    return f"CASE {whens} ELSE '{DEFAULT_SEASON}' END"
+
 
 async def run_pickup_forecast(
     db,
@@ -95,12 +120,7 @@ async def run_pickup_forecast(
         month = forecast_date.month
 
         # Determine season
-        if month in [6, 7, 8]:
-            season = 'peak'
-        elif month in [12, 1, 2]:
-            season = 'low'
-        else:
-            season = 'shoulder'
+        season = get_season(month)
 
         curve_result = db.execute(
             text("""
@@ -255,78 +275,108 @@ async def run_pickup_forecast(
     return forecasts
 
 
-async def update_pickup_curves(db, metric_code: str, lookback_days: int = 2555):
+async def update_pickup_curves(
+    db,
+    metric_codes: Optional[List[str]] = None,
+    lookback_days: int = 2555,
+    triggered_by: str = "manual"
+) -> dict:
     """
     Update historical pickup curves from actuals
 
-    Calculates average percentage of final value at each lead time
-    """
-    logger.info(f"Updating pickup curves for {metric_code}")
+    Calculates average percentage of final value at each lead time, grouped by
+    (metric, day of week, season, days_out) in a single INSERT ... SELECT with
+    a bulk upsert into pickup_curves. Seasons come from SEASON_CALENDAR and
+    day_of_week is 0=Monday, matching the lookup in run_pickup_forecast.
+    Rows for the rebuilt metrics that this run didn't upsert (including any
+    left from the old 0=Sunday convention) are deleted in the same
+    transaction, so readers never see a mix of conventions.
 
-    # For each day of week and season
-    for dow in range(7):
-        for season in ['peak', 'shoulder', 'low']:
-            # Get historical final values and snapshots
-            result = db.execute(
-                text("""
-                WITH final_values AS (
-                    SELECT date, actual_value
-                    FROM daily_metrics
-                    WHERE metric_code = :metric_code
-                        AND date > CURRENT_DATE - :lookback
-                        AND actual_value IS NOT NULL
-                        AND EXTRACT(DOW FROM date) = :dow
-                ),
-                snapshot_data AS (
-                    SELECT
-                        ps.stay_date,
-                        ps.days_out,
-                        ps.otb_value,
-                        fv.actual_value as final_value
-                    FROM pickup_snapshots ps
-                    JOIN final_values fv ON ps.stay_date = fv.date
-                    WHERE ps.metric_type = :metric_code
-                )
-                SELECT
-                    days_out,
-                    AVG(otb_value / NULLIF(final_value, 0) * 100) as avg_pct,
-                    STDDEV(otb_value / NULLIF(final_value, 0) * 100) as std_pct,
-                    COUNT(*) as sample_count
-                FROM snapshot_data
-                WHERE final_value > 0
-                GROUP BY days_out
-                HAVING COUNT(*) >= 5
-                """),
-                {"metric_code": metric_code, "lookback": lookback_days, "dow": dow}
-            )
-
-            for row in result.fetchall():
-                db.execute(
-                    text("""
-                    INSERT INTO pickup_curves (
-                        day_of_week, season, metric_type, days_out,
-                        avg_pct_of_final, std_dev, sample_count, updated_at
-                    ) VALUES (
-                        :dow, :season, :metric, :days_out,
-                        :avg_pct, :std, :count, NOW()
-                    )
-                    ON CONFLICT (day_of_week, season, metric_type, days_out)
-                    DO UPDATE SET
-                        avg_pct_of_final = :avg_pct,
-                        std_dev = :std,
-                        sample_count = :count,
-                        updated_at = NOW()
-                    """),
-                    {
-                        "dow": dow,
-                        "season": season,
-                        "metric": metric_code,
-                        "days_out": row.days_out,
-                        "avg_pct": row.avg_pct,
-                        "std": row.std_pct,
-                        "count": row.sample_count
-                    }
-                )
+    Args:
+        db: Sync database session
+        metric_codes: Metrics to rebuild (default: all active metrics)
+        lookback_days: History window for final values
+        triggered_by: Recorded in sync_log
 
+    Returns:
+        Dict with rows upserted and elapsed seconds
+    """
+    started_at = datetime.now()
+    started = time.monotonic()
+
+    params = {"lookback": lookback_days}
+    if metric_codes:
+        metric_filter = "AND dm.metric_code = ANY(:metric_codes)"
+        stale_filter = "metric_type = ANY(:metric_codes)"
+        params["metric_codes"] = list(metric_codes)
+    else:
+        metric_filter = """AND dm.metric_code IN (
+                    SELECT metric_code FROM forecast_metrics WHERE is_active = TRUE
+                )"""
+        stale_filter = "metric_type IN (SELECT metric_code FROM forecast_metrics WHERE is_active = TRUE)"
+
+    logger.info(f"Updating pickup curves for {', '.join(metric_codes) if metric_codes else 'all active metrics'}")
+
+    result = db.execute(
+        text(f"""
+        WITH final_values AS (
+            SELECT
+                dm.metric_code,
+                dm.date,
+                dm.actual_value,
+                EXTRACT(ISODOW FROM dm.date)::int - 1 as day_of_week,
+                {_season_sql('dm.date')} as season
+            FROM daily_metrics dm
+            WHERE dm.date > CURRENT_DATE - CAST(:lookback AS INTEGER)
+                AND dm.actual_value > 0
+                {metric_filter}
+        )
+        INSERT INTO pickup_curves (
+            day_of_week, season, metric_type, days_out,
+            avg_pct_of_final, std_dev, sample_count, updated_at
+        )
+        SELECT
+            fv.day_of_week,
+            fv.season,
+            fv.metric_code,
+            ps.days_out,
+            AVG(ps.otb_value / fv.actual_value * 100),
+            STDDEV(ps.otb_value / fv.actual_value * 100),
+            COUNT(*),
+            NOW()
+        FROM pickup_snapshots ps
+        JOIN final_values fv
+            ON ps.stay_date = fv.date
+            AND ps.metric_type = fv.metric_code
+        GROUP BY fv.day_of_week, fv.season, fv.metric_code, ps.days_out
+        HAVING COUNT(*) >= 5
+        ON CONFLICT (day_of_week, season, metric_type, days_out)
+        DO UPDATE SET
+            avg_pct_of_final = EXCLUDED.avg_pct_of_final,
+            std_dev = EXCLUDED.std_dev,
+            sample_count = EXCLUDED.sample_count,
+            updated_at = NOW()
+        """),
+        params
+    )
+    rows = result.rowcount
+
+    # NOW() is the transaction start, so every row upserted above has
+    # updated_at = NOW() and anything older is stale
+    stale = db.execute(
+        text(f"DELETE FROM pickup_curves WHERE {stale_filter} AND updated_at < NOW()"),
+        params
+    ).rowcount
+    elapsed = time.monotonic() - started
+
+    db.execute(
+        text("""
+            INSERT INTO sync_log (sync_type, source, started_at, completed_at, status, records_updated, triggered_by)
+            VALUES ('pickup_curves', 'pickup_model', :started_at, :completed_at, 'success', :rows, :triggered_by)
+        """),
+        {"started_at": started_at, "completed_at": datetime.now(), "rows": rows, "triggered_by": triggered_by}
+    )
     db.commit()
-    logger.info(f"Pickup curves updated for {metric_code}")
+
+    logger.info(f"Pickup curves updated: {rows} rows, {stale} stale rows deleted in {elapsed:.2f}s")
+    return {"rows": rows, "stale_deleted": stale, "seconds": round(elapsed, 2)}
@@ -15,6 +15,9 @@ from typing import Dict, List, Optional, Any, Tuple
 
 from sqlalchemy import text
 
+from utils.booking_nights import NIGHT_COLUMNS, night_rates
+from utils.settings_cache import get_settings_async
+
 logger = logging.getLogger(__name__)
 
 # Valid booking statuses for aggregation
@@ -75,30 +78,24 @@ async def get_current_otb_revenue(db, stay_date: date) -> Decimal:
     Sums net accommodation revenue for all bookings spanning the stay_date.
     """
     # Get VAT rate for net calculation
-    vat_result = await db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-    )
-    row = vat_result.fetchone()
-    vat_rate = Decimal(row.config_value) if row and row.config_value else Decimal('0.20')
+    vat_rate = (await get_settings_async(db)).vat_rate
 
     # Get included categories
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return Decimal('0')
 
     # Query actual bookings for real-time OTB revenue
     result = await db.execute(
-        text("""
-            SELECT raw_json
-            FROM newbook_bookings_data
-            WHERE arrival_date <= :stay_date
-            AND departure_date > :stay_date
-            AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
-            AND category_id = ANY(:categories)
+        text(f"""
+            SELECT {NIGHT_COLUMNS}
+            FROM newbook_bookings_data b
+            JOIN newbook_booking_nights n
+                ON n.newbook_id = b.newbook_id AND n.stay_date = :stay_date
+            WHERE b.stay_range @> CAST(:stay_date AS date)
+            AND b.status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
+            AND b.category_id = ANY(:categories)
         """),
         {
             "stay_date": stay_date,
@@ -108,9 +105,8 @@ async def get_current_otb_revenue(db, stay_date: date) -> Decimal:
 
     total_revenue = Decimal('0')
     for row in result.fetchall():
-        if row.raw_json:
-            revenue = _extract_day_rate_from_booking(row.raw_json, stay_date, vat_rate)
-            total_revenue += revenue
+        revenue, _ = night_rates(row, vat_rate)
+        total_revenue += revenue
 
     return total_revenue
 
@@ -181,24 +177,22 @@ async def get_prior_otb_revenue_from_bookings(
     cutoff_date = prior_date - timedelta(days=lead_days)
 
     # Get included categories
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return Decimal('0')
 
     # Query bookings that span the prior date and were placed before cutoff
     result = await db.execute(
-        text("""
-            SELECT raw_json
-            FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
-            AND booking_placed < :cutoff_date
-            AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
-            AND category_id = ANY(:categories)
+        text(f"""
+            SELECT {NIGHT_COLUMNS}
+            FROM newbook_bookings_data b
+            JOIN newbook_booking_nights n
+                ON n.newbook_id = b.newbook_id AND n.stay_date = :prior_date
+            WHERE b.stay_range @> CAST(:prior_date AS date)
+            AND b.booking_placed < :cutoff_date
+            AND b.status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
+            AND b.category_id = ANY(:categories)
         """),
         {
             "prior_date": prior_date,
@@ -209,84 +203,12 @@ async def get_prior_otb_revenue_from_bookings(
 
     total_revenue = Decimal('0')
     for row in result.fetchall():
-        if row.raw_json:
-            revenue = _extract_day_rate_from_booking(row.raw_json, prior_date, vat_rate)
-            total_revenue += revenue
+        revenue, _ = night_rates(row, vat_rate)
+        total_revenue += revenue
 
     return total_revenue
 
 
-def _extract_day_rate_from_booking(raw_json: dict, target_date: date, vat_rate: Decimal) -> Decimal:
-    """
-    Extract net accommodation revenue from booking JSON for a specific stay date.
-    Returns net rate only (for backward compatibility).
-    """
-    net, _ = _extract_day_rates_from_booking(raw_json, target_date, vat_rate)
-    return net
-
-
-def _extract_day_rates_from_booking(raw_json: dict, target_date: date, vat_rate: Decimal) -> Tuple[Decimal, Decimal]:
-    """
-    Extract both net and gross rates from booking JSON for a specific stay date.
-
-    Returns:
-        (net_rate, gross_rate) tuple
-
-    Net includes:
-    - Room tariff from tariffs_quoted (net of VAT)
-    - Inventory items like breakfast allocations (net of VAT)
-    - Commission deductions (negative amounts, no VAT)
-
-    Gross is the actual guest-facing tariff:
-    - Room tariff charge_amount
-    - Inventory items amounts
-    """
-    if not raw_json:
-        return Decimal('0'), Decimal('0')
-
-    target_str = target_date.strftime("%Y-%m-%d")
-    total_net = Decimal('0')
-    total_gross = Decimal('0')
-
-    # 1. Get room tariff for this stay date
-    tariffs = raw_json.get("tariffs_quoted", [])
-    for tariff in tariffs:
-        if tariff.get("stay_date") == target_str:
-            charge_amount = Decimal(str(tariff.get("charge_amount", 0) or 0))
-            total_gross += charge_amount
-
-            # Try to get net from taxes array if available
-            taxes = tariff.get("taxes", [])
-            if taxes and charge_amount > 0:
-                tax_amount = sum(Decimal(str(t.get("tax_amount", 0) or 0)) for t in taxes)
-                net_amount = charge_amount - tax_amount
-            else:
-                # Fallback: calculate net using VAT rate
-                net_amount = charge_amount / (1 + vat_rate)
-
-            total_net += net_amount
-            break  # Only one tariff per date
-
-    # 2. Add inventory items for this date (breakfast, commissions, etc.)
-    inventory_items = raw_json.get("inventory_items", [])
-    for item in inventory_items:
-        if item.get("stay_date") == target_str:
-            amount = Decimal(str(item.get("amount", 0) or 0))
-
-            if amount > 0:
-                # Positive amounts (breakfast, extras)
-                total_gross += amount  # Guest pays this
-                net_amount = amount / (1 + vat_rate)
-            else:
-                # Negative amounts (commissions) - reduce both, no VAT
-                total_gross += amount  # Reduces guest charge if visible
-                net_amount = amount
-
-            total_net += net_amount
-
-    return total_net, total_gross
-
-
 async def get_current_otb_rooms_by_category(db, stay_date: date) -> Dict[str, int]:
     """
     Get current on-the-books room counts by category.
@@ -295,10 +217,7 @@ async def get_current_otb_rooms_by_category(db, stay_date: date) -> Dict[str, in
     This counts bookings that span the stay_date and have valid status.
     """
     # Get included categories
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return {}
@@ -308,8 +227,7 @@ async def get_current_otb_rooms_by_category(db, stay_date: date) -> Dict[str, in
         text("""
             SELECT category_id, COUNT(*) as room_count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :stay_date
-            AND departure_date > :stay_date
+            WHERE stay_range @> CAST(:stay_date AS date)
             AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
             AND category_id = ANY(:categories)
             GROUP BY category_id
@@ -414,10 +332,7 @@ async def get_prior_year_pickup_rooms_by_category(
     cutoff_date = prior_date - timedelta(days=lead_days)
 
     # Get included categories
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return {}
@@ -427,8 +342,7 @@ async def get_prior_year_pickup_rooms_by_category(
         text("""
             SELECT category_id, COUNT(*) as room_count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
+            WHERE stay_range @> CAST(:prior_date AS date)
             AND booking_placed < :cutoff_date
             AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
             AND category_id = ANY(:categories)
@@ -447,8 +361,7 @@ async def get_prior_year_pickup_rooms_by_category(
         text("""
             SELECT category_id, COUNT(*) as room_count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
+            WHERE stay_range @> CAST(:prior_date AS date)
             AND status IN ('Confirmed', 'Arrived', 'Departed')
             AND category_id = ANY(:categories)
             GROUP BY category_id
@@ -496,10 +409,7 @@ async def get_prior_year_pickup_rates_by_category(
     cutoff_date = prior_date - timedelta(days=lead_days)
 
     # Get included categories
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return {}
@@ -507,15 +417,16 @@ async def get_prior_year_pickup_rates_by_category(
     # Query bookings ordered by booking_placed to get earliest first
     # This lets us use the first booking(s) as the "listed rate at this lead time"
     result = await db.execute(
-        text("""
-            SELECT category_id, raw_json, booking_placed
-            FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
-            AND booking_placed >= :cutoff_date
-            AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
-            AND category_id = ANY(:categories)
-            ORDER BY booking_placed ASC
+        text(f"""
+            SELECT b.category_id, b.booking_placed, {NIGHT_COLUMNS}
+            FROM newbook_bookings_data b
+            JOIN newbook_booking_nights n
+                ON n.newbook_id = b.newbook_id AND n.stay_date = :prior_date
+            WHERE b.stay_range @> CAST(:prior_date AS date)
+            AND b.booking_placed >= :cutoff_date
+            AND b.status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
+            AND b.category_id = ANY(:categories)
+            ORDER BY b.booking_placed ASC
         """),
         {
             "prior_date": prior_date,
@@ -530,13 +441,12 @@ async def get_prior_year_pickup_rates_by_category(
 
     for row in result.fetchall():
         cat_id = str(row.category_id)
-        if row.raw_json:
-            net_rate, gross_rate = _extract_day_rates_from_booking(row.raw_json, prior_date, vat_rate)
-            if net_rate > 0:
-                if cat_id not in rates_by_category:
-                    rates_by_category[cat_id] = []
-                booking_date = row.booking_placed.date() if hasattr(row.booking_placed, 'date') else row.booking_placed
-                rates_by_category[cat_id].append((net_rate, gross_rate, booking_date))
+        net_rate, gross_rate = night_rates(row, vat_rate)
+        if net_rate > 0:
+            if cat_id not in rates_by_category:
+                rates_by_category[cat_id] = []
+            booking_date = row.booking_placed.date() if hasattr(row.booking_placed, 'date') else row.booking_placed
+            rates_by_category[cat_id].append((net_rate, gross_rate, booking_date))
 
     # Calculate TWO sets of rates:
     # 1. Average of ALL pickup bookings - for realistic revenue forecasting
@@ -597,10 +507,7 @@ async def get_prior_year_otb_rooms_by_category(
     """
     cutoff_date = prior_date - timedelta(days=lead_days)
 
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return {}
@@ -609,8 +516,7 @@ async def get_prior_year_otb_rooms_by_category(
         text("""
             SELECT category_id, COUNT(*) as room_count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
+            WHERE stay_range @> CAST(:prior_date AS date)
             AND booking_placed < :cutoff_date
             AND status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
             AND category_id = ANY(:categories)
@@ -633,10 +539,7 @@ async def get_prior_year_final_rooms_by_category(
     """
     Get prior year final rooms by category (all valid bookings).
     """
-    cat_result = await db.execute(
-        text("SELECT site_id FROM newbook_room_categories WHERE is_included = true")
-    )
-    included_categories = [row.site_id for row in cat_result.fetchall()]
+    included_categories = (await get_settings_async(db)).included_category_ids
 
     if not included_categories:
         return {}
@@ -645,8 +548,7 @@ async def get_prior_year_final_rooms_by_category(
         text("""
             SELECT category_id, COUNT(*) as room_count
             FROM newbook_bookings_data
-            WHERE arrival_date <= :prior_date
-            AND departure_date > :prior_date
+            WHERE stay_range @> CAST(:prior_date AS date)
             AND status IN ('Confirmed', 'Arrived', 'Departed')
             AND category_id = ANY(:categories)
             GROUP BY category_id
@@ -665,17 +567,8 @@ async def get_category_availability(db, stay_date: date) -> Dict[str, int]:
     Get available room capacity per category for a date.
     Uses room inventory minus OTB.
     """
-    # Get included categories with their room counts
-    result = await db.execute(
-        text("""
-            SELECT site_id, room_count
-            FROM newbook_room_categories
-            WHERE is_included = true
-        """)
-    )
-
-    capacity = {row.site_id: row.room_count or 0 for row in result.fetchall()}
-    return capacity
+    # Included categories with their room counts
+    return dict((await get_settings_async(db)).included_room_counts)
 
 
 async def get_bookable_rooms(db, stay_date: date) -> int:
@@ -696,16 +589,7 @@ async def get_bookable_rooms(db, stay_date: date) -> int:
         return row.bookable_count
 
     # Fallback: sum of all included category rooms
-    result = await db.execute(
-        text("""
-            SELECT COALESCE(SUM(room_count), 0) as total
-            FROM newbook_room_categories
-            WHERE is_included = true
-        """)
-    )
-    row = result.fetchone()
-
-    return row.total if row else 0
+    return (await get_settings_async(db)).bookable_rooms
 
 
 async def calculate_revenue_bounds(
@@ -945,11 +829,7 @@ async def forecast_revenue_for_date(
     Ceiling: OTB + remaining_rooms × expensive_50_rate (physical capacity limit)
     """
     # Get VAT rate for revenue calculations
-    vat_result = await db.execute(
-        text("SELECT config_value FROM system_config WHERE config_key = 'accommodation_vat_rate'")
-    )
-    row = vat_result.fetchone()
-    vat_rate = Decimal(row.config_value) if row and row.config_value else Decimal('0.20')
+    vat_rate = (await get_settings_async(db)).vat_rate
 
     # Get current OTB revenue (net accommodation)
     current_otb_rev = await get_current_otb_revenue(db, stay_date)
@@ -1240,24 +1120,141 @@ async def forecast_rooms_for_date(
     Floor: Current OTB
     Ceiling: Bookable capacity
     """
-    # Get current OTB rooms by category
-    current_otb_by_cat = await get_current_otb_rooms_by_category(db, stay_date)
-    current_otb_rooms = sum(current_otb_by_cat.values())
+    key = (stay_date, lead_days, prior_date)
+    forecasts = await forecast_rooms_for_range(db, [key], metric_code, include_details)
+    return forecasts[key]
 
-    # Get prior year pickup rooms by category (from bookings data)
-    pickup_rooms_by_cat = await get_prior_year_pickup_rooms_by_category(db, prior_date, lead_days)
-    total_pickup_rooms = sum(pickup_rooms_by_cat.values())
 
-    # Get prior year totals for comparison (from bookings data)
-    prior_otb_by_cat = await get_prior_year_otb_rooms_by_category(db, prior_date, lead_days)
+async def forecast_rooms_for_range(
+    db,
+    keys: List[Tuple[date, int, date]],
+    metric_code: str,
+    include_details: bool = False
+) -> Dict[Tuple[date, int, date], Dict[str, Any]]:
+    """
+    forecast_rooms_for_date for many (stay_date, lead_days, prior_date) keys.
+
+    Current OTB, prior-year OTB at lead, prior-year final and bookable rooms
+    are each one query for all keys, so a range costs the same number of
+    queries as a single date.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    settings = await get_settings_async(db)
+    included_categories = settings.included_category_ids
+    stay_dates = sorted({k[0] for k in keys})
+    prior_dates = sorted({k[2] for k in keys})
+    prior_cutoffs = sorted({(k[2], k[2] - timedelta(days=k[1])) for k in keys})
+
+    current_otb: Dict[date, Dict[str, int]] = {}
+    prior_otb: Dict[Tuple[date, date], Dict[str, int]] = {}
+    prior_final: Dict[date, Dict[str, int]] = {}
+
+    if included_categories:
+        # Current OTB by stay date and category
+        result = await db.execute(
+            text("""
+                SELECT d.stay_date, b.category_id, COUNT(*) as room_count
+                FROM unnest(CAST(:stay_dates AS date[])) AS d(stay_date)
+                JOIN newbook_bookings_data b ON b.stay_range @> d.stay_date
+                WHERE b.status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
+                AND b.category_id = ANY(:categories)
+                GROUP BY d.stay_date, b.category_id
+            """),
+            {"stay_dates": stay_dates, "categories": included_categories}
+        )
+        for row in result.fetchall():
+            current_otb.setdefault(row.stay_date, {})[str(row.category_id)] = row.room_count
+
+        # Prior year OTB (bookings placed before the cutoff) per prior date and cutoff
+        result = await db.execute(
+            text("""
+                SELECT k.prior_date, k.cutoff_date, b.category_id, COUNT(*) as room_count
+                FROM unnest(CAST(:prior_dates AS date[]), CAST(:cutoff_dates AS date[]))
+                    AS k(prior_date, cutoff_date)
+                JOIN newbook_bookings_data b
+                    ON b.stay_range @> k.prior_date AND b.booking_placed < k.cutoff_date
+                WHERE b.status IN ('Unconfirmed', 'Confirmed', 'Arrived', 'Departed')
+                AND b.category_id = ANY(:categories)
+                GROUP BY k.prior_date, k.cutoff_date, b.category_id
+            """),
+            {
+                "prior_dates": [pc[0] for pc in prior_cutoffs],
+                "cutoff_dates": [pc[1] for pc in prior_cutoffs],
+                "categories": included_categories
+            }
+        )
+        for row in result.fetchall():
+            prior_otb.setdefault((row.prior_date, row.cutoff_date), {})[str(row.category_id)] = row.room_count
+
+        # Prior year final rooms per prior date
+        result = await db.execute(
+            text("""
+                SELECT d.prior_date, b.category_id, COUNT(*) as room_count
+                FROM unnest(CAST(:prior_dates AS date[])) AS d(prior_date)
+                JOIN newbook_bookings_data b ON b.stay_range @> d.prior_date
+                WHERE b.status IN ('Confirmed', 'Arrived', 'Departed')
+                AND b.category_id = ANY(:categories)
+                GROUP BY d.prior_date, b.category_id
+            """),
+            {"prior_dates": prior_dates, "categories": included_categories}
+        )
+        for row in result.fetchall():
+            prior_final.setdefault(row.prior_date, {})[str(row.category_id)] = row.room_count
+
+    # Bookable capacity (fallback: sum of all included category rooms)
+    result = await db.execute(
+        text("SELECT date, bookable_count FROM newbook_bookings_stats WHERE date = ANY(:stay_dates)"),
+        {"stay_dates": stay_dates}
+    )
+    bookable_by_date = {row.date: row.bookable_count for row in result.fetchall() if row.bookable_count}
+    capacity_by_cat = dict(settings.included_room_counts)
+
+    forecasts = {}
+    for stay_date, lead_days, prior_date in keys:
+        cutoff_date = prior_date - timedelta(days=lead_days)
+        otb_at_lead = prior_otb.get((prior_date, cutoff_date), {})
+        final = prior_final.get(prior_date, {})
+
+        # Pickup = final - OTB at the same lead time (only positive pickup)
+        pickup_rooms_by_cat = {}
+        for cat_id in set(otb_at_lead) | set(final):
+            pickup = max(0, final.get(cat_id, 0) - otb_at_lead.get(cat_id, 0))
+            if pickup > 0:
+                pickup_rooms_by_cat[cat_id] = pickup
+
+        forecasts[(stay_date, lead_days, prior_date)] = _rooms_forecast_result(
+            current_otb.get(stay_date, {}),
+            pickup_rooms_by_cat,
+            otb_at_lead,
+            final,
+            bookable_by_date.get(stay_date, settings.bookable_rooms),
+            capacity_by_cat,
+            metric_code,
+            include_details
+        )
+
+    return forecasts
+
+
+def _rooms_forecast_result(
+    current_otb_by_cat: Dict[str, int],
+    pickup_rooms_by_cat: Dict[str, int],
+    prior_otb_by_cat: Dict[str, int],
+    prior_final_by_cat: Dict[str, int],
+    bookable: int,
+    capacity_by_cat: Dict[str, int],
+    metric_code: str,
+    include_details: bool
+) -> Dict[str, Any]:
+    """Room forecast for one date from its per-category counts"""
+    current_otb_rooms = sum(current_otb_by_cat.values())
+    total_pickup_rooms = sum(pickup_rooms_by_cat.values())
     prior_otb_rooms = sum(prior_otb_by_cat.values())
-    prior_final_by_cat = await get_prior_year_final_rooms_by_category(db, prior_date)
     prior_final_rooms = sum(prior_final_by_cat.values())
 
-    # Get bookable capacity
-    bookable = await get_bookable_rooms(db, stay_date)
-    capacity_by_cat = await get_category_availability(db, stay_date)
-
     # Build category breakdown
     category_breakdown: Dict[str, Dict[str, Any]] = {}
     all_categories = set(
@@ -0,0 +1,284 @@
+"""
+Postgres-backed job queue
+
+The API and scheduler enqueue jobs by name (see jobs/registry.py) with JSON
+keyword arguments; worker processes (worker.py) claim them with
+SELECT ... FOR UPDATE SKIP LOCKED, so several workers can pull from the
+queue without ever picking up the same row.
+
+Running jobs refresh heartbeat_at; a job whose heartbeat goes stale (worker
+killed mid-run) is requeued or failed by whichever worker notices first.
+"""
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_CHANNEL = "job_queue"
+
+# Running jobs whose heartbeat is older than this are considered orphaned
+STALE_HEARTBEAT_MINUTES = 5
+
+ENQUEUE_SQL = """
+    INSERT INTO job_queue (job_name, payload, priority, max_attempts, triggered_by, if_running)
+    VALUES (:job_name, CAST(:payload AS jsonb), :priority, :max_attempts, :triggered_by, :if_running)
+    RETURNING id
+"""
+
+NOTIFY_SQL = "SELECT pg_notify('job_queue', :job_name)"
+
+CLAIM_SQL = """
+    UPDATE job_queue
+    SET status = 'running',
+        started_at = NOW(),
+        heartbeat_at = NOW(),
+        worker_id = :worker_id,
+        attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM job_queue
+        WHERE status = 'queued' AND run_after <= NOW()
+        ORDER BY priority DESC, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, job_name, payload, triggered_by, attempts, max_attempts,
+              if_running, pipeline_run_id, pipeline_node
+"""
+
+
+def _encode(value: Any) -> Any:
+    """JSON-safe payload value (dates tagged so they round-trip)"""
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"$date"}:
+            return date.fromisoformat(value["$date"])
+        if set(value) == {"$datetime"}:
+            return datetime.fromisoformat(value["$datetime"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def encode_payload(kwargs: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(_encode(kwargs or {}))
+
+
+def decode_payload(payload: Any) -> Dict[str, Any]:
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return _decode(payload or {})
+
+
+def encode_result(result: Any) -> Optional[str]:
+    """Job return value as JSON, or None if it has none / isn't serialisable"""
+    if result is None:
+        return None
+    try:
+        return json.dumps(_encode(result), default=str)
+    except (TypeError, ValueError):
+        return None
+
+
+def _enqueue_params(job_name, kwargs, triggered_by, priority, max_attempts, if_running) -> dict:
+    return {
+        "job_name": job_name,
+        "payload": encode_payload(kwargs),
+        "priority": priority,
+        "max_attempts": max_attempts,
+        "triggered_by": triggered_by,
+        "if_running": if_running,
+    }
+
+
+def enqueue_job(
+    job_name: str,
+    kwargs: Optional[Dict[str, Any]] = None,
+    triggered_by: str = "scheduler",
+    priority: int = 0,
+    max_attempts: int = 1,
+    db=None,
+    if_running: str = "wait"
+) -> int:
+    """
+    Queue a job (sync session; opens its own if none given). Commits.
+
+    if_running: what the job does if the same job is already running when a
+    worker starts it - 'wait' and share its result, or 'fail' (see
+    services/single_flight.py)
+
+    Returns:
+        job_queue id
+    """
+    from database import SyncSessionLocal
+
+    own_session = db is None
+    if own_session:
+        db = SyncSessionLocal()
+    try:
+        job_id = db.execute(
+            text(ENQUEUE_SQL),
+            _enqueue_params(job_name, kwargs, triggered_by, priority, max_attempts, if_running)
+        ).scalar()
+        db.execute(text(NOTIFY_SQL), {"job_name": job_name})
+        db.commit()
+        logger.info(f"Queued job {job_name} #{job_id} (triggered_by={triggered_by})")
+        return job_id
+    finally:
+        if own_session:
+            db.close()
+
+
+async def enqueue_job_async(
+    db,
+    job_name: str,
+    kwargs: Optional[Dict[str, Any]] = None,
+    triggered_by: str = "api",
+    priority: int = 10,
+    max_attempts: int = 1,
+    if_running: str = "wait"
+) -> int:
+    """
+    Queue a job from an API endpoint (async session). Commits.
+
+    Manual triggers default to a higher priority than scheduled runs so a
+    user isn't stuck behind the morning batch.
+
+    if_running='fail' raises JobAlreadyRunning now (409 for the caller) if
+    the job is in flight, and fails the queued job should one start first.
+    """
+    if if_running == "fail":
+        from services.single_flight import raise_if_running_async
+        await raise_if_running_async(db, job_name, kwargs)
+
+    result = await db.execute(
+        text(ENQUEUE_SQL),
+        _enqueue_params(job_name, kwargs, triggered_by, priority, max_attempts, if_running)
+    )
+    job_id = result.scalar()
+    await db.execute(text(NOTIFY_SQL), {"job_name": job_name})
+    await db.commit()
+    logger.info(f"Queued job {job_name} #{job_id} (triggered_by={triggered_by})")
+    return job_id
+
+
+def claim_next_job(db, worker_id: str) -> Optional[dict]:
+    """Claim the next runnable job for this worker (sync session, commits)"""
+    row = db.execute(text(CLAIM_SQL), {"worker_id": worker_id}).fetchone()
+    db.commit()
+    if not row:
+        return None
+    return {
+        "id": row.id,
+        "job_name": row.job_name,
+        "kwargs": decode_payload(row.payload),
+        "triggered_by": row.triggered_by,
+        "attempts": row.attempts,
+        "max_attempts": row.max_attempts,
+        "if_running": row.if_running,
+        "pipeline_run_id": row.pipeline_run_id,
+        "pipeline_node": row.pipeline_node,
+    }
+
+
+def complete_job(db, job_id: int, result: Any = None, query_stats: Optional[dict] = None):
+    db.execute(
+        text("""
+            UPDATE job_queue
+            SET status = 'completed', completed_at = NOW(), result = CAST(:result AS jsonb),
+                query_stats = CAST(:query_stats AS jsonb)
+            WHERE id = :id
+        """),
+        {"id": job_id, "result": encode_result(result), "query_stats": encode_result(query_stats)}
+    )
+    db.commit()
+
+
+def fail_job(db, job_id: int, error: str, retry: bool = False, query_stats: Optional[dict] = None):
+    """Mark a job failed, or put it back in the queue if it has attempts left"""
+    db.execute(
+        text("""
+            UPDATE job_queue
+            SET status = CASE WHEN :retry THEN 'queued' ELSE 'failed' END,
+                completed_at = CASE WHEN :retry THEN NULL ELSE NOW() END,
+                run_after = CASE WHEN :retry THEN NOW() + INTERVAL '1 minute' ELSE run_after END,
+                error_message = :error,
+                query_stats = COALESCE(CAST(:query_stats AS jsonb), query_stats)
+            WHERE id = :id
+        """),
+        {"id": job_id, "error": error[:2000], "retry": retry, "query_stats": encode_result(query_stats)}
+    )
+    db.commit()
+
+
+def heartbeat_jobs(db, job_ids: List[int]):
+    if not job_ids:
+        return
+    db.execute(
+        text("UPDATE job_queue SET heartbeat_at = NOW() WHERE id = ANY(:ids) AND status = 'running'"),
+        {"ids": list(job_ids)}
+    )
+    db.commit()
+
+
+def recover_stale_jobs(db) -> int:
+    """Requeue (or fail, when out of attempts) running jobs whose worker stopped heartbeating"""
+    rows = db.execute(
+        text(f"""
+            UPDATE job_queue
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                completed_at = CASE WHEN attempts < max_attempts THEN NULL ELSE NOW() END,
+                error_message = 'Worker stopped heartbeating (' || COALESCE(worker_id, '?') || ')'
+            WHERE status = 'running'
+            AND heartbeat_at < NOW() - INTERVAL '{STALE_HEARTBEAT_MINUTES} minutes'
+            RETURNING id, status, error_message, pipeline_run_id, pipeline_node
+        """)
+    ).fetchall()
+    db.commit()
+    if rows:
+        logger.warning(f"Recovered {len(rows)} job(s) from dead workers")
+
+    # Failed pipeline nodes must still release their downstream nodes
+    from jobs.pipeline import node_finished
+    for row in rows:
+        if row.pipeline_run_id and row.status == 'failed':
+            node_finished(db, row.pipeline_run_id, row.pipeline_node, 'failed', row.error_message)
+    return len(rows)
+
+
+async def list_jobs(db, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+    """Recent queue entries, newest first (async session)"""
+    params = {"limit": limit}
+    status_filter = ""
+    if status:
+        status_filter = "WHERE status = :status"
+        params["status"] = status
+    result = await db.execute(
+        text(f"""
+            SELECT id, job_name, payload, status, priority, attempts, max_attempts,
+                   triggered_by, worker_id, enqueued_at, started_at, heartbeat_at,
+                   completed_at, result, error_message, pipeline_run_id, pipeline_node,
+                   query_stats
+            FROM job_queue
+            {status_filter}
+            ORDER BY id DESC
+            LIMIT :limit
+        """),
+        params
+    )
+    return [dict(row._mapping) for row in result.fetchall()]
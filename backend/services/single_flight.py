@@ -0,0 +1,314 @@
+"""
+Single-flight for heavy jobs
+
+Job entry points (jobs/*, the sync tasks behind /sync/*) are wrapped in
+@single_flight(key). The first caller takes pg_try_advisory_lock(key) on a
+dedicated connection and runs the job; a concurrent caller with the same key
+either waits for that run (if_running='wait', used by the scheduler and
+pipeline) or gets JobAlreadyRunning straight away (if_running='fail', the
+default for manual triggers). A waiter only takes the finished run's result
+if it was called with the same arguments (e.g. the same sync date range);
+otherwise it runs the job itself once the lock is free.
+
+The advisory lock lives exactly as long as the owning connection, so a
+killed worker frees it at once. While a job runs, single_flight_runs.heartbeat_at
+is refreshed; a 'running' sync_log row without a live heartbeat is an orphan,
+which replaces the old "running for more than 60 minutes" guess.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat interval while a job holds its lock
+HEARTBEAT_SECONDS = 30
+
+# A flight (or running sync_log row) with no heartbeat for this long is dead
+STALE_SECONDS = 120
+
+# Keys held by the current thread/task, so a job that calls another job
+# with the same key (a sync task wrapping the job it runs) doesn't wait on itself
+_held_keys: ContextVar[frozenset] = ContextVar("single_flight_held_keys", default=frozenset())
+
+# Arguments that don't change what a job does, ignored when matching a waiter to a run
+UNSHARED_ARGUMENTS = ('triggered_by',)
+
+# What a second caller does: 'wait' (share the result) or 'fail'
+_if_running: ContextVar[str] = ContextVar("single_flight_if_running", default="wait")
+
+LIVE_FLIGHT_SQL = f"""
+    SELECT key, owner, started_at, heartbeat_at
+    FROM single_flight_runs
+    WHERE key = :key AND status = 'running'
+    AND heartbeat_at > NOW() - INTERVAL '{STALE_SECONDS} seconds'
+"""
+
+# sync_log rows are keyed '<source>:<sync_type>', matching the sync jobs' flight keys
+ORPHANED_SYNC_SQL = f"""
+    UPDATE sync_log s
+    SET status = 'failed', completed_at = NOW(),
+        error_message = 'Orphaned: sync process stopped without finishing'
+    WHERE s.status = 'running'
+    AND s.started_at < NOW() - INTERVAL '{STALE_SECONDS} seconds'
+    AND NOT EXISTS (
+        SELECT 1 FROM single_flight_runs f
+        WHERE f.key = s.source || ':' || s.sync_type
+        AND f.status = 'running'
+        AND f.heartbeat_at > NOW() - INTERVAL '{STALE_SECONDS} seconds'
+    )
+    RETURNING s.id
+"""
+
+
+class JobAlreadyRunning(Exception):
+    """Raised for if_running='fail' when another run holds the key"""
+
+    def __init__(self, key: str, started_at=None, owner: Optional[str] = None):
+        self.key = key
+        self.started_at = started_at
+        self.owner = owner
+        detail = f"{key} is already running"
+        if started_at:
+            detail += f" (started at {started_at})"
+        super().__init__(detail)
+
+
+@contextmanager
+def if_running(mode: str):
+    """Set what a concurrent caller does for jobs run inside this block"""
+    token = _if_running.set(mode)
+    try:
+        yield
+    finally:
+        _if_running.reset(token)
+
+
+class _Flight:
+    """An advisory lock held on its own autocommit connection, plus heartbeat"""
+
+    def __init__(self, key: str, args: Optional[str] = None):
+        self.key = key
+        self.args = args
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.conn = None
+        self.shared_result = None
+        self.stopping = threading.Event()
+        self.heartbeat = None
+
+    def _execute(self, sql: str, **params):
+        return self.conn.execute(text(sql), {"key": self.key, **params})
+
+    def acquire(self, mode: str) -> bool:
+        """
+        Returns True if this caller owns the run, False if it waited on a
+        run that completed with the same arguments (result in shared_result).
+        A waited-on run that failed or did different work is not shared; the
+        waiter runs the job itself.
+        """
+        from database import sync_engine
+
+        self.conn = sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            if not self._execute("SELECT pg_try_advisory_lock(hashtextextended(:key, 0))").scalar():
+                current = self._execute(LIVE_FLIGHT_SQL).fetchone()
+                if mode == "fail":
+                    raise JobAlreadyRunning(
+                        self.key,
+                        current.started_at if current else None,
+                        current.owner if current else None
+                    )
+
+                logger.info(f"{self.key} already running, waiting to share its result")
+                wait_started = self._execute("SELECT NOW()").scalar()
+                self._execute("SELECT pg_advisory_lock(hashtextextended(:key, 0))")
+                finished = self._execute(
+                    "SELECT status, completed_at, result, args FROM single_flight_runs WHERE key = :key"
+                ).fetchone()
+                if (finished and finished.status == "completed" and finished.completed_at >= wait_started
+                        and finished.args == self.args):
+                    from services.job_queue import decode_payload
+                    self.shared_result = decode_payload(finished.result) if finished.result is not None else None
+                    self._release()
+                    return False
+
+            self._execute(
+                """
+                INSERT INTO single_flight_runs (key, status, owner, started_at, heartbeat_at, args)
+                VALUES (:key, 'running', :owner, NOW(), NOW(), :args)
+                ON CONFLICT (key) DO UPDATE SET
+                    status = 'running', owner = :owner, started_at = NOW(), heartbeat_at = NOW(),
+                    completed_at = NULL, result = NULL, error_message = NULL, args = :args
+                """,
+                owner=self.owner,
+                args=self.args
+            )
+        except Exception:
+            self._release()
+            raise
+
+        self.heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"flight:{self.key}", daemon=True)
+        self.heartbeat.start()
+        return True
+
+    def _heartbeat_loop(self):
+        while not self.stopping.wait(HEARTBEAT_SECONDS):
+            try:
+                self._execute("UPDATE single_flight_runs SET heartbeat_at = NOW() WHERE key = :key")
+            except Exception as e:
+                logger.warning(f"Heartbeat for {self.key} failed: {e}")
+
+    def finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        self.stopping.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+        try:
+            from services.job_queue import encode_result
+            self._execute(
+                """
+                UPDATE single_flight_runs
+                SET status = :status, completed_at = NOW(),
+                    result = CAST(:result AS jsonb), error_message = :error
+                WHERE key = :key AND owner = :owner
+                """,
+                status=status,
+                result=encode_result(result),
+                error=error[:2000] if error else None,
+                owner=self.owner
+            )
+        except Exception as e:
+            logger.warning(f"Could not record outcome of {self.key}: {e}")
+        self._release()
+
+    def _release(self):
+        if self.conn is None:
+            return
+        try:
+            self._execute("SELECT pg_advisory_unlock_all()")
+            self.conn.close()
+        except Exception:
+            # Drop the connection instead of pooling it; closing frees the lock
+            self.conn.invalidate()
+            self.conn.close()
+        self.conn = None
+
+
+def single_flight(key: str):
+    """
+    Run the decorated job at most once at a time per key.
+
+    key may use the job's arguments as format fields, e.g.
+    "forecast:{horizon_days}:{start_days}". Runs with the same key are
+    serialised whatever their arguments; a waiting caller only shares a
+    result from a run with the same arguments. Works on sync and async
+    functions.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def bind(args: tuple, kwargs: dict) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        def resolve_key(args: tuple, kwargs: dict) -> str:
+            return key.format(**bind(args, kwargs))
+
+        def new_flight(args: tuple, kwargs: dict) -> _Flight:
+            arguments = bind(args, kwargs)
+            shared = {name: value for name, value in arguments.items() if name not in UNSHARED_ARGUMENTS}
+            return _Flight(key.format(**arguments), json.dumps(shared, sort_keys=True, default=str))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                flight = new_flight(args, kwargs)
+                flight_key = flight.key
+                if flight_key in _held_keys.get():
+                    return await func(*args, **kwargs)
+
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, flight.acquire, _if_running.get()):
+                    return flight.shared_result
+
+                token = _held_keys.set(_held_keys.get() | {flight_key})
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    await loop.run_in_executor(None, flight.finish, "failed", None, str(e))
+                    raise
+                finally:
+                    _held_keys.reset(token)
+                await loop.run_in_executor(None, flight.finish, "completed", result)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                flight = new_flight(args, kwargs)
+                flight_key = flight.key
+                if flight_key in _held_keys.get():
+                    return func(*args, **kwargs)
+
+                if not flight.acquire(_if_running.get()):
+                    return flight.shared_result
+
+                token = _held_keys.set(_held_keys.get() | {flight_key})
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    flight.finish("failed", None, str(e))
+                    raise
+                finally:
+                    _held_keys.reset(token)
+                flight.finish("completed", result)
+                return result
+
+        wrapper.resolve_flight_key = resolve_key
+        return wrapper
+    return decorator
+
+
+async def raise_if_running_async(db, job_name: str, kwargs: Optional[dict] = None):
+    """
+    Fail fast for a manual trigger: raise JobAlreadyRunning if the job that
+    job_name would run is already in flight (async session)
+    """
+    from jobs.registry import JOB_REGISTRY
+
+    resolve_key = getattr(JOB_REGISTRY.get(job_name), "resolve_flight_key", None)
+    if resolve_key is None:
+        return
+    try:
+        flight_key = resolve_key((), kwargs or {})
+    except (TypeError, KeyError):
+        return
+    result = await db.execute(text(LIVE_FLIGHT_SQL), {"key": flight_key})
+    running = result.fetchone()
+    if running:
+        raise JobAlreadyRunning(flight_key, running.started_at, running.owner)
+
+
+def clear_orphaned_syncs(db) -> int:
+    """Fail 'running' sync_log rows whose job has no live heartbeat (sync session, commits)"""
+    rows = db.execute(text(ORPHANED_SYNC_SQL)).fetchall()
+    db.commit()
+    if rows:
+        logger.warning(f"Cleared {len(rows)} orphaned sync_log row(s)")
+    return len(rows)
+
+
+async def clear_orphaned_syncs_async(db) -> int:
+    result = await db.execute(text(ORPHANED_SYNC_SQL))
+    rows = result.fetchall()
+    await db.commit()
+    return len(rows)
@@ -0,0 +1,57 @@
+"""
+Conditional requests against utils.response_cache.cached_response
+
+Run from backend/: python -m pytest tests
+"""
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import Request
+
+from utils import response_cache
+
+
+class FakeDB:
+    """Async session stand-in answering the data_version lookup"""
+
+    async def execute(self, statement, params=None):
+        return SimpleNamespace(fetchone=lambda: SimpleNamespace(config_value="7"))
+
+
+def _get(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+    built = []
+
+    async def build():
+        built.append(True)
+        return {"value": 1}
+
+    response = asyncio.run(
+        response_cache.cached_response(request, FakeDB(), "test/etag", {"id": 1}, build)
+    )
+    return response, built
+
+
+def test_current_etag_returns_304():
+    response, _ = _get()
+    etag = response.headers["etag"]
+
+    not_modified, built = _get(etag)
+    assert not_modified.status_code == 304
+    assert not built
+
+    # Weak comparison: the opaque tag without W/ matches too
+    assert _get(etag[2:])[0].status_code == 304
+
+
+def test_stale_etag_returns_200():
+    response, _ = _get('W/"stale"')
+    assert response.status_code == 200
+    assert response.body == b'{"value": 1}'
+
+
+def test_wildcard_is_not_treated_as_a_match():
+    response, _ = _get("*")
+    assert response.status_code == 200
+    assert response.body == b'{"value": 1}'
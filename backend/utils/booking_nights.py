@@ -0,0 +1,150 @@
+"""
+Per-night booking rates
+
+The Newbook payload lives in newbook_bookings_raw; the per-night amounts the
+aggregation, pace and pickup-v2 code need are extracted once at sync time
+into newbook_booking_nights, so hot queries join a narrow typed row instead
+of pulling and parsing raw_json for every booking:
+
+    SELECT ... n.calculated_amount, n.charge_amount, n.tax_amount,
+           n.extras_amount, n.deductions_amount
+    FROM newbook_bookings_data b
+    LEFT JOIN newbook_booking_nights n
+        ON n.newbook_id = b.newbook_id AND n.stay_date = :stay_date
+
+Net amounts are worked out at read time, as they depend on the current VAT rate.
+"""
+import json
+import re
+from decimal import Decimal
+from typing import List, Tuple
+
+from sqlalchemy import text
+
+_STAY_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Columns to select from newbook_booking_nights (aliased n) for the helpers below
+NIGHT_COLUMNS = "n.calculated_amount, n.charge_amount, n.tax_amount, n.extras_amount, n.deductions_amount"
+
+
+def _amount(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def extract_booking_nights(raw_booking: dict) -> List[dict]:
+    """
+    Per-night amounts from a booking payload.
+
+    tariffs_quoted gives the room tariff per stay_date (first entry wins):
+    calculated_amount is the rate the guest was quoted, charge_amount what is
+    charged, tax_amount the sum of its taxes (None when no taxes are listed).
+    inventory_items (breakfast, commissions, ...) are summed per stay_date
+    into extras (positive) and deductions (negative).
+    """
+    nights = {}
+
+    def night(stay_date: str) -> dict:
+        if stay_date not in nights:
+            nights[stay_date] = {
+                "stay_date": stay_date,
+                "calculated_amount": Decimal('0'),
+                "charge_amount": Decimal('0'),
+                "tax_amount": None,
+                "extras_amount": Decimal('0'),
+                "deductions_amount": Decimal('0'),
+                "has_tariff": False,
+            }
+        return nights[stay_date]
+
+    for tariff in raw_booking.get("tariffs_quoted") or []:
+        stay_date = tariff.get("stay_date")
+        if not isinstance(stay_date, str) or not _STAY_DATE.match(stay_date):
+            continue
+        row = night(stay_date)
+        if row["has_tariff"]:
+            continue
+        row["has_tariff"] = True
+        row["calculated_amount"] = _amount(tariff.get("calculated_amount"))
+        row["charge_amount"] = _amount(tariff.get("charge_amount"))
+        taxes = tariff.get("taxes") or []
+        if taxes:
+            row["tax_amount"] = sum(_amount(t.get("tax_amount")) for t in taxes)
+
+    for item in raw_booking.get("inventory_items") or []:
+        stay_date = item.get("stay_date")
+        if not isinstance(stay_date, str) or not _STAY_DATE.match(stay_date):
+            continue
+        amount = _amount(item.get("amount"))
+        row = night(stay_date)
+        if amount > 0:
+            row["extras_amount"] += amount
+        else:
+            row["deductions_amount"] += amount
+
+    for row in nights.values():
+        del row["has_tariff"]
+    return list(nights.values())
+
+
+def tariff_rates(night, vat_rate: Decimal) -> Tuple[Decimal, Decimal]:
+    """
+    Room tariff for one night as (calculated_amount, net_amount).
+    Net uses the listed taxes when present, otherwise deducts VAT.
+    night is a row with NIGHT_COLUMNS; all None when the booking has no row.
+    """
+    calculated = _amount(night.calculated_amount)
+    charge = _amount(night.charge_amount)
+    if night.tax_amount is not None and charge > 0:
+        net = charge - _amount(night.tax_amount)
+    else:
+        net = charge / (1 + vat_rate)
+    return calculated, net
+
+
+def night_rates(night, vat_rate: Decimal) -> Tuple[Decimal, Decimal]:
+    """
+    Net and gross accommodation revenue for one night as (net, gross):
+    room tariff plus inventory items. Extras are net of VAT; deductions
+    (commissions) carry no VAT.
+    """
+    _, tariff_net = tariff_rates(night, vat_rate)
+    extras = _amount(night.extras_amount)
+    deductions = _amount(night.deductions_amount)
+    net = tariff_net + extras / (1 + vat_rate) + deductions
+    gross = _amount(night.charge_amount) + extras + deductions
+    return net, gross
+
+
+def save_booking_payload(db, newbook_id: str, raw_booking: dict):
+    """
+    Store a synced booking's payload in newbook_bookings_raw and replace its
+    newbook_booking_nights rows (sync session; caller commits).
+    """
+    db.execute(
+        text("""
+            INSERT INTO newbook_bookings_raw (newbook_id, raw_json, fetched_at)
+            VALUES (:newbook_id, CAST(:raw_json AS jsonb), NOW())
+            ON CONFLICT (newbook_id) DO UPDATE SET
+                raw_json = EXCLUDED.raw_json,
+                fetched_at = NOW()
+        """),
+        {"newbook_id": newbook_id, "raw_json": json.dumps(raw_booking)}
+    )
+    db.execute(
+        text("DELETE FROM newbook_booking_nights WHERE newbook_id = :newbook_id"),
+        {"newbook_id": newbook_id}
+    )
+    nights = extract_booking_nights(raw_booking)
+    if nights:
+        db.execute(
+            text("""
+                INSERT INTO newbook_booking_nights (
+                    newbook_id, stay_date, calculated_amount, charge_amount,
+                    tax_amount, extras_amount, deductions_amount
+                ) VALUES (
+                    :newbook_id, CAST(:stay_date AS date), :calculated_amount, :charge_amount,
+                    :tax_amount, :extras_amount, :deductions_amount
+                )
+            """),
+            [{"newbook_id": newbook_id, **row} for row in nights]
+        )
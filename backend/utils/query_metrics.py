@@ -0,0 +1,316 @@
+"""
+Per-route and per-job SQL statement metrics
+
+SQLAlchemy cursor events on both engines count statements and time spent in
+the database, attributed to whatever scope is current: the API route being
+served (QueryMetricsMiddleware) or the queued job a worker is running
+(query_scope in worker.py). Totals are exposed at /metrics in Prometheus text
+format and per request in a Server-Timing header.
+
+Off unless QUERY_METRICS_ENABLED is set - when disabled no event listeners or
+middleware are installed, so the hot path is untouched.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_METRICS_ENABLED = os.getenv("QUERY_METRICS_ENABLED", "false").lower() in ("true", "1", "yes")
+
+# Bearer token a Prometheus scraper can use for GET /metrics instead of a user JWT
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+
+# Slowest statements kept per route/job
+SLOWEST_PER_SCOPE = 5
+
+# Statement text length kept for the slowest-statement labels
+STATEMENT_LABEL_LENGTH = 200
+
+_current_scope: ContextVar[Optional["ScopeStats"]] = ContextVar("query_metrics_scope", default=None)
+
+
+class ScopeStats:
+    """Statements issued within one request or job run"""
+
+    __slots__ = ("kind", "name", "statements", "db_seconds", "slowest", "started")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.started = time.perf_counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.statements += 1
+        self.db_seconds += elapsed
+        _keep_slowest(self.slowest, elapsed, statement)
+
+    def as_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "db_seconds": round(self.db_seconds, 4),
+            "slowest": [
+                {"seconds": round(elapsed, 4), "statement": _statement_label(statement)}
+                for elapsed, statement in self.slowest
+            ],
+        }
+
+
+class _Totals:
+    __slots__ = ("runs", "statements", "db_seconds", "seconds", "slowest")
+
+    def __init__(self):
+        self.runs = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+
+_totals: Dict[Tuple[str, str], _Totals] = {}
+_totals_lock = threading.Lock()
+
+
+def _keep_slowest(slowest: list, elapsed: float, statement: str):
+    if len(slowest) >= SLOWEST_PER_SCOPE and elapsed <= slowest[-1][0]:
+        return
+    slowest.append((elapsed, statement))
+    slowest.sort(key=lambda item: item[0], reverse=True)
+    del slowest[SLOWEST_PER_SCOPE:]
+
+
+def _statement_label(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()[:STATEMENT_LABEL_LENGTH]
+
+
+# --------------------------------------------
+# Engine events
+# --------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_scope.get() is not None:
+        conn.info.setdefault("query_metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_scope.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_metrics_start")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engines(*engines):
+    """Attach the cursor events (pass async_engine.sync_engine for the async engine)"""
+    if not QUERY_METRICS_ENABLED:
+        return
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    logger.info("Query metrics enabled")
+
+
+# --------------------------------------------
+# Scopes
+# --------------------------------------------
+
+def _finish(stats: ScopeStats):
+    elapsed = time.perf_counter() - stats.started
+    with _totals_lock:
+        totals = _totals.get((stats.kind, stats.name))
+        if totals is None:
+            totals = _totals[(stats.kind, stats.name)] = _Totals()
+        totals.runs += 1
+        totals.statements += stats.statements
+        totals.db_seconds += stats.db_seconds
+        totals.seconds += elapsed
+        for slow_elapsed, statement in stats.slowest:
+            _keep_slowest(totals.slowest, slow_elapsed, statement)
+
+
+@contextmanager
+def query_scope(kind: str, name: str):
+    """
+    Attribute statements issued inside the block to a route or job.
+    Yields the ScopeStats (None when metrics are disabled).
+    """
+    if not QUERY_METRICS_ENABLED:
+        yield None
+        return
+    stats = ScopeStats(kind, name)
+    token = _current_scope.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_scope.reset(token)
+        _finish(stats)
+
+
+class QueryMetricsMiddleware:
+    """
+    ASGI middleware: one scope per HTTP request, named by route template
+    ("GET /forecast/pickup-v2-preview"), plus a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = ScopeStats("route", scope["path"])
+        token = _current_scope.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                stats.name = _route_name(scope)
+                total_ms = (time.perf_counter() - stats.started) * 1000
+                timing = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_scope.reset(token)
+            stats.name = _route_name(scope)
+            _finish(stats)
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{scope['method']} {path}"
+
+
+class StatementCounter:
+    """
+    Count every statement on the given engines while the block runs,
+    regardless of QUERY_METRICS_ENABLED (query budgets, benchmarks):
+
+        with StatementCounter(sync_engine, async_engine.sync_engine) as counter:
+            ...
+        counter.statements, counter.db_seconds
+    """
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_counter_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("statement_counter_start")
+        elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+        with self._lock:
+            self.statements += 1
+            self.db_seconds += elapsed
+            _keep_slowest(self.slowest, elapsed, statement)
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+        return False
+
+
+# --------------------------------------------
+# Prometheus exposition
+# --------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(job_stats: Optional[List[dict]] = None) -> str:
+    """
+    Prometheus text exposition of this process's totals, plus the latest
+    run of each queued job (job_stats rows: job_name, query_stats, seconds),
+    which run in worker processes.
+    """
+    with _totals_lock:
+        snapshot = [
+            (kind, name, totals.runs, totals.statements, totals.db_seconds, totals.seconds, list(totals.slowest))
+            for (kind, name), totals in sorted(_totals.items())
+        ]
+
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {value}")
+
+    metric(
+        "finance_scope_runs_total", "counter", "Requests served / jobs run, by route or job",
+        [(_labels(scope=kind, name=name), runs) for kind, name, runs, *_ in snapshot]
+    )
+    metric(
+        "finance_scope_seconds_total", "counter", "Wall time of requests / jobs",
+        [(_labels(scope=kind, name=name), f"{seconds:.6f}") for kind, name, _, _, _, seconds, _ in snapshot]
+    )
+    metric(
+        "finance_db_statements_total", "counter", "SQL statements issued, by route or job",
+        [(_labels(scope=kind, name=name), statements) for kind, name, _, statements, *_ in snapshot]
+    )
+    metric(
+        "finance_db_seconds_total", "counter", "Time spent executing SQL, by route or job",
+        [(_labels(scope=kind, name=name), f"{db_seconds:.6f}") for kind, name, _, _, db_seconds, *_ in snapshot]
+    )
+    metric(
+        "finance_db_slowest_statement_seconds", "gauge", "Slowest statements seen per route or job",
+        [
+            (_labels(scope=kind, name=name, rank=rank, statement=_statement_label(statement)), f"{elapsed:.6f}")
+            for kind, name, _, _, _, _, slowest in snapshot
+            for rank, (elapsed, statement) in enumerate(slowest, start=1)
+        ]
+    )
+
+    if job_stats:
+        metric(
+            "finance_job_last_db_statements", "gauge", "SQL statements issued by the latest run of each queued job",
+            [(_labels(job=row["job_name"]), row["query_stats"].get("statements", 0)) for row in job_stats]
+        )
+        metric(
+            "finance_job_last_db_seconds", "gauge", "Time spent executing SQL in the latest run of each queued job",
+            [(_labels(job=row["job_name"]), row["query_stats"].get("db_seconds", 0)) for row in job_stats]
+        )
+        metric(
+            "finance_job_last_seconds", "gauge", "Wall time of the latest run of each queued job",
+            [(_labels(job=row["job_name"]), f"{float(row['seconds'] or 0):.3f}") for row in job_stats]
+        )
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,176 @@
+"""
+Versioned response cache for read-heavy public endpoints
+
+Responses are keyed by endpoint, request parameters, today's date (lead times
+depend on it) and a data-version counter held in system_config. Sync,
+aggregation and config writes bump the counter, which makes every cached
+entry stale at once - there is no per-key invalidation to get wrong.
+
+The ETag is derived from the same key, so If-None-Match can be answered with
+a 304 before anything is computed or even looked up.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "data_version"
+
+# Total size of cached response bodies (bytes) before least-recently-used eviction
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+BUMP_DATA_VERSION_SQL = """
+    INSERT INTO system_config (config_key, config_value, description, updated_at)
+    VALUES ('data_version', '1', 'Bumped when forecast input data changes (response cache key)', NOW())
+    ON CONFLICT (config_key) DO UPDATE SET
+        config_value = (COALESCE(NULLIF(system_config.config_value, ''), '0')::bigint + 1)::text,
+        updated_at = NOW()
+"""
+
+
+def bump_data_version(db):
+    """
+    Bump the data version (sync session). Runs in the caller's transaction -
+    the caller commits, so readers never see the new version before the data.
+    """
+    db.execute(text(BUMP_DATA_VERSION_SQL))
+
+
+async def bump_data_version_async(db):
+    """Bump the data version (async session, caller commits)"""
+    await db.execute(text(BUMP_DATA_VERSION_SQL))
+
+
+async def get_data_version(db) -> int:
+    """Current data version (0 if never bumped)"""
+    result = await db.execute(
+        text("SELECT config_value FROM system_config WHERE config_key = :key"),
+        {"key": DATA_VERSION_KEY}
+    )
+    row = result.fetchone()
+    try:
+        return int(row.config_value) if row and row.config_value else 0
+    except ValueError:
+        return 0
+
+
+class ResponseCache:
+    """Size-capped LRU of serialized JSON bodies with hit/miss counters"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._entries[key] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+
+def _cache_key(endpoint: str, params: Dict[str, Any], version: int) -> str:
+    raw = json.dumps(
+        {"endpoint": endpoint, "params": params, "version": version, "today": date.today().isoformat()},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # "*" is not honoured: the payload isn't built yet, so whether the
+    # resource exists at all is unknown here
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or etag[2:] in candidates
+
+
+async def cached_response(
+    request: Request,
+    db,
+    endpoint: str,
+    params: Dict[str, Any],
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a JSON payload from the response cache, computing it on a miss.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        db: Async database session (to read the data version)
+        endpoint: Cache namespace, e.g. 'forecast/rooms'
+        params: Request parameters that affect the payload
+        build: Coroutine factory producing the payload on a miss
+
+    Returns:
+        200 JSON response with ETag, or 304 if the client's copy is current
+    """
+    version = await get_data_version(db)
+    key = _cache_key(endpoint, params, version)
+    etag = f'W/"{key[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key)
+    if body is not None:
+        response_cache.hits += 1
+        headers["X-Cache"] = "HIT"
+    else:
+        response_cache.misses += 1
+        payload = await build()
+        body = json.dumps(jsonable_encoder(payload)).encode()
+        response_cache.put(key, body)
+        headers["X-Cache"] = "MISS"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,302 @@
+"""
+Process-wide settings cache
+
+Loads every system_config row and the included newbook_room_categories once
+and serves typed lookups from memory, so jobs and forecast services stop
+re-querying the same handful of keys per key, per date or per call.
+
+Invalidation: triggers on system_config / newbook_room_categories send
+NOTIFY config_changed on commit (db/migrations/add_config_change_notify.sql).
+start_settings_listener() LISTENs on a dedicated connection and drops the
+cached snapshot when one arrives; the next lookup reloads. A load already in
+flight when a notification arrives is returned to its caller but not cached,
+since it may have read the old values. A max age bounds
+staleness if the listener isn't running (scripts, lost connection).
+
+Other per-process caches (the auth cache) share the listener: a table's
+trigger notifies with the table name as payload, and on_config_changed()
+registers what to drop for it.
+
+Job watermarks (last_*_at) and data_version are state, not settings - read
+them straight from the database with read_config_value().
+"""
+import asyncio
+import base64
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from database import SyncSessionLocal, async_engine
+
+logger = logging.getLogger(__name__)
+
+CONFIG_CHANNEL = "config_changed"
+
+# Reload at least this often even without a notification (seconds)
+SETTINGS_CACHE_MAX_AGE_SECONDS = int(os.getenv("SETTINGS_CACHE_MAX_AGE_SECONDS", "600"))
+
+# Retry delay when the LISTEN connection drops (seconds)
+LISTENER_RETRY_SECONDS = 30
+
+CONFIG_SQL = "SELECT config_key, config_value, is_encrypted FROM system_config"
+
+CATEGORIES_SQL = """
+    SELECT site_id, COALESCE(room_count, 0) as room_count
+    FROM newbook_room_categories
+    WHERE is_included = true
+    ORDER BY display_order, site_name
+"""
+
+TRUE_VALUES = ('true', '1', 'yes', 'enabled')
+
+
+def _decode(value: Optional[str], is_encrypted: bool) -> Optional[str]:
+    if not value or not is_encrypted:
+        return value
+    try:
+        return base64.b64decode(value.encode()).decode()
+    except Exception:
+        return value
+
+
+class Settings:
+    """Immutable snapshot of system_config plus the included room categories"""
+
+    def __init__(self, config_rows, category_rows):
+        self._values: Dict[str, Optional[str]] = {
+            row.config_key: _decode(row.config_value, row.is_encrypted)
+            for row in config_rows
+        }
+        self.included_room_counts: Dict[str, int] = {
+            row.site_id: int(row.room_count) for row in category_rows
+        }
+        self.included_category_ids: List[str] = list(self.included_room_counts)
+        self.loaded_at = time.monotonic()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Raw (decrypted) value; empty strings count as unset"""
+        value = self._values.get(key)
+        return value if value else default
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        try:
+            return int(self.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        try:
+            return float(self.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    def get_decimal(self, key: str, default: str = "0") -> Decimal:
+        try:
+            return Decimal(self.get(key, default))
+        except Exception:
+            return Decimal(default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        if value is None:
+            return default
+        return value.lower() in TRUE_VALUES
+
+    @property
+    def vat_rate(self) -> Decimal:
+        """Accommodation VAT rate (default 20%)"""
+        return self.get_decimal('accommodation_vat_rate', '0.20')
+
+    @property
+    def total_rooms(self) -> int:
+        return self.get_int('total_rooms', 0)
+
+    @property
+    def bookable_rooms(self) -> int:
+        """Room count across included categories"""
+        return sum(self.included_room_counts.values())
+
+
+class SettingsCache:
+    """Holds the current Settings snapshot; thread-safe reload on demand"""
+
+    def __init__(self, max_age: int):
+        self.max_age = max_age
+        self._settings: Optional[Settings] = None
+        self._lock = threading.Lock()
+        # Bumped by invalidate(); a load that started before the bump read
+        # config from before the change and must not be cached
+        self._generation = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def _current(self) -> Optional[Settings]:
+        settings = self._settings
+        if settings is None or time.monotonic() - settings.loaded_at > self.max_age:
+            return None
+        return settings
+
+    def _store(self, settings: Settings, generation: int) -> Settings:
+        self.loads += 1
+        if generation == self._generation:
+            self._settings = settings
+        return settings
+
+    def get(self, db=None) -> Settings:
+        """Current settings, loading with a sync session if stale"""
+        settings = self._current()
+        if settings is not None:
+            return settings
+        with self._lock:
+            settings = self._current()
+            if settings is not None:
+                return settings
+            generation = self._generation
+            own_session = db is None
+            if own_session:
+                db = SyncSessionLocal()
+            try:
+                config_rows = db.execute(text(CONFIG_SQL)).fetchall()
+                category_rows = db.execute(text(CATEGORIES_SQL)).fetchall()
+            finally:
+                if own_session:
+                    db.close()
+            return self._store(Settings(config_rows, category_rows), generation)
+
+    async def get_async(self, db) -> Settings:
+        """Current settings, loading with the caller's async session if stale"""
+        settings = self._current()
+        if settings is not None:
+            return settings
+        generation = self._generation
+        config_rows = (await db.execute(text(CONFIG_SQL))).fetchall()
+        category_rows = (await db.execute(text(CATEGORIES_SQL))).fetchall()
+        return self._store(Settings(config_rows, category_rows), generation)
+
+    def invalidate(self):
+        self._generation += 1
+        self._settings = None
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        settings = self._settings
+        return {
+            "loaded": settings is not None,
+            "age_seconds": round(time.monotonic() - settings.loaded_at, 1) if settings else None,
+            "max_age_seconds": self.max_age,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "listening": _listener_task is not None and not _listener_task.done(),
+        }
+
+
+settings_cache = SettingsCache(SETTINGS_CACHE_MAX_AGE_SECONDS)
+
+
+def get_settings(db=None) -> Settings:
+    """Shared settings for sync code (jobs, scheduler)"""
+    return settings_cache.get(db)
+
+
+async def get_settings_async(db) -> Settings:
+    """Shared settings for async code (API endpoints, forecast services)"""
+    return await settings_cache.get_async(db)
+
+
+def get_config_value(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Cached (decrypted) system_config value"""
+    return settings_cache.get().get(key, default)
+
+
+def read_config_value(db, key: str) -> Optional[str]:
+    """Uncached read for state kept in system_config (watermarks), sync session"""
+    row = db.execute(
+        text("SELECT config_value FROM system_config WHERE config_key = :key"),
+        {"key": key}
+    ).fetchone()
+    return row.config_value if row else None
+
+
+def invalidate_settings():
+    """Drop the cached snapshot in this process"""
+    settings_cache.invalidate()
+
+
+_listener_task: Optional[asyncio.Task] = None
+
+# Notification payload -> invalidation callbacks of other caches
+_config_handlers: Dict[str, List[Callable[[], None]]] = {}
+
+
+def on_config_changed(payload: str, callback: Callable[[], None]):
+    """
+    Call callback when a config_changed notification carries payload (a
+    table name) instead of dropping the settings snapshot; also called
+    whenever the listener (re)connects
+    """
+    _config_handlers.setdefault(payload, []).append(callback)
+
+
+def _invalidate_all():
+    settings_cache.invalidate()
+    for callbacks in _config_handlers.values():
+        for callback in callbacks:
+            callback()
+
+
+def _on_config_changed(connection, pid, channel, payload):
+    callbacks = _config_handlers.get(payload)
+    if callbacks is None:
+        logger.debug(f"Config changed ({payload}), dropping settings cache")
+        settings_cache.invalidate()
+        return
+    logger.debug(f"{payload} changed, dropping its cache")
+    for callback in callbacks:
+        callback()
+
+
+async def _listen_loop():
+    while True:
+        try:
+            async with async_engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver_conn = raw.driver_connection
+                await driver_conn.add_listener(CONFIG_CHANNEL, _on_config_changed)
+                # Anything may have changed while we weren't listening
+                _invalidate_all()
+                logger.info(f"Listening for {CONFIG_CHANNEL} notifications")
+                try:
+                    while not driver_conn.is_closed():
+                        await asyncio.sleep(LISTENER_RETRY_SECONDS)
+                finally:
+                    if not driver_conn.is_closed():
+                        await driver_conn.remove_listener(CONFIG_CHANNEL, _on_config_changed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Settings listener connection failed: {e}")
+        await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+
+def start_settings_listener():
+    """Start the LISTEN config_changed task (call on app startup)"""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_loop())
+
+
+async def stop_settings_listener():
+    """Stop the listener task (call on shutdown)"""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
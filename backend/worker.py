@@ -0,0 +1,255 @@
+"""
+Job worker - runs queued jobs outside the API process
+
+The API and scheduler only insert into job_queue; this process claims jobs
+(FOR UPDATE SKIP LOCKED) and runs each one in its own thread with its own
+event loop, so blocking sync SQLAlchemy calls inside "async" jobs never stall
+the web server. Run as many worker containers as the database can take.
+
+Usage:
+    python worker.py [--concurrency N]
+"""
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+from database import SyncSessionLocal, async_engine, sync_engine
+from jobs.pipeline import node_finished, node_started
+from jobs.registry import JOB_REGISTRY
+from services.job_queue import (
+    JOB_QUEUE_CHANNEL,
+    claim_next_job,
+    complete_job,
+    fail_job,
+    heartbeat_jobs,
+    recover_stale_jobs,
+)
+from services.single_flight import JobAlreadyRunning, clear_orphaned_syncs, if_running
+from utils.query_metrics import query_scope
+from utils.settings_cache import start_settings_listener, stop_settings_listener
+
+logger = logging.getLogger("worker")
+
+# Jobs each worker process runs at once
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+
+# Seconds to wait for a NOTIFY before polling the queue anyway
+WORKER_POLL_SECONDS = 5
+
+HEARTBEAT_SECONDS = 30
+
+
+class Worker:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+        self.running = {}  # job_queue id -> job name
+        self.running_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.jobs_drained = threading.Event()
+
+    # --------------------------------------------
+    # Job execution (pool threads)
+    # --------------------------------------------
+
+    def _execute(self, job: dict):
+        func = JOB_REGISTRY[job["job_name"]]
+        with if_running(job["if_running"]), query_scope("job", job["job_name"]) as stats:
+            try:
+                if inspect.iscoroutinefunction(func):
+                    return asyncio.run(func(**job["kwargs"]))
+                return func(**job["kwargs"])
+            finally:
+                if stats is not None:
+                    job["query_stats"] = stats.as_dict()
+                    logger.info(
+                        f"Job {job['job_name']} #{job['id']}: {stats.statements} statements, "
+                        f"{stats.db_seconds:.2f}s in database"
+                    )
+
+    def _pipeline_finished(self, db, job: dict, status: str, error: str = None):
+        """Release a pipeline node's downstream nodes once its job is final"""
+        if job["pipeline_run_id"]:
+            node_finished(db, job["pipeline_run_id"], job["pipeline_node"], status, error)
+
+    def _run_job(self, job: dict):
+        started = time.monotonic()
+        db = SyncSessionLocal()
+        try:
+            if job["job_name"] not in JOB_REGISTRY:
+                error = f"Unknown job: {job['job_name']}"
+                fail_job(db, job["id"], error)
+                self._pipeline_finished(db, job, 'failed', error)
+                return
+            logger.info(f"Job {job['job_name']} #{job['id']} started (attempt {job['attempts']}/{job['max_attempts']})")
+            if job["pipeline_run_id"]:
+                node_started(db, job["pipeline_run_id"], job["pipeline_node"])
+            try:
+                result = self._execute(job)
+            except JobAlreadyRunning as e:
+                logger.info(f"Job {job['job_name']} #{job['id']} not run: {e}")
+                fail_job(db, job["id"], str(e))
+                self._pipeline_finished(db, job, 'failed', str(e))
+                return
+            except Exception as e:
+                logger.error(f"Job {job['job_name']} #{job['id']} failed: {e}")
+                db.rollback()
+                retry = job["attempts"] < job["max_attempts"]
+                fail_job(
+                    db, job["id"], f"{e}\n{traceback.format_exc()}",
+                    retry=retry, query_stats=job.get("query_stats")
+                )
+                if not retry:
+                    self._pipeline_finished(db, job, 'failed', str(e))
+                return
+            complete_job(db, job["id"], result, query_stats=job.get("query_stats"))
+            self._pipeline_finished(db, job, 'completed')
+            logger.info(f"Job {job['job_name']} #{job['id']} completed in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Could not record outcome of job #{job['id']}: {e}")
+        finally:
+            db.close()
+            with self.running_lock:
+                self.running.pop(job["id"], None)
+
+    # --------------------------------------------
+    # Claim loop (main thread)
+    # --------------------------------------------
+
+    def _free_slots(self) -> int:
+        with self.running_lock:
+            return self.concurrency - len(self.running)
+
+    def _claim_available(self) -> int:
+        """Claim jobs until the queue is empty or every slot is busy"""
+        claimed = 0
+        db = SyncSessionLocal()
+        try:
+            while self._free_slots() > 0 and not self.stopping.is_set():
+                job = claim_next_job(db, self.worker_id)
+                if not job:
+                    break
+                with self.running_lock:
+                    self.running[job["id"]] = job["job_name"]
+                self.pool.submit(self._run_job, job)
+                claimed += 1
+        finally:
+            db.close()
+        return claimed
+
+    def _heartbeat_loop(self):
+        while not self.stopping.wait(HEARTBEAT_SECONDS):
+            db = SyncSessionLocal()
+            try:
+                with self.running_lock:
+                    job_ids = list(self.running)
+                heartbeat_jobs(db, job_ids)
+                recover_stale_jobs(db)
+                clear_orphaned_syncs(db)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def _settings_listener_loop(self):
+        """
+        Keep the settings cache LISTEN task running on this thread's own event
+        loop (job loops are per-run), so config changes reach the cached
+        settings the jobs read. Stopped once running jobs have drained.
+        """
+        async def listen():
+            start_settings_listener()
+            while not self.jobs_drained.is_set():
+                await asyncio.sleep(1)
+            await stop_settings_listener()
+            # The LISTEN connection belongs to this loop; don't leave it pooled
+            await async_engine.dispose()
+
+        asyncio.run(listen())
+
+    def _listen_connection(self):
+        """Raw autocommit connection LISTENing for enqueue notifications"""
+        conn = sync_engine.raw_connection()
+        driver_conn = conn.driver_connection
+        driver_conn.autocommit = True
+        driver_conn.cursor().execute(f"LISTEN {JOB_QUEUE_CHANNEL}")
+        return conn, driver_conn
+
+    def _wait_for_work(self, driver_conn):
+        if driver_conn is None:
+            self.stopping.wait(WORKER_POLL_SECONDS)
+            return
+        ready, _, _ = select.select([driver_conn], [], [], WORKER_POLL_SECONDS)
+        if ready:
+            driver_conn.poll()
+            driver_conn.notifies.clear()
+
+    def run(self):
+        logger.info(f"Worker {self.worker_id} starting (concurrency={self.concurrency}, {len(JOB_REGISTRY)} job types)")
+        threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True).start()
+        settings_listener = threading.Thread(target=self._settings_listener_loop, name="settings-listener", daemon=True)
+        settings_listener.start()
+
+        conn = driver_conn = None
+        while not self.stopping.is_set():
+            try:
+                if driver_conn is None:
+                    conn, driver_conn = self._listen_connection()
+                self._claim_available()
+                self._wait_for_work(driver_conn)
+            except Exception as e:
+                logger.error(f"Worker loop error: {e}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                conn = driver_conn = None
+                self.stopping.wait(WORKER_POLL_SECONDS)
+
+        logger.info("Worker stopping, waiting for running jobs to finish...")
+        self.pool.shutdown(wait=True)
+        self.jobs_drained.set()
+        if conn is not None:
+            conn.close()
+        settings_listener.join(timeout=10)
+        logger.info("Worker stopped")
+
+    def stop(self, *args):
+        self.stopping.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued background jobs")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY,
+                        help="Jobs to run at once in this process")
+    args = parser.parse_args()
+
+    worker = Worker(max(1, args.concurrency))
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -79,7 +79,10 @@ INSERT INTO system_config (config_key, description) VALUES
 ('sync_newbook_earned_revenue_time', 'Newbook earned revenue sync time (HH:MM)'),
 ('last_revenue_aggregation_at', 'Timestamp of last revenue aggregation'),
 ('sync_newbook_current_rates_enabled', 'Enable automatic Newbook current rates sync for pickup-v2 (true/false)'),
-('sync_newbook_current_rates_time', 'Newbook current rates sync time (HH:MM)')
+('sync_newbook_current_rates_time', 'Newbook current rates sync time (HH:MM)'),
+('forecast_snapshot_retention_years', 'Years of forecast_snapshots partitions to keep (0 = keep all)'),
+('forecast_history_retention_years', 'Years of forecast_history partitions to keep (0 = keep all)'),
+('data_version', 'Bumped when forecast input data changes (response cache key)')
 ON CONFLICT (config_key) DO NOTHING;
 
 -- Set defaults
@@ -98,6 +101,9 @@ UPDATE system_config SET config_value = 'false' WHERE config_key = 'sync_newbook
 UPDATE system_config SET config_value = '05:10' WHERE config_key = 'sync_newbook_earned_revenue_time' AND config_value IS NULL;
 UPDATE system_config SET config_value = 'false' WHERE config_key = 'sync_newbook_current_rates_enabled' AND config_value IS NULL;
 UPDATE system_config SET config_value = '05:20' WHERE config_key = 'sync_newbook_current_rates_time' AND config_value IS NULL;
+UPDATE system_config SET config_value = '0' WHERE config_key = 'forecast_snapshot_retention_years' AND config_value IS NULL;
+UPDATE system_config SET config_value = '0' WHERE config_key = 'forecast_history_retention_years' AND config_value IS NULL;
+UPDATE system_config SET config_value = '0' WHERE config_key = 'data_version' AND config_value IS NULL;
 
 -- ============================================
 -- TAX RATES (date-based tax configuration)
@@ -135,6 +141,48 @@ CREATE TABLE IF NOT EXISTS newbook_room_categories (
     fetched_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Settings cache invalidation: NOTIFY config_changed when settings or the
+-- included room categories change (watermarks and data_version excluded)
+CREATE OR REPLACE FUNCTION notify_config_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_key TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'system_config' THEN
+        changed_key := COALESCE(NEW.config_key, OLD.config_key);
+        IF changed_key LIKE 'last\_%' OR changed_key = 'data_version' THEN
+            RETURN NULL;
+        END IF;
+    ELSE
+        changed_key := TG_TABLE_NAME;
+    END IF;
+    PERFORM pg_notify('config_changed', changed_key);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_system_config_notify ON system_config;
+CREATE TRIGGER trg_system_config_notify
+    AFTER INSERT OR UPDATE OR DELETE ON system_config
+    FOR EACH ROW EXECUTE FUNCTION notify_config_changed();
+
+DROP TRIGGER IF EXISTS trg_room_categories_notify ON newbook_room_categories;
+CREATE TRIGGER trg_room_categories_notify
+    AFTER INSERT OR UPDATE OR DELETE ON newbook_room_categories
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
+
+-- Auth cache invalidation: users and API keys notify on the same channel
+-- (payload is the table name); last_used_at updates don't
+DROP TRIGGER IF EXISTS trg_users_notify ON users;
+CREATE TRIGGER trg_users_notify
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
+
+DROP TRIGGER IF EXISTS trg_api_keys_notify ON api_keys;
+CREATE TRIGGER trg_api_keys_notify
+    AFTER UPDATE OF key_hash, is_active OR DELETE ON api_keys
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
+
 -- ============================================
 -- NEWBOOK GL ACCOUNTS (for revenue mapping)
 -- ============================================
@@ -190,13 +238,44 @@ CREATE TABLE IF NOT EXISTS newbook_bookings_data (
     booking_parent_source_name VARCHAR(255),
     booking_method_id VARCHAR(50),
     booking_method_name VARCHAR(100),
-    raw_json JSONB,
-    fetched_at TIMESTAMP DEFAULT NOW()
+    fetched_at TIMESTAMP DEFAULT NOW(),
+    -- Nights in house [arrival_date, departure_date), for stay_range @> :date lookups
+    stay_range DATERANGE GENERATED ALWAYS AS (
+        CASE WHEN departure_date > arrival_date
+             THEN daterange(arrival_date, departure_date, '[)')
+             ELSE 'empty'::daterange
+        END
+    ) STORED
 );
 
 CREATE INDEX IF NOT EXISTS idx_bookings_arrival ON newbook_bookings_data(arrival_date);
 CREATE INDEX IF NOT EXISTS idx_bookings_status ON newbook_bookings_data(status);
 CREATE INDEX IF NOT EXISTS idx_bookings_placed ON newbook_bookings_data(booking_placed);
+CREATE INDEX IF NOT EXISTS idx_bookings_stay_range ON newbook_bookings_data USING GIST (stay_range);
+CREATE INDEX IF NOT EXISTS idx_bookings_status_category ON newbook_bookings_data(status, category_id);
+
+-- Booking payload (guest PII removed), kept out of the hot table
+CREATE TABLE IF NOT EXISTS newbook_bookings_raw (
+    newbook_id VARCHAR(50) PRIMARY KEY
+        REFERENCES newbook_bookings_data(newbook_id) ON DELETE CASCADE,
+    raw_json JSONB NOT NULL,
+    fetched_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Per-night amounts extracted from the payload (backend/utils/booking_nights.py)
+CREATE TABLE IF NOT EXISTS newbook_booking_nights (
+    newbook_id VARCHAR(50) NOT NULL
+        REFERENCES newbook_bookings_data(newbook_id) ON DELETE CASCADE,
+    stay_date DATE NOT NULL,
+    calculated_amount NUMERIC DEFAULT 0,     -- tariffs_quoted: rate quoted to guest
+    charge_amount NUMERIC DEFAULT 0,         -- tariffs_quoted: amount charged
+    tax_amount NUMERIC,                      -- Sum of the tariff's taxes (NULL = none listed)
+    extras_amount NUMERIC DEFAULT 0,         -- inventory_items > 0 (breakfast, extras)
+    deductions_amount NUMERIC DEFAULT 0,     -- inventory_items < 0 (commissions)
+    PRIMARY KEY (newbook_id, stay_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_nights_stay_date ON newbook_booking_nights(stay_date);
 
 -- ============================================
 -- NEWBOOK EARNED REVENUE DATA (historical revenue data)
@@ -217,6 +296,7 @@ CREATE TABLE IF NOT EXISTS newbook_earned_revenue_data (
 
 CREATE INDEX IF NOT EXISTS idx_earned_revenue_data_date ON newbook_earned_revenue_data(date);
 CREATE INDEX IF NOT EXISTS idx_earned_revenue_data_type ON newbook_earned_revenue_data(date, revenue_type);
+CREATE INDEX IF NOT EXISTS idx_earned_revenue_data_fetched ON newbook_earned_revenue_data(fetched_at);  -- Aggregation watermark
 
 -- ============================================
 -- NEWBOOK NET REVENUE DATA (aggregated by department)
@@ -275,6 +355,161 @@ CREATE TABLE IF NOT EXISTS sync_log (
     triggered_by VARCHAR(100)
 );
 
+-- ============================================
+-- JOB QUEUE (consumed by backend/worker.py)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS job_queue (
+    id BIGSERIAL PRIMARY KEY,
+    job_name VARCHAR(100) NOT NULL,          -- Key in jobs/registry.py JOB_REGISTRY
+    payload JSONB NOT NULL DEFAULT '{}',     -- Keyword arguments for the job function
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    priority INTEGER NOT NULL DEFAULT 0,     -- Higher runs first
+    run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    triggered_by VARCHAR(100),
+    worker_id VARCHAR(100),                  -- hostname:pid of the claiming worker
+    enqueued_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,                  -- Refreshed while running; stale = worker died
+    completed_at TIMESTAMP,
+    result JSONB,
+    error_message TEXT,
+    pipeline_run_id BIGINT,                  -- pipeline_runs row when queued by the DAG runner
+    pipeline_node VARCHAR(50),
+    if_running VARCHAR(10) NOT NULL DEFAULT 'wait', -- Same job already running: wait (share result) or fail
+    query_stats JSONB                        -- Statements / DB time of the run (QUERY_METRICS_ENABLED)
+);
+
+-- Claim order for queued jobs (partial - completed rows don't bloat it)
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim
+    ON job_queue(priority DESC, id)
+    WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_job_queue_running
+    ON job_queue(heartbeat_at)
+    WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_job_queue_name
+    ON job_queue(job_name, enqueued_at DESC);
+
+COMMENT ON TABLE job_queue IS 'Background job queue consumed by worker processes (FOR UPDATE SKIP LOCKED)';
+
+-- ============================================
+-- EXPORT JOBS (backend/services/export_service.py)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    export_type VARCHAR(30) NOT NULL,        -- excel, csv, model_comparison
+    params JSONB NOT NULL DEFAULT '{}',      -- from_date, to_date, metric
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    queue_id BIGINT,                         -- job_queue row running the export
+    filename VARCHAR(255) NOT NULL,          -- Download name
+    file_path TEXT,                          -- Under /app/data/exports once completed
+    file_size_bytes BIGINT,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    progress_message TEXT,                   -- Current sheet and rows while running
+    error_message TEXT,
+    created_by VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_created
+    ON export_jobs(created_at);
+
+COMMENT ON TABLE export_jobs IS 'Background Excel/CSV exports and their progress';
+
+-- ============================================
+-- SINGLE-FLIGHT JOB RUNS (backend/services/single_flight.py)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS single_flight_runs (
+    key VARCHAR(200) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL,             -- running, completed, failed
+    owner VARCHAR(100),                      -- hostname:pid of the running process
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    heartbeat_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMP,
+    result JSONB,
+    error_message TEXT,
+    args TEXT                                -- Arguments of the last run (JSON, triggered_by excluded)
+);
+
+COMMENT ON TABLE single_flight_runs IS 'Heartbeat and last result per single-flight job key (advisory-lock guarded)';
+COMMENT ON COLUMN single_flight_runs.args IS 'Arguments of the last run; a waiter only shares the result when they match';
+
+-- ============================================
+-- JOB PIPELINE
+-- Dependency-driven daily batch (backend/jobs/pipeline.py)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id BIGSERIAL PRIMARY KEY,
+    pipeline VARCHAR(50) NOT NULL,           -- Key in jobs/pipeline.py PIPELINES
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- running, completed, failed
+    triggered_by VARCHAR(100),
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started
+    ON pipeline_runs(pipeline, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS pipeline_node_runs (
+    run_id BIGINT NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    node VARCHAR(50) NOT NULL,
+    -- pending, queued, running, completed, failed, skipped, cancelled
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    queue_id BIGINT,                         -- job_queue row once queued
+    queued_at TIMESTAMP,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    error_message TEXT,
+    PRIMARY KEY (run_id, node)
+);
+
+-- One row per dependency edge, written when the downstream node finishes.
+-- wait_seconds: upstream done -> downstream started (queue + worker latency)
+-- duration_seconds: upstream done -> downstream done
+CREATE TABLE IF NOT EXISTS pipeline_edge_runs (
+    run_id BIGINT NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    upstream VARCHAR(50) NOT NULL,
+    downstream VARCHAR(50) NOT NULL,
+    upstream_completed_at TIMESTAMP,
+    downstream_started_at TIMESTAMP,
+    downstream_completed_at TIMESTAMP,
+    wait_seconds NUMERIC(10, 1),
+    duration_seconds NUMERIC(10, 1),
+    PRIMARY KEY (run_id, upstream, downstream)
+);
+
+COMMENT ON TABLE pipeline_runs IS 'Daily job pipeline runs (DAG of syncs, aggregation, pace, forecasts, accuracy)';
+COMMENT ON TABLE pipeline_edge_runs IS 'Per-edge timings for pipeline runs';
+
+-- ============================================
+-- SNAPSHOT RUNS (backend/jobs/pickup_snapshot.py)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS snapshot_runs (
+    id BIGSERIAL PRIMARY KEY,
+    snapshot VARCHAR(50) NOT NULL,           -- pickup_snapshot
+    snapshot_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,             -- completed, failed
+    stay_dates INTEGER,                      -- Future dates captured
+    rows_written INTEGER,                    -- Rows inserted or updated
+    started_at TIMESTAMP NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    duration_seconds NUMERIC(10, 2),
+    error_message TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_runs_started
+    ON snapshot_runs(snapshot, started_at DESC);
+
+COMMENT ON TABLE snapshot_runs IS 'Runtime and row counts per snapshot job run';
+
 -- ============================================
 -- NEWBOOK BOOKINGS STATS (aggregated daily stats)
 -- ============================================
@@ -549,6 +784,10 @@ CREATE TABLE IF NOT EXISTS actual_vs_forecast (
     catboost_forecast DECIMAL(12,2),
     catboost_error DECIMAL(12,4),
     catboost_pct_error DECIMAL(8,4),
+    -- Blended (accuracy-weighted)
+    blended_forecast DECIMAL(12,2),
+    blended_error DECIMAL(12,4),
+    blended_pct_error DECIMAL(8,4),
     -- Analysis
     best_model VARCHAR(20),
     calculated_at TIMESTAMP DEFAULT NOW(),
@@ -613,6 +852,25 @@ CREATE TABLE IF NOT EXISTS pickup_explanations (
 
 CREATE INDEX IF NOT EXISTS idx_pickup_explanations_date ON pickup_explanations(forecast_date, forecast_type);
 
+-- Restaurant pickup curves for the covers model (DOW x lead-time quantiles,
+-- rebuilt from resos_booking_pace by jobs/resos_aggregation.py)
+CREATE TABLE IF NOT EXISTS resos_pickup_curves (
+    period VARCHAR(20) NOT NULL,             -- 'all' (pace is not split by meal period) or 'dinner'
+    segment VARCHAR(20) NOT NULL,            -- pace_type ('total', 'resident', 'non_resident') or 'resident_rate'
+    dow SMALLINT NOT NULL,                   -- Day of week (0 = Sunday)
+    lead_day INTEGER NOT NULL,               -- Pace interval (d1..d365); 0 for resident_rate
+    sample_size INTEGER NOT NULL DEFAULT 0,  -- Same-DOW dates used (last 8 weeks; 4 for resident_rate)
+    p10 DECIMAL(10,4),                       -- Pickup covers (or dining rate) quantiles
+    p25 DECIMAL(10,4),
+    median DECIMAL(10,4),
+    p75 DECIMAL(10,4),
+    p90 DECIMAL(10,4),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (period, segment, dow, lead_day)
+);
+
+COMMENT ON TABLE resos_pickup_curves IS 'Median / quantile restaurant pickup by DOW and lead time, built from resos_booking_pace';
+
 -- Monthly budgets from FD
 CREATE TABLE IF NOT EXISTS monthly_budgets (
     id SERIAL PRIMARY KEY,
@@ -645,22 +903,122 @@ CREATE TABLE IF NOT EXISTS daily_budgets (
 
 CREATE INDEX IF NOT EXISTS idx_daily_budgets_date ON daily_budgets(date, budget_type);
 
--- Forecast snapshots (for tracking how forecasts evolve over time)
+-- Create one yearly partition of a range-partitioned table
+CREATE OR REPLACE FUNCTION create_yearly_partition(parent TEXT, yr INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    part TEXT := format('%s_y%s', parent, yr);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        part, parent, make_date(yr, 1, 1), make_date(yr + 1, 1, 1)
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Forecast snapshots (backtest / weekly snapshots: forecasts by perception date)
+-- Partitioned yearly by perception_date; retention drops whole partitions
 CREATE TABLE IF NOT EXISTS forecast_snapshots (
-    id SERIAL PRIMARY KEY,
-    snapshot_date DATE NOT NULL,
-    target_date DATE NOT NULL,
+    id BIGSERIAL,
+    perception_date DATE NOT NULL,      -- Date forecast was run "as of"
+    target_date DATE NOT NULL,          -- Date being forecasted
+    model VARCHAR(50) NOT NULL,         -- 'prophet', 'xgboost', 'pickup', ...
     metric_code VARCHAR(50) NOT NULL,
-    days_out INTEGER NOT NULL,
-    prophet_value DECIMAL(12,2),
-    xgboost_value DECIMAL(12,2),
-    pickup_value DECIMAL(12,2),
-    catboost_value DECIMAL(12,2),
+    days_out INTEGER NOT NULL,          -- target_date - perception_date
+    forecast_value DECIMAL(12,2),
+    actual_value DECIMAL(12,2),         -- Filled in once target_date passes
     created_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(snapshot_date, target_date, metric_code)
+    CONSTRAINT forecast_snapshots_unique_key UNIQUE (perception_date, target_date, model, metric_code)
+) PARTITION BY RANGE (perception_date);
+
+CREATE TABLE IF NOT EXISTS forecast_snapshots_default PARTITION OF forecast_snapshots DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_perception_brin ON forecast_snapshots USING BRIN (perception_date);
+CREATE INDEX IF NOT EXISTS idx_snapshots_target_brin ON forecast_snapshots USING BRIN (target_date);
+CREATE INDEX IF NOT EXISTS idx_snapshots_accuracy ON forecast_snapshots(metric_code, days_out, model);
+CREATE INDEX IF NOT EXISTS idx_snapshots_model ON forecast_snapshots(model, metric_code);
+CREATE INDEX IF NOT EXISTS idx_snapshots_target_date ON forecast_snapshots(target_date) WHERE actual_value IS NULL;
+CREATE INDEX IF NOT EXISTS idx_snapshots_model_target ON forecast_snapshots(metric_code, model, target_date)
+    INCLUDE (perception_date, days_out, forecast_value, actual_value);
+
+-- Forecast history (forecast evolution, read by /evolution)
+-- Partitioned yearly by generated_at
+CREATE TABLE IF NOT EXISTS forecast_history (
+    id BIGSERIAL,
+    forecast_date DATE NOT NULL,
+    forecast_type VARCHAR(50) NOT NULL,
+    model_type VARCHAR(20) NOT NULL,
+    predicted_value DECIMAL(12,2) NOT NULL,
+    lower_bound DECIMAL(12,2),
+    upper_bound DECIMAL(12,2),
+    horizon_days INTEGER,
+    change_amount DECIMAL(12,2),
+    change_pct DECIMAL(8,4),
+    change_reason TEXT,
+    generated_at TIMESTAMP NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (generated_at);
+
+CREATE TABLE IF NOT EXISTS forecast_history_default PARTITION OF forecast_history DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_forecast_history_generated_brin ON forecast_history USING BRIN (generated_at);
+CREATE INDEX IF NOT EXISTS idx_forecast_history_date_brin ON forecast_history USING BRIN (forecast_date);
+CREATE INDEX IF NOT EXISTS idx_forecast_history_lookup ON forecast_history(forecast_date, forecast_type, model_type);
+
+-- Yearly partitions: a few years back for backtests, through next year
+DO $$
+BEGIN
+    FOR yr IN EXTRACT(YEAR FROM CURRENT_DATE)::int - 3 .. EXTRACT(YEAR FROM CURRENT_DATE)::int + 1 LOOP
+        PERFORM create_yearly_partition('forecast_snapshots', yr);
+        PERFORM create_yearly_partition('forecast_history', yr);
+    END LOOP;
+END $$;
+
+-- Accuracy rollup (daily error sums + running totals for windowed MAPE/RMSE/bias)
+CREATE TABLE IF NOT EXISTS accuracy_rollup (
+    source VARCHAR(20) NOT NULL,                 -- 'live' (actual_vs_forecast) or 'backtest' (forecast_snapshots)
+    metric_code VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    horizon_bucket VARCHAR(10) NOT NULL,         -- '0-7', '8-14', '15-30', '31-60', '61-90', '90+' or 'all'
+    day DATE NOT NULL,                           -- Target date being forecast
+    -- Daily sums
+    n INTEGER NOT NULL DEFAULT 0,                -- Forecast/actual pairs
+    pct_n INTEGER NOT NULL DEFAULT 0,            -- Pairs with non-zero actual (MAPE denominator)
+    sum_error DECIMAL(18,4) DEFAULT 0,           -- SUM(forecast - actual), for bias
+    sum_abs_error DECIMAL(18,4) DEFAULT 0,
+    sum_sq_error DECIMAL(24,4) DEFAULT 0,
+    sum_abs_pct_error DECIMAL(18,4) DEFAULT 0,
+    -- Running totals (ordered by day within source/metric/model/bucket)
+    cum_n BIGINT NOT NULL DEFAULT 0,
+    cum_pct_n BIGINT NOT NULL DEFAULT 0,
+    cum_sum_error DECIMAL(24,4) DEFAULT 0,
+    cum_sum_abs_error DECIMAL(24,4) DEFAULT 0,
+    cum_sum_sq_error DECIMAL(30,4) DEFAULT 0,
+    cum_sum_abs_pct_error DECIMAL(24,4) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (source, metric_code, model, horizon_bucket, day)
+);
+
+-- Backtest analytics cube (pre-aggregated forecast_snapshots error statistics)
+CREATE TABLE IF NOT EXISTS backtest_cube (
+    metric_code VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    lead_bracket VARCHAR(10) NOT NULL,           -- '0-7', '8-14', '15-30', '31-60', '61-90', '90+'
+    dow SMALLINT NOT NULL,                       -- Target date day of week (0 = Sunday)
+    month SMALLINT NOT NULL,                     -- Target date month (1-12)
+    perception_week DATE NOT NULL,               -- Monday of the perception date's week
+    n INTEGER NOT NULL DEFAULT 0,                -- Snapshots with an actual
+    err_n INTEGER NOT NULL DEFAULT 0,            -- ... and a forecast (MAE denominator)
+    pct_n INTEGER NOT NULL DEFAULT 0,            -- ... and a non-zero actual (MAPE denominator)
+    sum_error DECIMAL(18,4) DEFAULT 0,           -- SUM(forecast - actual)
+    sum_abs_error DECIMAL(18,4) DEFAULT 0,
+    sum_sq_error DECIMAL(24,4) DEFAULT 0,
+    sum_abs_pct_error DECIMAL(18,4) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (metric_code, model, lead_bracket, dow, month, perception_week)
 );
 
-CREATE INDEX IF NOT EXISTS idx_forecast_snapshots_target ON forecast_snapshots(target_date, metric_code);
+CREATE INDEX IF NOT EXISTS idx_backtest_cube_perception ON backtest_cube(perception_week);
 
 -- ============================================
 -- USER ROLES (migration for existing users table)
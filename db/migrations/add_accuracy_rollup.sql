@@ -0,0 +1,30 @@
+-- ============================================
+-- ACCURACY ROLLUP
+-- Incrementally maintained accuracy sums for model weighting.
+-- One row per (source, metric, model, horizon bucket, day) with daily sums
+-- and running totals, so any trailing window is a difference of two rows.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS accuracy_rollup (
+    source VARCHAR(20) NOT NULL,                 -- 'live' (actual_vs_forecast) or 'backtest' (forecast_snapshots)
+    metric_code VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    horizon_bucket VARCHAR(10) NOT NULL,         -- '0-7', '8-14', '15-30', '31-60', '61-90', '90+' or 'all'
+    day DATE NOT NULL,                           -- Target date being forecast
+    -- Daily sums
+    n INTEGER NOT NULL DEFAULT 0,                -- Forecast/actual pairs
+    pct_n INTEGER NOT NULL DEFAULT 0,            -- Pairs with non-zero actual (MAPE denominator)
+    sum_error DECIMAL(18,4) DEFAULT 0,           -- SUM(forecast - actual), for bias
+    sum_abs_error DECIMAL(18,4) DEFAULT 0,
+    sum_sq_error DECIMAL(24,4) DEFAULT 0,
+    sum_abs_pct_error DECIMAL(18,4) DEFAULT 0,
+    -- Running totals (ordered by day within source/metric/model/bucket)
+    cum_n BIGINT NOT NULL DEFAULT 0,
+    cum_pct_n BIGINT NOT NULL DEFAULT 0,
+    cum_sum_error DECIMAL(24,4) DEFAULT 0,
+    cum_sum_abs_error DECIMAL(24,4) DEFAULT 0,
+    cum_sum_sq_error DECIMAL(30,4) DEFAULT 0,
+    cum_sum_abs_pct_error DECIMAL(24,4) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (source, metric_code, model, horizon_bucket, day)
+);
@@ -0,0 +1,20 @@
+-- ============================================
+-- AUTH CHANGE NOTIFICATIONS
+-- Sends NOTIFY config_changed (payload 'users' / 'api_keys') when a user
+-- or API key is changed or deleted, so every process drops its cached
+-- users / API keys (backend/auth.py) on commit instead of accepting a
+-- revoked key or deleted user until the cache entry expires.
+--
+-- api_keys.last_used_at is flushed every few seconds and does not notify.
+-- Requires add_config_change_notify.sql. Safe to re-run.
+-- ============================================
+
+DROP TRIGGER IF EXISTS trg_users_notify ON users;
+CREATE TRIGGER trg_users_notify
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
+
+DROP TRIGGER IF EXISTS trg_api_keys_notify ON api_keys;
+CREATE TRIGGER trg_api_keys_notify
+    AFTER UPDATE OF key_hash, is_active OR DELETE ON api_keys
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
@@ -0,0 +1,31 @@
+-- ============================================
+-- BACKTEST ANALYTICS CUBE
+-- Pre-aggregated forecast_snapshots error statistics for the
+-- /backtest accuracy-by-bracket / day-of-week / month endpoints.
+-- Rebuilt per perception week when snapshots or actuals are written.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS backtest_cube (
+    metric_code VARCHAR(50) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    lead_bracket VARCHAR(10) NOT NULL,           -- '0-7', '8-14', '15-30', '31-60', '61-90', '90+'
+    dow SMALLINT NOT NULL,                       -- Target date day of week (0 = Sunday)
+    month SMALLINT NOT NULL,                     -- Target date month (1-12)
+    perception_week DATE NOT NULL,               -- Monday of the perception date's week
+    n INTEGER NOT NULL DEFAULT 0,                -- Snapshots with an actual
+    err_n INTEGER NOT NULL DEFAULT 0,            -- ... and a forecast (MAE denominator)
+    pct_n INTEGER NOT NULL DEFAULT 0,            -- ... and a non-zero actual (MAPE denominator)
+    sum_error DECIMAL(18,4) DEFAULT 0,           -- SUM(forecast - actual)
+    sum_abs_error DECIMAL(18,4) DEFAULT 0,
+    sum_sq_error DECIMAL(24,4) DEFAULT 0,
+    sum_abs_pct_error DECIMAL(18,4) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (metric_code, model, lead_bracket, dow, month, perception_week)
+);
+
+CREATE INDEX IF NOT EXISTS idx_backtest_cube_perception ON backtest_cube(perception_week);
+
+-- Covering index for the per-target-date 3D endpoints (index-only scans)
+CREATE INDEX IF NOT EXISTS idx_snapshots_model_target
+    ON forecast_snapshots(metric_code, model, target_date)
+    INCLUDE (perception_date, days_out, forecast_value, actual_value);
@@ -0,0 +1,7 @@
+-- Add blended forecast columns to actual_vs_forecast
+-- Run this migration to enable blended model accuracy tracking
+
+ALTER TABLE actual_vs_forecast
+ADD COLUMN IF NOT EXISTS blended_forecast DECIMAL(12,2),
+ADD COLUMN IF NOT EXISTS blended_error DECIMAL(12,4),
+ADD COLUMN IF NOT EXISTS blended_pct_error DECIMAL(8,4);
@@ -0,0 +1,27 @@
+-- ============================================
+-- BOOKING STAY RANGE
+-- Stay-night lookups ("is this booking in house on :d") used
+-- arrival_date <= :d AND departure_date > :d, which can only use the
+-- arrival_date B-tree and so scans every earlier arrival. stay_range holds
+-- [arrival_date, departure_date) as a daterange, maintained by Postgres,
+-- so the lookup becomes stay_range @> :d on a GiST index.
+-- ============================================
+
+-- Generated, so the sync needs no changes. Bookings with departure on or
+-- before arrival get an empty range (matched no night before either).
+ALTER TABLE newbook_bookings_data ADD COLUMN IF NOT EXISTS stay_range DATERANGE
+    GENERATED ALWAYS AS (
+        CASE WHEN departure_date > arrival_date
+             THEN daterange(arrival_date, departure_date, '[)')
+             ELSE 'empty'::daterange
+        END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_bookings_stay_range
+    ON newbook_bookings_data USING GIST (stay_range);
+
+-- Status / category filter applied alongside every stay-night lookup
+CREATE INDEX IF NOT EXISTS idx_bookings_status_category
+    ON newbook_bookings_data(status, category_id);
+
+ANALYZE newbook_bookings_data;
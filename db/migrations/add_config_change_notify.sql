@@ -0,0 +1,38 @@
+-- ============================================
+-- CONFIG CHANGE NOTIFICATIONS
+-- Sends NOTIFY config_changed whenever a setting in system_config or the
+-- newbook_room_categories list changes, so every process drops its settings
+-- cache (backend/utils/settings_cache.py) on commit.
+--
+-- Job watermarks (last_*) and the response cache data_version counter are
+-- state rather than settings and do not notify.
+-- Safe to re-run.
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_config_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_key TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'system_config' THEN
+        changed_key := COALESCE(NEW.config_key, OLD.config_key);
+        IF changed_key LIKE 'last\_%' OR changed_key = 'data_version' THEN
+            RETURN NULL;
+        END IF;
+    ELSE
+        changed_key := TG_TABLE_NAME;
+    END IF;
+    PERFORM pg_notify('config_changed', changed_key);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_system_config_notify ON system_config;
+CREATE TRIGGER trg_system_config_notify
+    AFTER INSERT OR UPDATE OR DELETE ON system_config
+    FOR EACH ROW EXECUTE FUNCTION notify_config_changed();
+
+DROP TRIGGER IF EXISTS trg_room_categories_notify ON newbook_room_categories;
+CREATE TRIGGER trg_room_categories_notify
+    AFTER INSERT OR UPDATE OR DELETE ON newbook_room_categories
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_config_changed();
@@ -0,0 +1,9 @@
+-- ============================================
+-- EARNED REVENUE WATERMARK INDEX
+-- jobs/revenue_aggregation.py re-aggregates only dates with rows fetched
+-- since its last run (fetched_at watermark in system_config
+-- 'last_revenue_aggregation_at').
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_earned_revenue_data_fetched
+    ON newbook_earned_revenue_data(fetched_at);
@@ -0,0 +1,29 @@
+-- ============================================
+-- EXPORT JOBS
+-- Background Excel/CSV exports run by the worker
+-- (backend/services/export_service.py). Rows and files are removed after
+-- EXPORT_RETENTION_DAYS.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    export_type VARCHAR(30) NOT NULL,        -- excel, csv, model_comparison
+    params JSONB NOT NULL DEFAULT '{}',      -- from_date, to_date, metric
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    queue_id BIGINT,                         -- job_queue row running the export
+    filename VARCHAR(255) NOT NULL,          -- Download name
+    file_path TEXT,                          -- Under /app/data/exports once completed
+    file_size_bytes BIGINT,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    progress_message TEXT,                   -- Current sheet and rows while running
+    error_message TEXT,
+    created_by VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_created
+    ON export_jobs(created_at);
+
+COMMENT ON TABLE export_jobs IS 'Background Excel/CSV exports and their progress';
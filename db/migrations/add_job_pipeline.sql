@@ -0,0 +1,52 @@
+-- ============================================
+-- JOB PIPELINE
+-- Dependency-driven daily batch (backend/jobs/pipeline.py). Each node is
+-- queued in job_queue as soon as its upstream nodes finish, so independent
+-- branches (Newbook, Resos) run side by side on the workers.
+-- ============================================
+
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS pipeline_run_id BIGINT;
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS pipeline_node VARCHAR(50);
+
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id BIGSERIAL PRIMARY KEY,
+    pipeline VARCHAR(50) NOT NULL,           -- Key in jobs/pipeline.py PIPELINES
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- running, completed, failed
+    triggered_by VARCHAR(100),
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started
+    ON pipeline_runs(pipeline, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS pipeline_node_runs (
+    run_id BIGINT NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    node VARCHAR(50) NOT NULL,
+    -- pending, queued, running, completed, failed, skipped, cancelled
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    queue_id BIGINT,                         -- job_queue row once queued
+    queued_at TIMESTAMP,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    error_message TEXT,
+    PRIMARY KEY (run_id, node)
+);
+
+-- One row per dependency edge, written when the downstream node finishes.
+-- wait_seconds: upstream done -> downstream started (queue + worker latency)
+-- duration_seconds: upstream done -> downstream done
+CREATE TABLE IF NOT EXISTS pipeline_edge_runs (
+    run_id BIGINT NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    upstream VARCHAR(50) NOT NULL,
+    downstream VARCHAR(50) NOT NULL,
+    upstream_completed_at TIMESTAMP,
+    downstream_started_at TIMESTAMP,
+    downstream_completed_at TIMESTAMP,
+    wait_seconds NUMERIC(10, 1),
+    duration_seconds NUMERIC(10, 1),
+    PRIMARY KEY (run_id, upstream, downstream)
+);
+
+COMMENT ON TABLE pipeline_runs IS 'Daily job pipeline runs (DAG of syncs, aggregation, pace, forecasts, accuracy)';
+COMMENT ON TABLE pipeline_edge_runs IS 'Per-edge timings for pipeline runs';
@@ -0,0 +1,8 @@
+-- ============================================
+-- JOB QUERY STATS
+-- Statement count, DB time and slowest statements of each job run,
+-- recorded by the worker when QUERY_METRICS_ENABLED is set
+-- (backend/utils/query_metrics.py) and exposed at /metrics.
+-- ============================================
+
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS query_stats JSONB;
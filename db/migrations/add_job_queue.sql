@@ -0,0 +1,37 @@
+-- ============================================
+-- JOB QUEUE
+-- Work queue consumed by the standalone worker (backend/worker.py).
+-- The API and scheduler only insert rows; workers claim them with
+-- SELECT ... FOR UPDATE SKIP LOCKED, so any number can run side by side.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS job_queue (
+    id BIGSERIAL PRIMARY KEY,
+    job_name VARCHAR(100) NOT NULL,          -- Key in jobs/registry.py JOB_REGISTRY
+    payload JSONB NOT NULL DEFAULT '{}',     -- Keyword arguments for the job function
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    priority INTEGER NOT NULL DEFAULT 0,     -- Higher runs first
+    run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    triggered_by VARCHAR(100),
+    worker_id VARCHAR(100),                  -- hostname:pid of the claiming worker
+    enqueued_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,                  -- Refreshed while running; stale = worker died
+    completed_at TIMESTAMP,
+    result JSONB,
+    error_message TEXT
+);
+
+-- Claim order for queued jobs (partial - completed rows don't bloat it)
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim
+    ON job_queue(priority DESC, id)
+    WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_job_queue_running
+    ON job_queue(heartbeat_at)
+    WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_job_queue_name
+    ON job_queue(job_name, enqueued_at DESC);
+
+COMMENT ON TABLE job_queue IS 'Background job queue consumed by worker processes (FOR UPDATE SKIP LOCKED)';
@@ -0,0 +1,23 @@
+-- ============================================
+-- RESOS PICKUP CURVES
+-- DOW x lead-time pickup quantiles used by the covers forecast model.
+-- Rebuilt in one statement after each resos_booking_pace update
+-- (jobs/resos_aggregation.py rebuild_resos_pickup_curves).
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS resos_pickup_curves (
+    period VARCHAR(20) NOT NULL,             -- 'all' (pace is not split by meal period) or 'dinner'
+    segment VARCHAR(20) NOT NULL,            -- pace_type ('total', 'resident', 'non_resident') or 'resident_rate'
+    dow SMALLINT NOT NULL,                   -- Day of week (0 = Sunday)
+    lead_day INTEGER NOT NULL,               -- Pace interval (d1..d365); 0 for resident_rate
+    sample_size INTEGER NOT NULL DEFAULT 0,  -- Same-DOW dates used (last 8 weeks; 4 for resident_rate)
+    p10 DECIMAL(10,4),                       -- Pickup covers (or dining rate) quantiles
+    p25 DECIMAL(10,4),
+    median DECIMAL(10,4),
+    p75 DECIMAL(10,4),
+    p90 DECIMAL(10,4),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (period, segment, dow, lead_day)
+);
+
+COMMENT ON TABLE resos_pickup_curves IS 'Median / quantile restaurant pickup by DOW and lead time, built from resos_booking_pace';
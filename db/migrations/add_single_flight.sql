@@ -0,0 +1,25 @@
+-- ============================================
+-- SINGLE-FLIGHT JOB RUNS
+-- One row per job key (backend/services/single_flight.py). The run itself
+-- is guarded by pg_try_advisory_lock(hashtextextended(key, 0)); this table
+-- carries the heartbeat and the last result, which a caller that waited on
+-- the run returns instead of running the job again.
+-- Sync job keys are '<source>:<sync_type>' so orphaned sync_log rows can be
+-- detected by a missing heartbeat instead of a fixed timeout.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS single_flight_runs (
+    key VARCHAR(200) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL,             -- running, completed, failed
+    owner VARCHAR(100),                      -- hostname:pid of the running process
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    heartbeat_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMP,
+    result JSONB,
+    error_message TEXT
+);
+
+-- What a job does when the same job is already running: wait (share result) or fail
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS if_running VARCHAR(10) NOT NULL DEFAULT 'wait';
+
+COMMENT ON TABLE single_flight_runs IS 'Heartbeat and last result per single-flight job key (advisory-lock guarded)';
@@ -0,0 +1,11 @@
+-- ============================================
+-- SINGLE-FLIGHT RUN ARGUMENTS
+-- The job arguments of the last run per key (JSON text, triggered_by
+-- excluded). A caller that waited on a run only shares its result when the
+-- arguments match, so e.g. a 7-day occupancy sync never hands its result to
+-- a caller that asked for a different date range.
+-- ============================================
+
+ALTER TABLE single_flight_runs ADD COLUMN IF NOT EXISTS args TEXT;
+
+COMMENT ON COLUMN single_flight_runs.args IS 'Arguments of the last run; a waiter only shares the result when they match';
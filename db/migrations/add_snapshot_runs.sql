@@ -0,0 +1,23 @@
+-- ============================================
+-- SNAPSHOT RUNS
+-- Runtime and row counts per run of the daily snapshot jobs
+-- (backend/jobs/pickup_snapshot.py), for tracking capture cost over time.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS snapshot_runs (
+    id BIGSERIAL PRIMARY KEY,
+    snapshot VARCHAR(50) NOT NULL,           -- pickup_snapshot
+    snapshot_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,             -- completed, failed
+    stay_dates INTEGER,                      -- Future dates captured
+    rows_written INTEGER,                    -- Rows inserted or updated
+    started_at TIMESTAMP NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    duration_seconds NUMERIC(10, 2),
+    error_message TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_runs_started
+    ON snapshot_runs(snapshot, started_at DESC);
+
+COMMENT ON TABLE snapshot_runs IS 'Runtime and row counts per snapshot job run';
@@ -0,0 +1,178 @@
+-- ============================================
+-- PARTITIONED FORECAST SNAPSHOTS / HISTORY
+-- Converts forecast_snapshots (by perception_date) and forecast_history
+-- (by generated_at) into yearly range-partitioned tables with BRIN indexes
+-- on their time columns. Column names are unchanged, so backtest and
+-- evolution queries keep working as before.
+--
+-- Retention drops whole yearly partitions (see services/forecast_partitions.py).
+-- Run once; safe to re-run (skips tables that are already partitioned).
+-- ============================================
+
+-- Create one yearly partition of a range-partitioned table
+CREATE OR REPLACE FUNCTION create_yearly_partition(parent TEXT, yr INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    part TEXT := format('%s_y%s', parent, yr);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        part, parent, make_date(yr, 1, 1), make_date(yr + 1, 1, 1)
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+
+-- --------------------------------------------
+-- forecast_snapshots: RANGE (perception_date)
+-- --------------------------------------------
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_snapshots' AND relkind = 'r') THEN
+        ALTER TABLE forecast_snapshots RENAME TO forecast_snapshots_legacy;
+        ALTER SEQUENCE IF EXISTS forecast_snapshots_id_seq OWNED BY NONE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_snapshots') THEN
+        CREATE SEQUENCE IF NOT EXISTS forecast_snapshots_id_seq;
+
+        CREATE TABLE forecast_snapshots (
+            id BIGINT NOT NULL DEFAULT nextval('forecast_snapshots_id_seq'),
+            perception_date DATE NOT NULL,      -- Date forecast was run "as of" (partition key)
+            target_date DATE NOT NULL,          -- Date being forecasted
+            model VARCHAR(50) NOT NULL,         -- 'prophet', 'xgboost', 'pickup', ...
+            metric_code VARCHAR(50) NOT NULL,   -- 'occupancy', 'rooms', etc.
+            days_out INTEGER NOT NULL,          -- target_date - perception_date
+            forecast_value DECIMAL(12,2),
+            actual_value DECIMAL(12,2),         -- Filled in once target_date passes
+            created_at TIMESTAMP DEFAULT NOW()
+        ) PARTITION BY RANGE (perception_date);
+
+        ALTER SEQUENCE forecast_snapshots_id_seq OWNED BY forecast_snapshots.id;
+        CREATE TABLE forecast_snapshots_default PARTITION OF forecast_snapshots DEFAULT;
+    END IF;
+
+    -- Yearly partitions covering existing data plus next year
+    first_year := EXTRACT(YEAR FROM CURRENT_DATE)::int - 1;
+    last_year := EXTRACT(YEAR FROM CURRENT_DATE)::int + 1;
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_snapshots_legacy') THEN
+        EXECUTE 'SELECT LEAST($1, COALESCE(EXTRACT(YEAR FROM MIN(perception_date))::int, $1)),
+                        GREATEST($2, COALESCE(EXTRACT(YEAR FROM MAX(perception_date))::int, $2))
+                 FROM forecast_snapshots_legacy'
+            INTO first_year, last_year USING first_year, last_year;
+    END IF;
+    FOR yr IN first_year..last_year LOOP
+        PERFORM create_yearly_partition('forecast_snapshots', yr);
+    END LOOP;
+
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_snapshots_legacy') THEN
+        INSERT INTO forecast_snapshots (
+            id, perception_date, target_date, model, metric_code,
+            days_out, forecast_value, actual_value, created_at
+        )
+        SELECT
+            id, perception_date, target_date, model, metric_code,
+            days_out, forecast_value, actual_value, created_at
+        FROM forecast_snapshots_legacy;
+        DROP TABLE forecast_snapshots_legacy;
+    END IF;
+END $$;
+
+ALTER TABLE forecast_snapshots DROP CONSTRAINT IF EXISTS forecast_snapshots_unique_key;
+ALTER TABLE forecast_snapshots
+    ADD CONSTRAINT forecast_snapshots_unique_key UNIQUE (perception_date, target_date, model, metric_code);
+
+-- BRIN indexes on time columns (append-mostly, naturally clustered)
+CREATE INDEX IF NOT EXISTS idx_snapshots_perception_brin
+    ON forecast_snapshots USING BRIN (perception_date);
+CREATE INDEX IF NOT EXISTS idx_snapshots_target_brin
+    ON forecast_snapshots USING BRIN (target_date);
+
+-- B-tree indexes still needed for point lookups
+CREATE INDEX IF NOT EXISTS idx_snapshots_accuracy
+    ON forecast_snapshots(metric_code, days_out, model);
+CREATE INDEX IF NOT EXISTS idx_snapshots_model
+    ON forecast_snapshots(model, metric_code);
+CREATE INDEX IF NOT EXISTS idx_snapshots_target_date
+    ON forecast_snapshots(target_date)
+    WHERE actual_value IS NULL;
+CREATE INDEX IF NOT EXISTS idx_snapshots_model_target
+    ON forecast_snapshots(metric_code, model, target_date)
+    INCLUDE (perception_date, days_out, forecast_value, actual_value);
+
+-- --------------------------------------------
+-- forecast_history: RANGE (generated_at)
+-- --------------------------------------------
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history' AND relkind = 'r') THEN
+        ALTER TABLE forecast_history RENAME TO forecast_history_legacy;
+        ALTER SEQUENCE IF EXISTS forecast_history_id_seq OWNED BY NONE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history') THEN
+        IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history_legacy') THEN
+            -- Keep whatever columns the existing table has
+            CREATE TABLE forecast_history (LIKE forecast_history_legacy INCLUDING DEFAULTS)
+                PARTITION BY RANGE (generated_at);
+        ELSE
+            CREATE SEQUENCE IF NOT EXISTS forecast_history_id_seq;
+            CREATE TABLE forecast_history (
+                id BIGINT NOT NULL DEFAULT nextval('forecast_history_id_seq'),
+                forecast_date DATE NOT NULL,
+                forecast_type VARCHAR(50) NOT NULL,
+                model_type VARCHAR(20) NOT NULL,
+                predicted_value DECIMAL(12,2) NOT NULL,
+                lower_bound DECIMAL(12,2),
+                upper_bound DECIMAL(12,2),
+                horizon_days INTEGER,
+                change_amount DECIMAL(12,2),
+                change_pct DECIMAL(8,4),
+                change_reason TEXT,
+                generated_at TIMESTAMP NOT NULL DEFAULT NOW()  -- Partition key
+            ) PARTITION BY RANGE (generated_at);
+        END IF;
+
+        IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history_id_seq') THEN
+            ALTER SEQUENCE forecast_history_id_seq OWNED BY forecast_history.id;
+        END IF;
+        CREATE TABLE forecast_history_default PARTITION OF forecast_history DEFAULT;
+    END IF;
+
+    first_year := EXTRACT(YEAR FROM CURRENT_DATE)::int - 1;
+    last_year := EXTRACT(YEAR FROM CURRENT_DATE)::int + 1;
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history_legacy') THEN
+        EXECUTE 'SELECT LEAST($1, COALESCE(EXTRACT(YEAR FROM MIN(generated_at))::int, $1)),
+                        GREATEST($2, COALESCE(EXTRACT(YEAR FROM MAX(generated_at))::int, $2))
+                 FROM forecast_history_legacy'
+            INTO first_year, last_year USING first_year, last_year;
+    END IF;
+    FOR yr IN first_year..last_year LOOP
+        PERFORM create_yearly_partition('forecast_history', yr);
+    END LOOP;
+
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'forecast_history_legacy') THEN
+        INSERT INTO forecast_history SELECT * FROM forecast_history_legacy;
+        DROP TABLE forecast_history_legacy;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_forecast_history_generated_brin
+    ON forecast_history USING BRIN (generated_at);
+CREATE INDEX IF NOT EXISTS idx_forecast_history_date_brin
+    ON forecast_history USING BRIN (forecast_date);
+CREATE INDEX IF NOT EXISTS idx_forecast_history_lookup
+    ON forecast_history(forecast_date, forecast_type, model_type);
+
+COMMIT;
+
+COMMENT ON TABLE forecast_snapshots IS 'Stores forecasts from multiple perception dates for accuracy analysis by lead time (partitioned yearly by perception_date)';
+COMMENT ON TABLE forecast_history IS 'Forecast evolution history (partitioned yearly by generated_at)';
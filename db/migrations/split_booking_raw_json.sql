@@ -0,0 +1,117 @@
+-- ============================================
+-- NARROW BOOKINGS TABLE
+-- newbook_bookings_data kept the full Newbook payload (raw_json) inline,
+-- so every stay-night scan and the backup JSON export dragged TOASTed
+-- blobs along. The payload moves to newbook_bookings_raw (cold), and the
+-- per-night amounts the aggregation / pace / pickup-v2 code read from it
+-- are extracted into typed rows in newbook_booking_nights.
+-- Run once; the sync (backend/api/sync_bookings.py) maintains both tables.
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS newbook_bookings_raw (
+    newbook_id VARCHAR(50) PRIMARY KEY
+        REFERENCES newbook_bookings_data(newbook_id) ON DELETE CASCADE,
+    raw_json JSONB NOT NULL,                 -- Booking payload, guest PII removed
+    fetched_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS newbook_booking_nights (
+    newbook_id VARCHAR(50) NOT NULL
+        REFERENCES newbook_bookings_data(newbook_id) ON DELETE CASCADE,
+    stay_date DATE NOT NULL,
+    calculated_amount NUMERIC DEFAULT 0,     -- tariffs_quoted: rate quoted to guest
+    charge_amount NUMERIC DEFAULT 0,         -- tariffs_quoted: amount charged
+    tax_amount NUMERIC,                      -- Sum of the tariff's taxes (NULL = none listed)
+    extras_amount NUMERIC DEFAULT 0,         -- inventory_items > 0 (breakfast, extras)
+    deductions_amount NUMERIC DEFAULT 0,     -- inventory_items < 0 (commissions)
+    PRIMARY KEY (newbook_id, stay_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_nights_stay_date ON newbook_booking_nights(stay_date);
+
+-- Copy payloads out of the hot table (only while raw_json still exists there)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'newbook_bookings_data' AND column_name = 'raw_json'
+    ) THEN
+        INSERT INTO newbook_bookings_raw (newbook_id, raw_json, fetched_at)
+        SELECT newbook_id, raw_json, fetched_at
+        FROM newbook_bookings_data
+        WHERE raw_json IS NOT NULL
+        ON CONFLICT (newbook_id) DO NOTHING;
+    END IF;
+END $$;
+
+-- Extract per-night amounts (same rules as utils/booking_nights.py:
+-- first tariff per stay_date wins, inventory items summed by sign)
+INSERT INTO newbook_booking_nights (
+    newbook_id, stay_date, calculated_amount, charge_amount,
+    tax_amount, extras_amount, deductions_amount
+)
+WITH tariffs AS (
+    SELECT DISTINCT ON (r.newbook_id, (t.value->>'stay_date')::date)
+        r.newbook_id,
+        (t.value->>'stay_date')::date AS stay_date,
+        COALESCE(NULLIF(t.value->>'calculated_amount', '')::numeric, 0) AS calculated_amount,
+        COALESCE(NULLIF(t.value->>'charge_amount', '')::numeric, 0) AS charge_amount,
+        (
+            SELECT SUM(COALESCE(NULLIF(x.value->>'tax_amount', '')::numeric, 0))
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(t.value->'taxes') = 'array' THEN t.value->'taxes' ELSE '[]'::jsonb END
+            ) x
+        ) AS tax_amount
+    FROM newbook_bookings_raw r,
+         jsonb_array_elements(
+             CASE WHEN jsonb_typeof(r.raw_json->'tariffs_quoted') = 'array'
+                  THEN r.raw_json->'tariffs_quoted' ELSE '[]'::jsonb END
+         ) WITH ORDINALITY AS t(value, ord)
+    WHERE t.value->>'stay_date' ~ '^\d{4}-\d{2}-\d{2}$'
+    ORDER BY r.newbook_id, (t.value->>'stay_date')::date, t.ord
+),
+items AS (
+    SELECT r.newbook_id,
+        (i.value->>'stay_date')::date AS stay_date,
+        COALESCE(SUM(COALESCE(NULLIF(i.value->>'amount', '')::numeric, 0))
+            FILTER (WHERE COALESCE(NULLIF(i.value->>'amount', '')::numeric, 0) > 0), 0) AS extras_amount,
+        COALESCE(SUM(COALESCE(NULLIF(i.value->>'amount', '')::numeric, 0))
+            FILTER (WHERE COALESCE(NULLIF(i.value->>'amount', '')::numeric, 0) < 0), 0) AS deductions_amount
+    FROM newbook_bookings_raw r,
+         jsonb_array_elements(
+             CASE WHEN jsonb_typeof(r.raw_json->'inventory_items') = 'array'
+                  THEN r.raw_json->'inventory_items' ELSE '[]'::jsonb END
+         ) AS i(value)
+    WHERE i.value->>'stay_date' ~ '^\d{4}-\d{2}-\d{2}$'
+    GROUP BY r.newbook_id, (i.value->>'stay_date')::date
+)
+SELECT COALESCE(t.newbook_id, i.newbook_id),
+       COALESCE(t.stay_date, i.stay_date),
+       COALESCE(t.calculated_amount, 0),
+       COALESCE(t.charge_amount, 0),
+       t.tax_amount,
+       COALESCE(i.extras_amount, 0),
+       COALESCE(i.deductions_amount, 0)
+FROM tariffs t
+FULL OUTER JOIN items i ON i.newbook_id = t.newbook_id AND i.stay_date = t.stay_date
+ON CONFLICT (newbook_id, stay_date) DO NOTHING;
+
+ALTER TABLE newbook_bookings_data DROP COLUMN IF EXISTS raw_json;
+
+COMMIT;
+
+-- Optional: compress cold payloads with lz4 instead of pglz (Postgres 14+
+-- built with lz4; TOAST has no zstd). Only affects values written afterwards.
+DO $$
+BEGIN
+    ALTER TABLE newbook_bookings_raw ALTER COLUMN raw_json SET COMPRESSION lz4;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'lz4 compression not available, keeping default: %', SQLERRM;
+END $$;
+
+-- Rewrite the hot table without the dropped column's TOAST data
+VACUUM FULL newbook_bookings_data;
+ANALYZE newbook_bookings_data;
+ANALYZE newbook_booking_nights;
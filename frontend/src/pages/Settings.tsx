@@ -5287,6 +5287,12 @@ interface BackupHistoryEntry {
   completed_at: string | null
   error_message: string | null
   created_by: string | null
+  progress_message: string | null
+  progress_updated_at: string | null
+  backup_mode: 'full' | 'incremental' | null
+  parent_backup_id: number | null
+  base_backup_id: number | null
+  checksum_sha256: string | null
 }
 
 const BackupPage: React.FC = () => {
@@ -5332,7 +5338,10 @@ const BackupPage: React.FC = () => {
       })
       if (!res.ok) throw new Error('Failed to fetch backup history')
       return res.json() as Promise<BackupHistoryEntry[]>
-    }
+    },
+    // Poll while a backup or restore is reporting progress
+    refetchInterval: (query) =>
+      query.state.data?.some((b) => b.status === 'running' || b.status === 'restoring') ? 3000 : false
   })
 
   // Save settings mutation
@@ -5362,8 +5371,8 @@ const BackupPage: React.FC = () => {
 
   // Create backup mutation
   const createBackupMutation = useMutation({
-    mutationFn: async () => {
-      const res = await fetch('/api/backup/create', {
+    mutationFn: async (mode: 'full' | 'incremental') => {
+      const res = await fetch(`/api/backup/create?mode=${mode}`, {
         method: 'POST',
         headers: { Authorization: `Bearer ${token}` }
       })
@@ -5384,12 +5393,11 @@ const BackupPage: React.FC = () => {
   // Upload and restore mutation
   const uploadRestoreMutation = useMutation({
     mutationFn: async (file: File) => {
-      const formData = new FormData()
-      formData.append('file', file)
-      const res = await fetch('/api/backup/upload-restore', {
+      // The ZIP is sent as the raw request body so the server can stream it to disk
+      const res = await fetch(`/api/backup/upload-restore?filename=${encodeURIComponent(file.name)}`, {
         method: 'POST',
-        headers: { Authorization: `Bearer ${token}` },
-        body: formData
+        headers: { Authorization: `Bearer ${token}`, 'Content-Type': 'application/zip' },
+        body: file
       })
       if (!res.ok) throw new Error('Failed to restore backup')
       return res.json()
@@ -5459,8 +5467,8 @@ const BackupPage: React.FC = () => {
     })
   }
 
-  const handleCreateBackup = () => {
-    createBackupMutation.mutate()
+  const handleCreateBackup = (mode: 'full' | 'incremental' = 'full') => {
+    createBackupMutation.mutate(mode)
   }
 
   const handleFileUpload = (file: File) => {
@@ -5539,6 +5547,8 @@ const BackupPage: React.FC = () => {
     const colors = {
       success: { bg: '#d4edda', color: '#155724', border: '#c3e6cb' },
       running: { bg: '#fff3cd', color: '#856404', border: '#ffeaa7' },
+      restoring: { bg: '#fff3cd', color: '#856404', border: '#ffeaa7' },
+      restored: { bg: '#d4edda', color: '#155724', border: '#c3e6cb' },
       failed: { bg: '#f8d7da', color: '#721c24', border: '#f5c6cb' }
     }
     const style = colors[status as keyof typeof colors] || colors.failed
@@ -5689,18 +5699,32 @@ const BackupPage: React.FC = () => {
         <h3 style={styles.subsectionTitle}>Create Backup</h3>
         <p style={styles.hint}>
           Create a full backup of your database and files. This may take several minutes.
+          An incremental backup only saves what changed since the latest backup and is
+          restored together with the full backup it builds on.
         </p>
-        <button
-          onClick={handleCreateBackup}
-          style={mergeStyles(
-            buttonStyle(),
-            { background: colors.success },
-            isOperationInProgress ? { opacity: 0.6, cursor: 'not-allowed' } : {}
-          )}
-          disabled={isOperationInProgress}
-        >
-          {createBackupMutation.isPending ? 'Creating Backup...' : 'Create Backup Now'}
-        </button>
+        <div style={{ display: 'flex', gap: spacing.sm }}>
+          <button
+            onClick={() => handleCreateBackup('full')}
+            style={mergeStyles(
+              buttonStyle(),
+              { background: colors.success },
+              isOperationInProgress ? { opacity: 0.6, cursor: 'not-allowed' } : {}
+            )}
+            disabled={isOperationInProgress}
+          >
+            {createBackupMutation.isPending ? 'Creating Backup...' : 'Create Backup Now'}
+          </button>
+          <button
+            onClick={() => handleCreateBackup('incremental')}
+            style={mergeStyles(
+              buttonStyle('secondary'),
+              isOperationInProgress ? { opacity: 0.6, cursor: 'not-allowed' } : {}
+            )}
+            disabled={isOperationInProgress}
+          >
+            Incremental Backup
+          </button>
+        </div>
       </div>
 
       <div style={styles.divider} />
@@ -5780,9 +5804,28 @@ const BackupPage: React.FC = () => {
                 {backupHistory.map((backup) => (
                   <tr key={backup.id}>
                     <td style={styles.td}>{formatDate(backup.started_at)}</td>
-                    <td style={styles.td}>{getTypeBadge(backup.backup_type)}</td>
-                    <td style={styles.td}>{getStatusBadge(backup.status)}</td>
-                    <td style={styles.td}>{formatFileSize(backup.file_size_bytes)}</td>
+                    <td style={styles.td}>
+                      {getTypeBadge(backup.backup_type)}
+                      {backup.backup_mode === 'incremental' && (
+                        <div style={{ fontSize: typography.xs, color: colors.textMuted, marginTop: spacing.xs }}>
+                          incremental of #{backup.base_backup_id}
+                        </div>
+                      )}
+                    </td>
+                    <td style={styles.td}>
+                      {getStatusBadge(backup.status)}
+                      {backup.progress_message && (
+                        <div style={{ fontSize: typography.xs, color: colors.textMuted, marginTop: spacing.xs }}>
+                          {backup.progress_message}
+                        </div>
+                      )}
+                    </td>
+                    <td
+                      style={styles.td}
+                      title={backup.checksum_sha256 ? `SHA-256 ${backup.checksum_sha256}` : undefined}
+                    >
+                      {formatFileSize(backup.file_size_bytes)}
+                    </td>
                     <td style={styles.td}>
                       {backup.snapshot_count !== null ? backup.snapshot_count.toLocaleString() : '-'}
                     </td>